@@ -26,32 +26,50 @@
 #     "1.0.159.37",4
 #
 # Without the double quotes works as well.
+#
+# IPv6 addresses go to a second file, ending in '_ints6.csv',
+# as the two 64-bit halves of the address, followed by the count.
+# Malformed lines are skipped, and summarized at the end. With
+# --rangeIndex, each IPv4 line gets the label of its range from an
+# index built by ipRangeIndex.py as third field. The conversion
+# itself is in ipIntConverter.py.
 
 
 from __future__ import print_function
-import sys
+import argparse
 import os
+import sys
+
+from ipIntConverter import convertIpFrequencyFile, outPaths, DEFAULT_CHUNK_BYTES
+
+parser = argparse.ArgumentParser(prog=os.path.basename(sys.argv[0]))
+parser.add_argument('--workers',
+                    type=int,
+                    default=1,
+                    help='Number of processes that convert chunks of the file (default: 1).')
+parser.add_argument('--chunkMB',
+                    type=int,
+                    default=DEFAULT_CHUNK_BYTES // (1024 * 1024),
+                    help='Megabytes of input converted at a time (default: %d).' % (DEFAULT_CHUNK_BYTES // (1024 * 1024)))
+parser.add_argument('--rangeIndex',
+                    default=None,
+                    help='Index file from ipRangeIndex.py; appends range labels to IPv4 lines.')
+parser.add_argument('fileWithIpStrings',
+                    help='File of one IP string and its count per line.')
+args = parser.parse_args()
+
+if args.rangeIndex is not None:
+  from ipRangeIndex import IpRangeIndex
+  rangeIndex = IpRangeIndex.load(args.rangeIndex)
+else:
+  rangeIndex = None
 
-if len(sys.argv) != 2 or sys.argv[1] == '-h' or sys.argv[1] == '--help':
-  print("Usage: computeIntFromIpStrings.py <file name of file one IP string per line>")
-  sys.exit()
-
-fileWithIpStrings = sys.argv[1]
-(pathNoExt,ext) = os.path.splitext(fileWithIpStrings)
-outFile = pathNoExt + '_ints.csv'
-
-with open(fileWithIpStrings, 'r') as inFd:
-  with open(outFile, 'w') as outFd:
-    for line in inFd:
-      try:
-	(ipStr,frequency) = line.split(',')
-	ipStr = ipStr.strip('"')
-	if len(ipStr) == 0:
-	  continue
-	(oct0,oct1,oct2,oct3) = ipStr.split('.')
-      except ValueError:
-	# Given ip str does not contain four octets:
-	print("Warning: line '%s' is not an IP address (continuing with next line)." % line)
-	continue
-      ipNum = int(oct3) + (int(oct2) * 256) + (int(oct1) * 256 * 256) + (int(oct0) * 256 * 256 * 256)
-      outFd.write(str(ipNum) + ',' + str(frequency))
+summary = convertIpFrequencyFile(args.fileWithIpStrings,
+                                 chunkBytes=args.chunkMB * 1024 * 1024,
+                                 workers=args.workers,
+                                 rangeIndex=rangeIndex)
+print(summary.report())
+(outFile, outFile6) = outPaths(args.fileWithIpStrings)
+print("IPv4 results are in %s." % outFile)
+if summary.numIpv6 > 0:
+  print("IPv6 results are in %s." % outFile6)
@@ -0,0 +1,435 @@
+# Copyright (c) 2014, Stanford University
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification, are permitted provided that the following conditions are met:
+# 1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following disclaimer in the documentation and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote products derived from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+'''
+Created on Oct 19, 2026
+
+Bulk conversion of IP frequency exports into integer IPs. Each
+input line holds an IP address string, optionally in double quotes,
+a comma, and a count:
+
+    "",16243
+    "1.0.137.96",45
+    1.0.138.212,4
+    "2001:db8::1",7
+
+IPv4 lines are written to the main output as <ipInt>,<count>, in
+input order, exactly like computeIntsFromIpStrings.py always did.
+Given an IpRangeIndex (see ipRangeIndex.py), the label of each
+IP's range is appended as a third field, empty for IPs outside
+all ranges.
+IPv6 lines go to a second output as <high64>,<low64>,<count>, the
+two unsigned 64-bit halves of the 128-bit address. Blanks around
+the address and the count are dropped. Lines with an empty
+address are skipped. Malformed lines are skipped, and counted
+by reason in the returned ConversionSummary, which keeps the first
+few of them as examples.
+
+The input is read in chunks of chunkBytes, cut at line ends. Within
+a chunk, IPv4 lines are parsed and formatted with NumPy array
+operations on the raw bytes: no per-line Python work. IPv6 lines
+are rare and go through socket.inet_pton() one by one. With
+workers > 1, chunks are converted in a process pool.
+
+    summary = convertIpFrequencyFile('ipFrequencies.csv', workers=4)
+    print(summary.report())
+
+@author: paepcke
+'''
+import itertools
+import multiprocessing
+import os
+import socket
+import struct
+
+import numpy
+
+
+# Bytes of interest:
+NEWLINE = ord('\n')
+CR = ord('\r')
+COMMA = ord(',')
+QUOTE = ord('"')
+SPACE = ord(' ')
+TAB = ord('\t')
+DOT = ord('.')
+COLON = ord(':')
+ZERO = ord('0')
+NINE = ord('9')
+
+# Longest fields that are converted; longer ones are malformed.
+# The NUL byte pads fields to these widths:
+IPV4_WIDTH = 15
+COUNT_WIDTH = 20
+# Place value of an octet's digit, by digits up to the octet's
+# end; -1 marks octets of more than three digits:
+PLACE_VALUES = numpy.array([0, 1, 10, 100, -1], dtype=numpy.int16)
+# Digits of the largest IPv4 integer:
+IPV4_INT_WIDTH = 10
+
+DEFAULT_CHUNK_BYTES = 64 * 1024 * 1024
+
+# Malformed lines kept as examples:
+NUM_EXAMPLES = 10
+
+MALFORMED_REASONS = ('commas', 'address', 'count')
+
+
+class ConversionSummary(object):
+    '''
+    Counts of one conversion:
+
+        numLines:        input lines
+        numIpv4:         IPv4 lines converted
+        numIpv6:         IPv6 lines converted
+        numEmpty:        blank lines and lines with an empty address
+        malformed:       reason --> number of malformed lines; reasons:
+                             'commas':  not exactly one comma
+                             'address': not an IPv4 or IPv6 address
+                             'count':   count is not a non-negative integer
+        examples:        [(lineNumber, line)] of the first malformed
+                         lines; line numbers are 1-based
+    '''
+
+    def __init__(self):
+        self.numLines = 0
+        self.numIpv4 = 0
+        self.numIpv6 = 0
+        self.numEmpty = 0
+        self.malformed = dict([(reason, 0) for reason in MALFORMED_REASONS])
+        self.examples = []
+
+    @property
+    def numMalformed(self):
+        return sum(self.malformed.values())
+
+    def addChunk(self, chunkResult, firstLineNumber):
+        '''
+        Add the counts of one convertChunk() result, whose first
+        line is line firstLineNumber of the input.
+        '''
+        self.numLines += chunkResult['numLines']
+        self.numIpv4 += chunkResult['numIpv4']
+        self.numIpv6 += chunkResult['numIpv6']
+        self.numEmpty += chunkResult['numEmpty']
+        for (reason, count) in chunkResult['malformed'].items():
+            self.malformed[reason] += count
+        for (lineIndex, line) in chunkResult['examples']:
+            if len(self.examples) >= NUM_EXAMPLES:
+                break
+            self.examples.append((firstLineNumber + lineIndex, line))
+
+    def asDict(self):
+        return {'numLines' : self.numLines,
+                'numIpv4' : self.numIpv4,
+                'numIpv6' : self.numIpv6,
+                'numEmpty' : self.numEmpty,
+                'malformed' : dict(self.malformed),
+                'examples' : list(self.examples)}
+
+    def report(self):
+        '''
+        Return a short, human readable account of the conversion.
+        '''
+        lines = ['Read %d lines: %d IPv4, %d IPv6, %d without address, %d malformed.' %
+                 (self.numLines, self.numIpv4, self.numIpv6, self.numEmpty, self.numMalformed)]
+        if self.numMalformed > 0:
+            lines.append('Malformed: %d without exactly one comma, %d with a bad address, %d with a bad count.' %
+                         (self.malformed['commas'], self.malformed['address'], self.malformed['count']))
+            lines.append('First malformed lines:')
+            for (lineNumber, line) in self.examples:
+                lines.append('    %d: %r' % (lineNumber, line))
+        return '\n'.join(lines)
+
+
+def readChunks(fd, chunkBytes=DEFAULT_CHUNK_BYTES):
+    '''
+    Yield the content of a binary file in pieces of about chunkBytes
+    that end with a newline. A missing final newline is added.
+    '''
+    leftover = b''
+    while True:
+        data = fd.read(chunkBytes)
+        if not data:
+            if leftover:
+                yield leftover + b'\n'
+            return
+        data = leftover + data
+        cut = data.rfind(b'\n') + 1
+        if cut == 0:
+            # Line longer than a chunk:
+            leftover = data
+            continue
+        leftover = data[cut:]
+        yield data[:cut]
+
+
+def trimBlanks(buf, starts, ends):
+    '''
+    Move the field bounds buf[starts[i]:ends[i]] past leading and
+    trailing spaces and tabs.
+
+    :return: (starts, ends) of the trimmed fields
+    :rtype: (numpy.ndarray, numpy.ndarray)
+    '''
+    nonBlanks = numpy.flatnonzero((buf != SPACE) & (buf != TAB))
+    # Sentinel for fields that run to the end of buf:
+    nonBlanks = numpy.append(nonBlanks, len(buf))
+    trimmedStarts = numpy.minimum(nonBlanks[numpy.searchsorted(nonBlanks, starts)], ends)
+    # Last non-blank before each end, if any:
+    lastIndexes = numpy.searchsorted(nonBlanks, ends) - 1
+    trimmedEnds = numpy.where(lastIndexes >= 0, nonBlanks[numpy.maximum(lastIndexes, 0)] + 1, 0)
+    trimmedEnds = numpy.maximum(trimmedEnds, trimmedStarts)
+    return (trimmedStarts, trimmedEnds)
+
+
+def fieldMatrix(buf, starts, ends, width):
+    '''
+    Copy fields buf[starts[i]:ends[i]] into the rows of an
+    (n, width) uint8 matrix, padded with NUL bytes. Fields must
+    not be longer than width.
+    '''
+    padded = numpy.concatenate((buf, numpy.zeros(width, dtype=numpy.uint8)))
+    # Row i of this view is the width bytes from position i on;
+    # picking whole rows is much faster than picking single bytes:
+    windows = numpy.lib.stride_tricks.as_strided(padded, shape=(len(buf), width), strides=(1, 1))
+    chars = windows[starts]
+    chars[numpy.arange(width) >= (ends - starts)[:, numpy.newaxis]] = 0
+    return chars
+
+
+def parseIpv4(chars):
+    '''
+    Parse the dotted quads in the rows of a fieldMatrix().
+
+    :return: (ips, ok): uint32 addresses, and whether each row was a valid address
+    :rtype: (numpy.ndarray, numpy.ndarray)
+    '''
+    isDot = chars == DOT
+    isDigit = (chars >= ZERO) & (chars <= NINE)
+    ok = numpy.all(isDot | isDigit | (chars == 0), axis=1) & (isDot.sum(axis=1, dtype=numpy.int8) == 3)
+    # Octet to which each byte belongs:
+    octetIndex = numpy.cumsum(isDot, axis=1, dtype=numpy.int8)
+    # Place value of each digit within its octet, from the number
+    # of digits up to the octet's end:
+    placeValue = numpy.zeros(chars.shape, dtype=numpy.int16)
+    digitsToEnd = numpy.zeros(len(chars), dtype=numpy.int8)
+    for column in range(chars.shape[1] - 1, -1, -1):
+        # Every dot must be followed by a digit:
+        ok &= ~isDot[:, column] | (digitsToEnd > 0)
+        digitsToEnd = numpy.where(isDigit[:, column], digitsToEnd + 1, 0).astype(numpy.int8)
+        placeValue[:, column] = PLACE_VALUES[numpy.minimum(digitsToEnd, 4)]
+    # First byte is a digit, and no octet has more than three:
+    ok &= (digitsToEnd > 0) & numpy.all(placeValue >= 0, axis=1)
+    values = (chars.astype(numpy.int16) - ZERO) * placeValue
+    ips = numpy.zeros(len(chars), dtype=numpy.int64)
+    for octet in range(4):
+        octetValues = numpy.where(octetIndex == octet, values, 0).sum(axis=1, dtype=numpy.int32)
+        ok &= octetValues <= 255
+        ips = (ips << 8) | octetValues
+    return (ips.astype(numpy.uint32), ok)
+
+
+def formatInts(values, width):
+    '''
+    Decimal digits of non-negative ints as rows of a NUL-padded
+    (n, width) uint8 matrix, right-aligned.
+    '''
+    values = values.astype(numpy.int64)
+    digits = numpy.empty((len(values), width), dtype=numpy.uint8)
+    for column in range(width - 1, -1, -1):
+        digits[:, column] = values % 10 + ZERO
+        values //= 10
+    # Blank leading zeros, but keep the last digit of 0:
+    leading = numpy.cumsum(digits != ZERO, axis=1) == 0
+    leading[:, -1] = False
+    digits[leading] = 0
+    return digits
+
+
+def convertChunk(chunk, rangeIndex=None):
+    '''
+    Convert the lines of one chunk from readChunks().
+
+    :param chunk: complete lines, ending in a newline
+    :type chunk: bytes
+    :param rangeIndex: if given, IPv4 lines get the label of their range
+    :type rangeIndex: {IpRangeIndex | None}
+    :return: dict with the output bytes 'ipv4' and 'ipv6', and the
+        counts of ConversionSummary; example line indexes are 0-based
+        within the chunk.
+    :rtype: dict
+    '''
+    buf = numpy.frombuffer(chunk, dtype=numpy.uint8)
+    lineEnds = numpy.flatnonzero(buf == NEWLINE)
+    numLines = len(lineEnds)
+    lineStarts = numpy.concatenate(([0], lineEnds + 1))[:-1].astype(numpy.int64)
+    ends = lineEnds.copy()
+    hasCr = (ends > lineStarts) & (buf[ends - 1] == CR)
+    ends[hasCr] -= 1
+
+    commas = numpy.flatnonzero(buf == COMMA)
+    commaLines = numpy.searchsorted(lineEnds, commas)
+    numCommas = numpy.bincount(commaLines, minlength=numLines)
+    commaPos = numpy.zeros(numLines, dtype=numpy.int64)
+    # Commas are in increasing order; the last write per line wins,
+    # which is the only comma of the lines that are kept:
+    commaPos[commaLines] = commas
+    colons = numpy.flatnonzero(buf == COLON)
+    colonLines = numpy.searchsorted(lineEnds, colons)
+    hasColon = numpy.zeros(numLines, dtype=bool)
+    hasColon[colonLines[colons < commaPos[colonLines]]] = True
+
+    blank = ends == lineStarts
+    badCommas = (numCommas != 1) & ~blank
+    # Address field without quotes:
+    addrStarts = lineStarts.copy()
+    addrEnds = commaPos.copy()
+    quoted = (addrEnds - addrStarts >= 2) & (buf[addrStarts] == QUOTE) & (buf[numpy.maximum(addrEnds - 1, 0)] == QUOTE)
+    addrStarts[quoted] += 1
+    addrEnds[quoted] -= 1
+    candidates = (numCommas == 1)
+    empty = blank | (candidates & (addrEnds == addrStarts))
+    candidates &= ~empty
+    # Blanks around the address, which int() ignored in
+    # computeIntsFromIpStrings.py:
+    (addrStarts, addrEnds) = trimBlanks(buf, addrStarts, addrEnds)
+
+    # Count field, without surrounding blanks, which int() ignored
+    # in computeIntsFromIpStrings.py:
+    (countStarts, countEnds) = trimBlanks(buf, commaPos + 1, ends)
+    countWidths = countEnds - countStarts
+    countOk = candidates & (countWidths >= 1) & (countWidths <= COUNT_WIDTH)
+    countRows = numpy.flatnonzero(countOk)
+    countChars = fieldMatrix(buf, countStarts[countRows], countEnds[countRows], COUNT_WIDTH)
+    countOk[countRows] = numpy.all(((countChars >= ZERO) & (countChars <= NINE)) | (countChars == 0), axis=1)
+
+    # IPv4:
+    ipv4Rows = numpy.flatnonzero(candidates & ~hasColon & (addrEnds - addrStarts <= IPV4_WIDTH))
+    addrOk = numpy.zeros(numLines, dtype=bool)
+    (ips, ok) = parseIpv4(fieldMatrix(buf, addrStarts[ipv4Rows], addrEnds[ipv4Rows], IPV4_WIDTH))
+    addrOk[ipv4Rows] = ok
+    keep = ok & countOk[ipv4Rows]
+    keptRows = ipv4Rows[keep]
+    outColumns = [formatInts(ips[keep], IPV4_INT_WIDTH),
+                  numpy.full((len(keptRows), 1), COMMA, dtype=numpy.uint8),
+                  fieldMatrix(buf, countStarts[keptRows], countEnds[keptRows], COUNT_WIDTH)]
+    if rangeIndex is not None:
+        # NO_LABEL (-1) picks the empty label at the end:
+        outColumns.extend([numpy.full((len(keptRows), 1), COMMA, dtype=numpy.uint8),
+                           rangeIndex.csvLabelMatrix()[rangeIndex.lookup(ips[keep])]])
+    outColumns.append(numpy.full((len(keptRows), 1), NEWLINE, dtype=numpy.uint8))
+    outMatrix = numpy.hstack(outColumns)
+    ipv4Out = outMatrix[outMatrix != 0].tobytes()
+
+    # IPv6, one line at a time:
+    ipv6OutLines = []
+    for row in numpy.flatnonzero(candidates & hasColon):
+        try:
+            packed = socket.inet_pton(socket.AF_INET6, chunk[addrStarts[row]:addrEnds[row]].decode('ascii'))
+        except (socket.error, ValueError, UnicodeDecodeError):
+            continue
+        addrOk[row] = True
+        if countOk[row]:
+            (high, low) = struct.unpack('>QQ', packed)
+            ipv6OutLines.append(b'%d,%d,' % (high, low) + chunk[countStarts[row]:countEnds[row]] + b'\n')
+
+    badAddress = candidates & ~addrOk
+    badCount = candidates & addrOk & ~countOk
+    malformedRows = numpy.flatnonzero(badCommas | badAddress | badCount)
+    return {'ipv4' : ipv4Out,
+            'ipv6' : b''.join(ipv6OutLines),
+            'numLines' : numLines,
+            'numIpv4' : len(keptRows),
+            'numIpv6' : len(ipv6OutLines),
+            'numEmpty' : int(empty.sum()),
+            'malformed' : {'commas' : int(badCommas.sum()),
+                           'address' : int(badAddress.sum()),
+                           'count' : int(badCount.sum())},
+            'examples' : [(int(row), chunk[lineStarts[row]:ends[row]])
+                          for row in malformedRows[:NUM_EXAMPLES]]}
+
+
+def outPaths(inPath):
+    '''
+    Return the IPv4 and IPv6 output paths for an input file:
+    extension replaced by _ints.csv and _ints6.csv.
+    '''
+    pathNoExt = os.path.splitext(inPath)[0]
+    return (pathNoExt + '_ints.csv', pathNoExt + '_ints6.csv')
+
+
+# Range index of a worker process; see convertInWorker():
+workerRangeIndex = None
+
+
+def setWorkerRangeIndex(rangeIndex):
+    global workerRangeIndex
+    workerRangeIndex = rangeIndex
+
+
+def convertInWorker(chunk):
+    return convertChunk(chunk, workerRangeIndex)
+
+
+def convertIpFrequencyFile(inPath, outPath=None, outPath6=None, chunkBytes=DEFAULT_CHUNK_BYTES, workers=1, rangeIndex=None):
+    '''
+    Convert an IP frequency file. The IPv6 output file is only
+    left behind if there were IPv6 lines.
+
+    :param inPath: file with one "<ip>",<count> per line
+    :type inPath: string
+    :param outPath: IPv4 output. Default: see outPaths()
+    :type outPath: {string | None}
+    :param outPath6: IPv6 output. Default: see outPaths()
+    :type outPath6: {string | None}
+    :param chunkBytes: bytes converted at a time
+    :type chunkBytes: int
+    :param workers: number of processes that convert chunks
+    :type workers: int
+    :param rangeIndex: if given, the label of each IPv4 address's range
+        is appended to its output line
+    :type rangeIndex: {IpRangeIndex | None}
+    :rtype: ConversionSummary
+    '''
+    (defaultOutPath, defaultOutPath6) = outPaths(inPath)
+    outPath = outPath or defaultOutPath
+    outPath6 = outPath6 or defaultOutPath6
+    summary = ConversionSummary()
+    if workers > 1:
+        # Hand the index to each worker once, not with every chunk:
+        pool = multiprocessing.Pool(processes=workers, initializer=setWorkerRangeIndex, initargs=(rangeIndex,))
+    else:
+        pool = None
+    try:
+        with open(inPath, 'rb') as inFd, open(outPath, 'wb') as outFd, open(outPath6, 'wb') as outFd6:
+            chunks = readChunks(inFd, chunkBytes)
+            while True:
+                # Read only as many chunks as the workers can
+                # convert at once, to bound memory use:
+                batch = list(itertools.islice(chunks, 2 * workers))
+                if len(batch) == 0:
+                    break
+                if pool is not None:
+                    results = pool.map(convertInWorker, batch)
+                else:
+                    results = [convertChunk(chunk, rangeIndex) for chunk in batch]
+                for result in results:
+                    outFd.write(result['ipv4'])
+                    outFd6.write(result['ipv6'])
+                    summary.addChunk(result, summary.numLines + 1)
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+    if summary.numIpv6 == 0:
+        os.remove(outPath6)
+    return summary
@@ -0,0 +1,229 @@
+#!/usr/bin/env python
+# Copyright (c) 2014, Stanford University
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification, are permitted provided that the following conditions are met:
+# 1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following disclaimer in the documentation and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote products derived from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+'''
+Created on Oct 19, 2026
+
+Index of labeled IPv4 ranges, such as country or campus ranges,
+for resolving integer IPs in bulk without range joins in MySQL.
+The ranges are kept in sorted uint32 arrays, and a batch of IPs
+is resolved with a single numpy.searchsorted():
+
+    index = IpRangeIndex.fromCsv('countryRanges.csv')
+    index.save('countryRanges.npz')
+    index = IpRangeIndex.load('countryRanges.npz')     # memory-mapped
+    labels = index.labels(ipInts)
+
+Range CSV files have one start,end,label row per range. Start and
+end are inclusive, and either integers or dotted quads. Ranges of
+one index must not overlap; nested ranges, such as campuses within
+countries, go into separate indexes.
+
+The index file is an uncompressed .npz archive with columns
+starts, ends, labelIndex, and the label dictionary labelNames.
+load() memory-maps the three range columns, so that large indexes
+are not read into memory.
+
+ipIntConverter.convertIpFrequencyFile() takes an index as its
+rangeIndex argument, and then appends each IP's label to its
+output line in the same pass.
+
+Command line:
+
+    ipRangeIndex.py build countryRanges.csv countryRanges.npz
+    ipRangeIndex.py lookup countryRanges.npz 16812384 1.0.138.212
+
+@author: paepcke
+'''
+import argparse
+import csv
+import os
+import socket
+import struct
+import sys
+
+import numpy
+
+# Add the engagement source dir to $PATH
+# for duration of this execution:
+source_dir = [os.path.join(os.path.dirname(os.path.abspath(__file__)), "../src")]
+source_dir.extend(sys.path)
+sys.path = source_dir
+
+from columnarOutput import memmapColumn, writeColumns
+
+
+def ipToInt(ipStr):
+    '''
+    Turn an integer string or dotted quad into an int.
+    '''
+    ipStr = ipStr.strip().strip('"')
+    if '.' in ipStr:
+        return struct.unpack('>I', socket.inet_aton(ipStr))[0]
+    return int(ipStr)
+
+
+def toBytes(label):
+    return label if isinstance(label, bytes) else label.encode('utf-8')
+
+
+def csvField(label):
+    '''
+    Quote a label for a CSV file, if needed.
+    '''
+    if ',' in label or '"' in label or '\n' in label:
+        return '"%s"' % label.replace('"', '""')
+    return label
+
+
+class IpRangeIndex(object):
+
+    NO_LABEL = -1
+
+    def __init__(self, starts, ends, labelIndex, labelNames):
+        '''
+        Use fromRanges(), fromCsv(), or load() instead.
+
+        :param starts: sorted uint32 range starts
+        :type starts: numpy.ndarray
+        :param ends: uint32 inclusive range ends
+        :type ends: numpy.ndarray
+        :param labelIndex: int32 index of each range's label in labelNames
+        :type labelIndex: numpy.ndarray
+        :param labelNames: label dictionary
+        :type labelNames: [string]
+        '''
+        self.starts = starts
+        self.ends = ends
+        self.labelIndex = labelIndex
+        self.labelNames = labelNames
+
+    def __len__(self):
+        return len(self.starts)
+
+    @classmethod
+    def fromRanges(cls, ranges):
+        '''
+        :param ranges: (start, end, label) with integer IPs, in any order
+        :type ranges: iterable
+        :raise ValueError: if ranges overlap, or are out of the IPv4 range
+        '''
+        labelNames = []
+        labelNums = {}
+        rows = []
+        for (start, end, label) in ranges:
+            if not 0 <= start <= end <= 0xFFFFFFFF:
+                raise ValueError('Not an IPv4 range: %s-%s' % (start, end))
+            if label not in labelNums:
+                labelNums[label] = len(labelNames)
+                labelNames.append(label)
+            rows.append((start, end, labelNums[label]))
+        rangeArr = numpy.array(rows, dtype=numpy.int64).reshape(-1, 3)
+        rangeArr = rangeArr[numpy.argsort(rangeArr[:, 0], kind='mergesort')]
+        overlaps = numpy.flatnonzero(rangeArr[1:, 0] <= rangeArr[:-1, 1])
+        if len(overlaps) > 0:
+            (first, second) = (rangeArr[overlaps[0]], rangeArr[overlaps[0] + 1])
+            raise ValueError("Ranges %d-%d ('%s') and %d-%d ('%s') overlap." %
+                             (first[0], first[1], labelNames[first[2]], second[0], second[1], labelNames[second[2]]))
+        return cls(rangeArr[:, 0].astype(numpy.uint32),
+                   rangeArr[:, 1].astype(numpy.uint32),
+                   rangeArr[:, 2].astype(numpy.int32),
+                   labelNames)
+
+    @classmethod
+    def fromCsv(cls, path, delimiter=',', hasHeader=False):
+        '''
+        Build an index from a CSV file of start,end,label rows.
+        '''
+        with open(path, 'r') as fd:
+            reader = csv.reader(fd, delimiter=delimiter)
+            if hasHeader:
+                next(reader)
+            return cls.fromRanges([(ipToInt(row[0]), ipToInt(row[1]), row[2]) for row in reader if len(row) > 0])
+
+    def save(self, path):
+        writeColumns(path, {'starts' : self.starts,
+                            'ends' : self.ends,
+                            'labelIndex' : self.labelIndex,
+                            'labelNames' : numpy.array([toBytes(label) for label in self.labelNames], dtype=bytes)})
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        '''
+        Load an index written by save().
+
+        :param mmap: memory-map the range columns, instead of reading them
+        :type mmap: boolean
+        '''
+        with numpy.load(path) as columns:
+            labelNames = [label if isinstance(label, str) else label.decode('utf-8')
+                          for label in columns['labelNames'].tolist()]
+            if not mmap:
+                return cls(columns['starts'], columns['ends'], columns['labelIndex'], labelNames)
+        return cls(memmapColumn(path, 'starts'), memmapColumn(path, 'ends'), memmapColumn(path, 'labelIndex'), labelNames)
+
+    def lookup(self, ips):
+        '''
+        Return the index into self.labelNames of each IP's range,
+        or NO_LABEL for IPs outside all ranges.
+
+        :param ips: integer IPv4 addresses
+        :type ips: numpy.ndarray
+        :rtype: numpy.ndarray of int32
+        '''
+        ips = numpy.asarray(ips, dtype=numpy.uint32)
+        if len(self.starts) == 0:
+            return numpy.full(len(ips), self.NO_LABEL, dtype=numpy.int32)
+        # Last range that starts at or before each IP:
+        rangeNums = numpy.searchsorted(self.starts, ips, side='right') - 1
+        inRange = (rangeNums >= 0) & (ips <= self.ends[numpy.maximum(rangeNums, 0)])
+        return numpy.where(inRange, self.labelIndex[numpy.maximum(rangeNums, 0)], self.NO_LABEL).astype(numpy.int32)
+
+    def labels(self, ips, default=None):
+        '''
+        Return the label of each IP's range, or default.
+        '''
+        labelNames = self.labelNames + [default]
+        return [labelNames[labelNum] for labelNum in self.lookup(ips)]
+
+    def csvLabelMatrix(self):
+        '''
+        Return the CSV form of all labels, plus an empty one for
+        NO_LABEL at the end, as rows of a NUL-padded uint8 matrix.
+        Used to append labels to output lines without per-line work.
+        '''
+        fields = [toBytes(csvField(label)) for label in self.labelNames] + [b'']
+        width = max([len(field) for field in fields] + [1])
+        return numpy.array(fields, dtype='S%d' % width).view(numpy.uint8).reshape(len(fields), width)
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(prog=os.path.basename(sys.argv[0]), formatter_class=argparse.RawTextHelpFormatter)
+    subparsers = parser.add_subparsers(dest='action')
+    buildParser = subparsers.add_parser('build', help='Build an index file from a CSV file of start,end,label rows.')
+    buildParser.add_argument('--header', action='store_true', help='Skip the first line of the CSV file.')
+    buildParser.add_argument('rangesCsv')
+    buildParser.add_argument('indexFile')
+    lookupParser = subparsers.add_parser('lookup', help='Print the labels of IPs.')
+    lookupParser.add_argument('indexFile')
+    lookupParser.add_argument('ips', nargs='+', help='Integer IPs or dotted quads.')
+    args = parser.parse_args();
+
+    if args.action == 'build':
+        index = IpRangeIndex.fromCsv(args.rangesCsv, hasHeader=args.header)
+        index.save(args.indexFile)
+        print('Indexed %d ranges with %d labels in %s.' % (len(index), len(index.labelNames), args.indexFile))
+    else:
+        index = IpRangeIndex.load(args.indexFile)
+        for (ip, label) in zip(args.ips, index.labels([ipToInt(ip) for ip in args.ips], default='')):
+            print('%s,%s' % (ip, csvField(label)))
@@ -0,0 +1,342 @@
+# Copyright (c) 2014, Stanford University
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification, are permitted provided that the following conditions are met:
+# 1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following disclaimer in the documentation and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote products derived from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+'''
+Created on Oct 19, 2026
+
+Pluggable per-course metrics, computed in the same run as the
+standard engagement results. An aggregator is handed every course
+that EngagementComputer.run() wraps up:
+
+    startCourse(courseName, startDate, endDate)
+    addSession(courseName, student, sessionStart, sessionSecs, numEvents)
+        once for each of the course's sessions
+    endCourse(courseName, courseResult)
+        with the course's CourseEngagementResult
+
+or, for a course that is not wrapped up, for instance because
+its runtime is unknown:
+
+    courseSkipped(courseName)
+
+and afterwards delivers its output lines from rows(), which
+writeAggregatorsToDisk() writes to one CSV file per aggregator,
+named after the aggregator, under its header. Aggregators see
+the sessions that run() already keeps, so a new metric needs
+no extra pass over the events. Aggregators whose closesSessions
+attribute is True are, in addition, handed each session as soon
+as it closes, during the pass over the events (see
+EngagementComputer.wrapUpSession()):
+
+    sessionClosed(courseName, student, sessionStart, sessionSecs, numEvents)
+
+Usage:
+
+    comp = EngagementComputer(..., aggregators=[SessionsByWeekdayAggregator()])
+    comp.run()
+    comp.writeAggregatorsToDisk()   # --> {'sessionsByWeekday' : <path>}
+
+or, from the command line:
+
+    engagement.py --aggregators sessionsByWeekday,weeklyActiveLearners All
+
+To add a metric, subclass Aggregator, and register the class
+in AGGREGATORS. Built-in aggregators:
+
+    summary:              the lines of the summary file
+    weeklyEffort:         the lines of the weeklyEffort file
+    sessionsByWeekday:    sessions and their seconds by weekday of the session start
+    sessionsByHour:       sessions and their seconds by hour of the day of the session start
+    weeklyActiveLearners: learners with at least one session, by course week
+    sessionLengthQuantiles: session length percentiles, by course and course week,
+                          from fixed-size quantile sketches
+
+Courses that were restored from checkpoints or computed by
+worker processes would not be seen by aggregators, so neither
+checkpoints nor workers can be combined with aggregators.
+
+@author: paepcke
+'''
+import datetime
+
+from quantileSketch import KLLSketch, DEFAULT_K
+
+
+PLATFORM = 'OpenEdX'
+
+WEEKDAYS = ('Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday')
+
+
+class Aggregator(object):
+    '''
+    Interface of all aggregators. The default methods do nothing.
+    '''
+
+    # Output file name part, and option value in engagement.py:
+    name = None
+    # First line of the output file:
+    header = None
+    # Whether sessionClosed() is to be called:
+    closesSessions = False
+
+    def sessionClosed(self, courseName, student, sessionStart, sessionSecs, numEvents): #@UnusedVariable
+        pass
+
+    def startCourse(self, courseName, startDate, endDate): #@UnusedVariable
+        pass
+
+    def addSession(self, courseName, student, sessionStart, sessionSecs, numEvents): #@UnusedVariable
+        pass
+
+    def endCourse(self, courseName, courseResult): #@UnusedVariable
+        pass
+
+    def courseSkipped(self, courseName): #@UnusedVariable
+        pass
+
+    def rows(self):
+        '''
+        Return an iterable of output lines as tuples, which are
+        written comma-separated.
+        '''
+        raise NotImplementedError()
+
+
+class SummaryAggregator(Aggregator):
+
+    name = 'summary'
+    header = 'Platform,Course,NumActiveLearners,TotalStudentSessions,TotalEffortAllStudents(secs),' +\
+             'MedPerWeekOneToTwenty,MedPerWeekTwentyoneToSixty,MedPerWeekGreaterSixty'
+
+    def __init__(self):
+        self.stats = []
+
+    def endCourse(self, courseName, courseResult):
+        self.stats.append((PLATFORM, courseName) + courseResult.statsTuple())
+
+    def rows(self):
+        return self.stats
+
+
+class WeeklyEffortAggregator(Aggregator):
+
+    name = 'weeklyEffort'
+    header = 'Platform,Course,anon_screen_name,Week,Effort (sec)'
+
+    def __init__(self):
+        self.courseResults = []
+
+    def endCourse(self, courseName, courseResult):
+        self.courseResults.append(courseResult)
+
+    def rows(self):
+        for courseResult in self.courseResults:
+            for (student, studentWeeklyEffort) in courseResult.weeklyEffort.items():
+                for (weekNum, effortSecs) in studentWeeklyEffort:
+                    # Zero-based internally; 1-based in all outputs:
+                    yield (PLATFORM, courseResult.courseName, student, weekNum + 1, int(effortSecs))
+
+
+class SessionsByWeekdayAggregator(Aggregator):
+
+    name = 'sessionsByWeekday'
+    header = 'Platform,Course,Weekday,NumSessions,TotalSessionSecs'
+
+    def __init__(self):
+        # Course --> [[numSessions, totalSecs] for each weekday]:
+        self.courseCounts = {}
+        self.counts = None
+
+    def startCourse(self, courseName, startDate, endDate): #@UnusedVariable
+        self.counts = self.courseCounts.setdefault(courseName, [[0, 0] for _ in WEEKDAYS])
+
+    def addSession(self, courseName, student, sessionStart, sessionSecs, numEvents): #@UnusedVariable
+        counts = self.counts[sessionStart.weekday()]
+        counts[0] += 1
+        counts[1] += sessionSecs
+
+    def rows(self):
+        for courseName in sorted(self.courseCounts.keys()):
+            for (weekday, (numSessions, totalSecs)) in zip(WEEKDAYS, self.courseCounts[courseName]):
+                yield (PLATFORM, courseName, weekday, numSessions, int(round(totalSecs)))
+
+
+class SessionsByHourAggregator(Aggregator):
+
+    name = 'sessionsByHour'
+    header = 'Platform,Course,Hour,NumSessions,TotalSessionSecs'
+
+    def __init__(self):
+        # Course --> [[numSessions, totalSecs] for each hour]:
+        self.courseCounts = {}
+        self.counts = None
+
+    def startCourse(self, courseName, startDate, endDate): #@UnusedVariable
+        self.counts = self.courseCounts.setdefault(courseName, [[0, 0] for _ in range(24)])
+
+    def addSession(self, courseName, student, sessionStart, sessionSecs, numEvents): #@UnusedVariable
+        counts = self.counts[sessionStart.hour]
+        counts[0] += 1
+        counts[1] += sessionSecs
+
+    def rows(self):
+        for courseName in sorted(self.courseCounts.keys()):
+            for (hour, (numSessions, totalSecs)) in enumerate(self.courseCounts[courseName]):
+                yield (PLATFORM, courseName, hour, numSessions, int(round(totalSecs)))
+
+
+class WeeklyActiveLearnersAggregator(Aggregator):
+    '''
+    Weeks are those of EngagementComputer.wrapUpCourse(): week n
+    starts n weeks after the course start date. Sessions before
+    the course start are not counted.
+    '''
+
+    name = 'weeklyActiveLearners'
+    header = 'Platform,Course,Week,NumActiveLearners'
+
+    def __init__(self):
+        # Course --> {weekNum : set of students}:
+        self.courseWeeks = {}
+        self.weeks = None
+        self.startDate = None
+
+    def startCourse(self, courseName, startDate, endDate): #@UnusedVariable
+        self.weeks = self.courseWeeks.setdefault(courseName, {})
+        self.startDate = startDate
+
+    def addSession(self, courseName, student, sessionStart, sessionSecs, numEvents): #@UnusedVariable
+        if sessionStart < self.startDate:
+            return
+        weekNum = (sessionStart - self.startDate).days // 7
+        try:
+            self.weeks[weekNum].add(student)
+        except KeyError:
+            self.weeks[weekNum] = set([student])
+
+    def rows(self):
+        for courseName in sorted(self.courseWeeks.keys()):
+            weeks = self.courseWeeks[courseName]
+            for weekNum in sorted(weeks.keys()):
+                # 1-based, like the weeklyEffort file:
+                yield (PLATFORM, courseName, weekNum + 1, len(weeks[weekNum]))
+
+
+class SessionLengthQuantilesAggregator(Aggregator):
+    '''
+    Percentiles of session lengths in seconds, for each course, and
+    for each course week, from KLL sketches (see quantileSketch.py).
+    Sessions go into a sketch for their course and start day when
+    they close, so that no session needs to be kept for this metric.
+    When the course is wrapped up, and its start date is known,
+    the day sketches are merged into week sketches, and those into
+    a sketch for the whole course. Memory per course is bounded by
+    the number of its days, independently of the number of sessions.
+
+    Each output line gives the number of sessions, the normalized rank
+    error bound of its percentiles (see quantileSketch.normalizedRankError()),
+    and the percentiles; Week is 'All' on the line for the whole course.
+    Weeks are 1-based, and start on the day of the week of the course start
+    date. Sessions that started before the course start date only count
+    towards the course line.
+    '''
+
+    name = 'sessionLengthQuantiles'
+    closesSessions = True
+    PERCENTILES = (0, 1, 5, 10, 25, 50, 75, 90, 95, 99, 100)
+    header = 'Platform,Course,Week,NumSessions,RankError,' + ','.join(['P%d' % percentile for percentile in PERCENTILES])
+
+    def __init__(self, k=DEFAULT_K):
+        self.k = k
+        # Course --> {date : KLLSketch} for courses not yet wrapped up:
+        self.daySketches = {}
+        # Course --> (course KLLSketch, {weekNum : KLLSketch}):
+        self.courseSketches = {}
+        self.startDay = None
+
+    def sessionClosed(self, courseName, student, sessionStart, sessionSecs, numEvents): #@UnusedVariable
+        # Skipped as in EngagementComputer.allDataIterator():
+        if not isinstance(sessionStart, datetime.datetime):
+            return
+        days = self.daySketches.setdefault(courseName, {})
+        day = sessionStart.date()
+        try:
+            days[day].update(sessionSecs)
+        except KeyError:
+            days[day] = KLLSketch(self.k)
+            days[day].update(sessionSecs)
+
+    def startCourse(self, courseName, startDate, endDate): #@UnusedVariable
+        self.startDay = startDate.date()
+
+    def endCourse(self, courseName, courseResult): #@UnusedVariable
+        courseSketch = KLLSketch(self.k)
+        weekSketches = {}
+        for (day, daySketch) in self.daySketches.pop(courseName, {}).items():
+            courseSketch.merge(daySketch)
+            if day < self.startDay:
+                continue
+            weekNum = (day - self.startDay).days // 7
+            try:
+                weekSketch = weekSketches[weekNum]
+            except KeyError:
+                weekSketch = weekSketches[weekNum] = KLLSketch(self.k)
+            weekSketch.merge(daySketch)
+        self.courseSketches[courseName] = (courseSketch, weekSketches)
+
+    def courseSkipped(self, courseName):
+        self.daySketches.pop(courseName, None)
+
+    def rows(self):
+        fractions = [percentile / 100.0 for percentile in self.PERCENTILES]
+        for courseName in sorted(self.courseSketches.keys()):
+            (courseSketch, weekSketches) = self.courseSketches[courseName]
+            lines = [('All', courseSketch)] + [(weekNum + 1, weekSketches[weekNum]) for weekNum in sorted(weekSketches.keys())]
+            for (week, sketch) in lines:
+                yield (PLATFORM, courseName, week, sketch.count, '%.4f' % sketch.rankError()) +\
+                      tuple([int(round(value)) for value in sketch.quantiles(fractions)])
+
+
+# Aggregators by name:
+AGGREGATORS = dict([(aggregatorClass.name, aggregatorClass) for aggregatorClass in
+                    (SummaryAggregator,
+                     WeeklyEffortAggregator,
+                     SessionsByWeekdayAggregator,
+                     SessionsByHourAggregator,
+                     WeeklyActiveLearnersAggregator,
+                     SessionLengthQuantilesAggregator)])
+
+
+def newAggregators(names):
+    '''
+    Instantiate registered aggregators.
+
+    :param names: names from AGGREGATORS
+    :type names: [string]
+    :rtype: [Aggregator]
+    :raise ValueError: for an unknown name
+    '''
+    aggregators = []
+    for name in names:
+        try:
+            aggregators.append(AGGREGATORS[name]())
+        except KeyError:
+            raise ValueError("Unknown aggregator '%s'; known are %s" % (name, ', '.join(sorted(AGGREGATORS.keys()))))
+    return aggregators
+
+
+def writeAggregator(aggregator, fileObj):
+    '''
+    Write an aggregator's header and rows to an open file.
+    '''
+    fileObj.write(aggregator.header + '\n')
+    for row in aggregator.rows():
+        fileObj.write(','.join([str(value) for value in row]) + '\n')
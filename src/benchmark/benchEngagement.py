@@ -0,0 +1,233 @@
+#!/usr/bin/env python
+# Copyright (c) 2014, Stanford University
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification, are permitted provided that the following conditions are met:
+# 1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following disclaimer in the documentation and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote products derived from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+'''
+Created on Oct 19, 2026
+
+Throughput benchmark of the engagement pipeline on synthetic
+workloads (see syntheticEvents.py). No database is needed.
+
+Each workload runs in a fresh child process, so that its peak
+RSS is its own. The events are generated before timing starts.
+These phases are timed separately:
+
+    sessionize:         run(), minus the time spent in wrapUpCourse()
+    wrapUpCourse:       all wrapUpCourse() calls of run()
+    allDataIterator:    one full pass over allDataIterator()
+    writeResultsToDisk: writeResultsToDisk(), files deleted afterwards
+
+For a scaling curve, the base workload is run once per
+factor in --scales, with learnersPerCourse multiplied
+by the factor.
+
+Example:
+
+    benchEngagement.py --courses 2 --learners 200 --events 100 --scales 1,2,4 --json bench.json
+
+@author: paepcke
+'''
+import argparse
+import json
+import multiprocessing
+import os
+import resource
+import sys
+import time
+
+# Add the engagement source dir to $PATH
+# for duration of this execution:
+source_dir = [os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")]
+source_dir.extend(sys.path)
+sys.path = source_dir
+
+from syntheticEvents import SyntheticWorkload, GAP_DISTRIBUTIONS
+
+
+PHASES = ('sessionize', 'wrapUpCourse', 'allDataIterator', 'writeResultsToDisk')
+
+
+class MaterializedEventDb(object):
+    '''
+    Database stand-in that serves pre-generated rows, so that
+    event generation does not count against run().
+    '''
+    def __init__(self, rows):
+        self.rows = rows
+
+    def query(self, queryStr): #@UnusedVariable
+        return iter(self.rows)
+
+    def close(self):
+        pass
+
+
+def newComputer(workload, rows):
+    '''
+    Return a quiet EngagementComputer that reads the given
+    rows instead of querying MySQL.
+    '''
+    from engagement import EngagementComputer
+    comp = EngagementComputer(mySQLUser='benchmark',
+                              mySQLPwd='',
+                              db=MaterializedEventDb(rows),
+                              courseRuntimes=workload.courseRuntimes())
+    comp.log = lambda msg: None
+    return comp
+
+
+def benchmarkWorkload(workloadParams):
+    '''
+    Time the phases of one workload. Meant to be run in
+    a child process of its own.
+
+    :param workloadParams: keyword arguments for SyntheticWorkload
+    :type workloadParams: dict
+    :return: JSON-compatible dict with the workload parameters, number of
+        events and sessions, per-phase seconds and events/sec, and peak RSS in KB.
+    :rtype: dict
+    '''
+    workload = SyntheticWorkload(**workloadParams)
+    rows = list(workload.events())
+    comp = newComputer(workload, rows)
+
+    wrapUpSecs = [0.0]
+    untimedWrapUpCourse = comp.wrapUpCourse
+    def timedWrapUpCourse(*args, **kwargs):
+        startTime = time.time()
+        try:
+            return untimedWrapUpCourse(*args, **kwargs)
+        finally:
+            wrapUpSecs[0] += time.time() - startTime
+    comp.wrapUpCourse = timedWrapUpCourse
+
+    phaseSecs = {}
+    startTime = time.time()
+    comp.run()
+    runSecs = time.time() - startTime
+    phaseSecs['sessionize'] = runSecs - wrapUpSecs[0]
+    phaseSecs['wrapUpCourse'] = wrapUpSecs[0]
+
+    startTime = time.time()
+    numSessions = 0
+    for _ in comp.allDataIterator():
+        numSessions += 1
+    phaseSecs['allDataIterator'] = time.time() - startTime
+
+    startTime = time.time()
+    outFiles = comp.writeResultsToDisk()
+    phaseSecs['writeResultsToDisk'] = time.time() - startTime
+    for outFile in outFiles:
+        os.remove(outFile)
+
+    phases = {}
+    for phase in PHASES:
+        secs = phaseSecs[phase]
+        phases[phase] = {'secs' : secs,
+                         'eventsPerSec' : len(rows) / secs if secs > 0 else None}
+    return {'workload' : workload.parameters(),
+            'numEvents' : len(rows),
+            'numSessions' : numSessions,
+            'phases' : phases,
+            # Linux reports KB:
+            'peakRssKb' : resource.getrusage(resource.RUSAGE_SELF).ru_maxrss}
+
+
+def runInChild(workloadParams):
+    '''
+    Run benchmarkWorkload() in a fresh process, and return its result.
+    '''
+    pool = multiprocessing.Pool(processes=1)
+    try:
+        return pool.apply(benchmarkWorkload, (workloadParams,))
+    finally:
+        pool.close()
+        pool.join()
+
+
+def scalingCurve(baseParams, scales):
+    '''
+    Benchmark the base workload at each scale factor.
+
+    :param baseParams: keyword arguments for SyntheticWorkload
+    :type baseParams: dict
+    :param scales: factors by which learnersPerCourse is multiplied
+    :type scales: [int]
+    :return: one benchmarkWorkload() result per factor
+    :rtype: [dict]
+    '''
+    results = []
+    for scale in scales:
+        workloadParams = dict(baseParams)
+        workloadParams['learnersPerCourse'] = baseParams.get('learnersPerCourse', 100) * scale
+        result = runInChild(workloadParams)
+        result['scale'] = scale
+        results.append(result)
+    return results
+
+
+def formatReport(results):
+    '''
+    Return a text table of benchmark results.
+    '''
+    lines = ['%8s %10s %10s %10s  %s' % ('scale', 'events', 'sessions', 'peakRSS(MB)',
+                                         '  '.join(['%26s' % ('%s s (ev/s)' % phase) for phase in PHASES]))]
+    for result in results:
+        phaseCols = []
+        for phase in PHASES:
+            phaseResult = result['phases'][phase]
+            phaseCols.append('%26s' % ('%.3f (%s)' % (phaseResult['secs'],
+                                                      '%.0f' % phaseResult['eventsPerSec'] if phaseResult['eventsPerSec'] else '-')))
+        lines.append('%8s %10d %10d %10.1f  %s' % (result.get('scale', 1),
+                                                  result['numEvents'],
+                                                  result['numSessions'],
+                                                  result['peakRssKb'] / 1024.0,
+                                                  '  '.join(phaseCols)))
+    return '\n'.join(lines)
+
+
+def addWorkloadArguments(parser):
+    '''
+    Add the synthetic workload options to an argument parser.
+    '''
+    parser.add_argument('--courses', type=int, default=2, help='Number of courses (default: 2).')
+    parser.add_argument('--learners', type=int, default=100, help='Learners per course at scale 1 (default: 100).')
+    parser.add_argument('--events', type=int, default=50, help='Events per learner (default: 50).')
+    parser.add_argument('--gaps', choices=GAP_DISTRIBUTIONS, default='session', help='Gap distribution (default: session).')
+    parser.add_argument('--videoFraction', type=float, default=0.3, help='Fraction of video events (default: 0.3).')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed (default: 42).')
+
+
+def workloadParamsFromArgs(args):
+    return {'numCourses' : args.courses,
+            'learnersPerCourse' : args.learners,
+            'eventsPerLearner' : args.events,
+            'gapDistribution' : args.gaps,
+            'videoFraction' : args.videoFraction,
+            'seed' : args.seed}
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(prog=os.path.basename(sys.argv[0]), formatter_class=argparse.RawTextHelpFormatter)
+    addWorkloadArguments(parser)
+    parser.add_argument('--scales',
+                        default='1',
+                        help='Comma-separated factors for learners per course, e.g. 1,2,4,8 (default: 1).')
+    parser.add_argument('--json',
+                        default=None,
+                        help='File to which results are written as JSON.')
+    args = parser.parse_args();
+
+    results = scalingCurve(workloadParamsFromArgs(args), [int(scale) for scale in args.scales.split(',')])
+    print(formatReport(results))
+    if args.json is not None:
+        with open(args.json, 'w') as fd:
+            json.dump(results, fd, indent=2)
@@ -0,0 +1,222 @@
+#!/usr/bin/env python
+# Copyright (c) 2014, Stanford University
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification, are permitted provided that the following conditions are met:
+# 1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following disclaimer in the documentation and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote products derived from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+'''
+Created on Oct 19, 2026
+
+Performance regression gate for engagement.py. Runs the phase
+benchmarks of benchEngagement.py, plus a micro-benchmark of
+addTimeToSession(), for a fixed set of synthetic workload sizes,
+and either records the timings as a baseline, or compares them
+against a recorded baseline:
+
+    perfGate.py record --baseline perfBaseline.json
+    perfGate.py check  --baseline perfBaseline.json --tolerance 0.2 --minDeltaSecs 0.01
+
+'check' prints a per-phase report, and exits with status 1 if any
+phase of any workload is slower than its baseline by more than
+the tolerance (0.2 == 20%) and by more than minDeltaSecs, or with
+status 2 if the baseline cannot be compared (different format
+version or workloads). The absolute floor keeps timer and
+scheduling noise in phases of a few milliseconds from failing
+the gate.
+
+Each timing is the minimum over --repeats runs, which filters
+out most scheduling noise. Baselines are only meaningful on the
+machine on which they were recorded; the file notes host and
+Python version.
+
+Baseline file layout (formatVersion 1):
+
+    {"formatVersion": 1,
+     "host": ..., "python": ..., "recordedAt": ...,
+     "workloads": {"<size>": {"params": {<SyntheticWorkload kwargs>},
+                              "phases": {"<phase>": <seconds>, ...}}}}
+
+@author: paepcke
+'''
+import argparse
+import datetime
+import json
+import os
+import platform
+import sys
+import time
+
+# Add the engagement source dir to $PATH
+# for duration of this execution:
+source_dir = [os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")]
+source_dir.extend(sys.path)
+sys.path = source_dir
+
+from benchEngagement import PHASES, runInChild, newComputer
+from syntheticEvents import SyntheticWorkload
+
+
+BASELINE_FORMAT_VERSION = 1
+
+# Named workload sizes that the gate runs:
+WORKLOADS = {'small'  : {'numCourses' : 2, 'learnersPerCourse' : 100, 'eventsPerLearner' : 50},
+             'medium' : {'numCourses' : 4, 'learnersPerCourse' : 500, 'eventsPerLearner' : 100}}
+
+# Calls of addTimeToSession() per micro-benchmark run:
+ADD_TIME_CALLS = 200000
+
+# Default smallest slowdown, in seconds, that counts as a regression:
+MIN_DELTA_SECS = 0.01
+
+EXIT_OK = 0
+EXIT_REGRESSION = 1
+EXIT_INCOMPARABLE = 2
+
+
+def timeAddTimeToSession(numCalls=ADD_TIME_CALLS):
+    '''
+    Time numCalls calls of addTimeToSession() on one student's
+    in-session events, and return the seconds taken.
+    '''
+    workload = SyntheticWorkload(numCourses=1, learnersPerCourse=1, eventsPerLearner=numCalls + 1,
+                                 gapDistribution='exponential')
+    times = [event[2] for event in workload.events()]
+    comp = newComputer(workload, [])
+    comp.studentSessionsDict = {}
+    comp.currStudent = 'benchmark'
+    comp.sessionStartTime = times[0]
+    comp.numEventsThisSession = 1
+    addTimeToSession = comp.addTimeToSession
+    startTime = time.time()
+    for i in range(numCalls):
+        addTimeToSession(times[i], times[i + 1], False, comp.timeSpentThisSession)
+    return time.time() - startTime
+
+
+def measure(workloads, repeats):
+    '''
+    Return {size : {'params' : ..., 'phases' : {phase : minSecs}}} for
+    the given workloads. The addTimeToSession micro-benchmark is listed
+    as an extra phase of each workload.
+    '''
+    measurements = {}
+    for (size, params) in sorted(workloads.items()):
+        phaseSecs = {}
+        for _ in range(repeats):
+            result = runInChild(params)
+            for phase in PHASES:
+                secs = result['phases'][phase]['secs']
+                phaseSecs[phase] = min(secs, phaseSecs.get(phase, secs))
+            secs = timeAddTimeToSession()
+            phaseSecs['addTimeToSession'] = min(secs, phaseSecs.get('addTimeToSession', secs))
+        measurements[size] = {'params' : params, 'phases' : phaseSecs}
+    return measurements
+
+
+def record(baselinePath, workloads, repeats):
+    baseline = {'formatVersion' : BASELINE_FORMAT_VERSION,
+                'host' : platform.node(),
+                'python' : platform.python_version(),
+                'recordedAt' : datetime.datetime.now().isoformat(),
+                'workloads' : measure(workloads, repeats)}
+    with open(baselinePath, 'w') as fd:
+        json.dump(baseline, fd, indent=2, sort_keys=True)
+    return baseline
+
+
+def compare(baseline, current, tolerance, minDeltaSecs=MIN_DELTA_SECS):
+    '''
+    Compare current measurements with a baseline.
+
+    :param baseline: content of a baseline file
+    :type baseline: dict
+    :param current: result of measure()
+    :type current: dict
+    :param tolerance: allowed slowdown as a fraction, e.g. 0.2 for 20%
+    :type tolerance: float
+    :param minDeltaSecs: changes of at most this many seconds are never
+        a regression, nor faster, whatever their fraction
+    :type minDeltaSecs: float
+    :return: (exit status, list of report lines)
+    :rtype: (int, [string])
+    '''
+    if baseline.get('formatVersion') != BASELINE_FORMAT_VERSION:
+        return (EXIT_INCOMPARABLE, ['Baseline format version %s, expected %s; re-record the baseline.' %
+                                    (baseline.get('formatVersion'), BASELINE_FORMAT_VERSION)])
+    status = EXIT_OK
+    report = ['%-8s %-20s %12s %12s %8s  %s' % ('size', 'phase', 'baseline(s)', 'current(s)', 'change', 'status')]
+    for (size, measurement) in sorted(current.items()):
+        try:
+            baselineWorkload = baseline['workloads'][size]
+        except KeyError:
+            return (EXIT_INCOMPARABLE, ["Workload '%s' is not in the baseline; re-record the baseline." % size])
+        if baselineWorkload['params'] != measurement['params']:
+            return (EXIT_INCOMPARABLE, ["Workload '%s' differs from the baseline's; re-record the baseline." % size])
+        for (phase, secs) in sorted(measurement['phases'].items()):
+            baselineSecs = baselineWorkload['phases'].get(phase)
+            if baselineSecs is None:
+                report.append('%-8s %-20s %12s %12.4f %8s  %s' % (size, phase, '-', secs, '-', 'new'))
+                continue
+            change = (secs - baselineSecs) / baselineSecs if baselineSecs > 0 else 0.0
+            if abs(secs - baselineSecs) <= minDeltaSecs:
+                phaseStatus = 'ok'
+            elif change > tolerance:
+                phaseStatus = 'REGRESSION'
+                status = EXIT_REGRESSION
+            elif change < -tolerance:
+                phaseStatus = 'faster'
+            else:
+                phaseStatus = 'ok'
+            report.append('%-8s %-20s %12.4f %12.4f %+7.1f%%  %s' % (size, phase, baselineSecs, secs, 100 * change, phaseStatus))
+    return (status, report)
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(prog=os.path.basename(sys.argv[0]), formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument('action',
+                        choices=['record', 'check'],
+                        help='record: save timings as the new baseline\n' +\
+                             'check:  compare timings with the baseline; exit 1 on regression')
+    parser.add_argument('--baseline',
+                        default='perfBaseline.json',
+                        help='Baseline JSON file (default: perfBaseline.json).')
+    parser.add_argument('--tolerance',
+                        type=float,
+                        default=0.2,
+                        help='Allowed slowdown per phase as a fraction (default: 0.2, i.e. 20%%).')
+    parser.add_argument('--minDeltaSecs',
+                        type=float,
+                        default=MIN_DELTA_SECS,
+                        help='Slowdowns of at most this many seconds never fail the gate (default: %s).' % MIN_DELTA_SECS)
+    parser.add_argument('--repeats',
+                        type=int,
+                        default=3,
+                        help='Runs per workload; the fastest counts (default: 3).')
+    parser.add_argument('--sizes',
+                        default=','.join(sorted(WORKLOADS.keys())),
+                        help='Comma-separated workload sizes to run (default: all of %s).' % ', '.join(sorted(WORKLOADS.keys())))
+    args = parser.parse_args();
+
+    try:
+        workloads = dict([(size, WORKLOADS[size]) for size in args.sizes.split(',')])
+    except KeyError as e:
+        parser.error('Unknown workload size %s' % str(e))
+
+    if args.action == 'record':
+        record(args.baseline, workloads, args.repeats)
+        print('Baseline written to %s.' % args.baseline)
+        sys.exit(EXIT_OK)
+
+    with open(args.baseline, 'r') as fd:
+        baseline = json.load(fd)
+    (status, report) = compare(baseline, measure(workloads, args.repeats), args.tolerance, args.minDeltaSecs)
+    print('\n'.join(report))
+    if status == EXIT_REGRESSION:
+        print('Performance regression beyond %d%% tolerance.' % round(100 * args.tolerance))
+    sys.exit(status)
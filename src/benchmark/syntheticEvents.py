@@ -0,0 +1,209 @@
+# Copyright (c) 2014, Stanford University
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification, are permitted provided that the following conditions are met:
+# 1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following disclaimer in the documentation and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote products derived from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+'''
+Created on Oct 19, 2026
+
+Deterministic synthetic event streams for exercising the
+engagement pipeline without the production database. A
+SyntheticWorkload yields (course_display_name, anon_screen_name,
+time, isVideo) rows in the order of EngagementComputer's main
+query: sorted by course, student, and time. SyntheticEventSource
+serves them to an EngagementComputer as its eventSource, and
+SyntheticEventDb as its db.
+
+The same parameters and seed always produce the same rows, on
+any Python version, since only random.random() based draws are
+used.
+
+Time between a learner's consecutive events is drawn from one
+of these gap distributions:
+
+    'session':     mixture; with probability sessionBreakProb a break of
+                   hours to days, else an in-session gap with a mean of
+                   meanGapMinutes. Produces realistic multi-session learners.
+    'exponential': exponential with a mean of meanGapMinutes
+    'lognormal':   lognormal with a median of meanGapMinutes
+
+@author: paepcke
+'''
+import datetime
+import hashlib
+import itertools
+import math
+import random
+
+
+GAP_DISTRIBUTIONS = ('session', 'exponential', 'lognormal')
+
+
+class SyntheticWorkload(object):
+
+    def __init__(self,
+                 numCourses=2,
+                 learnersPerCourse=100,
+                 eventsPerLearner=50,
+                 gapDistribution='session',
+                 meanGapMinutes=3.0,
+                 sessionBreakProb=0.1,
+                 videoFraction=0.3,
+                 courseStart=datetime.datetime(2013, 9, 2),
+                 courseWeeks=10,
+                 seed=42):
+        '''
+        :param numCourses: number of courses
+        :type numCourses: int
+        :param learnersPerCourse: number of learners in each course
+        :type learnersPerCourse: int
+        :param eventsPerLearner: number of events of each learner
+        :type eventsPerLearner: int
+        :param gapDistribution: one of GAP_DISTRIBUTIONS
+        :type gapDistribution: string
+        :param meanGapMinutes: typical minutes between events within a session
+        :type meanGapMinutes: float
+        :param sessionBreakProb: for the 'session' distribution: probability
+            that a gap ends a session
+        :type sessionBreakProb: float
+        :param videoFraction: fraction of events that are video events
+        :type videoFraction: float
+        :param courseStart: start date of all courses
+        :type courseStart: datetime.datetime
+        :param courseWeeks: length of each course; returned by courseRuntimes(),
+            events may run past it.
+        :type courseWeeks: int
+        :param seed: random seed
+        :type seed: int
+        '''
+        if gapDistribution not in GAP_DISTRIBUTIONS:
+            raise ValueError("Gap distribution must be one of %s, not '%s'" % (', '.join(GAP_DISTRIBUTIONS), gapDistribution))
+        self.numCourses = numCourses
+        self.learnersPerCourse = learnersPerCourse
+        self.eventsPerLearner = eventsPerLearner
+        self.gapDistribution = gapDistribution
+        self.meanGapMinutes = meanGapMinutes
+        self.sessionBreakProb = sessionBreakProb
+        self.videoFraction = videoFraction
+        self.courseStart = courseStart
+        self.courseWeeks = courseWeeks
+        self.seed = seed
+
+    @property
+    def numEvents(self):
+        return self.numCourses * self.learnersPerCourse * self.eventsPerLearner
+
+    def parameters(self):
+        '''
+        Return the workload parameters as a JSON-compatible dict.
+        '''
+        return {'numCourses' : self.numCourses,
+                'learnersPerCourse' : self.learnersPerCourse,
+                'eventsPerLearner' : self.eventsPerLearner,
+                'gapDistribution' : self.gapDistribution,
+                'meanGapMinutes' : self.meanGapMinutes,
+                'sessionBreakProb' : self.sessionBreakProb,
+                'videoFraction' : self.videoFraction,
+                'courseWeeks' : self.courseWeeks,
+                'seed' : self.seed}
+
+    def courseNames(self):
+        return ['Synthetic/C%03d/Fall2013' % courseNum for courseNum in range(self.numCourses)]
+
+    def learnerNames(self, courseName):
+        '''
+        Return the sorted, 40-hex-digit anon_screen_names of one course's learners.
+        '''
+        return sorted([hashlib.sha1(('%d/%s/%d' % (self.seed, courseName, learnerNum)).encode('utf-8')).hexdigest()
+                       for learnerNum in range(self.learnersPerCourse)])
+
+    def courseRuntimes(self):
+        '''
+        Return course name --> (startDate, endDate), suitable for
+        the courseRuntimes argument of EngagementComputer.
+        '''
+        endDate = self.courseStart + datetime.timedelta(weeks=self.courseWeeks)
+        return dict([(courseName, (self.courseStart, endDate)) for courseName in self.courseNames()])
+
+    def events(self):
+        '''
+        Yield all events as (course_display_name, anon_screen_name, time, isVideo)
+        in course, student, time order.
+        '''
+        for courseName in self.courseNames():
+            for student in self.learnerNames(courseName):
+                # Seed each learner separately, so that a learner's
+                # events don't depend on the workload's other sizes:
+                rand = random.Random(int(student[:15], 16))
+                # First event somewhere in the course's first week:
+                eventTime = self.courseStart + datetime.timedelta(minutes=int(rand.random() * 7 * 24 * 60))
+                for _ in range(self.eventsPerLearner):
+                    yield (courseName, student, eventTime, 1 if rand.random() < self.videoFraction else 0)
+                    eventTime += datetime.timedelta(seconds=int(60 * self._gapMinutes(rand)))
+
+    def _gapMinutes(self, rand):
+        if self.gapDistribution == 'exponential':
+            return rand.expovariate(1.0 / self.meanGapMinutes)
+        if self.gapDistribution == 'lognormal':
+            return rand.lognormvariate(math.log(self.meanGapMinutes), 1.0)
+        # 'session':
+        if rand.random() < self.sessionBreakProb:
+            # Break between sessions: one hour to three days:
+            return 60 + rand.random() * 3 * 24 * 60
+        return rand.expovariate(1.0 / self.meanGapMinutes)
+
+
+class SyntheticEventDb(object):
+    '''
+    Stands in for the MySQLDB connection of an EngagementComputer:
+    every query() returns the workload's events.
+    '''
+
+    def __init__(self, workload):
+        self.workload = workload
+
+    def query(self, queryStr): #@UnusedVariable
+        return self.workload.events()
+
+    def close(self):
+        pass
+
+
+class SyntheticEventSource(object):
+    '''
+    Serves the workload's events with the interface of EventSource
+    in eventSources.py, one batch per course. Not a subclass, so that
+    this module needs nothing from the engagement sources.
+    '''
+
+    def __init__(self, workload):
+        self.workload = workload
+
+    def batches(self, courseToProfile=None, afterCourse=None):
+        courseNames = self.workload.courseNames()
+        if afterCourse in courseNames:
+            # Courses come in the order of courseNames():
+            skipped = set(courseNames[:courseNames.index(afterCourse) + 1])
+        else:
+            skipped = set()
+        for (courseName, rows) in itertools.groupby(self.workload.events(), lambda row: row[0]):
+            if courseName in skipped or (courseToProfile is not None and courseName != courseToProfile):
+                continue
+            yield list(rows)
+
+    def unsortedBatches(self, courseToProfile=None, afterCourse=None):
+        return self.batches(courseToProfile, afterCourse)
+
+    def courseRuntime(self, courseName):
+        return self.workload.courseRuntimes().get(courseName)
+
+    def watermark(self, courseToProfile=None): #@UnusedVariable
+        return self.workload.parameters()
+
+    def close(self):
+        pass
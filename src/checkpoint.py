@@ -0,0 +1,157 @@
+# Copyright (c) 2014, Stanford University
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification, are permitted provided that the following conditions are met:
+# 1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following disclaimer in the documentation and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote products derived from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+'''
+Created on Oct 19, 2026
+
+Course-level checkpoints, so that an interrupted EngagementComputer
+run can be resumed without losing more than the course that was
+being processed. A checkpoint directory holds:
+
+    manifest.json:      {"formatVersion": 1,
+                         "runKey": {<parameters that determine the results>},
+                         "completed": [courseName, ...]}
+                        with courses in the order in which the main
+                        query delivered them
+    course_<sha1>.pkl:  per completed course: the CourseEngagementResult
+                        as a dict (or None if the course produced no
+                        result), and its studentSessionsDict
+
+Every file is written to a temporary name, fsync'ed, and renamed
+into place; a course counts as completed only once the manifest
+that lists it is in place.
+
+On resume, EngagementComputer loads the completed courses, and
+restarts its query after the last completed course, with a
+course_display_name > '<lastCompleted>' predicate. Since the
+query sorts by course_display_name, the database's own collation
+decides what comes after the last completed course.
+
+@author: paepcke
+'''
+import hashlib
+import json
+import os
+import tempfile
+
+try:
+    import cPickle as pickle
+except ImportError:
+    import pickle
+
+from engagementResult import CourseEngagementResult
+
+
+CHECKPOINT_FORMAT_VERSION = 1
+
+MANIFEST_NAME = 'manifest.json'
+
+
+class CheckpointStore(object):
+
+    def __init__(self, directory, runKey):
+        '''
+        :param directory: checkpoint directory; created if needed
+        :type directory: string
+        :param runKey: JSON-compatible parameters of the run. Checkpoints
+            are only resumed by runs with the same key.
+        :type runKey: dict
+        '''
+        self.directory = directory
+        # JSON round trip, so that the key compares
+        # equal to the one read from a manifest:
+        self.runKey = json.loads(json.dumps(runKey))
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        self.completed = []
+
+    def resume(self):
+        '''
+        Read the manifest of an earlier run.
+
+        :return: names of the completed courses, in query order
+        :rtype: [string]
+        :raise ValueError: if the checkpoints belong to a run with other parameters
+        '''
+        manifestPath = os.path.join(self.directory, MANIFEST_NAME)
+        if not os.path.exists(manifestPath):
+            self.completed = []
+            return self.completed
+        with open(manifestPath, 'r') as fd:
+            manifest = json.load(fd)
+        if manifest.get('formatVersion') != CHECKPOINT_FORMAT_VERSION:
+            raise ValueError("Checkpoints in %s have format version %s, not %s." %
+                             (self.directory, manifest.get('formatVersion'), CHECKPOINT_FORMAT_VERSION))
+        if manifest['runKey'] != self.runKey:
+            raise ValueError("Checkpoints in %s are from a run with parameters %s, not %s." %
+                             (self.directory, manifest['runKey'], self.runKey))
+        self.completed = manifest['completed']
+        return self.completed
+
+    def clear(self):
+        '''
+        Remove the checkpoints of an earlier run.
+        '''
+        for fileName in os.listdir(self.directory):
+            if fileName == MANIFEST_NAME or (fileName.startswith('course_') and fileName.endswith('.pkl')):
+                os.remove(os.path.join(self.directory, fileName))
+        self.completed = []
+
+    @property
+    def lastCompleted(self):
+        return self.completed[-1] if len(self.completed) > 0 else None
+
+    def saveCourse(self, courseName, courseResult, studentSessionsDict):
+        '''
+        Durably record one completed course.
+
+        :param courseName: course_display_name
+        :type courseName: string
+        :param courseResult: the course's result, or None if it produced none
+        :type courseResult: {CourseEngagementResult | None}
+        :param studentSessionsDict: {student : [(sessionStart, sessionSecs, numEvents), ...]}
+        :type studentSessionsDict: dict
+        '''
+        resultDict = None if courseResult is None else courseResult.toDict()
+        self._writeAtomically(self._coursePath(courseName),
+                              pickle.dumps((resultDict, studentSessionsDict), pickle.HIGHEST_PROTOCOL))
+        if courseName not in self.completed:
+            self.completed.append(courseName)
+        manifest = {'formatVersion' : CHECKPOINT_FORMAT_VERSION,
+                    'runKey' : self.runKey,
+                    'completed' : self.completed}
+        self._writeAtomically(os.path.join(self.directory, MANIFEST_NAME),
+                              json.dumps(manifest, indent=2).encode('utf-8'))
+
+    def loadCourse(self, courseName):
+        '''
+        :return: the course's result (None if it produced none), and its sessions
+        :rtype: ({CourseEngagementResult | None}, dict)
+        '''
+        with open(self._coursePath(courseName), 'rb') as fd:
+            (resultDict, studentSessionsDict) = pickle.load(fd)
+        courseResult = None if resultDict is None else CourseEngagementResult.fromDict(resultDict)
+        return (courseResult, studentSessionsDict)
+
+    def _coursePath(self, courseName):
+        return os.path.join(self.directory, 'course_%s.pkl' % hashlib.sha1(courseName.encode('utf-8')).hexdigest())
+
+    def _writeAtomically(self, path, content):
+        (fd, tmpPath) = tempfile.mkstemp(dir=self.directory, prefix='.checkpoint_')
+        try:
+            with os.fdopen(fd, 'wb') as tmpFd:
+                tmpFd.write(content)
+                tmpFd.flush()
+                os.fsync(tmpFd.fileno())
+            os.rename(tmpPath, path)
+        except:
+            os.remove(tmpPath)
+            raise
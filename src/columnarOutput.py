@@ -0,0 +1,253 @@
+# Copyright (c) 2014, Stanford University
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification, are permitted provided that the following conditions are met:
+# 1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following disclaimer in the documentation and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote products derived from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+'''
+Created on Oct 19, 2026
+
+Binary, column-wise alternative to the allData and weeklyEffort
+CSV files of EngagementComputer.writeResultsToDisk(). Each file is
+an uncompressed NumPy .npz archive of equal-length column arrays,
+plus two string dictionaries:
+
+allData .npz:
+    courses:     'S<n>' course_display_name dictionary
+    students:    'S<n>' anon_screen_name dictionary
+    course:      int32  index into courses
+    student:     int32  index into students
+    start:       int64  session start, seconds since the epoch (naive time, no tz conversion)
+    sessionSecs: float64 session length in seconds
+    numEvents:   int32  number of events in the session
+
+weeklyEffort .npz:
+    courses, students, course, student: as above
+    week:        int32  course week, 1-based as in the CSV file
+    effortSecs:  float64 engagement seconds in that week
+
+Load with:
+    cols = numpy.load(path)
+    cols['courses'][cols['course']]     # course name of every row
+    cols['start'].astype('datetime64[s]')
+
+Because the archive is not compressed, single columns of
+very large files can be memory-mapped instead of read; see
+memmapColumn().
+
+@author: paepcke
+'''
+import zipfile
+
+import numpy
+from numpy.lib import format as npyFormat
+
+from sessionColumns import SessionColumns, WeeklyEffortColumns, studentArray
+
+
+def _dictionaryEncode(courseNames, perCourseColumns, studentIndexField):
+    '''
+    Concatenate per-course column sets into single columns, with
+    one global student dictionary.
+
+    :return: (courses, students, courseIndexArr, studentIndexArr)
+    '''
+    courses = studentArray(courseNames)
+    lengths = numpy.array([len(columns) for columns in perCourseColumns], dtype=numpy.int64)
+    courseIndex = numpy.repeat(numpy.arange(len(courseNames), dtype=numpy.int32), lengths)
+    if len(perCourseColumns) == 0:
+        return (courses, studentArray([]), courseIndex, numpy.empty(0, dtype=numpy.int32))
+    # Global student dictionary; map each course's local
+    # student indexes into it:
+    allStudents = numpy.concatenate([columns.students for columns in perCourseColumns])
+    (students, globalIndex) = numpy.unique(allStudents, return_inverse=True)
+    studentOffsets = numpy.cumsum([0] + [len(columns.students) for columns in perCourseColumns])
+    localIndex = numpy.concatenate([getattr(columns, studentIndexField).astype(numpy.int64) + studentOffsets[i]
+                                    for (i, columns) in enumerate(perCourseColumns)])
+    studentIndex = globalIndex[localIndex].astype(numpy.int32)
+    return (courses, students, courseIndex, studentIndex)
+
+
+def allDataColumns(comp):
+    '''
+    Gather all sessions of an EngagementComputer's courses
+    into the allData column layout.
+
+    :param comp: computer on which run() was called
+    :type comp: EngagementComputer
+    :return: column name --> array
+    :rtype: dict
+    '''
+    courseNames = []
+    perCourseColumns = []
+    for (courseName, sessionsDict) in comp.allStudentsDicts.items():
+        courseNames.append(courseName)
+        perCourseColumns.append(SessionColumns.fromSessionsDict(sessionsDict))
+    for (courseName, sessionColumns) in comp.courseSessionColumns.items():
+        courseNames.append(courseName)
+        perCourseColumns.append(sessionColumns)
+    (courses, students, courseIndex, studentIndex) = _dictionaryEncode(courseNames, perCourseColumns, 'sessionStudent')
+
+    def concat(fieldName):
+        return numpy.concatenate([numpy.empty(0, dtype=SessionColumns.DTYPES[fieldName])] +
+                                 [getattr(columns, fieldName) for columns in perCourseColumns])
+    return {'courses'     : courses,
+            'students'    : students,
+            'course'      : courseIndex,
+            'student'     : studentIndex,
+            'start'       : concat('sessionStart'),
+            'sessionSecs' : concat('sessionSecs'),
+            'numEvents'   : concat('sessionEvents')}
+
+
+def weeklyEffortColumns(comp):
+    '''
+    Gather the weekly effort of all of an EngagementComputer's
+    courses into the weeklyEffort column layout.
+
+    :param comp: computer on which run() was called
+    :type comp: EngagementComputer
+    :return: column name --> array
+    :rtype: dict
+    '''
+    courseNames = []
+    perCourseColumns = []
+    for (courseName, courseResult) in comp.courseResults.items():
+        courseNames.append(courseName)
+        try:
+            # Added as columns, e.g. by a worker process:
+            perCourseColumns.append(comp.courseWeeklyEffortColumns[courseName])
+        except KeyError:
+            perCourseColumns.append(WeeklyEffortColumns.fromWeeklyEffortDict(courseResult.weeklyEffort))
+    (courses, students, courseIndex, studentIndex) = _dictionaryEncode(courseNames, perCourseColumns, 'effortStudent')
+
+    def concat(fieldName):
+        return numpy.concatenate([numpy.empty(0, dtype=WeeklyEffortColumns.DTYPES[fieldName])] +
+                                 [getattr(columns, fieldName) for columns in perCourseColumns])
+    return {'courses'    : courses,
+            'students'   : students,
+            'course'     : courseIndex,
+            'student'    : studentIndex,
+            # Zero-based internally; 1-based in all outputs:
+            'week'       : concat('effortWeek') + 1,
+            'effortSecs' : concat('effortSecs')}
+
+
+def sessionsArray(comp):
+    '''
+    All sessions of an EngagementComputer's courses as one
+    structured array with fields course, student, start
+    (datetime64[s]), sessionSecs, and numEvents.
+
+    :param comp: computer on which run() was called
+    :type comp: EngagementComputer
+    :rtype: numpy.ndarray
+    '''
+    columns = allDataColumns(comp)
+    sessions = numpy.empty(len(columns['start']), dtype=[('course', columns['courses'].dtype),
+                                                         ('student', columns['students'].dtype),
+                                                         ('start', 'datetime64[s]'),
+                                                         ('sessionSecs', numpy.float64),
+                                                         ('numEvents', numpy.int32)])
+    sessions['course'] = columns['courses'][columns['course']]
+    sessions['student'] = columns['students'][columns['student']]
+    sessions['start'] = columns['start'].astype('datetime64[s]')
+    sessions['sessionSecs'] = columns['sessionSecs']
+    sessions['numEvents'] = columns['numEvents']
+    return sessions
+
+
+def weeklyEffortArray(comp):
+    '''
+    Weekly effort of all of an EngagementComputer's courses as
+    one structured array with fields course, student, week (1-based),
+    and effortSecs.
+
+    :param comp: computer on which run() was called
+    :type comp: EngagementComputer
+    :rtype: numpy.ndarray
+    '''
+    columns = weeklyEffortColumns(comp)
+    efforts = numpy.empty(len(columns['week']), dtype=[('course', columns['courses'].dtype),
+                                                       ('student', columns['students'].dtype),
+                                                       ('week', numpy.int32),
+                                                       ('effortSecs', numpy.float64)])
+    efforts['course'] = columns['courses'][columns['course']]
+    efforts['student'] = columns['students'][columns['student']]
+    efforts['week'] = columns['week']
+    efforts['effortSecs'] = columns['effortSecs']
+    return efforts
+
+
+# Fields of summaryArray(), after course; in
+# the order of CourseEngagementResult.statsTuple():
+SUMMARY_FIELDS = ('numActiveLearners', 'totalStudentSessions', 'totalEffortAllStudents',
+                  'oneToTwentyMin', 'twentyoneToSixtyMin', 'greaterSixtyMin')
+
+
+def summaryArray(comp):
+    '''
+    One row per course of an EngagementComputer, as a structured
+    array with fields course and SUMMARY_FIELDS: the numbers of
+    the summary file.
+
+    :param comp: computer on which run() was called
+    :type comp: EngagementComputer
+    :rtype: numpy.ndarray
+    '''
+    courseNames = sorted(comp.courseResults.keys())
+    summary = numpy.empty(len(courseNames), dtype=[('course', studentArray(courseNames).dtype)] +
+                                                  [(field, numpy.int64) for field in SUMMARY_FIELDS])
+    for (row, courseName) in enumerate(courseNames):
+        summary[row] = (courseName,) + comp.courseResults[courseName].statsTuple()
+    return summary
+
+
+def writeColumns(fileObj, columns):
+    '''
+    Write a dict of columns as an uncompressed .npz archive.
+
+    :param fileObj: open, binary file, or path
+    :type fileObj: {file | string}
+    :param columns: column name --> array
+    :type columns: dict
+    '''
+    numpy.savez(fileObj, **columns)
+
+
+def memmapColumn(path, columnName):
+    '''
+    Memory-map one column of an .npz file written by writeColumns(),
+    without reading the column into memory.
+
+    :param path: the .npz file
+    :type path: string
+    :param columnName: name of the column, such as 'start'
+    :type columnName: string
+    :rtype: numpy.memmap
+    :raise ValueError: if the member is compressed
+    '''
+    with zipfile.ZipFile(path) as archive:
+        info = archive.getinfo(columnName + '.npy')
+    if info.compress_type != zipfile.ZIP_STORED:
+        raise ValueError("Column '%s' of %s is compressed, and cannot be memory-mapped." % (columnName, path))
+    with open(path, 'rb') as fd:
+        # Skip the zip local file header: 30 fixed bytes, then
+        # file name and extra field, whose lengths are at 26 and 28:
+        fd.seek(info.header_offset + 26)
+        lengths = numpy.frombuffer(fd.read(4), dtype='<u2')
+        fd.seek(info.header_offset + 30 + int(lengths[0]) + int(lengths[1]))
+        version = npyFormat.read_magic(fd)
+        if version == (1, 0):
+            (shape, fortranOrder, dtype) = npyFormat.read_array_header_1_0(fd)
+        else:
+            (shape, fortranOrder, dtype) = npyFormat.read_array_header_2_0(fd)
+        dataOffset = fd.tell()
+    order = 'F' if fortranOrder else 'C'
+    if numpy.prod(shape) == 0:
+        return numpy.empty(shape, dtype=dtype, order=order)
+    return numpy.memmap(path, dtype=dtype, mode='r', shape=shape, order=order, offset=dataOffset)
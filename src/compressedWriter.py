@@ -0,0 +1,190 @@
+# Copyright (c) 2014, Stanford University
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification, are permitted provided that the following conditions are met:
+# 1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following disclaimer in the documentation and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote products derived from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+'''
+Created on Oct 19, 2026
+
+File-like writer that compresses on a background thread. The
+caller's write() calls only append strings to an in-memory batch.
+Full batches go through a bounded queue to a compression thread,
+which compresses them and writes the result to the underlying
+file. The zlib, bz2, and lzma compressors release the GIL while
+they work, so formatting in the main thread and compression
+overlap.
+
+Supported codecs, all from the standard library:
+
+    'gzip'  .gz   (zlib with gzip framing; readable with gzip/zcat)
+    'bz2'   .bz2
+    'xz'    .xz   (only where the lzma module exists, i.e. Python 3)
+
+Usage:
+
+    with CompressedWriter(open('out.csv.gz', 'wb'), codec='gzip') as writer:
+        writer.write('a,b,c\\n')
+
+@author: paepcke
+'''
+import bz2
+import threading
+import zlib
+
+try:
+    import Queue as queue
+except ImportError:
+    import queue
+
+try:
+    import lzma
+except ImportError:
+    lzma = None
+
+
+# Codec name --> file name extension:
+CODEC_EXTENSIONS = {'gzip' : '.gz',
+                    'bz2'  : '.bz2',
+                    'xz'   : '.xz'}
+
+
+def availableCodecs():
+    '''
+    Return the names of the codecs that this Python supports.
+    '''
+    return sorted([codec for codec in CODEC_EXTENSIONS.keys() if codec != 'xz' or lzma is not None])
+
+
+def _newCompressor(codec, level):
+    if codec == 'gzip':
+        # wbits 16+15 selects the gzip header and trailer:
+        return zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    if codec == 'bz2':
+        return bz2.BZ2Compressor(level)
+    if codec == 'xz' and lzma is not None:
+        return lzma.LZMACompressor()
+    raise ValueError("Unsupported compression codec '%s'; available: %s" % (codec, ', '.join(availableCodecs())))
+
+
+class CompressedWriter(object):
+
+    # Sentinel that tells the compression thread to finish:
+    _END = None
+
+    def __init__(self, fileObj, codec='gzip', level=6, bufferSize=4 * 1024 * 1024, queueDepth=4):
+        '''
+        Wrap an open, binary, writable file.
+
+        :param fileObj: file to which compressed bytes are written; closed by close()
+        :type fileObj: file
+        :param codec: 'gzip', 'bz2', or 'xz'
+        :type codec: string
+        :param level: compression level 1 (fast) to 9 (small); ignored for xz
+        :type level: int
+        :param bufferSize: number of uncompressed bytes to collect before
+            handing a batch to the compression thread
+        :type bufferSize: int
+        :param queueDepth: number of batches that may wait for compression
+            before write() blocks
+        :type queueDepth: int
+        '''
+        self.fileObj = fileObj
+        self.codec = codec
+        self.compressor = _newCompressor(codec, level)
+        self.bufferSize = bufferSize
+        self.batch = []
+        self.batchSize = 0
+        self.bytesIn = 0
+        self.bytesOut = 0
+        self.error = None
+        self.closed = False
+        self.batchQueue = queue.Queue(maxsize=queueDepth)
+        self.thread = threading.Thread(target=self._compressLoop, name='CompressedWriter')
+        self.thread.daemon = True
+        self.thread.start()
+
+    @property
+    def name(self):
+        return self.fileObj.name
+
+    def write(self, data):
+        if self.error is not None:
+            raise self.error
+        if not isinstance(data, bytes):
+            data = data.encode('utf-8')
+        self.batch.append(data)
+        self.batchSize += len(data)
+        if self.batchSize >= self.bufferSize:
+            self._handOffBatch()
+
+    def writelines(self, lines):
+        for line in lines:
+            self.write(line)
+
+    def flush(self):
+        '''
+        Hand the current batch to the compression thread. Unlike
+        a file's flush(), this does not wait for the data to reach
+        the disk; close() does.
+        '''
+        if self.batchSize > 0:
+            self._handOffBatch()
+
+    def close(self):
+        '''
+        Compress all remaining data, and close the underlying
+        file. A file to which nothing was written is left empty,
+        rather than holding an empty compressed stream.
+
+        :raise Exception: whatever error the compression thread encountered
+        '''
+        if self.closed:
+            return
+        self.closed = True
+        try:
+            self.flush()
+            self.batchQueue.put(CompressedWriter._END)
+            self.thread.join()
+            if self.error is None and self.bytesIn > 0:
+                self._writeOut(self.compressor.flush())
+        finally:
+            self.fileObj.close()
+        if self.error is not None:
+            raise self.error
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        self.close()
+        return False
+
+    def _handOffBatch(self):
+        self.batchQueue.put(b''.join(self.batch))
+        self.bytesIn += self.batchSize
+        self.batch = []
+        self.batchSize = 0
+
+    def _compressLoop(self):
+        while True:
+            chunk = self.batchQueue.get()
+            if chunk is CompressedWriter._END:
+                return
+            if self.error is not None:
+                # Keep draining, so that write() never blocks
+                # on a full queue after a failure:
+                continue
+            try:
+                self._writeOut(self.compressor.compress(chunk))
+            except Exception as e:
+                self.error = e
+
+    def _writeOut(self, compressed):
+        if len(compressed) > 0:
+            self.fileObj.write(compressed)
+            self.bytesOut += len(compressed)
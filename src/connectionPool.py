@@ -0,0 +1,184 @@
+# Copyright (c) 2014, Stanford University
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification, are permitted provided that the following conditions are met:
+# 1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following disclaimer in the documentation and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote products derived from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+'''
+Created on Oct 19, 2026
+
+Thread-safe pool of database connections, so that the main
+query and the many course runtime lookups of an EngagementComputer
+(or of several computers in one process) reuse a few connections
+instead of opening one per lookup:
+
+    pool = ConnectionPool(MySQLDB, size=4, host='localhost', user=u, passwd=p, db='Edx')
+    with pool.connection() as db:
+        for row in db.query('SELECT ...'):
+            ...
+
+Connections are opened lazily, up to size at a time; acquire()
+blocks while all are in use. A connection that has been idle for
+more than checkAfterSecs is tested with a cheap query before it is
+handed out, and replaced by a new one if the test fails. A
+connection whose user raised an exception inside connection()
+is tested the same way before it goes back to the pool.
+
+Connections cannot cross process boundaries; in parallel runs,
+every worker process builds its own pool (see the dbPoolSize
+argument of EngagementComputer).
+
+@author: paepcke
+'''
+import contextlib
+import threading
+import time
+
+
+class PoolExhaustedError(Exception):
+    pass
+
+
+class ConnectionPool(object):
+
+    def __init__(self, factory, size=2, checkAfterSecs=60, healthQuery='SELECT 1;', **connectKwargs):
+        '''
+        :param factory: called with connectKwargs to open a connection, e.g. MySQLDB
+        :type factory: callable
+        :param size: maximum number of open connections
+        :type size: int
+        :param checkAfterSecs: idle time after which a connection is tested
+            before reuse. 0: always test
+        :type checkAfterSecs: float
+        :param healthQuery: query that tests a connection
+        :type healthQuery: string
+        :param connectKwargs: keyword arguments for factory, such as host, user,
+            passwd, and db
+        :type connectKwargs: dict
+        '''
+        if size < 1:
+            raise ValueError('Pool size must be at least 1, not %s' % size)
+        self.factory = factory
+        self.size = size
+        self.checkAfterSecs = checkAfterSecs
+        self.healthQuery = healthQuery
+        self.connectKwargs = connectKwargs
+        # (connection, time it was released), most recently
+        # released last:
+        self.idle = []
+        # Guards idle and numOpen. Notified whenever a connection
+        # is released or closed, i.e. whenever a waiting acquire()
+        # may now get a connection, or room to open one:
+        self.available = threading.Condition(threading.Lock())
+        self.numOpen = 0
+        self.numConnects = 0
+        self.numReconnects = 0
+
+    def acquire(self, timeout=None):
+        '''
+        Return a healthy connection; open one if fewer than size
+        are open, else wait for one to be released.
+
+        :param timeout: seconds to wait; None: wait indefinitely
+        :type timeout: {float | None}
+        :raise PoolExhaustedError: if timeout expires
+        '''
+        deadline = None if timeout is None else time.time() + timeout
+        while True:
+            with self.available:
+                while len(self.idle) == 0 and self.numOpen >= self.size:
+                    if deadline is None:
+                        self.available.wait()
+                        continue
+                    remainingSecs = deadline - time.time()
+                    if remainingSecs <= 0:
+                        raise PoolExhaustedError('No database connection became free within %s seconds.' % timeout)
+                    self.available.wait(remainingSecs)
+                idleConnection = self.idle.pop() if len(self.idle) > 0 else None
+            if idleConnection is None:
+                connection = self._openIfRoom()
+                if connection is not None:
+                    return connection
+                # Another thread took the room:
+                continue
+            (connection, releaseTime) = idleConnection
+            if time.time() - releaseTime < self.checkAfterSecs or self._isHealthy(connection):
+                return connection
+            self._discard(connection)
+            self.numReconnects += 1
+
+    def release(self, connection):
+        '''
+        Return a connection to the pool.
+        '''
+        with self.available:
+            self.idle.append((connection, time.time()))
+            self.available.notify()
+
+    @contextlib.contextmanager
+    def connection(self, timeout=None):
+        '''
+        Context manager around acquire() and release(). If the
+        body raises, the connection is tested, and closed rather
+        than reused if it is broken.
+        '''
+        connection = self.acquire(timeout)
+        try:
+            yield connection
+        except:
+            if self._isHealthy(connection):
+                self.release(connection)
+            else:
+                self._discard(connection)
+            raise
+        else:
+            self.release(connection)
+
+    def closeIdle(self):
+        '''
+        Close all connections that are not in use. Connections
+        in use are closed when released and closeIdle() is called again.
+        '''
+        with self.available:
+            idleConnections = self.idle
+            self.idle = []
+        for (connection, _) in idleConnections:
+            self._discard(connection)
+
+    def _openIfRoom(self):
+        with self.available:
+            if self.numOpen >= self.size:
+                return None
+            self.numOpen += 1
+        try:
+            connection = self.factory(**self.connectKwargs)
+        except:
+            with self.available:
+                self.numOpen -= 1
+                self.available.notify()
+            raise
+        self.numConnects += 1
+        return connection
+
+    def _isHealthy(self, connection):
+        try:
+            for _ in connection.query(self.healthQuery):
+                pass
+            return True
+        except Exception:
+            return False
+
+    def _discard(self, connection):
+        with self.available:
+            self.numOpen -= 1
+            # Room for a waiting acquire() to open a new connection:
+            self.available.notify()
+        try:
+            connection.close()
+        except Exception:
+            pass
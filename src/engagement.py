@@ -75,6 +75,8 @@ import argparse
 import copy
 import datetime
 import getpass
+import itertools
+import json
 import numpy
 import os
 import re
@@ -85,6 +87,20 @@ import time
 
 from pymysql_utils.pymysql_utils import MySQLDB
 
+from columnarOutput import writeColumns, allDataColumns, weeklyEffortColumns, \
+    sessionsArray, weeklyEffortArray, summaryArray
+from connectionPool import ConnectionPool
+from compressedWriter import CompressedWriter, CODEC_EXTENSIONS, availableCodecs
+from checkpoint import CheckpointStore
+from engagementMetrics import RunMetrics
+from engagementResult import CourseEngagementResult
+from eventSources import MySQLEventSource, WindowedEventSource, buildEventQuery, parseTime
+from externalSort import ExternalSortEventSource, DEFAULT_BUDGET_MB
+from aggregators import newAggregators, writeAggregator, AGGREGATORS
+from studentSampling import StudentSample, SampledEventSource, bucketProportionIntervals, BUCKET_NAMES
+from mysqlResultWriter import MySQLResultWriter
+from sessionArchive import writeSessionArchive
+
 
 #from mysqldb import MySQLDB
 # Add json_to_relation source dir to $PATH
@@ -169,7 +185,25 @@ class EngagementComputer(object):
                 mySQLPwd=None, 
                 courseToProfile=None, 
                 sessionInactivityThreshold=30,
-                videoOnly=False):
+                videoOnly=False,
+                db=None,
+                courseRuntimes=None,
+                metricsInterval=None,
+                memoryMonitor=None,
+                progressReporter=None,
+                checkpointDir=None,
+                resume=False,
+                eventSource=None,
+                dbFactory=None,
+                dbPool=None,
+                dbPoolSize=2,
+                outOfCoreBudgetMB=None,
+                sortDir=None,
+                sampleFraction=None,
+                sampleSalt='',
+                windowStart=None,
+                windowEnd=None,
+                aggregators=None):
         '''
         Sets up one session-accounting run through a properly filled table (as
         per file level comment above.
@@ -193,11 +227,72 @@ class EngagementComputer(object):
         :type sessionInactivityThreshold: int
         :param videoOnly: if True, then only video events will be considered.
         :type videoOnly: boolean
+        :param db: an already open connection to use instead of connecting to 
+               MySQL on dbHost. Any object with MySQLDB's query() and close() will do. 
+        :type db: {MySQLDB | None}
+        :param courseRuntimes: course name --> (startDate, endDate). Courses found 
+               here are not looked up in Edx.CourseInfo.
+        :type courseRuntimes: {dict | None}
+        :param metricsInterval: if given, log a progress line with counters from
+               self.metrics at most every this many seconds during run().
+        :type metricsInterval: {float | None}
+        :param memoryMonitor: if given, records memory use at each wrapUpCourse(),
+               and enforces its memory budget. See memoryMonitor.py.
+        :type memoryMonitor: {MemoryMonitor | None}
+        :param progressReporter: if given, reports progress with ETAs during run().
+               See progressReporter.py.
+        :type progressReporter: {ProgressReporter | None}
+        :param checkpointDir: if given, each completed course is saved in this
+               directory as soon as it is done. See checkpoint.py.
+        :type checkpointDir: {string | None}
+        :param resume: if True, run() picks up the completed courses from
+               checkpointDir, and only queries the courses after them. If False,
+               old checkpoints in checkpointDir are removed when run() starts.
+        :type resume: boolean
+        :param eventSource: where run() gets its events from. Default: the
+               main query on db. With a file-based source, no database
+               connection is opened unless db is given. See eventSources.py.
+        :type eventSource: {EventSource | None}
+        :param dbFactory: called with MySQLDB's host, user, passwd, and db keyword
+               arguments whenever a database connection is needed. Default: MySQLDB.
+               See sqliteStandIn.py for a local replacement.
+        :type dbFactory: {callable | None}
+        :param dbPool: pool from which the main query and the course runtime
+               lookups take their connections; may be shared with other
+               computers in the same process. Default: a pool of dbPoolSize
+               connections made by dbFactory. See connectionPool.py.
+        :type dbPool: {ConnectionPool | None}
+        :param dbPoolSize: size of the default pool. The main query holds one
+               connection for all of run(), so this should be at least 2.
+        :type dbPoolSize: int
+        :param outOfCoreBudgetMB: if given, events are fetched unsorted, and sorted
+               by run() itself within this much memory, spilling sorted runs
+               to disk as needed. See externalSort.py.
+        :type outOfCoreBudgetMB: {float | None}
+        :param sortDir: directory for the spilled runs. Default: the system's
+               temp directory.
+        :type sortDir: {string | None}
+        :param sampleFraction: if given, only this share of all learners, chosen
+               deterministically by a hash of their anon_screen_name, is computed,
+               and the summary numbers are scaled up to estimates for all learners.
+               See studentSampling.py.
+        :type sampleFraction: {float | None}
+        :param sampleSalt: with sampleFraction: draws a different sample.
+        :type sampleSalt: string
+        :param windowStart: if given, only events at or after this time are read;
+               the condition is part of the main query. Sessions that began
+               before are cut at windowStart.
+        :type windowStart: {datetime | None}
+        :param windowEnd: if given, only events before this time are read.
+        :type windowEnd: {datetime | None}
+        :param aggregators: additional metrics, which are handed the sessions
+               of each course as it is wrapped up. Not with checkpointDir.
+               See aggregators.py.
+        :type aggregators: {[Aggregator] | None}
         '''
         self.dbHost = dbHost
         self.dbName = 'Edx'
-        self.mySQLUser = mySQLUser
-        self.mySQLPwd  = mySQLPwd
+        (self.mySQLUser, self.mySQLPwd) = EngagementComputer.mySQLCredentials(mySQLUser, mySQLPwd)
         if courseToProfile == "None":
             self.courseToProfile = None
         else:
@@ -213,21 +308,126 @@ class EngagementComputer(object):
         # b/c we didn't find it:
         self.runtimesNotFoundCourses = []
         
+        # Place to hold all stats for one class
+        self.classStats = {}
+        if sampleFraction is None:
+            self.sample = None
+        else:
+            self.sample = StudentSample(sampleFraction, salt=sampleSalt)
+        if windowStart is not None and windowEnd is not None and windowStart >= windowEnd:
+            raise ValueError('Time window start (%s) must be before its end (%s)' % (windowStart, windowEnd))
+        if windowStart is None and windowEnd is None:
+            self.window = None
+        else:
+            self.window = (windowStart, windowEnd)
+        if aggregators and checkpointDir is not None:
+            # Courses restored from checkpoints never reach
+            # the aggregators:
+            raise ValueError('Aggregators cannot be combined with checkpoints')
+        self.aggregators = list(aggregators) if aggregators is not None else []
+        # Called by wrapUpSession() for each session:
+        self.sessionListeners = [aggregator.sessionClosed for aggregator in self.aggregators if aggregator.closesSessions]
+        # For sampled runs, course name --> bootstrap intervals of the
+        # median bucket proportions; see studentSampling.py:
+        self.bucketIntervals = {}
+        # Mergeable form of classStats plus weekly
+        # effort: course name --> CourseEngagementResult:
+        self.courseResults = {}
+        # Re-initialized in run(); present here so that
+        # results can be added and written without a run:
+        self.allStudentsDicts = {}
+        self.allStudentsWeeklyEffortDict = {}
+        # Sessions of courses that were computed elsewhere,
+        # in column form: course name --> SessionColumns:
+        self.courseSessionColumns = {}
+        # Likewise for weekly effort; the CourseEngagementResults
+        # of these courses have an empty weeklyEffort dict:
+        # course name --> WeeklyEffortColumns:
+        self.courseWeeklyEffortColumns = {}
+        self.courseRuntimes = courseRuntimes
+        # Counters and timers; see engagementMetrics.py. Log
+        # through a lambda, so that replacing self.log works:
+        self.metrics = RunMetrics(log=lambda msg: self.log(msg), reportInterval=metricsInterval)
+        self.memoryMonitor = memoryMonitor
+        self.progressReporter = progressReporter
+        if progressReporter is not None and progressReporter.log is None:
+            progressReporter.log = lambda msg: self.log(msg)
+        if checkpointDir is None:
+            self.checkpointStore = None
+        else:
+            runKey = {'courseToProfile' : self.courseToProfile,
+                      'coursesStartYearsArr' : coursesStartYearsArr,
+                      'sessionInactivityThreshold' : sessionInactivityThreshold,
+                      'videoOnly' : videoOnly}
+            if self.sample is not None:
+                runKey['sample'] = self.sample.toDict()
+            if self.window is not None:
+                runKey['window'] = [str(bound) if bound is not None else None for bound in self.window]
+            self.checkpointStore = CheckpointStore(checkpointDir, runKey)
+        self.resume = resume
+        self.eventSource = eventSource
+        self.outOfCoreBudgetMB = outOfCoreBudgetMB
+        self.sortDir = sortDir
+        self.dbFactory = dbFactory if dbFactory is not None else MySQLDB
+        # Connections are only opened on demand, so
+        # an unused default pool costs nothing:
+        self.ownsDbPool = dbPool is None
+        if dbPool is None:
+            self.dbPool = EngagementComputer.newDbPool(self.dbFactory, dbPoolSize, self.dbHost,
+                                                       self.mySQLUser, self.mySQLPwd)
+        else:
+            self.dbPool = dbPool
+        # True if self.db must go back to self.dbPool
+        # rather than be closed:
+        self.dbFromPool = False
+        if db is None and eventSource is None:
+            self.db = self.dbPool.acquire()
+            self.dbFromPool = True
+        else:
+            self.db = db
+        
+    @staticmethod
+    def mySQLCredentials(mySQLUser, mySQLPwd):
+        '''
+        Fill in defaults for MySQL credentials: the invoking user,
+        and the password in that user's .ssh/mysql file, or ''.
+
+        :return: (user, password)
+        :rtype: (string, string)
+        '''
+        user = mySQLUser
+        pwd = mySQLPwd
         if mySQLUser is None:
-            self.mySQLUser = getpass.getuser()
+            user = getpass.getuser()
         if mySQLPwd is None:
             # Try to get it from .ssh/mysql file of user
             try:
                 homeDir = os.path.expanduser('~' + mySQLUser)
                 pwdFile = os.path.join(homeDir,'.ssh/mysql')
                 with open(pwdFile, 'r') as fd:
-                    self.mySQLPwd = fd.readline().strip()
+                    pwd = fd.readline().strip()
             except Exception:
-                self.mySQLPwd = ''
-        # Place to hold all stats for one class
-        self.classStats = {}
-        self.db = MySQLDB(host=self.dbHost, user=self.mySQLUser, passwd=self.mySQLPwd, db='Edx')
-        
+                pwd = ''
+        return (user, pwd)
+
+    @staticmethod
+    def newDbPool(dbFactory=None, dbPoolSize=2, dbHost='localhost', mySQLUser=None, mySQLPwd=None):
+        '''
+        Return a ConnectionPool to the Edx database, like the default
+        pool of an EngagementComputer with the same arguments. For
+        sharing one pool among several computers (see the dbPool
+        argument of __init__()).
+
+        :rtype: ConnectionPool
+        '''
+        (mySQLUser, mySQLPwd) = EngagementComputer.mySQLCredentials(mySQLUser, mySQLPwd)
+        return ConnectionPool(dbFactory if dbFactory is not None else MySQLDB,
+                              size=dbPoolSize,
+                              host=dbHost,
+                              user=mySQLUser,
+                              passwd=mySQLPwd,
+                              db='Edx')
+
     def run(self):
         '''
         Run the analysis. In spite of this method name, the EngagementComputer
@@ -307,64 +507,62 @@ class EngagementComputer(object):
         TIME_INDEX      = 2
         IS_VIDEO_INDEX  = 3
         
+        # Row counters are kept locally in the loop, and
+        # passed to self.metrics every PROGRESS_ROWS rows:
+        self.metrics.reset()
+        self.metrics.startRun()
+        progressRows = RunMetrics.PROGRESS_ROWS
+        rowsFetched = 0
+        rowsFilteredCourses = 0
+        rowsFilteredStudents = 0
+        # Courses restored from checkpoints:
+        completedCourses = set()
+        afterCourse = None
+        if self.checkpointStore is not None:
+            if self.resume:
+                completedCourses = set(self.loadCheckpoints())
+                afterCourse = self.checkpointStore.lastCompleted
+            else:
+                self.checkpointStore.clear()
+        if self.db is None and self.eventSource is None:
+            # Connection was returned to the pool by an earlier run():
+            self.db = self.dbPool.acquire()
+            self.dbFromPool = True
         try:
+            if self.progressReporter is not None:
+                self.log('Estimating row counts for progress reports...')
+                self.progressReporter.start(self.db, self.courseToProfile)
             self.log('About to start the query; will take a while...')
             queryStartTime = time.time()
             queryEndTimeReported = False
             # Currently not following a sequence
             # of video sessions:
             inVideoSession = False
-            if self.courseToProfile is None:
-                # Profile all courses. Takes a loooong time.
-                # consider disallowing.
-                # The right(event_type,254) protects function
-                # isUserEvent() from event_type values larger than
-                # 255. We take the trailing 255, b/c sometimes
-                # the event is the last part of a long URL:
-                mysqlCmd = '''SELECT *
-		  	        FROM  (
-		  	        	SELECT course_display_name,
-		  	        	       anon_screen_name,
-		  	        	       time,
-		  	        	       IF((event_type = 'play_video' OR 
-                                                   event_type = 'stop_video' OR 
-                                                   event_type = 'load_video' OR 
-                                                   event_type = 'pause_video' OR 
-                                                   event_type = 'seek_video' OR 
-                                                   event_type = 'speed_change_video'),1,0) AS isVideo
-       	                	          FROM Edx.EventXtract 
-      	                	         WHERE isUserEvent(right(event_type, 254))
-		  	                 UNION ALL
-                                         SELECT course_display_name, EdxPrivate.idForum2Anon(forum_uid) AS anon_screen_name, created_at AS time, 0 AS isVideo
-                                           FROM EdxForum.contents
-                                       ) AS AllData
-                             ORDER BY course_display_name, anon_screen_name, time;'''
+            if self.eventSource is None:
+                # The sample is drawn by the query:
+                eventSource = MySQLEventSource(self.db, sample=self.sample, window=self.window)
             else:
-                mysqlCmd = '''SELECT *
-		  	        FROM  (
-		  	                SELECT course_display_name,
-                                               anon_screen_name,
-                                               time,
-                                               IF((event_type = 'play_video' OR 
-                                                   event_type = 'stop_video' OR
-                                                   event_type = 'load_video' OR 
-                                                   event_type = 'pause_video' OR 
-                                                   event_type = 'seek_video' OR 
-                                                   event_type = 'speed_change_video'),1,0) AS isVideo
-                                          FROM Edx.EventXtract
-     	                	         WHERE course_display_name = '%s'
-  	  	                           AND isUserEvent(right(event_type, 254))
-                                         UNION ALL
-                                         SELECT course_display_name, EdxPrivate.idForum2Anon(forum_uid) AS anon_screen_name, created_at AS time, 0 AS isVideo
-		  	                   FROM EdxForum.contents
-		  	                  WHERE course_display_name = '%s'
-		  	               ) AS AllData
-                              ORDER BY course_display_name, anon_screen_name, time;''' % (self.courseToProfile, self.courseToProfile)
-                
-            queryIterator = self.db.query(mysqlCmd)
+                eventSource = self.eventSource
+                if self.window is not None:
+                    eventSource = WindowedEventSource(eventSource, self.window)
+                if self.sample is not None:
+                    eventSource = SampledEventSource(eventSource, self.sample)
+            if self.outOfCoreBudgetMB is not None:
+                eventSource = ExternalSortEventSource(eventSource, budgetMB=self.outOfCoreBudgetMB, tmpDir=self.sortDir)
+            queryIterator = itertools.chain.from_iterable(eventSource.batches(self.courseToProfile, afterCourse))
                  
             for activityRecord in queryIterator:
+                rowsFetched += 1
+                if rowsFetched % progressRows == 0:
+                    self.metrics.progress(rowsFetched, rowsFilteredCourses, rowsFilteredStudents)
+                    if self.memoryMonitor is not None:
+                        self.memoryMonitor.check(self, self.currCourse)
+                    if self.progressReporter is not None:
+                        self.progressReporter.update(rowsFetched)
                 if not queryEndTimeReported:
+                    self.metrics.queryDone()
+                    if self.progressReporter is not None:
+                        self.progressReporter.queryDone()
                     self.log('Query done in %s' % str(datetime.timedelta(seconds=(time.time() - queryStartTime))))
                     self.log('Beginning computation.')
                     queryEndTimeReported = True
@@ -374,6 +572,9 @@ class EngagementComputer(object):
                              'isVideo'             : activityRecord[IS_VIDEO_INDEX]}
                 # Check whether it's a demo or sandbox course:
                 if self.filterCourses(currEvent):
+                    rowsFilteredCourses += 1
+                    continue
+                if completedCourses and currEvent['course_display_name'] in completedCourses:
                     continue
                 
                 # If we are only to pay attention to 
@@ -404,6 +605,7 @@ class EngagementComputer(object):
                     
                 # Is this an invalid student?                
                 if self.filterStudents(currEvent['anon_screen_name']):
+                    rowsFilteredStudents += 1
                     continue
                 if prevEvent is None:
                     # First event of this course:
@@ -426,10 +628,20 @@ class EngagementComputer(object):
                         # desired year:
                         if not self.courseStartDate.year in self.coursesStartYearsArr:
                             continue
+                    # Same bookkeeping as when the query moves on to
+                    # the next course below, so that a run which starts
+                    # mid-query (resume, retry, or one course per worker)
+                    # computes the same sessions as one that doesn't:
                     self.sessionStartTime = currEvent['eventDateTime']
+                    self.currStudent = currEvent['anon_screen_name']
                     self.currCourse = currEvent['course_display_name']
+                    numActiveLearners = 0
+                    currStudentCounted = False
+                    activeLearners    = {}
                     prevEvent = currEvent
                     self.log("Starting on course %s..." % currEvent['course_display_name'])
+                    if self.progressReporter is not None:
+                        self.progressReporter.startCourse(self.currCourse, rowsFetched)
                     continue
 
                 if currEvent['course_display_name'] != self.currCourse:
@@ -437,7 +649,8 @@ class EngagementComputer(object):
                     # Account for the last session of current student in the current
                     # class:
                     self.wrapUpSession(self.currStudent, prevEvent['isVideo'], self.timeSpentThisSession, prevEvent['eventDateTime'])
-                    self.wrapUpCourse(self.currCourse, self.studentSessionsDict, numActiveLearners)
+                    self.wrapUpCourse(self.currCourse, self.studentSessionsDict, numActiveLearners, activeLearners.keys())
+                    self.checkpointCourse(self.currCourse)
                     # Start a new course:
                     self.currStudent = currEvent['anon_screen_name']
                     self.currCourse  = currEvent['course_display_name']
@@ -450,6 +663,8 @@ class EngagementComputer(object):
                     self.sessionStartTime = currEvent['eventDateTime']
                     prevEvent = currEvent
                     self.log("Starting on course %s..." % self.currCourse)
+                    if self.progressReporter is not None:
+                        self.progressReporter.startCourse(self.currCourse, rowsFetched)
                     continue
                 # Steady state: Next event in same course as
                 # previous event:
@@ -497,18 +712,98 @@ class EngagementComputer(object):
                     self.wrapUpSession(self.currStudent, currEvent['isVideo'], self.timeSpentThisSession, currEvent['eventDateTime'])
                 self.sessionStartTime = currEvent['eventDateTime']
                 if self.currCourse is not None:
-                    self.wrapUpCourse(self.currCourse, self.studentSessionsDict, numActiveLearners)
+                    self.wrapUpCourse(self.currCourse, self.studentSessionsDict, numActiveLearners, activeLearners.keys())
+                    self.checkpointCourse(self.currCourse)
             if not queryEndTimeReported:
                 # Query above yielded an empty set, and we
                 # never reported that the query finished:
+                self.metrics.queryDone()
                 self.log('Query done, returning zero results')
+            if self.outOfCoreBudgetMB is not None:
+                self.log('Sorted %d events out of core; %d run(s), %d bytes spilled.' %
+                         (eventSource.sorter.numEvents, len(eventSource.sorter.runPaths), eventSource.sorter.spilledBytes))
+            if self.progressReporter is not None:
+                self.progressReporter.finish(rowsFetched)
 
         finally:
-            if self.db is not None:
+            if self.eventSource is not None:
+                try:
+                    self.eventSource.close()
+                except Exception as e:
+                    self.logErr('Could not close event source: %s' % `e`);
+            self.metrics.progress(rowsFetched, rowsFilteredCourses, rowsFilteredStudents)
+            self.metrics.endRun()
+            if self.progressReporter is not None:
+                # No-op unless an exception is on its way:
+                self.progressReporter.finish(rowsFetched, state='failed')
+            self.closeDb()
+
+    def closeDb(self):
+        '''
+        Release the main query's connection: back to the pool if it
+        came from there, else close it. Idle connections of the
+        default pool are closed as well.
+        '''
+        if self.db is not None:
+            if self.dbFromPool:
+                self.dbPool.release(self.db)
+                self.db = None
+                self.dbFromPool = False
+            else:
                 try:
                     self.db.close()
                 except Exception as e:
-                    self.logErr('Could not close activities db: ' % `e`);
+                    self.logErr('Could not close activities db: %s' % `e`);
+        if self.ownsDbPool:
+            self.dbPool.closeIdle()
+
+    def loadCheckpoints(self):
+        '''
+        Restore the courses that an interrupted run completed.
+        Their results replace any results this computer already
+        holds for them.
+
+        :return: names of the restored courses, in query order
+        :rtype: [string]
+        '''
+        completed = self.checkpointStore.resume()
+        for courseName in completed:
+            (courseResult, studentSessionsDict) = self.checkpointStore.loadCourse(courseName)
+            if courseResult is not None:
+                self.courseResults[courseName] = courseResult
+                self.classStats[courseName] = courseResult.statsTuple()
+                self.allStudentsWeeklyEffortDict[courseName] = courseResult.weeklyEffort
+            self.allStudentsDicts[courseName] = studentSessionsDict
+        if len(completed) > 0:
+            self.log('Resuming after %d completed courses; last was %s.' % (len(completed), completed[-1]))
+        return completed
+
+    def checkpointCourse(self, courseName):
+        '''
+        Save a course that wrapUpCourse() just finished, if
+        checkpointing is on.
+        '''
+        if self.checkpointStore is None:
+            return
+        try:
+            studentSessionsDict = self.allStudentsDicts[courseName]
+        except KeyError:
+            # Spilled to disk by the memory monitor:
+            studentSessionsDict = self.courseSessionColumns[courseName].toSessionsDict()
+        self.checkpointStore.saveCourse(courseName, self.courseResults.get(courseName), studentSessionsDict)
+
+    def eventQuery(self, afterCourse=None):
+        '''
+        Return the main query of run(). See run() for an
+        explanation, and eventSources.buildEventQuery().
+
+        :param afterCourse: if given, only courses that sort after this
+               one are queried. Used to resume from checkpoints.
+        :type afterCourse: {string | None}
+        :return: SQL statement
+        :rtype: string
+        '''
+        return buildEventQuery(self.courseToProfile, afterCourse)
 
     def addTimeToSession(self, dateTimePrevEvent, dateTimeCurrEvent, prevEventWasVideo, timeSpentSoFar):
         '''
@@ -575,6 +870,9 @@ class EngagementComputer(object):
         except KeyError:
             self.studentSessionsDict[currentStudent] = []
         self.studentSessionsDict[currentStudent].append((self.sessionStartTime, newTimeSpentSoFar, self.numEventsThisSession))
+        for sessionClosed in self.sessionListeners:
+            sessionClosed(self.currCourse, currentStudent, self.sessionStartTime, newTimeSpentSoFar, self.numEventsThisSession)
+        self.metrics.sessionsCreated += 1
         self.timeSpentThisSession = 0
         
         self.initOneSession(dateTimeNewSessionStart)
@@ -587,7 +885,7 @@ class EngagementComputer(object):
         self.sessionStartTime = dateTimeNewSessionStart
 
             
-    def wrapUpCourse(self, courseName, studentSessionsDict, numActiveLearners):
+    def wrapUpCourse(self, courseName, studentSessionsDict, numActiveLearners, activeLearners=None):
         '''
         Called when all students of one class have been
         processed. This method receives a dict that maps
@@ -608,7 +906,14 @@ class EngagementComputer(object):
         :param numActiveLearners: number of learners who created at least
                one 'real' event.
         :type numActiveLearners: int
+        :param activeLearners: anon_screen_names of the active learners. Kept
+               in the course's CourseEngagementResult, so that results from
+               partial runs can be merged without double-counting learners.
+               If None, the result holds numActiveLearners, and cannot be merged.
+        :type activeLearners: {[string] | None}
         '''
+        wrapUpStartTime = time.time()
+        aggregatorsFed = False
         try:
             # Data struct to hold student --> [[week0,x],[week1,y],...],
             # where x,y,... are minutes of engagement.
@@ -632,8 +937,10 @@ class EngagementComputer(object):
             totalStudentSessions    = 0
             
             studentSessionsLeftToDo = {}
+            # For sampled runs: student --> student-weeks in each median bucket:
+            studentBucketCounts = {} if self.sample is not None else None
             
-            for weekNum in range(numWeeks+1):
+            for weekNum in self.windowWeeks(startDate, numWeeks):
                 weekStart = startDate + weekNum * datetime.timedelta(weeks=1)
                 weekEnd   = weekStart + datetime.timedelta(weeks=1)
                 for student in self.studentSessionsDict.keys():
@@ -700,10 +1007,15 @@ class EngagementComputer(object):
                     studentMedianThisWeek = round(studentMedianThisWeek / 60.0)
                     if studentMedianThisWeek < 20:
                         oneToTwentyMin += 1
+                        bucket = 0
                     elif studentMedianThisWeek < 60:
                         twentyoneToSixtyMin += 1
+                        bucket = 1
                     else:
                         greaterSixtyMin += 1
+                        bucket = 2
+                    if studentBucketCounts is not None:
+                        studentBucketCounts.setdefault(student, [0, 0, 0])[bucket] += 1
                     sumEffortThisStudentThisWeek = sum(thisWeekThisStudentSessionList)
                     # Update this student's efforts with the effort expended this week:
                     # First occurrence of this student?
@@ -714,17 +1026,115 @@ class EngagementComputer(object):
                     thisStudentRecord.append([weekNum, sumEffortThisStudentThisWeek])  
                     totalEffortAllStudents += sumEffortThisStudentThisWeek
                         
-            self.classStats[courseName] = (numActiveLearners, totalStudentSessions, int(round(totalEffortAllStudents)), oneToTwentyMin, twentyoneToSixtyMin, greaterSixtyMin)
+            # Without names, the result keeps the count, but
+            # cannot be merged:
+            courseResult = CourseEngagementResult(courseName,
+                                                  activeLearners=activeLearners,
+                                                  numActiveLearners=numActiveLearners,
+                                                  totalStudentSessions=totalStudentSessions,
+                                                  totalEffortAllStudents=totalEffortAllStudents,
+                                                  oneToTwentyMin=oneToTwentyMin,
+                                                  twentyoneToSixtyMin=twentyoneToSixtyMin,
+                                                  greaterSixtyMin=greaterSixtyMin,
+                                                  weeklyEffort=studentPerWeekEffort,
+                                                  sampleFraction=self.sample.fraction if self.sample is not None else 1.0)
+            if studentBucketCounts is not None:
+                self.bucketIntervals[courseName] = bucketProportionIntervals(list(studentBucketCounts.values()))
+                self.log('%s: median bucket proportions in a %g%% sample: %s' %
+                         (courseName, 100 * self.sample.fraction,
+                          ', '.join(['%s %.3f [%.3f, %.3f]' % ((bucketName,) + self.bucketIntervals[courseName][bucketName])
+                                     for bucketName in BUCKET_NAMES if bucketName in self.bucketIntervals[courseName]])))
+            courseResult = self.addCourseResult(courseResult)
+            studentPerWeekEffort = courseResult.weeklyEffort
+            if len(self.aggregators) > 0:
+                self.feedAggregators(courseName, startDate, endDate, courseResult)
+            aggregatorsFed = True
         finally:
+            if not aggregatorsFed:
+                # Lets aggregators drop what sessionClosed() kept:
+                for aggregator in self.aggregators:
+                    aggregator.courseSkipped(courseName)
             # Save this course's record of all student sessions
             self.allStudentsDicts[courseName] = self.studentSessionsDict
             self.allStudentsWeeklyEffortDict[courseName] = studentPerWeekEffort
+            if self.memoryMonitor is not None:
+                self.memoryMonitor.courseDone(self, courseName)
             # Start a new sessions record for
             # the next course we'll tackle: 
             self.studentSessionsDict = {}
+            self.metrics.courseWrappedUp(courseName, time.time() - wrapUpStartTime)
             self.log("Done with course %s." % courseName)
         return True
         
+    def feedAggregators(self, courseName, startDate, endDate, courseResult):
+        '''
+        Hand one wrapped-up course, with all its sessions,
+        to each aggregator. See aggregators.py.
+        '''
+        for aggregator in self.aggregators:
+            aggregator.startCourse(courseName, startDate, endDate)
+        addSessions = [aggregator.addSession for aggregator in self.aggregators]
+        for (student, sessions) in self.studentSessionsDict.items():
+            for (sessionStart, sessionSecs, numEvents) in sessions:
+                # Skipped as in allDataIterator():
+                if not isinstance(sessionStart, datetime.datetime):
+                    continue
+                for addSession in addSessions:
+                    addSession(courseName, student, sessionStart, sessionSecs, numEvents)
+        for aggregator in self.aggregators:
+            aggregator.endCourse(courseName, courseResult)
+
+    def addCourseResult(self, courseResult):
+        '''
+        Fold one (partial) course result into this computer's
+        results. If a result for the same course is already
+        present, the two are merged. Results computed by other
+        processes, machines, or for other time slices are
+        combined this way before calling writeResultsToDisk().
+
+        :param courseResult: result to add
+        :type courseResult: CourseEngagementResult
+        :return: the now current result for the course
+        :rtype: CourseEngagementResult
+        '''
+        courseName = courseResult.courseName
+        try:
+            courseResult = self.courseResults[courseName].merge(courseResult)
+        except KeyError:
+            pass
+        self.courseResults[courseName] = courseResult
+        self.classStats[courseName] = courseResult.statsTuple()
+        return courseResult
+
+    def addCourseSessions(self, courseName, sessionColumns):
+        '''
+        Add the sessions of a course that was computed elsewhere,
+        for instance by a worker process. The columns are kept as
+        they are, without being decoded, until allDataIterator()
+        visits them.
+
+        :param courseName: course_display_name of the course
+        :type courseName: string
+        :param sessionColumns: the course's sessions
+        :type sessionColumns: SessionColumns
+        '''
+        self.courseSessionColumns[courseName] = sessionColumns
+
+    def addCourseWeeklyEffort(self, courseName, weeklyEffortColumns):
+        '''
+        Add the weekly effort of a course that was computed elsewhere,
+        such as by a worker process, to go with a course result whose
+        weeklyEffort dict is empty. Like addCourseSessions(), keeps the
+        columns as they are; the writers and iterWeeklyEffort() read
+        them directly.
+
+        :param courseName: course_display_name of the course
+        :type courseName: string
+        :param weeklyEffortColumns: the course's weekly effort
+        :type weeklyEffortColumns: WeeklyEffortColumns
+        '''
+        self.courseWeeklyEffortColumns[courseName] = weeklyEffortColumns
+
     def filterStudents(self, anon_screen_name):
         if anon_screen_name in ["9c1185a5c5e9fc54612808977ee8f548b2258d31", 
                                 'c8ced366_1048_4b4a_8e36_aa60f7b53dd8', 
@@ -770,26 +1180,29 @@ class EngagementComputer(object):
             could not be found
         :rtype: (datetime, datetime)
         '''
+        if self.courseRuntimes is not None and courseName in self.courseRuntimes:
+            return self.courseRuntimes[courseName]
+        if self.eventSource is not None:
+            runtime = self.eventSource.courseRuntime(courseName)
+            if runtime is not None:
+                return runtime
         try:
-            try:
-                runtimeLookupDb = MySQLDB(host=self.dbHost, user=self.mySQLUser, passwd=self.mySQLPwd, db=EngagementComputer.EVENT_XTRACT_TABLE_DB)
-            except Exception as e:
-                self.logErr('While looking up course start/end times in getCourseRuntime(): %s' % `e`)
-                return(None,None)
-            
-            courseRunIt = runtimeLookupDb.query("SELECT start_date, end_date FROM Edx.CourseInfo WHERE course_display_name = '%s';" % courseName)
-            try:
-                (startDate, endDate) = courseRunIt.next()
-                # For courses without end time, make the end
-                # time the time of the most recent observed event:
-                if endDate is None:
-                    for lastDate in runtimeLookupDb.query("SELECT MAX(time) FROM Edx.EventXtract WHERE course_display_name = '%s';" % courseName):
-                        # The (single) result is a on-tuple
-                        # like: (datetime.datetime(2014, 8, 7, 3, 52, 15),):
-                        endDate = lastDate
-            except (StopIteration, IndexError):
-                (startDate, endDate) = (None, None) 
-            return (startDate, endDate) 
+            # Connection comes back to the pool at the end of
+            # the with, or is replaced if the lookup broke it:
+            with self.dbPool.connection() as runtimeLookupDb:
+                courseRunIt = runtimeLookupDb.query("SELECT start_date, end_date FROM Edx.CourseInfo WHERE course_display_name = '%s';" % courseName)
+                try:
+                    (startDate, endDate) = courseRunIt.next()
+                    # For courses without end time, make the end
+                    # time the time of the most recent observed event:
+                    if endDate is None:
+                        for lastDate in runtimeLookupDb.query("SELECT MAX(time) FROM Edx.EventXtract WHERE course_display_name = '%s';" % courseName):
+                            # The (single) result is a on-tuple
+                            # like: (datetime.datetime(2014, 8, 7, 3, 52, 15),):
+                            endDate = lastDate
+                except (StopIteration, IndexError):
+                    (startDate, endDate) = (None, None) 
+                return (startDate, endDate) 
             
 #             # The following commented code uses first and last observation,
 #             # instead of the CourseInfo table to determine course duration:
@@ -812,11 +1225,6 @@ class EngagementComputer(object):
         except Exception as e:
             self.logErr("While attempting lookup of course start/end times: '%s'" % `e`)
             return (None,None)
-        finally:
-            try:
-                runtimeLookupDb.close()
-            except Exception as e:
-                self.logErr('Could not close runtime lookup db: %s' % `e`);
   
     def allDataIterator(self):
         for courseName in self.allStudentsDicts.keys():
@@ -833,16 +1241,110 @@ class EngagementComputer(object):
                                                     dateMinutesTuple[2])   # num of events in session
                     except AttributeError as e:
                         self.logErr('In allDataIterator() dataMinutesTuple[0] was bad: (%s): %s' % (str(dateMinutesTuple),`e`));
+        for courseName in self.courseSessionColumns.keys():
+            for (student, sessionStart, sessionSecs, numEvents) in self.courseSessionColumns[courseName].iterSessions():
+                yield '%s,%s,%s,%s,%d,%d\n' % (courseName,
+                                              student,
+                                              sessionStart.date(),
+                                              sessionStart.time(),
+                                              sessionSecs,
+                                              numEvents)
+
+    def iterSessions(self, courseName=None):
+        '''
+        Lazily iterate over the sessions that run() computed, without
+        writing any files. Sessions whose start was never set to a
+        datetime are skipped, as in allDataIterator().
+
+        :param courseName: only sessions of this course; None for all courses
+        :type courseName: {string | None}
+        :return: (courseName, student, sessionStart, sessionSecs, numEvents) tuples
+        :rtype: generator
+        '''
+        for (course, sessionsByStudentDict) in self.allStudentsDicts.items():
+            if courseName is not None and course != courseName:
+                continue
+            for (student, sessionsArr) in sessionsByStudentDict.items():
+                for (sessionStart, sessionSecs, numEvents) in sessionsArr:
+                    if isinstance(sessionStart, datetime.datetime):
+                        yield (course, student, sessionStart, sessionSecs, numEvents)
+        for (course, sessionColumns) in self.courseSessionColumns.items():
+            if courseName is not None and course != courseName:
+                continue
+            for (student, sessionStart, sessionSecs, numEvents) in sessionColumns.iterSessions():
+                yield (course, student, sessionStart, sessionSecs, numEvents)
+
+    def iterWeeklyEffort(self, courseName=None):
+        '''
+        Lazily iterate over students' weekly effort, with 1-based
+        week numbers as in the weeklyEffort file.
 
-    def writeResultsToDisk(self):
+        :param courseName: only effort in this course; None for all courses
+        :type courseName: {string | None}
+        :return: (courseName, student, week, effortSecs) tuples
+        :rtype: generator
+        '''
+        for (course, courseResult) in self.courseResults.items():
+            if courseName is not None and course != courseName:
+                continue
+            for (student, studentWeeklyEffort) in courseResult.weeklyEffort.items():
+                for (weekNum, effortSecs) in studentWeeklyEffort:
+                    # Zero-based internally; 1-based in all outputs:
+                    yield (course, student, weekNum + 1, effortSecs)
+        for (course, weeklyEffortColumns) in self.courseWeeklyEffortColumns.items():
+            if courseName is not None and course != courseName:
+                continue
+            for (student, weekNum, effortSecs) in weeklyEffortColumns.iterEffort():
+                yield (course, student, weekNum + 1, effortSecs)
+
+    def iterSummary(self):
+        '''
+        Iterate over the per-course numbers of the summary file.
+
+        :return: (courseName, numActiveLearners, totalStudentSessions, totalEffortAllStudents,
+                  oneToTwentyMin, twentyoneToSixtyMin, greaterSixtyMin) tuples
+        :rtype: generator
+        '''
+        for (courseName, courseResult) in self.courseResults.items():
+            yield (courseName,) + courseResult.statsTuple()
+
+    def sessionsArray(self):
+        '''
+        All sessions as a NumPy structured array; see columnarOutput.sessionsArray().
+        '''
+        return sessionsArray(self)
+
+    def weeklyEffortArray(self):
+        '''
+        All weekly effort as a NumPy structured array; see columnarOutput.weeklyEffortArray().
+        '''
+        return weeklyEffortArray(self)
+
+    def summaryArray(self):
+        '''
+        The per-course summary as a NumPy structured array; see columnarOutput.summaryArray().
+        '''
+        return summaryArray(self)
+
+    def writeResultsToDisk(self, outputFormat='csv', compression=None):
         '''
         Assumes that run() has been called, and that therefore 
-        instance self.classStats is a dictionary with all computed
-        stats for each class. Computes three final results, and writes
+        instance self.courseResults is a dictionary with all computed
+        stats for each class. Partial results that were computed elsewhere
+        may have been folded in via addCourseResult(). Computes three final results, and writes
         them to three temp files. Returns three-tuple with names of
         those files. The files are tempfiles, and will therefore not
         be overwritten by multiple successive calls.
         
+        :param outputFormat: 'csv' for the usual text files, or 'npz' to have 
+                 the allData and weeklyEffort files written as binary column arrays 
+                 (see columnarOutput.py). The summary is always CSV.
+        :type outputFormat: string
+        :param compression: None for plain files, or the codec with which to 
+                 compress the three CSV files while they are written: 'gzip',
+                 'bz2', or, on Python 3, 'xz'. Compression runs on background
+                 threads (see compressedWriter.py). Not applicable to npz.
+        :type compression: {string | None}
         :return: Tri-tuple with paths to three files:
                  outFileSummary: one line per course with total sessions, cumulative median weekly effort and such.
                  outFileAll: big file with all sessions of each student in each class
@@ -850,37 +1352,44 @@ class EngagementComputer(object):
 
         :rtype: (string,string,string)
         '''
-        # If we considered only video events, we 
-        # add 'vidOnly' to each of the three result
-        # file names, else we don't:
-        if self.videoOnly:
-            videoNote = '_vidOnly_'
-        else:
-            videoNote = '_' 
-        if self.courseToProfile is None:
-            # Analysis was requested for all courses.
-            # The summary goes into one file:
-            outFileSummary = tempfile.NamedTemporaryFile(suffix='_engagementAllCourses%ssummary.csv' % videoNote, delete=False)
-            # File for all student engagement numbers:
-            outFileAll     = tempfile.NamedTemporaryFile(suffix='_engagementAllCourses%sallData.csv' % videoNote, delete=False)
-            # File for weekly student effort summary in each course:
-            outFileWeeklyEffort = tempfile.NamedTemporaryFile(suffix='_engagementAllCourses%sweeklyEffort.csv' % videoNote, delete=False)
+        writeStartTime = time.time()
+        if outputFormat not in ('csv', 'npz'):
+            raise ValueError("Output format must be 'csv' or 'npz', not '%s'" % outputFormat)
+        if compression is not None:
+            if outputFormat != 'csv':
+                raise ValueError("Compression is only available for csv output.")
+            if compression not in availableCodecs():
+                raise ValueError("Compression must be one of %s, not '%s'" % (', '.join(availableCodecs()), compression))
+            outputFormat += CODEC_EXTENSIONS[compression]
+            summaryFormat = 'csv' + CODEC_EXTENSIONS[compression]
         else:
-            # Analysis was requested for a single course.
-            # The summary goes into /tmp/engagement_<courseNameNoSpacesOrSlashes>_summary.csv:
-            courseNameNoSpaces = string.replace(string.replace(self.courseToProfile,' ',''), '/', '_')
-            outFileSummary = tempfile.NamedTemporaryFile(suffix='_engagement_%s%ssummary.csv' % (courseNameNoSpaces, videoNote), delete=False)
-            outFileAll     = tempfile.NamedTemporaryFile(suffix='_engagement_%s%sallData.csv' % (courseNameNoSpaces, videoNote), delete=False)
-            outFileWeeklyEffort = tempfile.NamedTemporaryFile(suffix='_engagement_%s%sweeklyEffort.csv' % (courseNameNoSpaces, videoNote), delete=False)
+            summaryFormat = 'csv'
+        # The summary goes into /tmp/<random>_engagementAllCourses_summary.csv, or, if
+        # analysis was requested for a single course, /tmp/<random>_engagement_<courseNameNoSpacesOrSlashes>_summary.csv:
+        outFileSummary = tempfile.NamedTemporaryFile(suffix=self.resultFileSuffix('summary', summaryFormat), delete=False)
+        # File for all student engagement numbers:
+        outFileAll     = tempfile.NamedTemporaryFile(suffix=self.resultFileSuffix('allData', outputFormat), delete=False)
+        # File for weekly student effort summary in each course:
+        outFileWeeklyEffort = tempfile.NamedTemporaryFile(suffix=self.resultFileSuffix('weeklyEffort', outputFormat), delete=False)
+        if compression is not None:
+            # Compress in the same pass, on background threads:
+            outFileSummary = CompressedWriter(outFileSummary, codec=compression)
+            outFileAll     = CompressedWriter(outFileAll, codec=compression)
+            outFileWeeklyEffort = CompressedWriter(outFileWeeklyEffort, codec=compression)
         try:
             # For classes that actually have results: write them:
-            if len(self.classStats.keys()) > 0:
+            if len(self.courseResults.keys()) > 0:
                 # Summary file:
                 outFileSummary.write('Platform,Course,NumActiveLearners,TotalEffortAllStudents(hrs),TotalStudentSessions,TotalEffortAllStudents(secs),MedPerWeekOneToTwenty,MedPerWeekTwentyoneToSixty,MedPerWeekGreaterSixty\n')
-                for className in self.classStats.keys():
-                    output = 'OpenEdX,' + className + ',' + re.sub(r'[\s()]','',str(self.classStats[className]))
+                for className in self.courseResults.keys():
+                    output = 'OpenEdX,' + className + ',' + re.sub(r'[\s()]','',str(self.courseResults[className].statsTuple()))
                     outFileSummary.write(output + '\n')
                 outFileSummary.flush()
+                if outputFormat == 'npz':
+                    # Bulk array writes instead of per-row formatting:
+                    writeColumns(outFileAll, allDataColumns(self))
+                    writeColumns(outFileWeeklyEffort, weeklyEffortColumns(self))
+                    return
                 # Big detail file    
                 outFileAll.write('Platform,Course,anon_screen_name,Date,Time,SessionLength(sec),NumEventsInSession\n')
                 for csvSessionRecord in self.allDataIterator():
@@ -890,9 +1399,9 @@ class EngagementComputer(object):
                 outFileWeeklyEffort.write('Platform,Course,anon_screen_name,Week,Effort (sec)\n')
                 # For all dicts of form {student1->[[weekNum0,xMins],[weekNum1,yMins],...,],
                 #                        student2->[[...]
-                for course in self.allStudentsWeeklyEffortDict.keys():
+                for course in self.courseResults.keys():
                     # Get one student's time engagement for all the weeks in this course:
-                    studentWeeklyEffortDict = self.allStudentsWeeklyEffortDict[course]
+                    studentWeeklyEffortDict = self.courseResults[course].weeklyEffort
                     for student in studentWeeklyEffortDict.keys():
                         # For this student get array of weekNum/time pairs:
                         studentWeeklyEffort = studentWeeklyEffortDict[student]
@@ -901,13 +1410,195 @@ class EngagementComputer(object):
                             # Add one to the course week-number to make 
                             # it 1-based:
                             outFileWeeklyEffort.write('OpenEdX,%s,%s,%d,%d\n' % (course,student,weekNumEffortPair[0]+1,weekNumEffortPair[1]))
+                for (course, weeklyEffortColumns) in self.courseWeeklyEffortColumns.items():
+                    for (student, weekNum, effortSecs) in weeklyEffortColumns.iterEffort():
+                        outFileWeeklyEffort.write('OpenEdX,%s,%s,%d,%d\n' % (course,student,weekNum+1,effortSecs))
                 outFileWeeklyEffort.flush()
         finally:
             outFileSummary.close()
             outFileAll.close()
             outFileWeeklyEffort.close()
+            for outFile in (outFileSummary, outFileAll, outFileWeeklyEffort):
+                self.metrics.outputBytes += os.path.getsize(outFile.name)
+            self.metrics.writeSecs += time.time() - writeStartTime
             return(outFileSummary.name,outFileAll.name,outFileWeeklyEffort.name)
         
+    def resultFileSuffix(self, kind, fileFormat):
+        '''
+        Return the end of the name of a result file, after the
+        random part of the temp file name: _engagementAllCourses_<kind>.<fileFormat>,
+        or _engagement_<courseNameNoSpacesOrSlashes>_<kind>.<fileFormat> for
+        single-course runs. Video-only runs have _vidOnly_ before the kind.
+
+        :param kind: 'summary', 'allData', 'weeklyEffort', or an aggregator name
+        :type kind: string
+        :param fileFormat: file extension, such as 'csv' or 'csv.gz'
+        :type fileFormat: string
+        :rtype: string
+        '''
+        # If we considered only video events, we 
+        # add 'vidOnly' to each of the result
+        # file names, else we don't:
+        if self.videoOnly:
+            videoNote = '_vidOnly_'
+        else:
+            videoNote = '_' 
+        if self.courseToProfile is None:
+            return '_engagementAllCourses%s%s.%s' % (videoNote, kind, fileFormat)
+        courseNameNoSpaces = string.replace(string.replace(self.courseToProfile,' ',''), '/', '_')
+        return '_engagement_%s%s%s.%s' % (courseNameNoSpaces, videoNote, kind, fileFormat)
+
+    def writeAggregatorsToDisk(self):
+        '''
+        Write the rows of each aggregator to a temp CSV file of its own,
+        named like the other result files (see resultFileSuffix()), with
+        the aggregator's name as the kind of file.
+
+        :return: aggregator name --> path of its file
+        :rtype: dict
+        '''
+        writeStartTime = time.time()
+        paths = {}
+        try:
+            for aggregator in self.aggregators:
+                with tempfile.NamedTemporaryFile(suffix=self.resultFileSuffix(aggregator.name, 'csv'), delete=False) as outFile:
+                    writeAggregator(aggregator, outFile)
+                paths[aggregator.name] = outFile.name
+                self.metrics.outputBytes += os.path.getsize(outFile.name)
+        finally:
+            self.metrics.writeSecs += time.time() - writeStartTime
+        return paths
+
+    def dataWatermark(self):
+        '''
+        Return a value that changes whenever the events of
+        self.courseToProfile (or of all courses) change, or None if
+        the event source cannot tell. See EventSource.watermark().
+        '''
+        if self.eventSource is not None:
+            return self.eventSource.watermark(self.courseToProfile)
+        with self.dbPool.connection() as db:
+            return MySQLEventSource(db).watermark(self.courseToProfile)
+
+    def cachedResults(self, resultCache, outputFormat='csv', compression=None):
+        '''
+        Return the three files of writeResultsToDisk() from the given
+        cache if this computation was done before on unchanged events.
+        Else run(), write the results, and cache them. Sources without
+        a watermark are never cached. Afterwards, self.resultsFromCache
+        tells which of the two happened.
+
+        :param resultCache: the cache to use
+        :type resultCache: ResultCache
+        :param outputFormat: see writeResultsToDisk()
+        :type outputFormat: string
+        :param compression: see writeResultsToDisk()
+        :type compression: {string | None}
+        :return: paths of the summary, allData, and weeklyEffort files. They
+            belong to the cache; see resultCache.py.
+        :rtype: (string,string,string)
+        '''
+        watermark = self.dataWatermark()
+        self.resultsFromCache = False
+        if watermark is None:
+            self.run()
+            return self.writeResultsToDisk(outputFormat=outputFormat, compression=compression)
+        params = {'courseToProfile' : self.courseToProfile,
+                  'coursesStartYearsArr' : self.coursesStartYearsArr,
+                  'sessionInactivityThreshold' : self.sessionInactivityThreshold,
+                  'videoOnly' : self.videoOnly,
+                  'outputFormat' : outputFormat,
+                  'compression' : compression,
+                  'watermark' : watermark}
+        if self.sample is not None:
+            params['sample'] = self.sample.toDict()
+        if self.window is not None:
+            params['window'] = [str(bound) if bound is not None else None for bound in self.window]
+        key = resultCache.key(**params)
+        cachedPaths = resultCache.get(key)
+        self.resultsFromCache = cachedPaths is not None
+        if cachedPaths is not None:
+            self.log('Using cached results %s.' % key)
+            # No run() to release the connection:
+            self.closeDb()
+            return tuple(cachedPaths)
+        self.run()
+        paths = self.writeResultsToDisk(outputFormat=outputFormat, compression=compression)
+        return tuple(resultCache.put(key, paths, params))
+
+    def writeResultsToDatabase(self, dbName='Engagement', method='insert', resultDb=None):
+        '''
+        Load the results that writeResultsToDisk() would write into
+        tables of a MySQL database, replacing earlier results of the same
+        courses one course at a time. See mysqlResultWriter.py for tables,
+        views, and how courses are swapped.
+
+        :param dbName: existing database for the result tables
+        :type dbName: string
+        :param method: 'insert' for multi-row INSERTs, or 'loadData' for
+            LOAD DATA LOCAL INFILE
+        :type method: string
+        :param resultDb: connection to use. Default: one from self.dbPool
+        :type resultDb: {MySQLDB | None}
+        :return: names of the courses that were written
+        :rtype: [string]
+        '''
+        writeStartTime = time.time()
+        try:
+            if resultDb is not None:
+                return MySQLResultWriter(resultDb, dbName=dbName, method=method).writeResults(self)
+            with self.dbPool.connection() as resultDb:
+                return MySQLResultWriter(resultDb, dbName=dbName, method=method).writeResults(self)
+        finally:
+            if self.ownsDbPool:
+                self.dbPool.closeIdle()
+            self.metrics.writeSecs += time.time() - writeStartTime
+
+    def writeSessionArchive(self, basePath=None):
+        '''
+        Write all sessions as an indexed archive, from which the
+        sessions of one learner in one course can be looked up
+        quickly. See sessionArchive.py.
+
+        :param basePath: path without extension for the archive's two files.
+            Default: a new name in the temp directory.
+        :type basePath: {string | None}
+        :return: paths of the archive's sessions file and index file
+        :rtype: (string, string)
+        '''
+        if basePath is None:
+            if self.courseToProfile is None:
+                prefix = 'engagementAllCourses_'
+            else:
+                prefix = 'engagement_%s_' % string.replace(string.replace(self.courseToProfile,' ',''), '/', '_')
+            basePath = tempfile.mktemp(prefix=prefix + 'archive_')
+        return writeSessionArchive(self, basePath)
+
+    def windowWeeks(self, courseStartDate, numWeeks):
+        '''
+        Return the zero-based numbers of the course weeks that
+        wrapUpCourse() visits: weeks 0 to numWeeks, or, in
+        time-windowed runs, those of them that overlap the window.
+        Week n spans courseStartDate + n weeks to one week later.
+
+        :param courseStartDate: start of the course's week 0
+        :type courseStartDate: datetime.datetime
+        :param numWeeks: last week of the course
+        :type numWeeks: int
+        :rtype: [int]
+        '''
+        firstWeek = 0
+        lastWeek = numWeeks
+        if self.window is not None:
+            (windowStart, windowEnd) = self.window
+            if windowStart is not None and windowStart > courseStartDate:
+                firstWeek = (windowStart - courseStartDate).days // 7
+            if windowEnd is not None:
+                # Last week that begins before windowEnd, i.e. the ceiling
+                # of the weeks from course start to windowEnd, minus one:
+                lastWeek = min(lastWeek, -((courseStartDate - windowEnd).days // 7) - 1)
+        return range(firstWeek, lastWeek + 1)
+
     def courseWeekNumber(self, courseStartDate, date):
         '''
         Given a course start date, and some other, later
@@ -1025,6 +1716,167 @@ if __name__ == '__main__':
                         dest='videoOnly',
                         default=False,
                         action='store_true');
+    parser.add_argument('--format',
+                        choices=['csv', 'npz'],
+                        default='csv',
+                        help='Format of the allData and weeklyEffort files: csv text (default),\n' +\
+                             '    or npz binary column arrays, readable with numpy.load().'
+                        )
+    parser.add_argument('--compress',
+                        choices=availableCodecs(),
+                        default=None,
+                        help='Compress the csv result files while writing them (xz needs Python 3).'
+                        )
+    parser.add_argument('--archive',
+                        help='Also write an indexed session archive for fast per-learner lookups\n' +\
+                             '    with sessionArchive.py.',
+                        dest='archive',
+                        default=False,
+                        action='store_true');
+    parser.add_argument('--workers',
+                        type=int,
+                        default=1,
+                        help='Number of worker processes among which to distribute the courses\n' +\
+                             '    when engagement is computed for all courses (default: 1).'
+                        )
+    parser.add_argument('--metricsFile',
+                        default=None,
+                        help='Write counters and timings of the run to this JSON file.'
+                        )
+    parser.add_argument('--metricsInterval',
+                        type=float,
+                        default=None,
+                        help='Log a progress line with row and session counts at most\n' +\
+                             '    every this many seconds during the computation.'
+                        )
+    parser.add_argument('--memoryReport',
+                        default=None,
+                        help='Record memory use at the end of each course, and write it to this JSON file.'
+                        )
+    parser.add_argument('--memoryBudgetMB',
+                        type=float,
+                        default=None,
+                        help='Resident memory in MB beyond which --onBudget is taken.'
+                        )
+    parser.add_argument('--onBudget',
+                        choices=['warn', 'spill'],
+                        default='warn',
+                        help='When over the memory budget: only warn (default), or also move the\n' +\
+                             '    sessions of completed courses to memory-mapped files on disk.'
+                        )
+    parser.add_argument('--traceAllocations',
+                        help='Record the source lines holding the most memory at the end of each\n' +\
+                             '    course (Python 3 only; slow).',
+                        dest='traceAllocations',
+                        default=False,
+                        action='store_true');
+    parser.add_argument('--progressInterval',
+                        type=float,
+                        default=None,
+                        help='Log rows processed, throughput, and ETAs for the current course\n' +\
+                             '    and the whole run at most every this many seconds.'
+                        )
+    parser.add_argument('--statusFile',
+                        default=None,
+                        help='Keep a JSON progress status in this file, for job monitors to poll.'
+                        )
+    parser.add_argument('--progressEstimate',
+                        choices=['tableStats', 'grouped'],
+                        default='tableStats',
+                        help='How rows of all courses are estimated for ETAs: the total from table statistics,\n' +\
+                             '    which is instant, but gives no course ETA (default), or per-course COUNT(*)\n' +\
+                             '    queries, which scan the event tables. Single-course runs always count their rows.'
+                        )
+    parser.add_argument('--checkpointDir',
+                        default=None,
+                        help='Save each completed course in this directory, so that an interrupted\n' +\
+                             '    run can be resumed with --resume.'
+                        )
+    parser.add_argument('--resume',
+                        help='Continue the run whose checkpoints are in --checkpointDir.',
+                        dest='resume',
+                        default=False,
+                        action='store_true');
+    parser.add_argument('--retries',
+                        type=int,
+                        default=0,
+                        help='With --checkpointDir: on failure, such as a lost database connection,\n' +\
+                             '    reconnect and resume up to this many times (default: 0).'
+                        )
+    parser.add_argument('--events',
+                        default=None,
+                        help='Read events from this file instead of MySQL: a CSV or TSV export\n' +\
+                             '    of course_display_name, anon_screen_name, time, isVideo, sorted in that\n' +\
+                             '    order, optionally .gz; or an .npz file made by eventSources.py.'
+                        )
+    parser.add_argument('--runtimes',
+                        default=None,
+                        help='With --events: CSV file of course_display_name, start_date, end_date.\n' +\
+                             '    Default: first and last event of each course.'
+                        )
+    parser.add_argument('--sqlite',
+                        default=None,
+                        help='Use the local SQLite stand-in databases in this directory instead\n' +\
+                             '    of MySQL; see sqliteStandIn.py.'
+                        )
+    parser.add_argument('--resultDb',
+                        default=None,
+                        help='Also load the results into tables of this MySQL database, replacing\n' +\
+                             '    earlier results of the same courses; see mysqlResultWriter.py.'
+                        )
+    parser.add_argument('--loadMethod',
+                        choices=['insert', 'loadData'],
+                        default='insert',
+                        help='How --resultDb tables are loaded: multi-row INSERTs, or\n' +\
+                             '    LOAD DATA LOCAL INFILE (default: insert).'
+                        )
+    parser.add_argument('--dbPoolSize',
+                        type=int,
+                        default=2,
+                        help='Database connections per process, shared by the main query and\n' +\
+                             '    the course runtime lookups; at least 2 (default: 2).'
+                        )
+    parser.add_argument('--outOfCore',
+                        help='Fetch events unsorted, and sort them here within --memoryBudgetMB\n' +\
+                             '    (default: %d MB), spilling sorted runs to disk; for runs that do not\n' % DEFAULT_BUDGET_MB +\
+                             '    fit in memory. See externalSort.py.',
+                        dest='outOfCore',
+                        default=False,
+                        action='store_true');
+    parser.add_argument('--sortDir',
+                        default=None,
+                        help='With --outOfCore: directory for the spilled runs (default: system temp dir).'
+                        )
+    parser.add_argument('--sampleFraction',
+                        type=float,
+                        default=None,
+                        help='Quick estimate: compute only this share of all learners (e.g. 0.05),\n' +\
+                             '    the same learners in every run, and scale the summary numbers up.'
+                        )
+    parser.add_argument('--sampleSalt',
+                        default='',
+                        help='With --sampleFraction: draw a different, independent sample.'
+                        )
+    parser.add_argument('--sampleReport',
+                        default=None,
+                        help='With --sampleFraction: write the median bucket proportions of each course,\n' +\
+                             '    with 95%% bootstrap confidence intervals, to this JSON file.'
+                        )
+    parser.add_argument('--start',
+                        default=None,
+                        help='Only use events at or after this time: YYYY-MM-DD or\n' +\
+                             "    'YYYY-MM-DD HH:MM:SS'. Weeks stay numbered from the course start."
+                        )
+    parser.add_argument('--end',
+                        default=None,
+                        help='Only use events before this time (exclusive); same formats as --start.'
+                        )
+    parser.add_argument('--aggregators',
+                        default=None,
+                        help='Comma-separated additional metrics to compute in the same run, each\n' +\
+                             '    written to a file of its own; any of %s.\n' % ', '.join(sorted(AGGREGATORS.keys())) +\
+                             '    Not with --workers or --checkpointDir. See aggregators.py.'
+                        )
     parser.add_argument('course',
                         action='store',
                         help='The course for which engagement is to be computed. Else: engagement for all courses.\n' +\
@@ -1040,6 +1892,43 @@ if __name__ == '__main__':
     
     
     args = parser.parse_args();
+    if args.compress is not None and args.format != 'csv':
+        parser.error('--compress only applies to --format csv.')
+    if (args.resume or args.retries > 0) and args.checkpointDir is None:
+        parser.error('--resume and --retries need --checkpointDir.')
+    if args.checkpointDir is not None and args.workers > 1:
+        parser.error('--checkpointDir cannot be combined with --workers.')
+    if args.events is not None and args.workers > 1:
+        parser.error('--events cannot be combined with --workers.')
+    if args.runtimes is not None and args.events is None:
+        parser.error('--runtimes needs --events.')
+    if args.dbPoolSize < 2:
+        parser.error('--dbPoolSize must be at least 2.')
+    if args.sampleFraction is not None and args.workers > 1:
+        parser.error('--sampleFraction cannot be combined with --workers.')
+    if args.sampleFraction is not None and not 0 < args.sampleFraction <= 1:
+        parser.error('--sampleFraction must be greater than 0, and at most 1.')
+    if (args.sampleSalt != '' or args.sampleReport is not None) and args.sampleFraction is None:
+        parser.error('--sampleSalt and --sampleReport need --sampleFraction.')
+    try:
+        windowStart = parseTime(args.start + ' 00:00:00' if len(args.start) == 10 else args.start) if args.start is not None else None
+        windowEnd = parseTime(args.end + ' 00:00:00' if len(args.end) == 10 else args.end) if args.end is not None else None
+    except ValueError as e:
+        parser.error('--start and --end must be YYYY-MM-DD or YYYY-MM-DD HH:MM:SS: %s' % str(e))
+    if windowStart is not None and windowEnd is not None and windowStart >= windowEnd:
+        parser.error('--start must be before --end.')
+    try:
+        aggregators = newAggregators(args.aggregators.split(',')) if args.aggregators is not None else None
+    except ValueError as e:
+        parser.error(str(e))
+    if aggregators is not None and args.workers > 1:
+        parser.error('--aggregators cannot be combined with --workers.')
+    if aggregators is not None and args.checkpointDir is not None:
+        parser.error('--aggregators cannot be combined with --checkpointDir.')
+    if args.outOfCore and args.workers > 1:
+        parser.error('--outOfCore cannot be combined with --workers.')
+    if args.sortDir is not None and not args.outOfCore:
+        parser.error('--sortDir needs --outOfCore.')
     if args.user is None:
         user = getpass.getuser()
     else:
@@ -1091,14 +1980,92 @@ if __name__ == '__main__':
     # -------------- Run the Computation ---------------
 
     invokingUser = getpass.getuser()
+    if args.memoryReport is not None or args.memoryBudgetMB is not None or args.traceAllocations:
+        from memoryMonitor import MemoryMonitor
+        # Watches this process only; with --workers, that is
+        # the process that gathers all results:
+        memoryMonitor = MemoryMonitor(budgetMb=args.memoryBudgetMB, onBudget=args.onBudget, trace=args.traceAllocations)
+    else:
+        memoryMonitor = None
+    if args.progressInterval is not None or args.statusFile is not None:
+        from progressReporter import ProgressReporter
+        progressReporter = ProgressReporter(interval=args.progressInterval if args.progressInterval is not None else 60,
+                                            statusFile=args.statusFile,
+                                            estimateMethod=args.progressEstimate)
+    else:
+        progressReporter = None
     # Set mysql password to None, which will cause
     # the __init__() method to check ~/.ssh...
-    comp = EngagementComputer(coursesStartYearsArr=years, dbHost='localhost', mySQLUser=invokingUser, mySQLPwd=None, courseToProfile=courseName, videoOnly=args.videoOnly)
-    comp.run()
+    if args.sqlite is not None:
+        from sqliteStandIn import SQLiteDBFactory
+        dbFactory = SQLiteDBFactory(args.sqlite)
+    else:
+        dbFactory = None
+    def newComputer(resume):
+        if args.events is not None:
+            from eventSources import openEventSource
+            eventSource = openEventSource(args.events, runtimesPath=args.runtimes)
+        else:
+            eventSource = None
+        return EngagementComputer(coursesStartYearsArr=years, dbHost='localhost', mySQLUser=invokingUser, mySQLPwd=None, courseToProfile=courseName, videoOnly=args.videoOnly, metricsInterval=args.metricsInterval, memoryMonitor=memoryMonitor, progressReporter=progressReporter, checkpointDir=args.checkpointDir, resume=resume, eventSource=eventSource, dbFactory=dbFactory, dbPoolSize=args.dbPoolSize, outOfCoreBudgetMB=outOfCoreBudgetMB, sortDir=args.sortDir, sampleFraction=args.sampleFraction, sampleSalt=args.sampleSalt, windowStart=windowStart, windowEnd=windowEnd, aggregators=aggregators)
+    if args.outOfCore:
+        outOfCoreBudgetMB = args.memoryBudgetMB if args.memoryBudgetMB is not None else DEFAULT_BUDGET_MB
+    else:
+        outOfCoreBudgetMB = None
+    comp = newComputer(args.resume)
+    if args.workers > 1 and courseName is None:
+        from parallelEngagement import ParallelEngagementRunner, listCourses
+        runner = ParallelEngagementRunner(listCourses(comp.db),
+                                          numWorkers=args.workers,
+                                          coursesStartYearsArr=years,
+                                          dbHost='localhost',
+                                          mySQLUser=invokingUser,
+                                          mySQLPwd=None,
+                                          videoOnly=args.videoOnly,
+                                          metricsInterval=args.metricsInterval,
+                                          dbFactory=dbFactory,
+                                          dbPoolSize=args.dbPoolSize,
+                                          windowStart=windowStart,
+                                          windowEnd=windowEnd)
+        comp.closeDb()
+        runner.run(comp)
+    else:
+        attempt = 0
+        while True:
+            try:
+                comp.run()
+                break
+            except Exception as e:
+                if attempt >= args.retries:
+                    raise
+                attempt += 1
+                comp.logErr("Run failed: '%s'; resuming from checkpoints (retry %d of %d)." % (`e`, attempt, args.retries))
+                # Fresh computer with a fresh connection; results
+                # of completed courses come from the checkpoints:
+                comp = newComputer(True)
     
     # -------------- Output Results to Disk ---------------
-    (summaryFile, detailFile, weeklyEffortFile) = comp.writeResultsToDisk()
+    (summaryFile, detailFile, weeklyEffortFile) = comp.writeResultsToDisk(outputFormat=args.format, compression=args.compress)
     if os.path.getsize(summaryFile) == 0 and os.path.getsize(detailFile) == 0 and os.path.getsize(weeklyEffortFile) == 0:
         comp.log('No course qualified given year constraints.')
     else: 
         comp.log("Your results are in %s, %s, and %s." % (summaryFile, detailFile, weeklyEffortFile))
+    if aggregators is not None:
+        for (aggregatorName, path) in sorted(comp.writeAggregatorsToDisk().items()):
+            comp.log("Aggregator %s results are in %s." % (aggregatorName, path))
+    if args.resultDb is not None:
+        loadedCourses = comp.writeResultsToDatabase(dbName=args.resultDb, method=args.loadMethod)
+        comp.log("Results of %d course(s) are in database %s." % (len(loadedCourses), args.resultDb))
+    if args.archive:
+        (sessionsFile, indexFile) = comp.writeSessionArchive()
+        comp.log("Session archive is in %s and %s." % (sessionsFile, indexFile))
+    if args.metricsFile is not None:
+        comp.metrics.save(args.metricsFile)
+        comp.log("Run metrics are in %s." % args.metricsFile)
+    if args.sampleReport is not None:
+        with open(args.sampleReport, 'w') as fd:
+            json.dump({'sample' : comp.sample.toDict(), 'confidence' : 0.95, 'courses' : comp.bucketIntervals}, fd, indent=2, sort_keys=True)
+        comp.log("Sample report is in %s." % args.sampleReport)
+    if args.memoryReport is not None:
+        memoryMonitor.save(args.memoryReport)
+        comp.log("Memory report is in %s." % args.memoryReport)
@@ -0,0 +1,153 @@
+# Copyright (c) 2014, Stanford University
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification, are permitted provided that the following conditions are met:
+# 1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following disclaimer in the documentation and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote products derived from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+'''
+Created on Oct 19, 2026
+
+Counters and timers of one EngagementComputer run, so that a
+slow night can be attributed to the database, sessionization,
+the weekly median loop in wrapUpCourse(), or writing results.
+After run() and writeResultsToDisk(), comp.metrics.asDict()
+holds:
+
+    rowsFetched:            rows delivered by the event query
+    rowsFilteredCourses:    rows dropped by filterCourses()
+    rowsFilteredStudents:   rows dropped by filterStudents()
+    sessionsCreated:        sessions closed by wrapUpSession()
+    coursesCompleted:       courses closed by wrapUpCourse()
+    querySecs:              from issuing the query until its first row
+    runSecs:                all of run(), including querySecs
+    wrapUpSecs:             total of wrapUpCourse() time
+    courseWrapUpSecs:       {courseName : secs} for each wrapUpCourse() call
+    writeSecs:              writeResultsToDisk() time
+    outputBytes:            size of the files written by writeResultsToDisk()
+    rowsPerSec:             rowsFetched / runSecs
+
+Hot loop counters are kept in local variables by run(), and
+are handed to the RunMetrics instance only every PROGRESS_ROWS
+rows, at which time a progress line is logged if reportInterval
+seconds have passed since the last one.
+
+Metrics of worker processes are folded into the parent's
+with merge().
+
+@author: paepcke
+'''
+import json
+import time
+
+
+class RunMetrics(object):
+
+    # run() calls progress() every this many rows:
+    PROGRESS_ROWS = 100000
+
+    COUNTERS = ('rowsFetched',
+                'rowsFilteredCourses',
+                'rowsFilteredStudents',
+                'sessionsCreated',
+                'coursesCompleted',
+                'outputBytes')
+
+    TIMERS = ('querySecs',
+              'runSecs',
+              'wrapUpSecs',
+              'writeSecs')
+
+    def __init__(self, log=None, reportInterval=None):
+        '''
+        :param log: function that takes a message string; used for
+            periodic progress lines
+        :type log: {function | None}
+        :param reportInterval: minimum seconds between progress lines.
+            None: no progress lines.
+        :type reportInterval: {float | None}
+        '''
+        self.log = log
+        self.reportInterval = reportInterval
+        self.reset()
+
+    def reset(self):
+        for counter in RunMetrics.COUNTERS:
+            setattr(self, counter, 0)
+        for timer in RunMetrics.TIMERS:
+            setattr(self, timer, 0.0)
+        self.courseWrapUpSecs = {}
+        self.runStartTime = None
+        self.lastReportTime = None
+
+    def startRun(self):
+        self.runStartTime = self.lastReportTime = time.time()
+
+    def endRun(self):
+        if self.runStartTime is not None:
+            self.runSecs += time.time() - self.runStartTime
+            self.runStartTime = None
+
+    def queryDone(self):
+        if self.runStartTime is not None:
+            self.querySecs += time.time() - self.runStartTime
+
+    def progress(self, rowsFetched, rowsFilteredCourses, rowsFilteredStudents):
+        '''
+        Take over run()'s row counters, and log a progress line
+        if one is due.
+        '''
+        self.rowsFetched = rowsFetched
+        self.rowsFilteredCourses = rowsFilteredCourses
+        self.rowsFilteredStudents = rowsFilteredStudents
+        if self.reportInterval is None or self.log is None:
+            return
+        now = time.time()
+        if now - self.lastReportTime >= self.reportInterval:
+            self.lastReportTime = now
+            self.log('Progress: %d rows (%.0f rows/sec), %d sessions, %d courses done.' %
+                     (rowsFetched, rowsFetched / (now - self.runStartTime), self.sessionsCreated, self.coursesCompleted))
+
+    def courseWrappedUp(self, courseName, secs):
+        self.courseWrapUpSecs[courseName] = self.courseWrapUpSecs.get(courseName, 0.0) + secs
+        self.wrapUpSecs += secs
+        self.coursesCompleted += 1
+
+    @property
+    def rowsPerSec(self):
+        if self.runSecs <= 0:
+            return None
+        return self.rowsFetched / self.runSecs
+
+    def asDict(self):
+        '''
+        Return all metrics as a JSON-compatible dict.
+        '''
+        metrics = {}
+        for name in RunMetrics.COUNTERS + RunMetrics.TIMERS:
+            metrics[name] = getattr(self, name)
+        metrics['courseWrapUpSecs'] = dict(self.courseWrapUpSecs)
+        metrics['rowsPerSec'] = self.rowsPerSec
+        return metrics
+
+    def merge(self, metricsDict):
+        '''
+        Add the counters and timers of another run, given as
+        returned by its asDict(), to this instance's. The run
+        seconds of parallel runs add up to CPU, not wall clock time.
+        '''
+        for name in RunMetrics.COUNTERS + RunMetrics.TIMERS:
+            setattr(self, name, getattr(self, name) + metricsDict[name])
+        for (courseName, secs) in metricsDict['courseWrapUpSecs'].items():
+            self.courseWrapUpSecs[courseName] = self.courseWrapUpSecs.get(courseName, 0.0) + secs
+
+    def save(self, path):
+        '''
+        Write asDict() to a JSON file.
+        '''
+        with open(path, 'w') as fd:
+            json.dump(self.asDict(), fd, indent=2, sort_keys=True)
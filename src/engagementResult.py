@@ -0,0 +1,319 @@
+# Copyright (c) 2014, Stanford University
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification, are permitted provided that the following conditions are met:
+# 1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following disclaimer in the documentation and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote products derived from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+'''
+Created on Oct 19, 2026
+
+Mergeable per-course engagement results. An instance of
+CourseEngagementResult holds everything that goes into one
+line of the engagement summary file, plus the week-by-week
+effort of each student in the course:
+
+    activeLearners:          set of anon_screen_name of learners with at least one video event,
+                             or None if only their number is known
+    totalStudentSessions:    number of sessions with non-zero engagement
+    totalEffortAllStudents:  total engagement seconds across all students
+    oneToTwentyMin:          number of student-weeks with median session length < 20min
+    twentyoneToSixtyMin:     number of student-weeks with median session length 20min to < 1hr
+    greaterSixtyMin:         number of student-weeks with median session length >= 1hr
+    weeklyEffort:            {student : [[weekNum, effortSecs], [weekNum, effortSecs], ...]}
+                             with weekNum zero-based, and entries sorted by weekNum.
+
+Results computed by different processes, machines, or time
+slices are combined with merge(), which is associative and
+commutative. All counts and totals are summed, learner sets are
+unioned, and weekly efforts of the same student in the same week
+are added.
+
+Note that the three median buckets are counted per student-week.
+Merged bucket counts are therefore exact as long as the partial
+results do not split the sessions of one student in one week
+across partials, as is the case for partitions by course or
+by student.
+
+Results of runs over a sample of learners (see studentSampling.py)
+hold the sample's numbers, plus the sampleFraction, and statsTuple()
+scales the numbers up by 1/sampleFraction. Only results with the
+same sampleFraction merge. Results that only know the number of
+active learners, not their names, do not merge at all.
+
+Results serialize to plain dicts (toDict()/fromDict()), and
+to JSON files (save()/load()).
+
+@author: paepcke
+'''
+import json
+
+
+class CourseEngagementResult(object):
+
+    # Order of the numbers in the summary tuple, which
+    # is the same as the EngagementComputer.classStats
+    # values:
+    STATS_FIELDS = ('numActiveLearners',
+                    'totalStudentSessions',
+                    'totalEffortAllStudents',
+                    'oneToTwentyMin',
+                    'twentyoneToSixtyMin',
+                    'greaterSixtyMin')
+
+    def __init__(self,
+                 courseName,
+                 activeLearners=None,
+                 totalStudentSessions=0,
+                 totalEffortAllStudents=0,
+                 oneToTwentyMin=0,
+                 twentyoneToSixtyMin=0,
+                 greaterSixtyMin=0,
+                 weeklyEffort=None,
+                 sampleFraction=1.0,
+                 numActiveLearners=None):
+        '''
+        Create a (partial) result for one course.
+
+        :param courseName: course_display_name of the course
+        :type courseName: string
+        :param activeLearners: anon_screen_names of learners who were active in the course
+        :type activeLearners: {set | [string] | None}
+        :param totalStudentSessions: number of sessions across all students
+        :type totalStudentSessions: int
+        :param totalEffortAllStudents: engagement seconds across all students
+        :type totalEffortAllStudents: {int | float}
+        :param oneToTwentyMin: number of student-weeks with median session < 20 minutes
+        :type oneToTwentyMin: int
+        :param twentyoneToSixtyMin: number of student-weeks with median session of 20 minutes to < 1hr
+        :type twentyoneToSixtyMin: int
+        :param greaterSixtyMin: number of student-weeks with median session of 1hr or more
+        :type greaterSixtyMin: int
+        :param weeklyEffort: {student : [[weekNum, effortSecs], ...]}, sorted by weekNum
+        :type weeklyEffort: {dict | None}
+        :param sampleFraction: share of the course's learners from which the numbers
+               were computed; 1.0 for all learners
+        :type sampleFraction: float
+        :param numActiveLearners: number of active learners, for callers that
+               do not have their names. Ignored if activeLearners is given.
+        :type numActiveLearners: {int | None}
+        '''
+        self.courseName = courseName
+        if activeLearners is not None:
+            self.activeLearners = set(activeLearners)
+        elif numActiveLearners is not None:
+            # Count without names:
+            self.activeLearners = None
+        else:
+            self.activeLearners = set()
+        self._numActiveLearners = numActiveLearners
+        self.totalStudentSessions = totalStudentSessions
+        self.totalEffortAllStudents = totalEffortAllStudents
+        self.oneToTwentyMin = oneToTwentyMin
+        self.twentyoneToSixtyMin = twentyoneToSixtyMin
+        self.greaterSixtyMin = greaterSixtyMin
+        self.weeklyEffort = weeklyEffort if weeklyEffort is not None else {}
+        self.sampleFraction = sampleFraction
+
+    @property
+    def numActiveLearners(self):
+        if self.activeLearners is None:
+            return self._numActiveLearners
+        return len(self.activeLearners)
+
+    def statsTuple(self):
+        '''
+        Return the six-tuple that EngagementComputer has always
+        kept in its classStats dict:
+        (numActiveLearners, totalStudentSessions, totalEffortAllStudents,
+         oneToTwentyMin, twentyoneToSixtyMin, greaterSixtyMin)
+        For sampled results, these are estimates for all learners.
+
+        :return: summary numbers for this course
+        :rtype: (int,int,int,int,int,int)
+        '''
+        if self.sampleFraction != 1.0:
+            scale = 1.0 / self.sampleFraction
+            return (int(round(self.numActiveLearners * scale)),
+                    int(round(self.totalStudentSessions * scale)),
+                    int(round(self.totalEffortAllStudents * scale)),
+                    int(round(self.oneToTwentyMin * scale)),
+                    int(round(self.twentyoneToSixtyMin * scale)),
+                    int(round(self.greaterSixtyMin * scale)))
+        return (self.numActiveLearners,
+                self.totalStudentSessions,
+                int(round(self.totalEffortAllStudents)),
+                self.oneToTwentyMin,
+                self.twentyoneToSixtyMin,
+                self.greaterSixtyMin)
+
+    def merge(self, other):
+        '''
+        Return a new result that combines this result with
+        another partial result for the same course. Neither
+        self nor other is modified.
+
+        :param other: partial result for the same course
+        :type other: CourseEngagementResult
+        :return: combined result
+        :rtype: CourseEngagementResult
+        :raise ValueError: if other is for a different course, or for another sample
+            fraction, or if either result lacks the names of its active learners
+        '''
+        if other.courseName != self.courseName:
+            raise ValueError("Cannot merge results of course '%s' with results of course '%s'" %
+                             (self.courseName, other.courseName))
+        if other.sampleFraction != self.sampleFraction:
+            raise ValueError("Cannot merge results of course '%s' for sample fractions %s and %s" %
+                             (self.courseName, self.sampleFraction, other.sampleFraction))
+        if self.activeLearners is None or other.activeLearners is None:
+            raise ValueError("Cannot merge results of course '%s' without the names of their active learners" %
+                             self.courseName)
+        return CourseEngagementResult(self.courseName,
+                                      activeLearners=self.activeLearners | other.activeLearners,
+                                      totalStudentSessions=self.totalStudentSessions + other.totalStudentSessions,
+                                      totalEffortAllStudents=self.totalEffortAllStudents + other.totalEffortAllStudents,
+                                      oneToTwentyMin=self.oneToTwentyMin + other.oneToTwentyMin,
+                                      twentyoneToSixtyMin=self.twentyoneToSixtyMin + other.twentyoneToSixtyMin,
+                                      greaterSixtyMin=self.greaterSixtyMin + other.greaterSixtyMin,
+                                      weeklyEffort=self._mergeWeeklyEffort(self.weeklyEffort, other.weeklyEffort),
+                                      sampleFraction=self.sampleFraction)
+
+    def toDict(self):
+        '''
+        Return a JSON-compatible dict from which fromDict()
+        recreates an equal result.
+
+        :rtype: dict
+        '''
+        return {'courseName' : self.courseName,
+                'activeLearners' : sorted(self.activeLearners) if self.activeLearners is not None else None,
+                'numActiveLearners' : self.numActiveLearners,
+                'totalStudentSessions' : self.totalStudentSessions,
+                'totalEffortAllStudents' : self.totalEffortAllStudents,
+                'oneToTwentyMin' : self.oneToTwentyMin,
+                'twentyoneToSixtyMin' : self.twentyoneToSixtyMin,
+                'greaterSixtyMin' : self.greaterSixtyMin,
+                'weeklyEffort' : self.weeklyEffort,
+                'sampleFraction' : self.sampleFraction
+                }
+
+    @classmethod
+    def fromDict(cls, resultDict):
+        '''
+        Inverse of toDict().
+
+        :param resultDict: dict as produced by toDict()
+        :type resultDict: dict
+        :rtype: CourseEngagementResult
+        '''
+        weeklyEffort = {}
+        for student, weekEffortPairs in resultDict.get('weeklyEffort', {}).items():
+            weeklyEffort[student] = [[weekNum, effort] for (weekNum, effort) in weekEffortPairs]
+        return cls(resultDict['courseName'],
+                   activeLearners=resultDict.get('activeLearners', []),
+                   totalStudentSessions=resultDict.get('totalStudentSessions', 0),
+                   totalEffortAllStudents=resultDict.get('totalEffortAllStudents', 0),
+                   oneToTwentyMin=resultDict.get('oneToTwentyMin', 0),
+                   twentyoneToSixtyMin=resultDict.get('twentyoneToSixtyMin', 0),
+                   greaterSixtyMin=resultDict.get('greaterSixtyMin', 0),
+                   weeklyEffort=weeklyEffort,
+                   sampleFraction=resultDict.get('sampleFraction', 1.0),
+                   numActiveLearners=resultDict.get('numActiveLearners'))
+
+    def save(self, path):
+        '''
+        Write this result to the given file as JSON.
+
+        :param path: file to write
+        :type path: string
+        '''
+        with open(path, 'w') as fd:
+            json.dump(self.toDict(), fd)
+
+    @classmethod
+    def load(cls, path):
+        '''
+        Read a result that was written by save().
+
+        :param path: file to read
+        :type path: string
+        :rtype: CourseEngagementResult
+        '''
+        with open(path, 'r') as fd:
+            return cls.fromDict(json.load(fd))
+
+    def __eq__(self, other):
+        if not isinstance(other, CourseEngagementResult):
+            return False
+        return self.courseName == other.courseName and\
+            self.activeLearners == other.activeLearners and\
+            self.sampleFraction == other.sampleFraction and\
+            self.statsTuple() == other.statsTuple() and\
+            self.weeklyEffort == other.weeklyEffort
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def __repr__(self):
+        return '<CourseEngagementResult %s %s>' % (self.courseName, str(self.statsTuple()))
+
+    @staticmethod
+    def _mergeWeeklyEffort(weeklyEffort1, weeklyEffort2):
+        '''
+        Merge two {student : [[weekNum, effort], ...]} dicts. Both
+        inputs have their per-student lists sorted by weekNum.
+        Efforts of one student in the same week are added.
+        Inputs are not modified.
+        '''
+        merged = {}
+        for student in set(weeklyEffort1.keys()) | set(weeklyEffort2.keys()):
+            pairs1 = weeklyEffort1.get(student, [])
+            pairs2 = weeklyEffort2.get(student, [])
+            if len(pairs2) == 0:
+                merged[student] = [list(pair) for pair in pairs1]
+                continue
+            if len(pairs1) == 0:
+                merged[student] = [list(pair) for pair in pairs2]
+                continue
+            mergedPairs = []
+            i = j = 0
+            while i < len(pairs1) and j < len(pairs2):
+                (week1, effort1) = pairs1[i]
+                (week2, effort2) = pairs2[j]
+                if week1 == week2:
+                    mergedPairs.append([week1, effort1 + effort2])
+                    i += 1
+                    j += 1
+                elif week1 < week2:
+                    mergedPairs.append([week1, effort1])
+                    i += 1
+                else:
+                    mergedPairs.append([week2, effort2])
+                    j += 1
+            mergedPairs.extend([list(pair) for pair in pairs1[i:]])
+            mergedPairs.extend([list(pair) for pair in pairs2[j:]])
+            merged[student] = mergedPairs
+        return merged
+
+
+def mergeResults(results):
+    '''
+    Combine any number of partial results, possibly for
+    different courses, into one result per course.
+
+    :param results: partial results in any order
+    :type results: [CourseEngagementResult]
+    :return: dict mapping course name to merged result
+    :rtype: {string : CourseEngagementResult}
+    '''
+    merged = {}
+    for result in results:
+        try:
+            merged[result.courseName] = merged[result.courseName].merge(result)
+        except KeyError:
+            merged[result.courseName] = result
+    return merged
@@ -0,0 +1,395 @@
+#!/usr/bin/env python
+# Copyright (c) 2014, Stanford University
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification, are permitted provided that the following conditions are met:
+# 1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following disclaimer in the documentation and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote products derived from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+'''
+Created on Oct 19, 2026
+
+Long-running engagement service. Instead of starting engagement.py
+for every export, clients send jobs to this daemon over a Unix
+domain socket. The daemon keeps warm what every fresh process
+would otherwise rebuild:
+
+    - imports, and a ConnectionPool of open database connections
+    - the course runtime table (Edx.CourseInfo), reloaded at most
+      every runtimesMaxAgeSecs
+    - recent results, in a ResultCache keyed by run parameters
+      and data watermark (see resultCache.py)
+
+Jobs run on threads, at most maxConcurrent at a time; further jobs
+wait. Connections cannot be shared between processes, which is why
+threads are used rather than a process pool.
+
+Protocol: one JSON object per line in each direction. Requests:
+
+    {"op": "compute", "course": "Engineering/CS101/Fall2013",
+     "years": [2013], "threshold": 30, "videoOnly": false,
+     "format": "csv", "compression": null, "rows": false}
+    {"op": "ping"}
+    {"op": "status"}
+    {"op": "shutdown"}
+
+All compute fields except op are optional; course null means all
+courses. For a compute request, the service answers with
+{"status": "running"} once the job has a worker, then, if rows is
+true, with {"status": "rows", "rows": [<allData CSV line>, ...]}
+messages, and finally with
+
+    {"status": "done", "paths": [summary, allData, weeklyEffort],
+     "cached": <whether the results came from the cache>, "secs": ...}
+
+The paths belong to the result cache; clients should copy the files
+they want to keep. Errors are answered with {"status": "error",
+"error": <message>}. Several requests may be sent on one connection.
+
+    engagementService.py serve --socket /tmp/engagement.sock --maxConcurrent 2
+    engagementService.py compute --socket /tmp/engagement.sock Engineering/CS101/Fall2013
+
+@author: paepcke
+'''
+import argparse
+import datetime
+import getpass
+import json
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+
+from pymysql_utils.pymysql_utils import MySQLDB
+
+from connectionPool import ConnectionPool
+from engagement import EngagementComputer
+from resultCache import ResultCache, DEFAULT_MAX_BYTES
+
+
+DEFAULT_SOCKET = os.path.join(tempfile.gettempdir(), 'engagementService.sock')
+
+# Statuses that end the answer to a request:
+FINAL_STATUSES = ('done', 'error', 'ok')
+
+# allData lines per 'rows' message:
+ROWS_PER_MESSAGE = 1000
+
+
+class EngagementService(object):
+
+    def __init__(self,
+                 socketPath=DEFAULT_SOCKET,
+                 dbHost='localhost',
+                 mySQLUser=None,
+                 mySQLPwd=None,
+                 maxConcurrent=2,
+                 dbPoolSize=None,
+                 cacheDir=None,
+                 cacheMaxBytes=DEFAULT_MAX_BYTES,
+                 runtimesMaxAgeSecs=3600,
+                 dbFactory=None):
+        '''
+        :param socketPath: path of the Unix domain socket to listen on
+        :type socketPath: string
+        :param dbHost: MySQL host
+        :type dbHost: string
+        :param mySQLUser: MySQL user. Default: the invoking user
+        :type mySQLUser: {string | None}
+        :param mySQLPwd: MySQL password. Default: from ~/.ssh/mysql of mySQLUser
+        :type mySQLPwd: {string | None}
+        :param maxConcurrent: jobs that run at the same time
+        :type maxConcurrent: int
+        :param dbPoolSize: connections kept open. Default: maxConcurrent + 1,
+            one per job for its main query, plus one for lookups
+        :type dbPoolSize: {int | None}
+        :param cacheDir: result cache directory. Default: in the temp directory
+        :type cacheDir: {string | None}
+        :param cacheMaxBytes: size of the result cache
+        :type cacheMaxBytes: int
+        :param runtimesMaxAgeSecs: seconds after which the course runtime
+            table is reloaded
+        :type runtimesMaxAgeSecs: float
+        :param dbFactory: see EngagementComputer. Default: MySQLDB
+        :type dbFactory: {callable | None}
+        '''
+        self.socketPath = socketPath
+        self.dbHost = dbHost
+        self.mySQLUser = mySQLUser if mySQLUser is not None else getpass.getuser()
+        if mySQLPwd is None:
+            # Same place as EngagementComputer looks:
+            try:
+                with open(os.path.join(os.path.expanduser('~' + self.mySQLUser), '.ssh/mysql'), 'r') as fd:
+                    mySQLPwd = fd.readline().strip()
+            except IOError:
+                mySQLPwd = ''
+        self.mySQLPwd = mySQLPwd
+        self.maxConcurrent = maxConcurrent
+        self.dbFactory = dbFactory if dbFactory is not None else MySQLDB
+        self.dbPool = ConnectionPool(self.dbFactory,
+                                     size=dbPoolSize if dbPoolSize is not None else maxConcurrent + 1,
+                                     host=dbHost,
+                                     user=self.mySQLUser,
+                                     passwd=self.mySQLPwd,
+                                     db='Edx')
+        if cacheDir is None:
+            cacheDir = os.path.join(tempfile.gettempdir(), 'engagementServiceCache')
+        self.resultCache = ResultCache(cacheDir, maxBytes=cacheMaxBytes)
+        self.runtimesMaxAgeSecs = runtimesMaxAgeSecs
+        self.runtimes = None
+        self.runtimesLoadedAt = 0
+        self.runtimesLock = threading.Lock()
+        self.jobSlots = threading.Semaphore(maxConcurrent)
+        self.statsLock = threading.Lock()
+        self.stats = {'jobs' : 0, 'cacheHits' : 0, 'errors' : 0, 'running' : 0}
+        self.startedAt = time.time()
+        self.listener = None
+        self.shuttingDown = False
+
+    def courseRuntimes(self):
+        '''
+        Return course name --> (startDate, endDate) of all courses
+        in Edx.CourseInfo, reloading the table if it is older than
+        runtimesMaxAgeSecs. Courses without an end date are left out;
+        EngagementComputer looks those up itself.
+        '''
+        with self.runtimesLock:
+            if self.runtimes is None or time.time() - self.runtimesLoadedAt > self.runtimesMaxAgeSecs:
+                runtimes = {}
+                with self.dbPool.connection() as db:
+                    for (courseName, startDate, endDate) in db.query('SELECT course_display_name, start_date, end_date FROM Edx.CourseInfo;'):
+                        if startDate is not None and endDate is not None:
+                            runtimes[courseName] = (startDate, endDate)
+                self.runtimes = runtimes
+                self.runtimesLoadedAt = time.time()
+                self.log('Loaded runtimes of %d courses.' % len(runtimes))
+            return self.runtimes
+
+    def serve(self):
+        '''
+        Accept connections until a shutdown request arrives.
+        '''
+        if os.path.exists(self.socketPath):
+            # Left behind by an earlier service:
+            os.remove(self.socketPath)
+        self.listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.listener.bind(self.socketPath)
+        os.chmod(self.socketPath, 0o600)
+        self.listener.listen(16)
+        # Wake up now and then to notice shutdowns:
+        self.listener.settimeout(0.5)
+        self.courseRuntimes()
+        self.log('Serving on %s.' % self.socketPath)
+        try:
+            while not self.shuttingDown:
+                try:
+                    (connection, _) = self.listener.accept()
+                except socket.timeout:
+                    continue
+                connection.settimeout(None)
+                handler = threading.Thread(target=self.handleConnection, args=(connection,))
+                handler.daemon = True
+                handler.start()
+        finally:
+            self.listener.close()
+            if os.path.exists(self.socketPath):
+                os.remove(self.socketPath)
+            self.dbPool.closeIdle()
+            self.log('Service stopped.')
+
+    def handleConnection(self, connection):
+        def send(message):
+            connection.sendall((json.dumps(message) + '\n').encode('utf-8'))
+        reader = connection.makefile('rb')
+        try:
+            for line in reader:
+                if not line.strip():
+                    continue
+                try:
+                    request = json.loads(line.decode('utf-8'))
+                except ValueError as e:
+                    send({'status' : 'error', 'error' : 'Request is not JSON: %s' % str(e)})
+                    continue
+                self.handleRequest(request, send)
+        except socket.error as e:
+            self.logErr('Lost client: %s' % `e`)
+        finally:
+            reader.close()
+            connection.close()
+
+    def handleRequest(self, request, send):
+        op = request.get('op')
+        if op == 'ping':
+            send({'status' : 'ok'})
+        elif op == 'status':
+            with self.statsLock:
+                stats = dict(self.stats)
+            stats.update({'status' : 'ok',
+                          'uptimeSecs' : time.time() - self.startedAt,
+                          'maxConcurrent' : self.maxConcurrent,
+                          'cachedBytes' : self.resultCache.totalBytes()})
+            send(stats)
+        elif op == 'shutdown':
+            self.shuttingDown = True
+            send({'status' : 'ok'})
+        elif op == 'compute':
+            self.compute(request, send)
+        else:
+            send({'status' : 'error', 'error' : "Unknown op '%s'" % op})
+
+    def compute(self, request, send):
+        '''
+        Run one compute request, and send its answers.
+        '''
+        startTime = time.time()
+        with self.jobSlots:
+            with self.statsLock:
+                self.stats['jobs'] += 1
+                self.stats['running'] += 1
+            try:
+                send({'status' : 'running'})
+                comp = EngagementComputer(coursesStartYearsArr=request.get('years'),
+                                          dbHost=self.dbHost,
+                                          mySQLUser=self.mySQLUser,
+                                          mySQLPwd=self.mySQLPwd,
+                                          courseToProfile=request.get('course'),
+                                          sessionInactivityThreshold=request.get('threshold', 30),
+                                          videoOnly=request.get('videoOnly', False),
+                                          courseRuntimes=self.courseRuntimes(),
+                                          dbFactory=self.dbFactory,
+                                          dbPool=self.dbPool)
+                comp.log = lambda msg: self.log('[%s] %s' % (request.get('course'), msg))
+                comp.logErr = lambda msg: self.logErr('[%s] %s' % (request.get('course'), msg))
+                paths = comp.cachedResults(self.resultCache,
+                                           outputFormat=request.get('format', 'csv'),
+                                           compression=request.get('compression'))
+                if comp.resultsFromCache:
+                    with self.statsLock:
+                        self.stats['cacheHits'] += 1
+            except Exception as e:
+                with self.statsLock:
+                    self.stats['errors'] += 1
+                self.logErr('Job %s failed: %s' % (json.dumps(request), `e`))
+                send({'status' : 'error', 'error' : str(e)})
+                return
+            finally:
+                with self.statsLock:
+                    self.stats['running'] -= 1
+        if request.get('rows', False):
+            if request.get('format', 'csv') != 'csv' or request.get('compression') is not None:
+                send({'status' : 'error', 'error' : 'Rows can only be streamed from uncompressed csv results.'})
+                return
+            self.sendRows(paths[1], send)
+        send({'status' : 'done',
+              'paths' : list(paths),
+              'cached' : comp.resultsFromCache,
+              'secs' : time.time() - startTime})
+
+    def sendRows(self, allDataPath, send):
+        with open(allDataPath, 'r') as fd:
+            # Skip the header:
+            next(fd, None)
+            rows = []
+            for line in fd:
+                rows.append(line.rstrip('\n'))
+                if len(rows) >= ROWS_PER_MESSAGE:
+                    send({'status' : 'rows', 'rows' : rows})
+                    rows = []
+            if len(rows) > 0:
+                send({'status' : 'rows', 'rows' : rows})
+
+    def log(self, msg):
+        print('%s: %s' %  (str(datetime.datetime.now()), msg))
+        sys.stdout.flush()
+
+    def logErr(self, msg):
+        sys.stderr.write('     %s: %s\n' %  (str(datetime.datetime.now()), msg))
+        sys.stderr.flush()
+
+
+def request(socketPath=DEFAULT_SOCKET, **requestFields):
+    '''
+    Send one request to a running service, and yield its
+    answers up to and including the final one.
+
+    :param socketPath: the service's socket
+    :type socketPath: string
+    :param requestFields: the request, such as op='compute', course='...'
+    :type requestFields: dict
+    '''
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    client.connect(socketPath)
+    reader = client.makefile('rb')
+    try:
+        client.sendall((json.dumps(requestFields) + '\n').encode('utf-8'))
+        for line in reader:
+            answer = json.loads(line.decode('utf-8'))
+            yield answer
+            if answer.get('status') in FINAL_STATUSES:
+                return
+    finally:
+        reader.close()
+        client.close()
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(prog=os.path.basename(sys.argv[0]), formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument('--socket',
+                        default=DEFAULT_SOCKET,
+                        help='Unix domain socket of the service (default: %s).' % DEFAULT_SOCKET)
+    subparsers = parser.add_subparsers(dest='action')
+    serveParser = subparsers.add_parser('serve', help='Run the service.')
+    serveParser.add_argument('--maxConcurrent', type=int, default=2, help='Jobs that run at the same time (default: 2).')
+    serveParser.add_argument('--cacheDir', default=None, help='Result cache directory.')
+    serveParser.add_argument('--cacheMB', type=int, default=DEFAULT_MAX_BYTES // (1024 * 1024),
+                             help='Result cache size in MB (default: %d).' % (DEFAULT_MAX_BYTES // (1024 * 1024)))
+    serveParser.add_argument('--sqlite', default=None, help='Use the SQLite stand-in databases in this directory.')
+    computeParser = subparsers.add_parser('compute', help='Send a job to the service, and print its result paths.')
+    computeParser.add_argument('--videoOnly', action='store_true', help='Only consider video events.')
+    computeParser.add_argument('--rows', action='store_true', help='Print the allData rows instead of the paths.')
+    computeParser.add_argument('course', help='Course name, or None for all courses.')
+    computeParser.add_argument('years', nargs='*', type=int, help='Course start years to include.')
+    for op in ('ping', 'status', 'shutdown'):
+        subparsers.add_parser(op, help="Send a '%s' request." % op)
+    args = parser.parse_args();
+
+    if args.action == 'serve':
+        if args.sqlite is not None:
+            from sqliteStandIn import SQLiteDBFactory
+            dbFactory = SQLiteDBFactory(args.sqlite)
+        else:
+            dbFactory = None
+        EngagementService(socketPath=args.socket,
+                          maxConcurrent=args.maxConcurrent,
+                          cacheDir=args.cacheDir,
+                          cacheMaxBytes=args.cacheMB * 1024 * 1024,
+                          dbFactory=dbFactory).serve()
+        sys.exit(0)
+
+    if args.action == 'compute':
+        requestFields = {'op' : 'compute',
+                         'course' : None if args.course == 'None' else args.course,
+                         'years' : args.years or None,
+                         'videoOnly' : args.videoOnly,
+                         'rows' : args.rows}
+    else:
+        requestFields = {'op' : args.action}
+    status = 0
+    for answer in request(args.socket, **requestFields):
+        if answer['status'] == 'rows':
+            print('\n'.join(answer['rows']))
+        elif answer['status'] == 'done' and not args.rows:
+            print('\n'.join(answer['paths']))
+        elif answer['status'] == 'error':
+            sys.stderr.write('%s\n' % answer['error'])
+            status = 1
+        elif answer['status'] == 'ok':
+            print(json.dumps(answer, sort_keys=True))
+    sys.exit(status)
@@ -0,0 +1,611 @@
+# Copyright (c) 2014, Stanford University
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification, are permitted provided that the following conditions are met:
+# 1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following disclaimer in the documentation and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote products derived from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+'''
+Created on Oct 19, 2026
+
+Sources of the (course_display_name, anon_screen_name, time, isVideo)
+event rows that EngagementComputer.run() turns into sessions. Every
+source delivers the rows in batches (lists of tuples), sorted by
+course, student, and time, as the main query's ORDER BY does:
+
+    MySQLEventSource:   the main query against Edx.EventXtract and
+                        EdxForum.contents (the default)
+    CsvEventSource:     CSV or TSV exports, optionally gzip'ed, such as
+                        the output of the main query from the mysql client
+    ColumnarEventSource: binary .npz column files written by
+                        writeEventColumns(); the fastest to read
+
+Pass a source as the eventSource of an EngagementComputer to run
+without a database:
+
+    source = CsvEventSource('events.csv.gz', runtimesPath='runtimes.csv')
+    comp = EngagementComputer(eventSource=source)
+
+File sources read the sorted order as given; if a file is not
+sorted, construct the source with presorted=False to have it
+sorted in memory. They filter for a single course, but ignore
+the afterCourse hint of resumed runs: run() itself skips the
+rows of completed courses. Time windows are part of the main
+query for MySQL (see buildEventQuery()); WindowedEventSource
+applies them to other sources.
+
+Course start and end dates, which EngagementComputer otherwise
+looks up in Edx.CourseInfo, come from a runtimes CSV file with
+columns course_display_name, start_date, end_date. Without one,
+a file source reports the earliest and latest event of each
+course it has delivered. Note that when run() asks at the first
+event of a course, in order to apply its year filter, that is
+the first event of the course's first student only.
+
+Converting a CSV export to columns, once:
+
+    eventSources.py events.csv.gz events.npz
+
+@author: paepcke
+'''
+import csv
+import datetime
+import gzip
+import itertools
+import os
+import sys
+
+import numpy
+
+from columnarOutput import writeColumns, memmapColumn
+from sessionColumns import studentArray, decodeName, toEpochSeconds, fromEpochSeconds, EPOCH
+
+
+# Rows per batch:
+DEFAULT_BATCH_SIZE = 100000
+
+EVENT_COLUMNS = ('course_display_name', 'anon_screen_name', 'time', 'isVideo')
+
+
+def sqlTime(dateTime):
+    '''
+    Return a datetime as a MySQL DATETIME literal.
+    '''
+    return "'%s'" % dateTime.isoformat(' ')
+
+
+def inWindow(eventTime, window):
+    '''
+    Return True if eventTime falls into the half-open time
+    window (start, end); either bound may be None. Events
+    without a time are outside any window.
+    '''
+    if eventTime is None:
+        return False
+    (start, end) = window
+    return (start is None or eventTime >= start) and (end is None or eventTime < end)
+
+
+def buildEventQuery(courseToProfile=None, afterCourse=None, ordered=True, sample=None, window=None):
+    '''
+    Return the main engagement query, which EngagementComputer.run()
+    explains.
+
+    :param courseToProfile: the one course to query; None for all courses
+    :type courseToProfile: {string | None}
+    :param afterCourse: if given, only courses that sort after this
+           one are queried. Used to resume from checkpoints.
+    :type afterCourse: {string | None}
+    :param ordered: False to leave out the ORDER BY, for callers
+           that sort the rows themselves (see externalSort.py)
+    :type ordered: boolean
+    :param sample: if given, only events of learners in this sample
+           are queried. See studentSampling.py.
+    :type sample: {StudentSample | None}
+    :param window: if given, (start, end) datetimes, either of which may
+           be None: only events at or after start, and before end, are
+           queried. The conditions are on the indexed time columns of
+           both the event and the forum table.
+    :type window: {(datetime, datetime) | None}
+    :return: SQL statement
+    :rtype: string
+    '''
+    if ordered:
+        orderClause = '\n                     ORDER BY course_display_name, anon_screen_name, time'
+    else:
+        orderClause = ''
+    # Conditions on the event and on the forum rows:
+    eventConditions = []
+    forumConditions = []
+    if afterCourse is not None:
+        # Course names are compared by the database, so that
+        # the predicate agrees with the query's ORDER BY:
+        afterCourse = afterCourse.replace("\\", "\\\\").replace("'", "\\'")
+        eventConditions.append("course_display_name > '%s'" % afterCourse)
+        forumConditions.append("course_display_name > '%s'" % afterCourse)
+    if window is not None:
+        (start, end) = window
+        if start is not None:
+            eventConditions.append('time >= %s' % sqlTime(start))
+            forumConditions.append('created_at >= %s' % sqlTime(start))
+        if end is not None:
+            eventConditions.append('time < %s' % sqlTime(end))
+            forumConditions.append('created_at < %s' % sqlTime(end))
+    if sample is not None:
+        eventConditions.append(sample.sqlPredicate('anon_screen_name'))
+        forumConditions.append(sample.sqlPredicate('EdxPrivate.idForum2Anon(forum_uid)'))
+    afterPredicate = ''.join(["\n                                           AND %s" % condition for condition in eventConditions])
+    forumAndPredicate = ''.join(["\n                                           AND %s" % condition for condition in forumConditions])
+    if len(forumConditions) == 0:
+        forumAfterPredicate = ''
+    else:
+        forumAfterPredicate = "\n                                          WHERE %s" % forumAndPredicate.strip()[len('AND '):]
+    if courseToProfile is None:
+        # Profile all courses. Takes a loooong time.
+        # consider disallowing.
+        # The right(event_type,254) protects function
+        # isUserEvent() from event_type values larger than
+        # 255. We take the trailing 255, b/c sometimes
+        # the event is the last part of a long URL:
+        return '''SELECT *
+		  	        FROM  (
+		  	        	SELECT course_display_name,
+		  	        	       anon_screen_name,
+		  	        	       time,
+		  	        	       IF((event_type = 'play_video' OR 
+                                           event_type = 'stop_video' OR 
+                                           event_type = 'load_video' OR 
+                                           event_type = 'pause_video' OR 
+                                           event_type = 'seek_video' OR 
+                                           event_type = 'speed_change_video'),1,0) AS isVideo
+   	                	          FROM Edx.EventXtract 
+  	                	         WHERE isUserEvent(right(event_type, 254))%s
+		  	                 UNION ALL
+                                 SELECT course_display_name, EdxPrivate.idForum2Anon(forum_uid) AS anon_screen_name, created_at AS time, 0 AS isVideo
+                                   FROM EdxForum.contents%s
+                               ) AS AllData%s;''' % (afterPredicate, forumAfterPredicate, orderClause)
+    else:
+        return '''SELECT *
+		  	        FROM  (
+		  	                SELECT course_display_name,
+                                       anon_screen_name,
+                                       time,
+                                       IF((event_type = 'play_video' OR 
+                                           event_type = 'stop_video' OR
+                                           event_type = 'load_video' OR 
+                                           event_type = 'pause_video' OR 
+                                           event_type = 'seek_video' OR 
+                                           event_type = 'speed_change_video'),1,0) AS isVideo
+                                  FROM Edx.EventXtract
+ 	                	         WHERE course_display_name = '%s'
+  	  	                           AND isUserEvent(right(event_type, 254))%s
+                                 UNION ALL
+                                 SELECT course_display_name, EdxPrivate.idForum2Anon(forum_uid) AS anon_screen_name, created_at AS time, 0 AS isVideo
+		  	                   FROM EdxForum.contents
+		  	                  WHERE course_display_name = '%s'%s
+		  	               ) AS AllData%s;''' % (courseToProfile, afterPredicate, courseToProfile, forumAndPredicate, orderClause)
+
+def parseTime(timeStr):
+    '''
+    Turn 'YYYY-MM-DD HH:MM:SS', optionally followed by fractional
+    seconds, into a naive datetime. Fixed-position slicing is
+    several times faster than strptime(). Empty strings and
+    NULL become None.
+    '''
+    if len(timeStr) == 19:
+        return datetime.datetime(int(timeStr[0:4]), int(timeStr[5:7]), int(timeStr[8:10]),
+                                 int(timeStr[11:13]), int(timeStr[14:16]), int(timeStr[17:19]))
+    if len(timeStr) == 0 or timeStr == 'NULL' or timeStr == '\\N':
+        return None
+    if '.' in timeStr:
+        return datetime.datetime.strptime(timeStr, '%Y-%m-%d %H:%M:%S.%f')
+    return datetime.datetime.strptime(timeStr, '%Y-%m-%d %H:%M:%S')
+
+
+def readRuntimes(path):
+    '''
+    Read a CSV file of course_display_name, start_date, end_date,
+    with a header line.
+
+    :return: course name --> (startDate, endDate)
+    :rtype: dict
+    '''
+    runtimes = {}
+    with open(path, 'r') as fd:
+        reader = csv.reader(fd)
+        next(reader)
+        for (courseName, startDate, endDate) in reader:
+            runtimes[courseName] = (parseTime(startDate), parseTime(endDate))
+    return runtimes
+
+
+class EventSource(object):
+    '''
+    Interface of all event sources.
+    '''
+
+    def batches(self, courseToProfile=None, afterCourse=None):
+        '''
+        Yield lists of (course_display_name, anon_screen_name, time, isVideo)
+        tuples, in course, student, time order.
+
+        :param courseToProfile: only deliver this course; None for all
+        :type courseToProfile: {string | None}
+        :param afterCourse: hint that courses up to and including this
+            one are not needed
+        :type afterCourse: {string | None}
+        '''
+        raise NotImplementedError()
+
+    def unsortedBatches(self, courseToProfile=None, afterCourse=None):
+        '''
+        Like batches(), but the rows may come in any order. Sources
+        that can skip their sorting override this; see externalSort.py.
+        '''
+        return self.batches(courseToProfile, afterCourse)
+
+    def courseRuntime(self, courseName): #@UnusedVariable
+        '''
+        Return (startDate, endDate) of a course, or None if this
+        source does not know, in which case Edx.CourseInfo is used.
+        '''
+        return None
+
+    def watermark(self, courseToProfile=None): #@UnusedVariable
+        '''
+        Return a JSON-compatible value that changes whenever the
+        events of the given course (None: all courses) change, or None
+        if this source cannot tell. Used as part of result cache keys;
+        see resultCache.py.
+        '''
+        return None
+
+    def close(self):
+        pass
+
+
+class MySQLEventSource(EventSource):
+
+    def __init__(self, db, batchSize=DEFAULT_BATCH_SIZE, sample=None, window=None):
+        '''
+        :param db: open connection
+        :type db: MySQLDB
+        :param batchSize: rows per batch
+        :type batchSize: int
+        :param sample: if given, only learners in this sample are
+            queried; the filter runs in the database
+        :type sample: {StudentSample | None}
+        :param window: if given, (start, end) of the events to query;
+            see buildEventQuery()
+        :type window: {(datetime, datetime) | None}
+        '''
+        self.db = db
+        self.batchSize = batchSize
+        self.sample = sample
+        self.window = window
+
+    def batches(self, courseToProfile=None, afterCourse=None):
+        return self._queryBatches(buildEventQuery(courseToProfile, afterCourse, sample=self.sample, window=self.window))
+
+    def unsortedBatches(self, courseToProfile=None, afterCourse=None):
+        return self._queryBatches(buildEventQuery(courseToProfile, afterCourse, ordered=False,
+                                                  sample=self.sample, window=self.window))
+
+    def _queryBatches(self, queryStr):
+        rows = self.db.query(queryStr)
+        while True:
+            batch = list(itertools.islice(rows, self.batchSize))
+            if len(batch) == 0:
+                return
+            yield batch
+
+    def watermark(self, courseToProfile=None):
+        '''
+        Row counts and latest times of the event and forum tables,
+        plus the CourseInfo dates, for the course or for all courses.
+        Cheap next to the main query, since no isUserEvent() filtering
+        or sorting is involved.
+        '''
+        if courseToProfile is None:
+            coursePredicate = ''
+        else:
+            coursePredicate = " WHERE course_display_name = '%s'" % courseToProfile.replace("\\", "\\\\").replace("'", "\\'")
+        marks = []
+        for queryStr in ('SELECT COUNT(*), MAX(time) FROM Edx.EventXtract%s;' % coursePredicate,
+                         'SELECT COUNT(*), MAX(created_at) FROM EdxForum.contents%s;' % coursePredicate,
+                         'SELECT COUNT(*), MAX(start_date), MAX(end_date) FROM Edx.CourseInfo%s;' % coursePredicate):
+            for row in self.db.query(queryStr):
+                marks.append([str(value) for value in row])
+        return marks
+
+    def close(self):
+        self.db.close()
+
+
+class FileEventSource(EventSource):
+    '''
+    Runtime bookkeeping shared by the file-based sources.
+    '''
+
+    def __init__(self, runtimesPath=None):
+        self.runtimesPath = runtimesPath
+        self.runtimes = readRuntimes(runtimesPath) if runtimesPath is not None else None
+        # Course --> [earliest, latest] event time delivered so far:
+        self.observedRuntimes = {}
+
+    def courseRuntime(self, courseName):
+        if self.runtimes is not None:
+            return self.runtimes.get(courseName)
+        try:
+            return tuple(self.observedRuntimes[courseName])
+        except KeyError:
+            return None
+
+    def watermark(self, courseToProfile=None): #@UnusedVariable
+        '''
+        Size and modification time of the event files
+        and the runtimes file.
+        '''
+        marks = []
+        for path in self.paths + ([self.runtimesPath] if self.runtimesPath is not None else []):
+            fileStat = os.stat(path)
+            marks.append([os.path.abspath(path), fileStat.st_size, fileStat.st_mtime])
+        return marks
+
+    def _observe(self, batch):
+        '''
+        Update the earliest and latest event time of each
+        course in a batch.
+        '''
+        if self.runtimes is not None:
+            return
+        for (courseName, rows) in itertools.groupby(batch, key=lambda row: row[0]):
+            times = [row[2] for row in rows if row[2] is not None]
+            if len(times) == 0:
+                continue
+            (earliest, latest) = (min(times), max(times))
+            try:
+                observed = self.observedRuntimes[courseName]
+                observed[0] = min(observed[0], earliest)
+                observed[1] = max(observed[1], latest)
+            except KeyError:
+                self.observedRuntimes[courseName] = [earliest, latest]
+
+
+class CsvEventSource(FileEventSource):
+
+    def __init__(self,
+                 paths,
+                 delimiter=None,
+                 hasHeader=True,
+                 presorted=True,
+                 runtimesPath=None,
+                 batchSize=DEFAULT_BATCH_SIZE):
+        '''
+        :param paths: one file, or several files in course order. Files
+            ending in .gz are decompressed on the fly.
+        :type paths: {string | [string]}
+        :param delimiter: field separator. Default: tab for .tsv files,
+            else comma
+        :type delimiter: {string | None}
+        :param hasHeader: whether each file starts with a header line
+        :type hasHeader: boolean
+        :param presorted: False if rows are not in course, student, time order
+        :type presorted: boolean
+        :param runtimesPath: CSV file with course start and end dates
+        :type runtimesPath: {string | None}
+        :param batchSize: rows per batch
+        :type batchSize: int
+        '''
+        FileEventSource.__init__(self, runtimesPath)
+        self.paths = list(paths) if isinstance(paths, (list, tuple)) else [paths]
+        self.delimiter = delimiter
+        self.hasHeader = hasHeader
+        self.presorted = presorted
+        self.batchSize = batchSize
+
+    def batches(self, courseToProfile=None, afterCourse=None): #@UnusedVariable
+        if self.presorted:
+            for batch in self._readBatches(courseToProfile):
+                self._observe(batch)
+                yield batch
+            return
+        rows = []
+        for batch in self._readBatches(courseToProfile):
+            rows.extend(batch)
+        rows.sort(key=lambda row: (row[0], row[1], row[2] or EPOCH))
+        for start in range(0, len(rows), self.batchSize):
+            batch = rows[start:start + self.batchSize]
+            self._observe(batch)
+            yield batch
+
+    def unsortedBatches(self, courseToProfile=None, afterCourse=None): #@UnusedVariable
+        # Start and end times are the same in any order:
+        for batch in self._readBatches(courseToProfile):
+            self._observe(batch)
+            yield batch
+
+    def _readBatches(self, courseToProfile):
+        for path in self.paths:
+            delimiter = self.delimiter
+            if delimiter is None:
+                delimiter = '\t' if path.replace('.gz', '').endswith('.tsv') else ','
+            if path.endswith('.gz'):
+                fd = gzip.open(path, 'rb')
+            else:
+                fd = open(path, 'rb')
+            try:
+                if self.hasHeader:
+                    fd.readline()
+                while True:
+                    # Read about batchSize rows' worth of lines at
+                    # a time; whole lines are always returned:
+                    lines = fd.readlines(self.batchSize * 100)
+                    if len(lines) == 0:
+                        break
+                    if sys.version_info[0] > 2:
+                        lines = [line.decode('utf-8') for line in lines]
+                    batch = [(course, student, parseTime(timeStr), int(isVideo))
+                             for (course, student, timeStr, isVideo) in csv.reader(lines, delimiter=delimiter)]
+                    if courseToProfile is not None:
+                        batch = [row for row in batch if row[0] == courseToProfile]
+                    if len(batch) > 0:
+                        yield batch
+            finally:
+                fd.close()
+
+
+class ColumnarEventSource(FileEventSource):
+
+    def __init__(self, path, runtimesPath=None, batchSize=DEFAULT_BATCH_SIZE):
+        '''
+        :param path: .npz file written by writeEventColumns(); its
+            large columns are memory-mapped
+        :type path: string
+        :param runtimesPath: CSV file with course start and end dates
+        :type runtimesPath: {string | None}
+        :param batchSize: rows per batch
+        :type batchSize: int
+        '''
+        FileEventSource.__init__(self, runtimesPath)
+        self.path = path
+        self.paths = [path]
+        self.batchSize = batchSize
+
+    def batches(self, courseToProfile=None, afterCourse=None): #@UnusedVariable
+        with numpy.load(self.path) as archive:
+            courses = [decodeName(name) for name in archive['courses']]
+            students = [decodeName(name) for name in archive['students']]
+        courseCol = memmapColumn(self.path, 'course')
+        studentCol = memmapColumn(self.path, 'student')
+        timeCol = memmapColumn(self.path, 'time')
+        videoCol = memmapColumn(self.path, 'isVideo')
+        (start, end) = (0, len(courseCol))
+        if courseToProfile is not None:
+            # Rows are sorted by course, so each course is one range:
+            if courseToProfile not in courses:
+                return
+            courseIndex = courses.index(courseToProfile)
+            start = int(numpy.searchsorted(courseCol, courseIndex, side='left'))
+            end = int(numpy.searchsorted(courseCol, courseIndex, side='right'))
+        for batchStart in range(start, end, self.batchSize):
+            batchEnd = min(batchStart + self.batchSize, end)
+            batch = [(courses[course], students[student], fromEpochSeconds(epochSecs), isVideo)
+                     for (course, student, epochSecs, isVideo) in
+                     zip(courseCol[batchStart:batchEnd].tolist(),
+                         studentCol[batchStart:batchEnd].tolist(),
+                         timeCol[batchStart:batchEnd].tolist(),
+                         videoCol[batchStart:batchEnd].tolist())]
+            self._observe(batch)
+            yield batch
+
+
+class WindowedEventSource(EventSource):
+    '''
+    Passes on only the events of another source that fall into
+    a time window, for sources that cannot filter themselves.
+    '''
+
+    def __init__(self, source, window):
+        '''
+        :param source: where the events come from
+        :type source: EventSource
+        :param window: (start, end); see buildEventQuery()
+        :type window: (datetime, datetime)
+        '''
+        self.source = source
+        self.window = window
+
+    def batches(self, courseToProfile=None, afterCourse=None):
+        return self._filter(self.source.batches(courseToProfile, afterCourse))
+
+    def unsortedBatches(self, courseToProfile=None, afterCourse=None):
+        return self._filter(self.source.unsortedBatches(courseToProfile, afterCourse))
+
+    def _filter(self, batches):
+        for batch in batches:
+            kept = [row for row in batch if inWindow(row[2], self.window)]
+            if len(kept) > 0:
+                yield kept
+
+    def courseRuntime(self, courseName):
+        return self.source.courseRuntime(courseName)
+
+    def watermark(self, courseToProfile=None):
+        return self.source.watermark(courseToProfile)
+
+    def close(self):
+        self.source.close()
+
+
+def writeEventColumns(path, source):
+    '''
+    Write the rows of an event source as an .npz file for
+    ColumnarEventSource:
+
+        courses:  'S<n>' course_display_name dictionary, in row order
+        students: 'S<n>' sorted anon_screen_name dictionary
+        course:   int32 index into courses
+        student:  int32 index into students
+        time:     int64 seconds since the epoch
+        isVideo:  int8
+
+    Courses are numbered in the order they appear, so that the
+    course column is sorted if the source's rows are. Rows without
+    a time are dropped.
+
+    :param path: file to write
+    :type path: string
+    :param source: source of sorted rows
+    :type source: EventSource
+    :return: number of rows written
+    :rtype: int
+    '''
+    courseIndexes = {}
+    studentIndexes = {}
+    courseCol = []
+    studentCol = []
+    timeCol = []
+    videoCol = []
+    for batch in source.batches():
+        for (course, student, eventTime, isVideo) in batch:
+            if eventTime is None:
+                continue
+            courseCol.append(courseIndexes.setdefault(course, len(courseIndexes)))
+            studentCol.append(studentIndexes.setdefault(student, len(studentIndexes)))
+            timeCol.append(toEpochSeconds(eventTime))
+            videoCol.append(isVideo)
+    courseNames = sorted(courseIndexes, key=courseIndexes.get)
+    # Renumber students in sorted name order:
+    studentNames = sorted(studentIndexes)
+    renumbering = numpy.empty(len(studentNames), dtype=numpy.int32)
+    for (newIndex, student) in enumerate(studentNames):
+        renumbering[studentIndexes[student]] = newIndex
+    writeColumns(path, {'courses'  : studentArray(courseNames),
+                        'students' : studentArray(studentNames),
+                        'course'   : numpy.array(courseCol, dtype=numpy.int32),
+                        'student'  : renumbering[numpy.array(studentCol, dtype=numpy.int64)],
+                        'time'     : numpy.array(timeCol, dtype=numpy.int64),
+                        'isVideo'  : numpy.array(videoCol, dtype=numpy.int8)})
+    return len(timeCol)
+
+
+def openEventSource(path, runtimesPath=None):
+    '''
+    Return a ColumnarEventSource for .npz files, else a CsvEventSource.
+    '''
+    if path.endswith('.npz'):
+        return ColumnarEventSource(path, runtimesPath=runtimesPath)
+    return CsvEventSource(path, runtimesPath=runtimesPath)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 3 or not sys.argv[2].endswith('.npz'):
+        print('Usage: %s <events.csv[.gz] | events.tsv[.gz]> <events.npz>' % os.path.basename(sys.argv[0]))
+        sys.exit(1)
+    numRows = writeEventColumns(sys.argv[2], CsvEventSource(sys.argv[1]))
+    print('Wrote %d events to %s.' % (numRows, sys.argv[2]))
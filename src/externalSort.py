@@ -0,0 +1,317 @@
+# Copyright (c) 2014, Stanford University
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification, are permitted provided that the following conditions are met:
+# 1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following disclaimer in the documentation and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote products derived from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+'''
+Created on Oct 19, 2026
+
+Out-of-core sorting of event rows into the (course, student, time)
+order that EngagementComputer.run() needs, for platform-wide runs
+whose events do not fit in memory, and to spare the database the
+ORDER BY over the union of all events.
+
+Rows are read in unsorted batches (EventSource.unsortedBatches()),
+and encoded into fixed-size records: int32 course and student
+indexes into name dictionaries, int64 microseconds since the epoch,
+and the int8 isVideo flag; 17 bytes per event. Whenever the
+encoded events reach the memory budget, they are sorted and spilled
+to a temporary file as a sorted run. At the end, all runs are read
+back one block at a time, and merged:
+
+    sorter = ExternalSorter(budgetMB=512)
+    for batch in sorter.sortedBatches(source.unsortedBatches()):
+        ...
+
+If all events fit within the budget, nothing is spilled. The
+budget covers the event records, not the course and student name
+dictionaries, nor the batches in which rows arrive and leave.
+
+Names are sorted by Python's comparison, which is bytewise, while
+the main query's ORDER BY uses the database collation. Sessions
+only need each student's events together and in time order, so
+results are the same, but courses may come in a different order.
+For that reason ExternalSortEventSource does not pass the
+afterCourse hint of resumed runs on to its source: run() skips
+the rows of completed courses itself.
+
+Run out of core from the command line with engagement.py --outOfCore.
+
+@author: paepcke
+'''
+import os
+import shutil
+import tempfile
+
+import numpy
+
+from eventSources import EventSource, DEFAULT_BATCH_SIZE
+
+
+# Layout of one event in memory and in run files:
+RUN_DTYPE = numpy.dtype([('course', numpy.int32),
+                         ('student', numpy.int32),
+                         ('time', numpy.int64),
+                         ('isVideo', numpy.int8)])
+
+# Memory per buffered event while a chunk is sorted: the
+# record, its sort keys and permutation, and the sorted copy:
+BYTES_PER_EVENT = 64
+
+DEFAULT_BUDGET_MB = 256
+
+# Smallest chunk, and smallest block read from a run:
+MIN_BLOCK_ROWS = 1024
+
+
+def nameSortKey(name):
+    # None, as for a NULL anon_screen_name, sorts first:
+    return (name is not None, name)
+
+
+def nameRanks(indexes):
+    '''
+    Given a name --> index dictionary, return the names in index
+    order, and an array with the sort rank of each index.
+
+    :param indexes: name --> index, with indexes 0..n-1
+    :type indexes: dict
+    :return: (names, ranks)
+    :rtype: ([string], numpy.ndarray)
+    '''
+    names = [None] * len(indexes)
+    for (name, index) in indexes.items():
+        names[index] = name
+    ranks = numpy.empty(len(names), dtype=numpy.int64)
+    ranks[sorted(range(len(names)), key=lambda index: nameSortKey(names[index]))] = numpy.arange(len(names))
+    return (names, ranks)
+
+
+def countUpTo(columns, bound):
+    '''
+    Number of leading rows of lexicographically sorted columns
+    that are less than or equal to a bound.
+
+    :param columns: sort key columns, most significant first
+    :type columns: [numpy.ndarray]
+    :param bound: one value per column
+    :type bound: tuple
+    :rtype: int
+    '''
+    (low, high) = (0, len(columns[0]))
+    for (column, value) in zip(columns[:-1], bound[:-1]):
+        (low, high) = (low + numpy.searchsorted(column[low:high], value, side='left'),
+                       low + numpy.searchsorted(column[low:high], value, side='right'))
+    return int(low + numpy.searchsorted(columns[-1][low:high], bound[-1], side='right'))
+
+
+class ExternalSorter(object):
+    '''
+    Sorts event rows in bounded memory. One instance sorts
+    one stream of batches.
+    '''
+
+    def __init__(self, budgetMB=DEFAULT_BUDGET_MB, tmpDir=None, batchSize=DEFAULT_BATCH_SIZE):
+        '''
+        :param budgetMB: memory for buffered events, in MB
+        :type budgetMB: float
+        :param tmpDir: directory for the run files. Default: the
+            system's temp directory
+        :type tmpDir: {string | None}
+        :param batchSize: rows per delivered batch
+        :type batchSize: int
+        '''
+        self.chunkRows = max(int(budgetMB * 1024 * 1024) // BYTES_PER_EVENT, MIN_BLOCK_ROWS)
+        self.tmpDir = tmpDir
+        self.batchSize = batchSize
+        self.courseIndexes = {}
+        self.studentIndexes = {}
+        self.runPaths = []
+        self.numEvents = 0
+        self.spilledBytes = 0
+
+    def sortedBatches(self, batches):
+        '''
+        Yield the rows of the given batches as lists of
+        (course_display_name, anon_screen_name, time, isVideo) tuples,
+        in course, student, time order; see sortChunk(). Run files are removed when
+        the generator finishes or is closed.
+
+        :param batches: lists of event tuples, in any order
+        :type batches: iterable
+        '''
+        workDir = tempfile.mkdtemp(prefix='engagementSort_', dir=self.tmpDir)
+        try:
+            chunk = []
+            chunkLen = 0
+            for batch in batches:
+                if len(batch) == 0:
+                    continue
+                records = self.encode(batch)
+                chunk.append(records)
+                chunkLen += len(records)
+                self.numEvents += len(records)
+                if chunkLen >= self.chunkRows:
+                    self.spill(workDir, self.sortChunk(chunk))
+                    chunk = []
+                    chunkLen = 0
+            if len(self.runPaths) == 0:
+                # Everything fit in memory:
+                if chunkLen > 0:
+                    (courseNames, _) = nameRanks(self.courseIndexes)
+                    (studentNames, _) = nameRanks(self.studentIndexes)
+                    for batch in self.decodeBatches(self.sortChunk(chunk), courseNames, studentNames):
+                        yield batch
+                return
+            if chunkLen > 0:
+                self.spill(workDir, self.sortChunk(chunk))
+            for batch in self.merge():
+                yield batch
+        finally:
+            shutil.rmtree(workDir, ignore_errors=True)
+
+    def encode(self, batch):
+        '''
+        Turn a batch of event tuples into an array of RUN_DTYPE records.
+        Times of None become NaT, which sorts first.
+        '''
+        (courses, students, times, isVideos) = zip(*batch)
+        courseIndexes = self.courseIndexes
+        studentIndexes = self.studentIndexes
+        records = numpy.empty(len(batch), dtype=RUN_DTYPE)
+        records['course'] = [courseIndexes.setdefault(course, len(courseIndexes)) for course in courses]
+        records['student'] = [studentIndexes.setdefault(student, len(studentIndexes)) for student in students]
+        records['time'] = numpy.array(times, dtype='datetime64[us]').view(numpy.int64)
+        records['isVideo'] = isVideos
+        return records
+
+    def sortChunk(self, chunk):
+        '''
+        Concatenate a list of record arrays, and sort the result
+        by course name, student name, time, and isVideo. Ordering
+        on isVideo too makes results independent of the budget.
+        '''
+        records = numpy.concatenate(chunk)
+        del chunk[:]
+        (_, courseRanks) = nameRanks(self.courseIndexes)
+        (_, studentRanks) = nameRanks(self.studentIndexes)
+        order = numpy.lexsort((records['isVideo'],
+                               records['time'],
+                               studentRanks[records['student']],
+                               courseRanks[records['course']]))
+        return records[order]
+
+    def spill(self, workDir, records):
+        path = os.path.join(workDir, 'run%05d.bin' % len(self.runPaths))
+        with open(path, 'wb') as fd:
+            records.tofile(fd)
+        self.runPaths.append(path)
+        self.spilledBytes += records.nbytes
+
+    def merge(self):
+        '''
+        K-way merge of the sorted runs. Each run is read one block
+        at a time. In each round, the smallest of the last keys in the
+        blocks of runs that have more on disk bounds what is safe to
+        emit: all buffered rows up to that key are sorted together and
+        delivered. Names are ranked once, over the complete dictionaries;
+        since each run was sorted by name, run order agrees with these ranks.
+        '''
+        (courseNames, courseRanks) = nameRanks(self.courseIndexes)
+        (studentNames, studentRanks) = nameRanks(self.studentIndexes)
+        numStudents = max(len(studentNames), 1)
+        blockRows = max(self.chunkRows // (len(self.runPaths) + 1), MIN_BLOCK_ROWS)
+
+        def groupKeys(records):
+            # One int64 per course/student pair, in name order:
+            return courseRanks[records['course']] * numStudents + studentRanks[records['student']]
+
+        numRuns = len(self.runPaths)
+        runFiles = [open(path, 'rb') for path in self.runPaths]
+        try:
+            buffers = [numpy.empty(0, dtype=RUN_DTYPE)] * numRuns
+            groups = [numpy.empty(0, dtype=numpy.int64)] * numRuns
+            exhausted = [False] * numRuns
+            while True:
+                for run in range(numRuns):
+                    if len(buffers[run]) == 0 and not exhausted[run]:
+                        buffers[run] = numpy.fromfile(runFiles[run], dtype=RUN_DTYPE, count=blockRows)
+                        groups[run] = groupKeys(buffers[run])
+                        exhausted[run] = len(buffers[run]) < blockRows
+                active = [run for run in range(numRuns) if len(buffers[run]) > 0]
+                if len(active) == 0:
+                    return
+                bounding = [run for run in active if not exhausted[run]]
+                if len(bounding) > 0:
+                    bound = min([(groups[run][-1], buffers[run]['time'][-1], buffers[run]['isVideo'][-1]) for run in bounding])
+                parts = []
+                partGroups = []
+                for run in active:
+                    if len(bounding) > 0:
+                        numTaken = countUpTo((groups[run], buffers[run]['time'], buffers[run]['isVideo']), bound)
+                    else:
+                        numTaken = len(buffers[run])
+                    parts.append(buffers[run][:numTaken])
+                    partGroups.append(groups[run][:numTaken])
+                    buffers[run] = buffers[run][numTaken:]
+                    groups[run] = groups[run][numTaken:]
+                records = numpy.concatenate(parts)
+                order = numpy.lexsort((records['isVideo'], records['time'], numpy.concatenate(partGroups)))
+                for batch in self.decodeBatches(records[order], courseNames, studentNames):
+                    yield batch
+        finally:
+            for runFile in runFiles:
+                runFile.close()
+
+    def decodeBatches(self, records, courseNames, studentNames):
+        '''
+        Turn sorted records back into lists of event tuples,
+        batchSize rows at a time.
+        '''
+        for start in range(0, len(records), self.batchSize):
+            block = records[start:start + self.batchSize]
+            yield list(zip([courseNames[course] for course in block['course'].tolist()],
+                           [studentNames[student] for student in block['student'].tolist()],
+                           block['time'].view('datetime64[us]').tolist(),
+                           block['isVideo'].tolist()))
+
+
+class ExternalSortEventSource(EventSource):
+    '''
+    Delivers the rows of another source in sorted order, from that
+    source's unsortedBatches(), sorted out of core.
+    '''
+
+    def __init__(self, source, budgetMB=DEFAULT_BUDGET_MB, tmpDir=None):
+        '''
+        :param source: where the events come from
+        :type source: EventSource
+        :param budgetMB: memory for buffered events, in MB
+        :type budgetMB: float
+        :param tmpDir: directory for the run files
+        :type tmpDir: {string | None}
+        '''
+        self.source = source
+        self.budgetMB = budgetMB
+        self.tmpDir = tmpDir
+        # Sorter of the latest batches() call, for its statistics:
+        self.sorter = None
+
+    def batches(self, courseToProfile=None, afterCourse=None): #@UnusedVariable
+        self.sorter = ExternalSorter(self.budgetMB, tmpDir=self.tmpDir)
+        return self.sorter.sortedBatches(self.source.unsortedBatches(courseToProfile))
+
+    def courseRuntime(self, courseName):
+        return self.source.courseRuntime(courseName)
+
+    def watermark(self, courseToProfile=None):
+        return self.source.watermark(courseToProfile)
+
+    def close(self):
+        self.source.close()
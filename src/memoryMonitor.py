@@ -0,0 +1,278 @@
+# Copyright (c) 2014, Stanford University
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification, are permitted provided that the following conditions are met:
+# 1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following disclaimer in the documentation and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote products derived from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+'''
+Created on Oct 19, 2026
+
+Memory accounting for EngagementComputer runs. A MemoryMonitor
+passed to the computer as memoryMonitor records at each
+wrapUpCourse():
+
+    rssKb:                     current resident set size
+    peakRssKb:                 peak resident set size of the process so far
+    studentSessionsBytes:      estimated size of the course's studentSessionsDict
+    allStudentsDictsBytes:     estimated size of all courses' sessions held in dicts
+    weeklyEffortBytes:         estimated size of allStudentsWeeklyEffortDict
+    topAllocations:            if tracing, the source lines that hold the most memory
+
+Sizes are estimated by measuring the sys.getsizeof() of a sample
+of students, and extrapolating. They count shared small ints and
+interned strings repeatedly, and thus err on the high side.
+
+Allocation tracing uses tracemalloc, which needs Python 3. Tracing
+slows Python down severalfold, so snapshots are taken only every
+traceEvery courses. Without tracemalloc the monitor logs one
+notice, and otherwise works without tracing.
+
+With a memory budget, RSS is also checked every RunMetrics.PROGRESS_ROWS
+rows during run(). When RSS exceeds the budget:
+
+    'warn':  an error message names the course being processed
+    'spill': in addition, the sessions of all completed courses are
+             moved out of their Python dicts into memory-mapped
+             SessionColumns arrays in spillDir, from where all of
+             EngagementComputer's output methods read them. The
+             spill files are unlinked right away; the kernel keeps
+             the mapped pages on disk, and can evict them under
+             pressure.
+
+Example:
+
+    monitor = MemoryMonitor(budgetMb=8000, onBudget='spill')
+    comp = EngagementComputer(..., memoryMonitor=monitor)
+    comp.run()
+    monitor.save('/tmp/memory.json')
+
+@author: paepcke
+'''
+import itertools
+import json
+import os
+import resource
+import sys
+import tempfile
+
+from numpy.lib import format as npyFormat
+
+from sessionColumns import SessionColumns
+
+try:
+    import tracemalloc
+except ImportError:
+    # Python 2:
+    tracemalloc = None
+
+
+BUDGET_ACTIONS = ('warn', 'spill')
+
+PAGE_KB = os.sysconf('SC_PAGE_SIZE') // 1024
+
+
+def currentRssKb():
+    '''
+    Return the current resident set size in KB. Where
+    /proc is unavailable, returns the peak RSS instead.
+    '''
+    try:
+        with open('/proc/self/statm', 'r') as fd:
+            return int(fd.read().split()[1]) * PAGE_KB
+    except (IOError, OSError, IndexError, ValueError):
+        return peakRssKb()
+
+
+def peakRssKb():
+    # Linux reports KB:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def _deepSize(obj):
+    '''
+    sys.getsizeof() of obj, plus that of the items of
+    nested lists and tuples.
+    '''
+    size = sys.getsizeof(obj)
+    if isinstance(obj, (list, tuple)):
+        for item in obj:
+            size += _deepSize(item)
+    return size
+
+
+def estimateDictBytes(studentDict, sampleSize=50):
+    '''
+    Estimate the memory held by a dict of the form
+    {student : [sessionTuple or weekList, ...]}.
+
+    :param studentDict: a studentSessionsDict, or one course's weekly effort dict
+    :type studentDict: dict
+    :param sampleSize: number of students to measure
+    :type sampleSize: int
+    :return: estimated bytes
+    :rtype: int
+    '''
+    size = sys.getsizeof(studentDict)
+    if len(studentDict) == 0:
+        return size
+    sampleBytes = 0
+    sampled = 0
+    for student in itertools.islice(studentDict, sampleSize):
+        sampleBytes += sys.getsizeof(student) + _deepSize(studentDict[student])
+        sampled += 1
+    return size + sampleBytes * len(studentDict) // sampled
+
+
+def estimateCourseDictsBytes(courseDicts, sampleSize=50):
+    '''
+    Estimate the memory held by {courseName : studentDict}
+    structures, such as allStudentsDicts.
+    '''
+    size = sys.getsizeof(courseDicts)
+    for (courseName, studentDict) in courseDicts.items():
+        size += sys.getsizeof(courseName) + estimateDictBytes(studentDict, sampleSize)
+    return size
+
+
+def spillArrayFactory(spillDir, prefix):
+    '''
+    Return an arrayFactory for SessionColumns.allocate() that
+    creates memory-mapped .npy files in spillDir, and unlinks
+    each file as soon as it is mapped.
+    '''
+    def newArray(fieldName, dtype, length):
+        path = os.path.join(spillDir, '%s_%s.npy' % (prefix, fieldName))
+        # numpy refuses to map zero-length files; allocate
+        # one element, and hand out an empty view of it:
+        array = npyFormat.open_memmap(path, mode='w+', dtype=dtype, shape=(max(length, 1),))
+        os.remove(path)
+        if length == 0:
+            array = array[:0]
+        return array
+    return newArray
+
+
+class MemoryMonitor(object):
+
+    def __init__(self,
+                 budgetMb=None,
+                 onBudget='warn',
+                 spillDir=None,
+                 trace=False,
+                 traceEvery=1,
+                 topAllocations=10,
+                 sampleSize=50):
+        '''
+        :param budgetMb: RSS in MB beyond which onBudget is taken. None: no budget
+        :type budgetMb: {float | None}
+        :param onBudget: 'warn' or 'spill'; see module comment
+        :type onBudget: string
+        :param spillDir: directory for spilled sessions. Default: the temp directory
+        :type spillDir: {string | None}
+        :param trace: whether to trace allocations with tracemalloc
+        :type trace: boolean
+        :param traceEvery: take an allocation snapshot every this many courses
+        :type traceEvery: int
+        :param topAllocations: number of source lines to record per snapshot
+        :type topAllocations: int
+        :param sampleSize: students measured per dict for size estimates
+        :type sampleSize: int
+        '''
+        if onBudget not in BUDGET_ACTIONS:
+            raise ValueError("Budget action must be one of %s, not '%s'" % (', '.join(BUDGET_ACTIONS), onBudget))
+        self.budgetKb = None if budgetMb is None else int(budgetMb * 1024)
+        self.onBudget = onBudget
+        self.spillDir = spillDir if spillDir is not None else tempfile.gettempdir()
+        self.traceEvery = traceEvery
+        self.topAllocations = topAllocations
+        self.sampleSize = sampleSize
+        self.trace = trace
+        self.courseRecords = {}
+        self.budgetExceededCourses = []
+        self.spilledCourses = []
+        self.numCoursesDone = 0
+        self.tracingNoticeDue = trace and tracemalloc is None
+        if trace and tracemalloc is not None and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def courseDone(self, comp, courseName):
+        '''
+        Called by comp.wrapUpCourse() once the course's sessions
+        are in comp.allStudentsDicts, and before its
+        studentSessionsDict is reset.
+        '''
+        self.numCoursesDone += 1
+        record = {'rssKb' : currentRssKb(),
+                  'peakRssKb' : peakRssKb(),
+                  'studentSessionsBytes' : estimateDictBytes(comp.studentSessionsDict, self.sampleSize),
+                  'allStudentsDictsBytes' : estimateCourseDictsBytes(comp.allStudentsDicts, self.sampleSize),
+                  'weeklyEffortBytes' : estimateCourseDictsBytes(comp.allStudentsWeeklyEffortDict, self.sampleSize)}
+        if self.tracingNoticeDue:
+            comp.logErr('Allocation tracing needs tracemalloc (Python 3); tracing disabled.')
+            self.tracingNoticeDue = False
+        if self.trace and tracemalloc is not None and self.numCoursesDone % self.traceEvery == 0:
+            stats = tracemalloc.take_snapshot().statistics('lineno')[:self.topAllocations]
+            record['topAllocations'] = ['%s:%d %d' % (stat.traceback[0].filename, stat.traceback[0].lineno, stat.size)
+                                        for stat in stats]
+        self.courseRecords[courseName] = record
+        self.check(comp, courseName, record['rssKb'])
+
+    def check(self, comp, courseName, rssKb=None):
+        '''
+        Take the budget action if RSS exceeds the budget. Called
+        from courseDone(), and periodically from run().
+
+        :return: True if the budget was exceeded
+        :rtype: boolean
+        '''
+        if self.budgetKb is None:
+            return False
+        if rssKb is None:
+            rssKb = currentRssKb()
+        if rssKb <= self.budgetKb:
+            return False
+        # One message per course:
+        if courseName not in self.budgetExceededCourses:
+            self.budgetExceededCourses.append(courseName)
+            comp.logErr('Memory budget of %d MB exceeded while processing course %s: RSS is %d MB.' %
+                        (self.budgetKb // 1024, courseName, rssKb // 1024))
+        if self.onBudget == 'spill':
+            self.spill(comp)
+        return True
+
+    def spill(self, comp):
+        '''
+        Move the sessions of all completed courses from
+        comp.allStudentsDicts into memory-mapped columns.
+        '''
+        for courseName in list(comp.allStudentsDicts.keys()):
+            if courseName in comp.courseSessionColumns:
+                # Cannot hold two column sets for one course:
+                continue
+            prefix = 'engagementSpill_%d_%d' % (os.getpid(), len(self.spilledCourses))
+            columns = SessionColumns.fromSessionsDict(comp.allStudentsDicts[courseName],
+                                                      arrayFactory=spillArrayFactory(self.spillDir, prefix))
+            comp.addCourseSessions(courseName, columns)
+            del comp.allStudentsDicts[courseName]
+            self.spilledCourses.append(courseName)
+            comp.log('Spilled sessions of course %s to disk.' % courseName)
+
+    def asDict(self):
+        return {'budgetMb' : None if self.budgetKb is None else self.budgetKb / 1024.0,
+                'onBudget' : self.onBudget,
+                'peakRssKb' : peakRssKb(),
+                'courses' : self.courseRecords,
+                'budgetExceededCourses' : self.budgetExceededCourses,
+                'spilledCourses' : self.spilledCourses}
+
+    def save(self, path):
+        '''
+        Write asDict() to a JSON file.
+        '''
+        with open(path, 'w') as fd:
+            json.dump(self.asDict(), fd, indent=2, sort_keys=True)
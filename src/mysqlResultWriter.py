@@ -0,0 +1,263 @@
+# Copyright (c) 2014, Stanford University
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification, are permitted provided that the following conditions are met:
+# 1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following disclaimer in the documentation and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote products derived from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+'''
+Created on Oct 19, 2026
+
+Writes the results of an EngagementComputer into MySQL tables,
+so that dashboards can read them without a CSV reload. The same
+three results as writeResultsToDisk() go into three data tables
+of the result database (default: Engagement):
+
+    EngagementSummaryData:      one row per course
+    EngagementSessionsData:     one row per session
+    EngagementWeeklyEffortData: one row per learner and course week
+
+Rows are loaded in bulk, either as multi-row INSERT statements
+of batchRows rows each ('insert'), or through a temporary file
+and LOAD DATA LOCAL INFILE ('loadData'; the server must allow
+local_infile).
+
+Each load of a course is tagged with a fresh load_id. The course's
+current load_id is kept in the EngagementLoads table, and readers
+use the views EngagementSummary, EngagementSessions, and
+EngagementWeeklyEffort, which only show rows of current loads.
+After all rows of a course are loaded, a single-row upsert of
+EngagementLoads swaps the course over, and the rows of the previous
+load are deleted. So a re-run replaces a course atomically: readers
+see either all old or all new rows, and the only lock on visible
+data is that of the one-row update. Rows of a load that failed
+midway remain invisible; dropUnreferencedLoads() removes them.
+
+Results computed with videoOnly are kept apart from the others
+through the video_only column of EngagementLoads and the views.
+Two writers must not load the same course at the same time.
+
+@author: paepcke
+'''
+import datetime
+import numbers
+import os
+import tempfile
+import uuid
+
+
+PLATFORM = 'OpenEdX'
+
+# Data table --> column definitions; every data
+# table starts with load_id and course_display_name:
+DATA_TABLES = [('EngagementSummaryData',
+                [('platform', 'VARCHAR(32)'),
+                 ('num_active_learners', 'INT'),
+                 ('total_student_sessions', 'INT'),
+                 ('total_effort_secs', 'BIGINT'),
+                 ('med_per_week_1_to_20_min', 'INT'),
+                 ('med_per_week_21_to_60_min', 'INT'),
+                 ('med_per_week_gt_60_min', 'INT')]),
+               ('EngagementSessionsData',
+                [('anon_screen_name', 'VARCHAR(40)'),
+                 ('session_start', 'DATETIME'),
+                 ('session_secs', 'INT'),
+                 ('num_events', 'INT')]),
+               ('EngagementWeeklyEffortData',
+                [('anon_screen_name', 'VARCHAR(40)'),
+                 ('week', 'INT'),
+                 ('effort_secs', 'INT')])]
+
+LOADS_TABLE = 'EngagementLoads'
+
+LOAD_METHODS = ('insert', 'loadData')
+
+
+def sqlLiteral(value):
+    '''
+    Return the MySQL literal for an int, float, string, datetime, or None.
+    '''
+    if value is None:
+        return 'NULL'
+    if isinstance(value, datetime.datetime):
+        return "'%s'" % value.strftime('%Y-%m-%d %H:%M:%S')
+    if isinstance(value, numbers.Number):
+        return '%d' % value
+    return "'%s'" % str(value).replace('\\', '\\\\').replace("'", "\\'")
+
+
+def infileField(value):
+    '''
+    Return a value as a field of a LOAD DATA file with the
+    default escaping: tab separated, backslash escapes, \\N for NULL.
+    '''
+    if value is None:
+        return '\\N'
+    if isinstance(value, datetime.datetime):
+        return value.strftime('%Y-%m-%d %H:%M:%S')
+    if isinstance(value, numbers.Number):
+        return '%d' % value
+    return str(value).replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n')
+
+
+class MySQLResultWriter(object):
+
+    def __init__(self, db, dbName='Engagement', method='insert', batchRows=5000, tmpDir=None):
+        '''
+        :param db: open connection with MySQLDB's execute() and query()
+        :type db: MySQLDB
+        :param dbName: existing database that holds the result tables
+        :type dbName: string
+        :param method: one of LOAD_METHODS
+        :type method: string
+        :param batchRows: rows per INSERT statement
+        :type batchRows: int
+        :param tmpDir: directory for LOAD DATA files. Default: system temp dir
+        :type tmpDir: {string | None}
+        '''
+        if method not in LOAD_METHODS:
+            raise ValueError("Load method must be one of %s, not '%s'" % (', '.join(LOAD_METHODS), method))
+        self.db = db
+        self.dbName = dbName
+        self.method = method
+        self.batchRows = batchRows
+        self.tmpDir = tmpDir
+        self.numRowsLoaded = 0
+
+    def table(self, tableName):
+        return '%s.%s' % (self.dbName, tableName)
+
+    def ensureTables(self):
+        '''
+        Create the data tables, EngagementLoads, and the
+        views, unless they exist.
+        '''
+        self.db.execute('CREATE TABLE IF NOT EXISTS %s (' % self.table(LOADS_TABLE) +
+                        'course_display_name VARCHAR(255) NOT NULL, ' +
+                        'video_only TINYINT NOT NULL, ' +
+                        'load_id BIGINT NOT NULL, ' +
+                        'loaded_at DATETIME NOT NULL, ' +
+                        'PRIMARY KEY (course_display_name, video_only), ' +
+                        'KEY (load_id)) ENGINE=InnoDB;')
+        for (tableName, columns) in DATA_TABLES:
+            columnDefs = ', '.join(['%s %s' % column for column in columns])
+            if tableName == 'EngagementSummaryData':
+                keys = 'KEY (load_id)'
+            else:
+                keys = 'KEY (load_id, anon_screen_name)'
+            self.db.execute('CREATE TABLE IF NOT EXISTS %s (' % self.table(tableName) +
+                            'load_id BIGINT NOT NULL, ' +
+                            'course_display_name VARCHAR(255) NOT NULL, ' +
+                            '%s, %s) ENGINE=InnoDB;' % (columnDefs, keys))
+            self.db.execute('CREATE OR REPLACE VIEW %s AS ' % self.table(tableName[:-len('Data')]) +
+                            'SELECT data.*, loads.video_only FROM %s AS data ' % self.table(tableName) +
+                            'JOIN %s AS loads ON data.load_id = loads.load_id;' % self.table(LOADS_TABLE))
+
+    def writeResults(self, comp):
+        '''
+        Load and swap in all courses of an EngagementComputer, one
+        course at a time; each course becomes visible as soon as
+        its rows are loaded.
+
+        :param comp: computer on which run() was called, or into which
+            results were added
+        :type comp: EngagementComputer
+        :return: names of the courses that were written
+        :rtype: [string]
+        '''
+        self.ensureTables()
+        courseNames = set(comp.courseResults.keys())
+        courseNames.update(comp.allStudentsDicts.keys())
+        courseNames.update(comp.courseSessionColumns.keys())
+        courseNames = sorted([courseName for courseName in courseNames if courseName is not None])
+        for courseName in courseNames:
+            self.writeCourse(comp, courseName)
+        return courseNames
+
+    def writeCourse(self, comp, courseName):
+        '''
+        Load one course's results under a new load_id, and swap
+        them in for the course's previous rows.
+        '''
+        loadId = uuid.uuid4().int >> 65
+        courseResult = comp.courseResults.get(courseName)
+        if courseResult is not None:
+            self.loadRows('EngagementSummaryData', [(loadId, courseName, PLATFORM) + courseResult.statsTuple()])
+            self.loadRows('EngagementWeeklyEffortData', self.weeklyEffortRows(loadId, courseName, comp))
+        self.loadRows('EngagementSessionsData', self.sessionRows(loadId, courseName, comp))
+        self.swap(courseName, 1 if comp.videoOnly else 0, loadId)
+
+    def sessionRows(self, loadId, courseName, comp):
+        for row in comp.iterSessions(courseName):
+            yield (loadId,) + row
+
+    def weeklyEffortRows(self, loadId, courseName, comp):
+        for row in comp.iterWeeklyEffort(courseName):
+            yield (loadId,) + row
+
+    def loadRows(self, tableName, rows):
+        '''
+        Bulk-load rows, whose values are in the order of the table's columns.
+        '''
+        columns = ['load_id', 'course_display_name'] + [column for (column, _) in dict(DATA_TABLES)[tableName]]
+        if self.method == 'loadData':
+            self.loadRowsFromFile(tableName, columns, rows)
+            return
+        insertPrefix = 'INSERT INTO %s (%s) VALUES ' % (self.table(tableName), ', '.join(columns))
+        batch = []
+        for row in rows:
+            batch.append('(%s)' % ','.join([sqlLiteral(value) for value in row]))
+            if len(batch) >= self.batchRows:
+                self.db.execute(insertPrefix + ','.join(batch) + ';')
+                self.numRowsLoaded += len(batch)
+                batch = []
+        if len(batch) > 0:
+            self.db.execute(insertPrefix + ','.join(batch) + ';')
+            self.numRowsLoaded += len(batch)
+
+    def loadRowsFromFile(self, tableName, columns, rows):
+        (fd, path) = tempfile.mkstemp(suffix='_%s.tsv' % tableName, dir=self.tmpDir)
+        try:
+            numRows = 0
+            with os.fdopen(fd, 'w') as infile:
+                for row in rows:
+                    infile.write('\t'.join([infileField(value) for value in row]) + '\n')
+                    numRows += 1
+            if numRows == 0:
+                return
+            self.db.execute("LOAD DATA LOCAL INFILE '%s' INTO TABLE %s (%s);" %
+                            (path.replace('\\', '\\\\').replace("'", "\\'"), self.table(tableName), ', '.join(columns)))
+            self.numRowsLoaded += numRows
+        finally:
+            os.remove(path)
+
+    def swap(self, courseName, videoOnly, loadId):
+        '''
+        Make loadId the course's visible load, and delete
+        the rows of the load it replaces.
+        '''
+        oldLoadIds = [row[0] for row in self.db.query('SELECT load_id FROM %s WHERE course_display_name = %s AND video_only = %d;' %
+                                                      (self.table(LOADS_TABLE), sqlLiteral(courseName), videoOnly))]
+        # The swap itself: one single-row statement:
+        self.db.execute('INSERT INTO %s (course_display_name, video_only, load_id, loaded_at) VALUES (%s, %d, %d, NOW()) ' %
+                        (self.table(LOADS_TABLE), sqlLiteral(courseName), videoOnly, loadId) +
+                        'ON DUPLICATE KEY UPDATE load_id = VALUES(load_id), loaded_at = VALUES(loaded_at);')
+        # Old rows are no longer visible; removing
+        # them does not hold up any reader:
+        for oldLoadId in oldLoadIds:
+            for (tableName, _) in DATA_TABLES:
+                self.db.execute('DELETE FROM %s WHERE load_id = %d;' % (self.table(tableName), oldLoadId))
+
+    def dropUnreferencedLoads(self):
+        '''
+        Delete rows of loads that never were swapped in, such as
+        those of a crashed run. Only call while no writer is active:
+        rows of a load in progress are unreferenced too.
+        '''
+        for (tableName, _) in DATA_TABLES:
+            self.db.execute('DELETE data FROM %s AS data LEFT JOIN %s AS loads ON data.load_id = loads.load_id WHERE loads.load_id IS NULL;' %
+                            (self.table(tableName), self.table(LOADS_TABLE)))
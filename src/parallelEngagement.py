@@ -0,0 +1,165 @@
+# Copyright (c) 2014, Stanford University
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification, are permitted provided that the following conditions are met:
+# 1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following disclaimer in the documentation and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote products derived from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+'''
+Created on Oct 19, 2026
+
+Spread engagement computation over worker processes, one
+course at a time. Each worker runs an EngagementComputer for
+a single course. All courses of a worker process share one
+ConnectionPool, sized by the dbPoolSize engine argument, so
+that connections are opened once per worker, not once per
+course. The computer hands the course's sessions and weekly
+effort back through shared memory (see sharedResults.py). Only
+the small summary part of the course's CourseEngagementResult
+is pickled.
+
+The parent folds everything into one EngagementComputer,
+whose writeResultsToDisk() then produces the usual three files:
+
+    comp = EngagementComputer(...)
+    ParallelEngagementRunner(courseNames, numWorkers=4, **sameKwargsAsComp).run(comp)
+    comp.writeResultsToDisk()
+
+@author: paepcke
+'''
+import multiprocessing
+
+from engagementResult import CourseEngagementResult
+from sharedResults import newRunPrefix, exportSessions, exportWeeklyEffort, \
+    attachSessions, attachWeeklyEffort, unlinkAll
+
+
+# The ConnectionPool of a worker process; see _initWorker():
+_workerDbPool = None
+
+# Engine arguments that determine the database connections:
+POOL_KWARGS = ('dbFactory', 'dbPoolSize', 'dbHost', 'mySQLUser', 'mySQLPwd')
+
+
+def _initWorker(poolKwargs):
+    '''
+    Worker process side: build the connection pool that
+    all courses computed by this process share. The pool's
+    connections close when the worker process exits.
+
+    :param poolKwargs: arguments for EngagementComputer.newDbPool()
+    :type poolKwargs: dict
+    '''
+    global _workerDbPool
+    from engagement import EngagementComputer
+    _workerDbPool = EngagementComputer.newDbPool(**poolKwargs)
+
+
+def _computeCourse(args):
+    '''
+    Worker process side: compute one course, and export
+    its large results into shared memory.
+
+    :param args: (courseIndex, courseName, segmentPrefix, engineKwargs)
+    :type args: (int, string, string, dict)
+    :return: (courseName, resultDict, sessionsHandle, weeklyEffortHandle, metricsDict);
+        the result dict and handles are None if the course produced no result.
+    :rtype: (string, {dict | None}, {SegmentHandle | None}, {SegmentHandle | None}, dict)
+    '''
+    # Import here, so that importing this module does
+    # not drag in the MySQL client:
+    from engagement import EngagementComputer
+
+    (courseIndex, courseName, segmentPrefix, engineKwargs) = args
+    comp = EngagementComputer(courseToProfile=courseName, dbPool=_workerDbPool, **engineKwargs)
+    comp.run()
+    try:
+        courseResult = comp.courseResults[courseName]
+    except KeyError:
+        return (courseName, None, None, None, comp.metrics.asDict())
+    sessionsHandle = exportSessions('%s_%d_sessions' % (segmentPrefix, courseIndex),
+                                    comp.allStudentsDicts.get(courseName, {}))
+    weeklyEffortHandle = exportWeeklyEffort('%s_%d_weeklyEffort' % (segmentPrefix, courseIndex),
+                                            courseResult.weeklyEffort)
+    # Weekly effort travels through shared memory, not the pickle:
+    resultDict = courseResult.toDict()
+    resultDict['weeklyEffort'] = {}
+    return (courseName, resultDict, sessionsHandle, weeklyEffortHandle, comp.metrics.asDict())
+
+
+class ParallelEngagementRunner(object):
+
+    def __init__(self, courseNames, numWorkers=None, **engineKwargs):
+        '''
+        Prepare a parallel run.
+
+        :param courseNames: course_display_name of each course to compute
+        :type courseNames: [string]
+        :param numWorkers: number of worker processes. Default: number of CPUs
+        :type numWorkers: {int | None}
+        :param engineKwargs: keyword arguments for each worker's EngagementComputer,
+            other than courseToProfile.
+        :type engineKwargs: dict
+        '''
+        self.courseNames = list(courseNames)
+        self.numWorkers = numWorkers if numWorkers is not None else multiprocessing.cpu_count()
+        self.engineKwargs = engineKwargs
+
+    def run(self, comp):
+        '''
+        Compute all courses, and add their results to comp.
+
+        :param comp: EngagementComputer that receives all results
+        :type comp: EngagementComputer
+        :return: comp
+        :rtype: EngagementComputer
+        '''
+        segmentPrefix = newRunPrefix()
+        workArgs = [(courseIndex, courseName, segmentPrefix, self.engineKwargs)
+                    for (courseIndex, courseName) in enumerate(self.courseNames)]
+        poolKwargs = dict([(key, value) for (key, value) in self.engineKwargs.items() if key in POOL_KWARGS])
+        pool = multiprocessing.Pool(processes=self.numWorkers, initializer=_initWorker, initargs=(poolKwargs,))
+        try:
+            for (courseName, resultDict, sessionsHandle, weeklyEffortHandle, metricsDict) in \
+                    pool.imap_unordered(_computeCourse, workArgs):
+                comp.metrics.merge(metricsDict)
+                if resultDict is None:
+                    comp.log("No results for course %s." % courseName)
+                    continue
+                # Unlink right after attaching: the mapped pages
+                # stay valid for as long as the arrays are in use,
+                # and nothing can leak if we fail later on:
+                (sessionsSegment, sessionColumns) = attachSessions(sessionsHandle)
+                sessionsSegment.unlink()
+                (effortSegment, weeklyEffortColumns) = attachWeeklyEffort(weeklyEffortHandle)
+                effortSegment.unlink()
+
+                # Neither sessions nor weekly effort are decoded;
+                # the writers read the attached columns:
+                comp.addCourseResult(CourseEngagementResult.fromDict(resultDict))
+                comp.addCourseSessions(courseName, sessionColumns)
+                comp.addCourseWeeklyEffort(courseName, weeklyEffortColumns)
+            pool.close()
+        except:
+            pool.terminate()
+            raise
+        finally:
+            pool.join()
+            # Segments of workers that failed before
+            # their handle reached us:
+            unlinkAll(segmentPrefix)
+        return comp
+
+
+def listCourses(db):
+    '''
+    Return the names of all courses in Edx.CourseInfo.
+
+    :param db: open connection to the Edx database
+    :type db: MySQLDB
+    :rtype: [string]
+    '''
+    return [row[0] for row in db.query("SELECT DISTINCT course_display_name FROM Edx.CourseInfo;")]
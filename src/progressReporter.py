@@ -0,0 +1,266 @@
+# Copyright (c) 2014, Stanford University
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification, are permitted provided that the following conditions are met:
+# 1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following disclaimer in the documentation and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote products derived from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+'''
+Created on Oct 19, 2026
+
+Progress reports with ETA for EngagementComputer.run(). Before
+the main query, the reporter estimates how many rows each course
+will deliver, with one of:
+
+    'tableStats': TABLE_ROWS of the two tables from information_schema.
+                  Instant, but approximate, and only a total, so
+                  there is no per-course ETA. The default.
+    'grouped':    COUNT(*) ... GROUP BY course_display_name over
+                  Edx.EventXtract and EdxForum.contents. Per-course
+                  estimates, but for all courses a scan of both
+                  tables' course_display_name indexes, which can
+                  take long on the largest tables.
+
+Runs of a single course always use the grouped count, which
+for one course is a cheap index range scan, and exact.
+
+Estimates count all rows, including those that run() drops, such
+as non-user events. ETAs therefore err on the long side. If the
+estimate queries fail, for instance for lack of access to
+information_schema, the run goes on without ETAs.
+
+During the run, every RunMetrics.PROGRESS_ROWS rows, and at most
+every interval seconds, the reporter logs one line, and replaces
+the status file with a JSON object that job monitors can poll:
+
+    state:                      'running', 'done', or 'failed'
+    pid, startedAt, updatedAt:  process ID, and ISO times
+    currentCourse:              course being processed
+    coursesDone:                courses finished so far
+    coursesEstimated:           number of courses in the estimate, or None
+    rowsProcessed:              rows fetched so far
+    rowsEstimated:              estimated total rows, or None
+    currentCourseRows:          rows fetched for the current course
+    currentCourseRowsEstimated: estimate for the current course, or None
+    rowsPerSec:                 rows per second since the first row arrived
+    courseEtaSecs, runEtaSecs:  estimated seconds left, or None
+
+The status file is written to a temporary file in the same
+directory, and renamed into place, so readers never see a
+partial file.
+
+@author: paepcke
+'''
+import datetime
+import json
+import os
+import tempfile
+import time
+
+
+ESTIMATE_METHODS = ('tableStats', 'grouped')
+
+
+class ProgressReporter(object):
+
+    def __init__(self, interval=60, statusFile=None, estimateMethod='tableStats', estimates=None, log=None):
+        '''
+        :param interval: minimum seconds between reports
+        :type interval: float
+        :param statusFile: path of the JSON status file; None: log only
+        :type statusFile: {string | None}
+        :param estimateMethod: one of ESTIMATE_METHODS, for runs of all
+            courses; see the module comment
+        :type estimateMethod: string
+        :param estimates: course name --> expected rows. If given, no
+            estimate queries are run.
+        :type estimates: {dict | None}
+        :param log: function that takes a message string. Default: the
+            log() of the EngagementComputer that the reporter is given to
+        :type log: {function | None}
+        '''
+        if estimateMethod not in ESTIMATE_METHODS:
+            raise ValueError("Estimate method must be one of %s, not '%s'" % (', '.join(ESTIMATE_METHODS), estimateMethod))
+        self.interval = interval
+        self.statusFile = statusFile
+        self.estimateMethod = estimateMethod
+        self.courseEstimates = estimates
+        self.rowsEstimated = None if estimates is None else sum(estimates.values())
+        self.log = log
+
+    def start(self, db, courseToProfile=None):
+        '''
+        Called by run() before the main query. Estimates
+        row counts unless they were given to __init__().
+
+        :param db: connection on which the main query will run, if any
+        :type db: {MySQLDB | None}
+        :param courseToProfile: the one course that will be computed, or None for all
+        :type courseToProfile: {string | None}
+        '''
+        self.startTime = time.time()
+        self.startedAt = datetime.datetime.now().isoformat()
+        self.firstRowTime = None
+        self.currentCourse = None
+        self.courseStartRows = 0
+        self.coursesDone = 0
+        self.rowsProcessed = 0
+        self.lastReportTime = self.startTime
+        self.finished = False
+        # Without a database, as with file event sources,
+        # only estimates given to __init__() are available:
+        if db is not None and self.courseEstimates is None and self.rowsEstimated is None:
+            try:
+                if self.estimateMethod == 'grouped' or courseToProfile is not None:
+                    # For a single course, the grouped count is
+                    # an index range scan, and exact:
+                    self.courseEstimates = self.groupedCounts(db, courseToProfile)
+                    self.rowsEstimated = sum(self.courseEstimates.values())
+                else:
+                    self.rowsEstimated = self.tableStatsCount(db)
+            except Exception as e:
+                # Such as no access to information_schema; the
+                # run itself does not need the estimates:
+                self.courseEstimates = None
+                self.rowsEstimated = None
+                (self.log or self._print)("Could not estimate row counts, reporting progress without ETAs: '%s'" % `e`)
+        self.writeStatus('running')
+
+    def groupedCounts(self, db, courseToProfile=None):
+        '''
+        Return course name --> number of rows in Edx.EventXtract
+        and EdxForum.contents.
+        '''
+        if courseToProfile is None:
+            whereClause = ''
+        else:
+            whereClause = "WHERE course_display_name = '%s'" % courseToProfile
+        counts = {}
+        for table in ('Edx.EventXtract', 'EdxForum.contents'):
+            for (courseName, numRows) in db.query('SELECT course_display_name, COUNT(*) FROM %s %s GROUP BY course_display_name;' %
+                                                  (table, whereClause)):
+                counts[courseName] = counts.get(courseName, 0) + int(numRows)
+        return counts
+
+    def tableStatsCount(self, db):
+        '''
+        Return the approximate total number of rows in Edx.EventXtract
+        and EdxForum.contents, according to the table statistics.
+        '''
+        for (numRows,) in db.query("SELECT SUM(TABLE_ROWS) FROM information_schema.TABLES " +\
+                                   "WHERE (TABLE_SCHEMA = 'Edx' AND TABLE_NAME = 'EventXtract') " +\
+                                   "   OR (TABLE_SCHEMA = 'EdxForum' AND TABLE_NAME = 'contents');"):
+            return None if numRows is None else int(numRows)
+        return None
+
+    def queryDone(self):
+        '''
+        Called by run() when the first row arrives. Throughput
+        is measured from here on.
+        '''
+        self.firstRowTime = time.time()
+
+    def startCourse(self, courseName, rowsProcessed):
+        '''
+        Called by run() when the first row of a course arrives.
+        '''
+        if self.currentCourse is not None:
+            self.coursesDone += 1
+        self.currentCourse = courseName
+        self.courseStartRows = rowsProcessed
+
+    def update(self, rowsProcessed):
+        '''
+        Called by run() every RunMetrics.PROGRESS_ROWS rows. Reports
+        if the interval has passed since the last report.
+        '''
+        now = time.time()
+        if self.firstRowTime is None:
+            self.firstRowTime = now
+        self.rowsProcessed = rowsProcessed
+        if now - self.lastReportTime < self.interval:
+            return
+        self.lastReportTime = now
+        status = self.writeStatus('running')
+        courseEta = status['courseEtaSecs']
+        runEta = status['runEtaSecs']
+        (self.log or self._print)('Progress: %d%s rows, %.0f rows/sec; course %s: %d%s rows, ETA %s; run ETA %s.' %
+                 (rowsProcessed,
+                  '' if self.rowsEstimated is None else ' of ~%d' % self.rowsEstimated,
+                  status['rowsPerSec'] or 0,
+                  self.currentCourse,
+                  status['currentCourseRows'],
+                  '' if status['currentCourseRowsEstimated'] is None else ' of ~%d' % status['currentCourseRowsEstimated'],
+                  '?' if courseEta is None else str(datetime.timedelta(seconds=int(courseEta))),
+                  '?' if runEta is None else str(datetime.timedelta(seconds=int(runEta)))))
+
+    def finish(self, rowsProcessed, state='done'):
+        '''
+        Called by run() at its end. Only the first call counts,
+        so run() can call with state 'failed' from its finally clause.
+        '''
+        if self.finished:
+            return
+        self.finished = True
+        self.rowsProcessed = rowsProcessed
+        if self.currentCourse is not None and state == 'done':
+            self.coursesDone += 1
+        self.writeStatus(state)
+
+    def status(self, state):
+        '''
+        Return the status dict described in the module comment.
+        '''
+        now = time.time()
+        if self.firstRowTime is not None and now > self.firstRowTime and self.rowsProcessed > 0:
+            rowsPerSec = self.rowsProcessed / (now - self.firstRowTime)
+        else:
+            rowsPerSec = None
+        courseRows = self.rowsProcessed - self.courseStartRows
+        courseEstimate = None
+        if self.courseEstimates is not None and self.currentCourse is not None:
+            courseEstimate = self.courseEstimates.get(self.currentCourse)
+        return {'state' : state,
+                'pid' : os.getpid(),
+                'startedAt' : self.startedAt,
+                'updatedAt' : datetime.datetime.now().isoformat(),
+                'currentCourse' : self.currentCourse,
+                'coursesDone' : self.coursesDone,
+                'coursesEstimated' : None if self.courseEstimates is None else len(self.courseEstimates),
+                'rowsProcessed' : self.rowsProcessed,
+                'rowsEstimated' : self.rowsEstimated,
+                'currentCourseRows' : courseRows,
+                'currentCourseRowsEstimated' : courseEstimate,
+                'rowsPerSec' : rowsPerSec,
+                'courseEtaSecs' : self._eta(courseEstimate, courseRows, rowsPerSec),
+                'runEtaSecs' : self._eta(self.rowsEstimated, self.rowsProcessed, rowsPerSec)}
+
+    def writeStatus(self, state):
+        status = self.status(state)
+        if self.statusFile is not None:
+            statusDir = os.path.dirname(os.path.abspath(self.statusFile))
+            (fd, tmpPath) = tempfile.mkstemp(dir=statusDir, prefix='.progress_')
+            try:
+                with os.fdopen(fd, 'w') as statusFd:
+                    json.dump(status, statusFd, indent=2, sort_keys=True)
+                # mkstemp() makes the file private:
+                os.chmod(tmpPath, 0o644)
+                os.rename(tmpPath, self.statusFile)
+            except:
+                os.remove(tmpPath)
+                raise
+        return status
+
+    @staticmethod
+    def _eta(rowsEstimated, rowsDone, rowsPerSec):
+        if rowsEstimated is None or not rowsPerSec:
+            return None
+        return max(rowsEstimated - rowsDone, 0) / rowsPerSec
+
+    @staticmethod
+    def _print(msg):
+        print('%s: %s' % (str(datetime.datetime.now()), msg))
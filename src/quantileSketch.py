@@ -0,0 +1,258 @@
+# Copyright (c) 2014, Stanford University
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification, are permitted provided that the following conditions are met:
+# 1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following disclaimer in the documentation and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote products derived from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+'''
+Created on Oct 19, 2026
+
+Mergeable streaming quantile sketches, after Karnin, Lang and
+Liberty, "Optimal Quantile Approximation in Streams" (KLL, 2016).
+A KLLSketch summarizes any number of values in a fixed number of
+retained values: at most about 3 * k, plus one per level, i.e.
+log2(count / k). Memory therefore does not grow with the number
+of values seen. Values must be mutually comparable; in this
+package they are session lengths in seconds.
+
+The retained values sit in levels; a value in level h stands for
+2**h of the original values. When a level fills up, it is sorted,
+and every other of its values, starting at a random offset, is
+promoted to the next level, the rest dropped. Capacities shrink
+by a factor of CAPACITY_DECAY per level below the top one.
+
+Two sketches with the same k merge into one that summarizes
+both value streams, with the same error guarantee as if all
+values had gone into a single sketch. This is how per-day
+sketches become per-week and per-course sketches
+(see aggregators.SessionLengthQuantilesAggregator).
+
+Error bound: for a quantile query at fraction q, the returned
+value's true normalized rank is within normalizedRankError(k)
+of q, with 99% confidence. normalizedRankError() is the empirical
+fit 2.296 / k**0.9723 that Apache DataSketches publishes for its
+KLL sketch; for the default k=200 it is 0.0133, i.e. the 'median'
+lies between the 48.67th and 51.33rd percentile. Minimum and
+maximum are exact.
+
+Sketches are deterministic for a given seed, so repeated runs
+produce identical output.
+
+@author: paepcke
+'''
+import math
+import random
+
+
+DEFAULT_K = 200
+MIN_K = 8
+
+# Ratio of the capacities of neighboring levels:
+CAPACITY_DECAY = 2.0 / 3.0
+
+
+def normalizedRankError(k):
+    '''
+    Return the rank error of single quantile queries of a KLL sketch
+    with parameter k, as a fraction of the number of values, with 99%
+    confidence.
+
+    :param k: the sketch's k
+    :type k: int
+    :rtype: float
+    '''
+    return 2.296 / k ** 0.9723
+
+
+class KLLSketch(object):
+
+    def __init__(self, k=DEFAULT_K, seed=0):
+        '''
+        :param k: size parameter; larger k retains more values, and
+            answers with less error. See normalizedRankError().
+        :type k: int
+        :param seed: seed of the random promotion offsets
+        :type seed: int
+        '''
+        if k < MIN_K:
+            raise ValueError("Sketch parameter k must be at least %d, not %s" % (MIN_K, k))
+        self.k = k
+        self.random = random.Random(seed)
+        self.compactors = []
+        # Number of values seen:
+        self.count = 0
+        self.minValue = None
+        self.maxValue = None
+        self.numRetained = 0
+        self.maxRetained = 0
+        self.grow()
+
+    def capacity(self, level):
+        depth = len(self.compactors) - level - 1
+        return int(math.ceil(self.k * CAPACITY_DECAY ** depth)) + 1
+
+    def grow(self):
+        self.compactors.append([])
+        self.maxRetained = sum([self.capacity(level) for level in range(len(self.compactors))])
+
+    def update(self, value):
+        '''
+        Add one value to the sketch.
+        '''
+        self.compactors[0].append(value)
+        self.count += 1
+        if self.minValue is None or value < self.minValue:
+            self.minValue = value
+        if self.maxValue is None or value > self.maxValue:
+            self.maxValue = value
+        self.numRetained += 1
+        if self.numRetained >= self.maxRetained:
+            self.compress()
+
+    def merge(self, other):
+        '''
+        Add the values summarized by another sketch to this one.
+        The other sketch is not changed.
+
+        :param other: sketch with the same k
+        :type other: KLLSketch
+        :raise ValueError: if the two sketches have different k
+        '''
+        if other.k != self.k:
+            raise ValueError("Cannot merge sketches with k=%d and k=%d" % (self.k, other.k))
+        if other.count == 0:
+            return
+        while len(self.compactors) < len(other.compactors):
+            self.grow()
+        for (level, values) in enumerate(other.compactors):
+            self.compactors[level].extend(values)
+        self.count += other.count
+        if self.minValue is None or other.minValue < self.minValue:
+            self.minValue = other.minValue
+        if self.maxValue is None or other.maxValue > self.maxValue:
+            self.maxValue = other.maxValue
+        self.numRetained += other.numRetained
+        if self.numRetained >= self.maxRetained:
+            self.compress()
+
+    def compress(self):
+        '''
+        Compact full levels until the sketch holds fewer than
+        self.maxRetained values. Growing a level lowers the
+        capacities of all levels below, hence the outer loop.
+        '''
+        while self.numRetained >= self.maxRetained:
+            level = 0
+            while level < len(self.compactors):
+                if len(self.compactors[level]) >= self.capacity(level):
+                    if level + 1 == len(self.compactors):
+                        self.grow()
+                    self.compactors[level + 1].extend(self.compact(level))
+                    self.numRetained = sum([len(values) for values in self.compactors])
+                    if self.numRetained < self.maxRetained:
+                        return
+                level += 1
+
+    def compact(self, level):
+        '''
+        Empty one level, except for its smallest value if the level
+        holds an odd number of values, and return the values that
+        are promoted to the next level.
+        '''
+        values = self.compactors[level]
+        values.sort()
+        if len(values) % 2 == 1:
+            self.compactors[level] = values[:1]
+            values = values[1:]
+        else:
+            self.compactors[level] = []
+        return values[self.random.randint(0, 1)::2]
+
+    def weightedValues(self):
+        '''
+        Return the retained values with their weights, sorted by value.
+        The weights add up to self.count.
+
+        :rtype: [(value, int)]
+        '''
+        weighted = []
+        for (level, values) in enumerate(self.compactors):
+            weight = 2 ** level
+            weighted.extend([(value, weight) for value in values])
+        weighted.sort()
+        return weighted
+
+    def quantiles(self, fractions):
+        '''
+        Return the approximate value at each of the given fractions
+        of the sorted values seen; 0 is the minimum, 1 the maximum.
+        See the module comment for the error bound.
+
+        :param fractions: numbers between 0 and 1, in any order
+        :type fractions: [float]
+        :return: one value for each fraction, or Nones if the sketch is empty
+        :rtype: list
+        '''
+        if self.count == 0:
+            return [None for _ in fractions]
+        weighted = self.weightedValues()
+        results = []
+        for fraction in fractions:
+            if fraction <= 0:
+                results.append(self.minValue)
+                continue
+            if fraction >= 1:
+                results.append(self.maxValue)
+                continue
+            targetWeight = fraction * self.count
+            cumWeight = 0
+            for (value, weight) in weighted:
+                cumWeight += weight
+                if cumWeight >= targetWeight:
+                    break
+            results.append(value)
+        return results
+
+    def quantile(self, fraction):
+        return self.quantiles([fraction])[0]
+
+    def rank(self, value):
+        '''
+        Return the approximate fraction of values seen that are
+        less than or equal to the given value.
+
+        :rtype: float
+        '''
+        if self.count == 0:
+            return 0.0
+        return sum([weight for (retained, weight) in self.weightedValues() if retained <= value]) / float(self.count)
+
+    def rankError(self):
+        return normalizedRankError(self.k)
+
+    def toDict(self):
+        '''
+        Return a JSON-able dict, from which fromDict() recreates the sketch.
+        '''
+        return {'k' : self.k,
+                'count' : self.count,
+                'min' : self.minValue,
+                'max' : self.maxValue,
+                'compactors' : [list(values) for values in self.compactors]}
+
+    @classmethod
+    def fromDict(cls, sketchDict, seed=0):
+        sketch = cls(k=sketchDict['k'], seed=seed)
+        for _ in range(len(sketchDict['compactors']) - 1):
+            sketch.grow()
+        sketch.compactors = [list(values) for values in sketchDict['compactors']]
+        sketch.count = sketchDict['count']
+        sketch.minValue = sketchDict['min']
+        sketch.maxValue = sketchDict['max']
+        sketch.numRetained = sum([len(values) for values in sketch.compactors])
+        return sketch
@@ -0,0 +1,204 @@
+# Copyright (c) 2014, Stanford University
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification, are permitted provided that the following conditions are met:
+# 1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following disclaimer in the documentation and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote products derived from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+'''
+Created on Oct 19, 2026
+
+On-disk cache of the three result files of writeResultsToDisk(),
+for library callers that request the same course many times:
+
+    cache = ResultCache('/var/cache/engagement', maxBytes=2 * 1024**3)
+    comp = EngagementComputer(coursesStartYearsArr=None, ..., courseToProfile=courseName)
+    (summaryFile, detailFile, weeklyEffortFile) = comp.cachedResults(cache)
+
+Entries are keyed by the run parameters (course, start years,
+inactivity threshold, videoOnly, output format, and compression),
+plus a watermark of the underlying events, such as their row count
+and latest time (see EventSource.watermark()). When events are added,
+the watermark changes, and the next request computes fresh results.
+
+Each entry is a subdirectory named by its key, with the three
+files and an entry.json. The modification time of entry.json
+records the last use. When a put() takes the cache beyond maxBytes,
+least recently used entries are removed until it fits again.
+
+Returned paths point into the cache: callers must not modify or
+remove the files, and should copy them if they need them after a
+later put() may have evicted them. Entries are written under a
+temporary name and renamed into place, so several processes may
+share a cache directory.
+
+@author: paepcke
+'''
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+
+
+CACHE_FORMAT_VERSION = 1
+
+ENTRY_FILE = 'entry.json'
+
+DEFAULT_MAX_BYTES = 1024 ** 3
+
+# Tries of put() to rename its files into place:
+PUT_ATTEMPTS = 3
+
+
+class ResultCache(object):
+
+    def __init__(self, directory, maxBytes=DEFAULT_MAX_BYTES):
+        '''
+        :param directory: cache directory; created if needed
+        :type directory: string
+        :param maxBytes: size beyond which entries are evicted
+        :type maxBytes: int
+        '''
+        self.directory = directory
+        self.maxBytes = maxBytes
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+
+    def key(self, **params):
+        '''
+        Return the cache key for JSON-compatible run parameters.
+        '''
+        params['cacheFormatVersion'] = CACHE_FORMAT_VERSION
+        return hashlib.sha1(json.dumps(params, sort_keys=True).encode('utf-8')).hexdigest()
+
+    def entryDir(self, key):
+        return os.path.join(self.directory, key)
+
+    def get(self, key):
+        '''
+        Return the cached file paths for key, in the order in which
+        they were put(), or None if there is no such entry.
+        '''
+        entryFile = os.path.join(self.entryDir(key), ENTRY_FILE)
+        try:
+            with open(entryFile, 'r') as fd:
+                entry = json.load(fd)
+            # Mark as recently used:
+            os.utime(entryFile, None)
+        except (IOError, OSError, ValueError):
+            return None
+        paths = [os.path.join(self.entryDir(key), fileName) for fileName in entry['files']]
+        if not all([os.path.exists(path) for path in paths]):
+            return None
+        return paths
+
+    def put(self, key, paths, params=None):
+        '''
+        Move files into the cache as the entry for key, and evict
+        old entries if the cache grew too large. If another process
+        put the same key first, its files are kept, and the given
+        files are removed. An incomplete entry directory, as left by a
+        crash or a concurrent remove(), is replaced.
+
+        :param paths: files to cache; they are moved, not copied
+        :type paths: [string]
+        :param params: run parameters, recorded in entry.json for reference
+        :type params: {dict | None}
+        :return: the cached paths, in the same order
+        :rtype: [string]
+        :raise IOError: if the entry could not be put into place
+        '''
+        tmpDir = tempfile.mkdtemp(prefix='.%s_' % key, dir=self.directory)
+        try:
+            fileNames = []
+            numBytes = 0
+            for path in paths:
+                fileName = os.path.basename(path)
+                shutil.move(path, os.path.join(tmpDir, fileName))
+                fileNames.append(fileName)
+                numBytes += os.path.getsize(os.path.join(tmpDir, fileName))
+            with open(os.path.join(tmpDir, ENTRY_FILE), 'w') as fd:
+                json.dump({'files' : fileNames,
+                           'bytes' : numBytes,
+                           'params' : params,
+                           'created' : time.time()}, fd, indent=2, sort_keys=True)
+            for _ in range(PUT_ATTEMPTS):
+                try:
+                    os.rename(tmpDir, self.entryDir(key))
+                    break
+                except OSError:
+                    if self.get(key) is not None:
+                        # Another process put the same key first:
+                        break
+                    self.removeIncomplete(key)
+        finally:
+            shutil.rmtree(tmpDir, ignore_errors=True)
+        self.evict(keepKey=key)
+        cachedPaths = self.get(key)
+        if cachedPaths is None:
+            raise IOError("Could not put cache entry %s into place in %s." % (key, self.directory))
+        return cachedPaths
+
+    def entries(self):
+        '''
+        Return [(lastUsed, numBytes, key)] of all complete entries,
+        least recently used first.
+        '''
+        entries = []
+        for key in os.listdir(self.directory):
+            entryFile = os.path.join(self.entryDir(key), ENTRY_FILE)
+            try:
+                with open(entryFile, 'r') as fd:
+                    numBytes = json.load(fd)['bytes']
+                entries.append((os.path.getmtime(entryFile), numBytes, key))
+            except (IOError, OSError, ValueError, KeyError):
+                # Temporary directory of a put() in progress,
+                # or an entry that was just evicted:
+                continue
+        return sorted(entries)
+
+    def totalBytes(self):
+        return sum([numBytes for (_, numBytes, _) in self.entries()])
+
+    def evict(self, keepKey=None):
+        '''
+        Remove least recently used entries until the cache fits
+        into maxBytes. The entry keepKey is never removed.
+        '''
+        entries = self.entries()
+        totalBytes = sum([numBytes for (_, numBytes, _) in entries])
+        for (_, numBytes, key) in entries:
+            if totalBytes <= self.maxBytes:
+                break
+            if key == keepKey:
+                continue
+            self.remove(key)
+            totalBytes -= numBytes
+
+    def remove(self, key):
+        shutil.rmtree(self.entryDir(key), ignore_errors=True)
+
+    def removeIncomplete(self, key):
+        '''
+        Remove an entry directory without a usable entry. It is
+        first renamed out of the way, so that put() can rename
+        a new entry into place even if the removal fails halfway.
+        '''
+        staleDir = tempfile.mkdtemp(prefix='.%s_stale_' % key, dir=self.directory)
+        try:
+            os.rename(self.entryDir(key), os.path.join(staleDir, key))
+        except OSError:
+            # Already gone:
+            pass
+        finally:
+            shutil.rmtree(staleDir, ignore_errors=True)
+
+    def clear(self):
+        for (_, _, key) in self.entries():
+            self.remove(key)
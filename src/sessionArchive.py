@@ -0,0 +1,195 @@
+#!/usr/bin/env python
+# Copyright (c) 2014, Stanford University
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification, are permitted provided that the following conditions are met:
+# 1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following disclaimer in the documentation and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote products derived from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+'''
+Created on Oct 19, 2026
+
+Indexed session archive: all sessions of an engagement run, sorted
+by (course, student, session start), plus an index from which the
+sessions of one student in one course are fetched with a single
+seek and read.
+
+An archive with base path B consists of two files:
+
+    B.sessions:  fixed-width little-endian records, 20 bytes each:
+                     start        int64   session start, seconds since the epoch
+                     sessionSecs  float64 session length in seconds
+                     numEvents    int32   number of events in the session
+    B.index.npz: uncompressed .npz (see columnarOutput.py) with
+                     courses      sorted 'S<n>' course names
+                     students     sorted 'S<n>' student names
+                     key          sorted int64 courseIdx * len(students) + studentIdx
+                     offset       int64 number of the key's first record in B.sessions
+                     count        int32 number of records for the key
+
+The index columns are memory-mapped, so a lookup only touches
+the few index pages that its binary searches visit.
+
+Usage as a library:
+
+    archive = SessionArchive('/tmp/engagement')
+    for (sessionStart, sessionSecs, numEvents) in archive.lookup(course, student):
+        ...
+
+From the command line:
+
+    sessionArchive.py /tmp/engagement Medicine/SciWrite/Fall2013 <anon_screen_name>
+
+@author: paepcke
+'''
+import argparse
+import os
+import sys
+
+import numpy
+
+from columnarOutput import allDataColumns, writeColumns, memmapColumn
+from sessionColumns import fromEpochSeconds
+
+
+RECORD_DTYPE = numpy.dtype([('start', '<i8'),
+                            ('sessionSecs', '<f8'),
+                            ('numEvents', '<i4')])
+
+
+def writeSessionArchive(comp, basePath):
+    '''
+    Write the sessions of all courses of an EngagementComputer
+    as an indexed archive.
+
+    :param comp: computer on which run() was called
+    :type comp: EngagementComputer
+    :param basePath: path without extension of the two archive files
+    :type basePath: string
+    :return: paths of the sessions file and of the index file
+    :rtype: (string, string)
+    '''
+    cols = allDataColumns(comp)
+    # Student names come sorted from allDataColumns(),
+    # course names don't:
+    courseOrder = numpy.argsort(cols['courses'], kind='mergesort')
+    courseRank = numpy.empty(len(courseOrder), dtype=numpy.int64)
+    courseRank[courseOrder] = numpy.arange(len(courseOrder))
+    numStudents = max(len(cols['students']), 1)
+
+    key = courseRank[cols['course']] * numStudents + cols['student']
+    order = numpy.lexsort((cols['start'], key))
+    key = key[order]
+
+    records = numpy.empty(len(order), dtype=RECORD_DTYPE)
+    records['start'] = cols['start'][order]
+    records['sessionSecs'] = cols['sessionSecs'][order]
+    records['numEvents'] = cols['numEvents'][order]
+
+    # First record of each run of equal keys:
+    if len(key) > 0:
+        runStarts = numpy.concatenate(([0], numpy.flatnonzero(numpy.diff(key)) + 1))
+    else:
+        runStarts = numpy.empty(0, dtype=numpy.int64)
+    counts = numpy.diff(numpy.concatenate((runStarts, [len(key)])))
+
+    sessionsPath = basePath + '.sessions'
+    indexPath = basePath + '.index.npz'
+    records.tofile(sessionsPath)
+    writeColumns(indexPath, {'courses'  : cols['courses'][courseOrder],
+                             'students' : cols['students'],
+                             'key'      : key[runStarts].astype(numpy.int64),
+                             'offset'   : runStarts.astype(numpy.int64),
+                             'count'    : counts.astype(numpy.int32)})
+    return (sessionsPath, indexPath)
+
+
+class SessionArchive(object):
+
+    def __init__(self, basePath):
+        '''
+        Open an archive written by writeSessionArchive().
+
+        :param basePath: path without extension of the two archive files
+        :type basePath: string
+        '''
+        indexPath = basePath + '.index.npz'
+        self.courses = memmapColumn(indexPath, 'courses')
+        self.students = memmapColumn(indexPath, 'students')
+        self.key = memmapColumn(indexPath, 'key')
+        self.offset = memmapColumn(indexPath, 'offset')
+        self.count = memmapColumn(indexPath, 'count')
+        self.sessionsFd = open(basePath + '.sessions', 'rb')
+
+    def lookup(self, courseName, student):
+        '''
+        Return all sessions of one student in one course,
+        sorted by session start.
+
+        :param courseName: course_display_name
+        :type courseName: string
+        :param student: anon_screen_name
+        :type student: string
+        :return: list of (sessionStart, sessionSecs, numEvents); empty
+            if the student has no sessions in the course.
+        :rtype: [(datetime.datetime, float, int)]
+        '''
+        courseIdx = self._find(self.courses, courseName)
+        studentIdx = self._find(self.students, student)
+        if courseIdx is None or studentIdx is None:
+            return []
+        key = courseIdx * max(len(self.students), 1) + studentIdx
+        entry = int(numpy.searchsorted(self.key, key))
+        if entry >= len(self.key) or self.key[entry] != key:
+            return []
+        self.sessionsFd.seek(int(self.offset[entry]) * RECORD_DTYPE.itemsize)
+        records = numpy.frombuffer(self.sessionsFd.read(int(self.count[entry]) * RECORD_DTYPE.itemsize),
+                                   dtype=RECORD_DTYPE)
+        return [(fromEpochSeconds(record['start']), float(record['sessionSecs']), int(record['numEvents']))
+                for record in records]
+
+    def close(self):
+        self.sessionsFd.close()
+
+    @staticmethod
+    def _find(sortedNames, name):
+        if not isinstance(name, bytes):
+            name = name.encode('utf-8')
+        pos = int(numpy.searchsorted(sortedNames, name))
+        if pos < len(sortedNames) and sortedNames[pos] == name:
+            return pos
+        return None
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(prog=os.path.basename(sys.argv[0]), formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument('archive',
+                        action='store',
+                        help='Path of the archive without extension, i.e. without .sessions or .index.npz'
+                        )
+    parser.add_argument('course',
+                        action='store',
+                        help='course_display_name of the course'
+                        )
+    parser.add_argument('student',
+                        action='store',
+                        help='anon_screen_name of the learner'
+                        )
+    args = parser.parse_args();
+
+    archive = SessionArchive(args.archive)
+    try:
+        sys.stdout.write('Platform,Course,anon_screen_name,Date,Time,SessionLength(sec),NumEventsInSession\n')
+        for (sessionStart, sessionSecs, numEvents) in archive.lookup(args.course, args.student):
+            sys.stdout.write('OpenEdX,%s,%s,%s,%s,%d,%d\n' % (args.course,
+                                                             args.student,
+                                                             sessionStart.date(),
+                                                             sessionStart.time(),
+                                                             sessionSecs,
+                                                             numEvents))
+    finally:
+        archive.close()
@@ -0,0 +1,297 @@
+# Copyright (c) 2014, Stanford University
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification, are permitted provided that the following conditions are met:
+# 1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following disclaimer in the documentation and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote products derived from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+'''
+Created on Oct 19, 2026
+
+Column-wise (NumPy array) encodings of the two big per-course
+result structures of EngagementComputer:
+
+    SessionColumns:      one course's studentSessionsDict, i.e.
+                         {student : [(sessionStart, sessionSecs, numEvents), ...]}
+    WeeklyEffortColumns: one course's weekly effort dict, i.e.
+                         {student : [[weekNum, effortSecs], ...]}
+
+Students are stored once, in a fixed-width byte string array;
+the per-session (or per-week) rows refer to them by index. Session
+start times are seconds since the Unix epoch. Datetimes are
+naive, as delivered by MySQL, and are converted without any
+timezone adjustment.
+
+The arrays may live in ordinary memory, in memory-mapped files,
+or in shared memory segments (see sharedResults.py). Nothing in
+this module copies the arrays it is given.
+
+@author: paepcke
+'''
+import datetime
+import itertools
+
+import numpy
+
+
+try:
+    basestring
+except NameError:
+    basestring = str
+
+EPOCH = datetime.datetime(1970, 1, 1)
+
+
+def toEpochSeconds(dateTime):
+    '''
+    Convert a naive datetime to integer seconds since the epoch.
+
+    :param dateTime: time to convert
+    :type dateTime: datetime.datetime
+    :rtype: int
+    '''
+    timeDelta = dateTime - EPOCH
+    return timeDelta.days * 86400 + timeDelta.seconds
+
+
+def fromEpochSeconds(epochSecs):
+    '''
+    Inverse of toEpochSeconds().
+
+    :param epochSecs: seconds since the epoch
+    :type epochSecs: int
+    :rtype: datetime.datetime
+    '''
+    return EPOCH + datetime.timedelta(seconds=int(epochSecs))
+
+
+def studentArray(students):
+    '''
+    Turn a list of student names into a fixed-width byte string
+    array, wide enough for the longest name. Names that are not
+    strings, such as a None anon_screen_name in the events, are
+    stored as their str().
+
+    :param students: anon_screen_names
+    :type students: [string]
+    :rtype: numpy.ndarray
+    '''
+    encoded = [student if isinstance(student, bytes) else
+               (student if isinstance(student, basestring) else str(student)).encode('utf-8')
+               for student in students]
+    width = max([len(student) for student in encoded] + [1])
+    return numpy.array(encoded, dtype='S%d' % width)
+
+
+def decodeName(nameBytes):
+    '''
+    Turn one element of a studentArray() back into a str.
+    '''
+    if isinstance(nameBytes, str):
+        return nameBytes
+    return nameBytes.decode('utf-8')
+
+
+class SessionColumns(object):
+    '''
+    All sessions of all students in one course, as five arrays
+    of equal length, except for students:
+
+        students:       'S<n>' names of the course's students
+        sessionStudent: int32 index into students
+        sessionStart:   int64 session start, seconds since the epoch
+        sessionSecs:    float64 session length in seconds
+        sessionEvents:  int32 number of events in the session
+    '''
+
+    FIELDS = ('sessionStudent', 'sessionStart', 'sessionSecs', 'sessionEvents')
+    DTYPES = {'sessionStudent' : numpy.int32,
+              'sessionStart'   : numpy.int64,
+              'sessionSecs'    : numpy.float64,
+              'sessionEvents'  : numpy.int32}
+
+    # One session of a studentSessionsDict, as given; see fromSessionsDict():
+    SESSION_RECORD = [('sessionStart', object), ('sessionSecs', numpy.float64), ('sessionEvents', numpy.int32)]
+
+    def __init__(self, students, sessionStudent, sessionStart, sessionSecs, sessionEvents):
+        self.students = students
+        self.sessionStudent = sessionStudent
+        self.sessionStart = sessionStart
+        self.sessionSecs = sessionSecs
+        self.sessionEvents = sessionEvents
+
+    def __len__(self):
+        return len(self.sessionStart)
+
+    @classmethod
+    def allocate(cls, students, numSessions, arrayFactory=None):
+        '''
+        Create a SessionColumns with room for the given number
+        of sessions. The arrays are obtained from arrayFactory, which
+        is called with (fieldName, dtype, length), and defaults to
+        numpy.empty(). Returns the new instance; its students
+        array is also obtained from the factory.
+
+        :param students: fixed-width student name array as made by studentArray()
+        :type students: numpy.ndarray
+        :param numSessions: number of sessions to make room for
+        :type numSessions: int
+        :param arrayFactory: callable that returns a new array
+        :type arrayFactory: {callable | None}
+        '''
+        if arrayFactory is None:
+            arrayFactory = lambda fieldName, dtype, length: numpy.empty(length, dtype=dtype) #@UnusedVariable
+        studentsCopy = arrayFactory('students', students.dtype, len(students))
+        studentsCopy[:] = students
+        arrays = [arrayFactory(fieldName, cls.DTYPES[fieldName], numSessions) for fieldName in cls.FIELDS]
+        return cls(studentsCopy, *arrays)
+
+    @classmethod
+    def fromSessionsDict(cls, studentSessionsDict, arrayFactory=None):
+        '''
+        Encode one course's studentSessionsDict. Sessions whose
+        start time never was set to a datetime are left out,
+        just as allDataIterator() skips them.
+
+        :param studentSessionsDict: {student : [(sessionStart, sessionSecs, numEvents), ...]}
+        :type studentSessionsDict: dict
+        :param arrayFactory: see allocate()
+        :type arrayFactory: {callable | None}
+        :rtype: SessionColumns
+        '''
+        studentNames = list(studentSessionsDict.keys())
+        studentSessions = [studentSessionsDict[student] for student in studentNames]
+        # All columns are built in bulk, by NumPy, from one record
+        # array of all sessions, rather than element by element:
+        allSessions = list(itertools.chain.from_iterable(studentSessions))
+        try:
+            sessions = numpy.array(allSessions, dtype=cls.SESSION_RECORD)
+        except (TypeError, ValueError):
+            # NumPy only takes records as tuples, not as lists:
+            sessions = numpy.array([tuple(session) for session in allSessions], dtype=cls.SESSION_RECORD)
+        sessionStudent = numpy.repeat(numpy.arange(len(studentNames), dtype=numpy.int32),
+                                      [len(oneStudentSessions) for oneStudentSessions in studentSessions])
+        try:
+            # Usually, all start times are datetimes:
+            startDeltas = sessions['sessionStart'] - EPOCH
+        except TypeError:
+            isDatetime = numpy.array([isinstance(sessionStart, datetime.datetime) for sessionStart in sessions['sessionStart']],
+                                     dtype=bool)
+            sessions = sessions[isDatetime]
+            sessionStudent = sessionStudent[isDatetime]
+            startDeltas = sessions['sessionStart'] - EPOCH
+        columns = cls.allocate(studentArray(studentNames), len(sessions), arrayFactory)
+        columns.sessionStudent[:] = sessionStudent
+        columns.sessionStart[:] = numpy.fromiter((timeDelta.days * 86400 + timeDelta.seconds for timeDelta in startDeltas),
+                                                 dtype=numpy.int64, count=len(startDeltas))
+        columns.sessionSecs[:] = sessions['sessionSecs']
+        columns.sessionEvents[:] = sessions['sessionEvents']
+        return columns
+
+    def iterSessions(self):
+        '''
+        Yield (student, sessionStart, sessionSecs, numEvents)
+        for every session, with sessionStart a datetime.
+        '''
+        studentNames = [decodeName(student) for student in self.students]
+        for row in range(len(self.sessionStart)):
+            yield (studentNames[self.sessionStudent[row]],
+                   fromEpochSeconds(self.sessionStart[row]),
+                   float(self.sessionSecs[row]),
+                   int(self.sessionEvents[row]))
+
+    def toSessionsDict(self):
+        '''
+        Decode into the {student : [(sessionStart, sessionSecs, numEvents), ...]}
+        form that EngagementComputer keeps in allStudentsDicts.
+        '''
+        sessionsDict = {}
+        for (student, sessionStart, sessionSecs, numEvents) in self.iterSessions():
+            try:
+                sessionsDict[student].append((sessionStart, sessionSecs, numEvents))
+            except KeyError:
+                sessionsDict[student] = [(sessionStart, sessionSecs, numEvents)]
+        return sessionsDict
+
+
+class WeeklyEffortColumns(object):
+    '''
+    Week-by-week effort of all students in one course:
+
+        students:     'S<n>' names of the course's students
+        effortStudent: int32 index into students
+        effortWeek:    int32 zero-based course week
+        effortSecs:    float64 engagement seconds in that week
+    '''
+
+    FIELDS = ('effortStudent', 'effortWeek', 'effortSecs')
+    DTYPES = {'effortStudent' : numpy.int32,
+              'effortWeek'    : numpy.int32,
+              'effortSecs'    : numpy.float64}
+
+    def __init__(self, students, effortStudent, effortWeek, effortSecs):
+        self.students = students
+        self.effortStudent = effortStudent
+        self.effortWeek = effortWeek
+        self.effortSecs = effortSecs
+
+    def __len__(self):
+        return len(self.effortWeek)
+
+    @classmethod
+    def fromWeeklyEffortDict(cls, weeklyEffortDict, arrayFactory=None):
+        '''
+        Encode a {student : [[weekNum, effortSecs], ...]} dict.
+
+        :param weeklyEffortDict: one course's weekly effort
+        :type weeklyEffortDict: dict
+        :param arrayFactory: see SessionColumns.allocate()
+        :type arrayFactory: {callable | None}
+        :rtype: WeeklyEffortColumns
+        '''
+        if arrayFactory is None:
+            arrayFactory = lambda fieldName, dtype, length: numpy.empty(length, dtype=dtype) #@UnusedVariable
+        studentNames = list(weeklyEffortDict.keys())
+        numRows = sum([len(weeklyEffortDict[student]) for student in studentNames])
+        names = studentArray(studentNames)
+        students = arrayFactory('students', names.dtype, len(names))
+        students[:] = names
+        arrays = [arrayFactory(fieldName, cls.DTYPES[fieldName], numRows) for fieldName in cls.FIELDS]
+        columns = cls(students, *arrays)
+        if numRows == 0:
+            return columns
+        # One (numRows, 2) array of all [weekNum, effortSecs] pairs, built by NumPy:
+        pairs = numpy.array(list(itertools.chain.from_iterable([weeklyEffortDict[student] for student in studentNames])),
+                            dtype=numpy.float64)
+        columns.effortStudent[:] = numpy.repeat(numpy.arange(len(studentNames), dtype=numpy.int32),
+                                                [len(weeklyEffortDict[student]) for student in studentNames])
+        columns.effortWeek[:] = pairs[:, 0]
+        columns.effortSecs[:] = pairs[:, 1]
+        return columns
+
+    def iterEffort(self):
+        '''
+        Yield (student, weekNum, effortSecs) for every row,
+        with zero-based weekNum.
+        '''
+        studentNames = [decodeName(student) for student in self.students]
+        for row in range(len(self.effortWeek)):
+            yield (studentNames[self.effortStudent[row]],
+                   int(self.effortWeek[row]),
+                   float(self.effortSecs[row]))
+
+    def toWeeklyEffortDict(self):
+        '''
+        Decode into {student : [[weekNum, effortSecs], ...]}.
+        '''
+        weeklyEffortDict = {}
+        for (student, weekNum, effortSecs) in self.iterEffort():
+            pair = [weekNum, effortSecs]
+            try:
+                weeklyEffortDict[student].append(pair)
+            except KeyError:
+                weeklyEffortDict[student] = [pair]
+        return weeklyEffortDict
@@ -0,0 +1,304 @@
+# Copyright (c) 2014, Stanford University
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification, are permitted provided that the following conditions are met:
+# 1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following disclaimer in the documentation and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote products derived from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+'''
+Created on Oct 19, 2026
+
+Hand large per-course results from worker processes to the parent
+process without pickling them.
+
+A SharedSegment is a named set of typed NumPy arrays that live in
+shared memory. Each array is a .npy file under /dev/shm (the same
+tmpfs that POSIX shm_open() uses), mapped with numpy.memmap. A
+worker creates a segment, fills its arrays in place, and returns
+only the segment's small, picklable SegmentHandle to the parent.
+The parent attaches to the segment by name, and reads the very same
+memory pages. Neither side serializes or copies the data.
+
+Lifecycle:
+    - Creating a segment registers it with the creating process.
+      Registered segments are unlinked when the process exits
+      (atexit), and when the 'with' block that created them raises.
+    - A worker that has filled a segment calls handOff(), which
+      un-registers the segment, making the receiving parent the owner.
+    - The parent unlinks each segment once it is done with it.
+      Segment names start with a per-run prefix, so that
+      unlinkAll(prefix) removes even the segments of workers that
+      died before they could hand them off.
+
+On systems without /dev/shm the segments are placed in the
+temp directory, which keeps everything working, though
+pages may then be written to disk.
+
+@author: paepcke
+'''
+import atexit
+import glob
+import os
+import tempfile
+import uuid
+
+import numpy
+from numpy.lib import format as npyFormat
+
+from sessionColumns import SessionColumns, WeeklyEffortColumns
+
+
+if os.path.isdir('/dev/shm'):
+    SHM_DIR = '/dev/shm'
+else:
+    SHM_DIR = tempfile.gettempdir()
+
+# Segments created by this process, and not
+# yet handed off or unlinked: name --> SharedSegment
+_ownedSegments = {}
+
+
+def newRunPrefix():
+    '''
+    Return a segment name prefix that is unique to one run.
+    '''
+    return 'engagement_%d_%s' % (os.getpid(), uuid.uuid4().hex[:8])
+
+
+class SegmentHandle(object):
+    '''
+    Picklable reference to a SharedSegment: its name, and
+    the names and lengths of its arrays.
+    '''
+    def __init__(self, name, fieldLengths):
+        self.name = name
+        self.fieldLengths = dict(fieldLengths)
+
+    def __repr__(self):
+        return '<SegmentHandle %s %s>' % (self.name, str(self.fieldLengths))
+
+
+class SharedSegment(object):
+
+    def __init__(self, name, arrays=None, owner=False):
+        '''
+        Use SharedSegment.create() or SharedSegment.attach()
+        rather than calling this constructor directly.
+
+        :param name: unique name of the segment
+        :type name: string
+        :param arrays: field name --> array
+        :type arrays: {dict | None}
+        :param owner: True if this process is responsible for unlinking the segment
+        :type owner: boolean
+        '''
+        self.name = name
+        self.arrays = arrays if arrays is not None else {}
+        self.owner = owner
+
+    @classmethod
+    def create(cls, name):
+        '''
+        Create a new, empty segment. Arrays are added with
+        newArray().
+
+        :param name: unique segment name; see newRunPrefix()
+        :type name: string
+        :rtype: SharedSegment
+        '''
+        segment = cls(name, owner=True)
+        _ownedSegments[name] = segment
+        return segment
+
+    @classmethod
+    def attach(cls, handle, writable=False):
+        '''
+        Map the arrays of an existing segment into this process.
+
+        :param handle: handle that the creator returned from handOff()
+        :type handle: SegmentHandle
+        :param writable: if True, map read/write; else read-only
+        :type writable: boolean
+        :rtype: SharedSegment
+        :raise IOError: if the segment does not exist
+        '''
+        mode = 'r+' if writable else 'r'
+        arrays = {}
+        for (fieldName, length) in handle.fieldLengths.items():
+            array = numpy.load(cls._path(handle.name, fieldName), mmap_mode=mode)
+            arrays[fieldName] = array[:length]
+        # The receiver of a handle owns the segment:
+        segment = cls(handle.name, arrays, owner=True)
+        _ownedSegments[handle.name] = segment
+        return segment
+
+    def newArray(self, fieldName, dtype, length):
+        '''
+        Allocate one array in this segment. The signature matches
+        the arrayFactory of SessionColumns.allocate().
+
+        :param fieldName: name of the array within the segment
+        :type fieldName: string
+        :param dtype: element type
+        :type dtype: numpy.dtype
+        :param length: number of elements
+        :type length: int
+        :rtype: numpy.memmap
+        '''
+        # numpy refuses to map zero-length files; allocate
+        # one element, and hand out an empty view of it:
+        array = npyFormat.open_memmap(self._path(self.name, fieldName),
+                                      mode='w+',
+                                      dtype=dtype,
+                                      shape=(max(length, 1),))
+        if length == 0:
+            array = array[:0]
+        self.arrays[fieldName] = array
+        return array
+
+    def handle(self):
+        return SegmentHandle(self.name,
+                             [(fieldName, len(array)) for (fieldName, array) in self.arrays.items()])
+
+    def handOff(self):
+        '''
+        Flush the arrays, and give up ownership. Called by the
+        process that filled the segment, right before returning
+        the handle to the process that will consume it.
+
+        :return: handle with which the receiver attaches
+        :rtype: SegmentHandle
+        '''
+        for array in self.arrays.values():
+            if isinstance(array, numpy.memmap) and len(array) > 0:
+                array.flush()
+        handle = self.handle()
+        self.owner = False
+        _ownedSegments.pop(self.name, None)
+        self.close()
+        return handle
+
+    def close(self):
+        '''
+        Drop this process' mappings. Arrays obtained from this
+        segment must no longer be used.
+        '''
+        self.arrays = {}
+
+    def unlink(self):
+        '''
+        Remove the segment from shared memory. Pages stay valid
+        for any process that still has them mapped, and are
+        released when the last mapping goes away.
+        '''
+        self.close()
+        for path in glob.glob(self._path(self.name, '*')):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        self.owner = False
+        _ownedSegments.pop(self.name, None)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        # Clean up if the block failed while we still
+        # own the segment:
+        if excType is not None and self.owner:
+            self.unlink()
+        return False
+
+    @staticmethod
+    def _path(name, fieldName):
+        return os.path.join(SHM_DIR, '%s.%s.npy' % (name, fieldName))
+
+
+def unlinkAll(prefix):
+    '''
+    Remove all segments whose name starts with prefix,
+    whether or not this process owns them. Used by a parent
+    to clean up after workers that failed.
+
+    :param prefix: run prefix as returned by newRunPrefix()
+    :type prefix: string
+    '''
+    for path in glob.glob(os.path.join(SHM_DIR, prefix + '*.npy')):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+    for name in list(_ownedSegments.keys()):
+        if name.startswith(prefix):
+            _ownedSegments.pop(name, None)
+
+
+def _unlinkOwnedSegments():
+    for segment in list(_ownedSegments.values()):
+        segment.unlink()
+
+atexit.register(_unlinkOwnedSegments)
+
+
+def exportSessions(name, studentSessionsDict):
+    '''
+    Write one course's sessions into a new shared segment.
+
+    :param name: segment name
+    :type name: string
+    :param studentSessionsDict: {student : [(sessionStart, sessionSecs, numEvents), ...]}
+    :type studentSessionsDict: dict
+    :return: handle for the parent to attach to
+    :rtype: SegmentHandle
+    '''
+    with SharedSegment.create(name) as segment:
+        SessionColumns.fromSessionsDict(studentSessionsDict, arrayFactory=segment.newArray)
+        return segment.handOff()
+
+
+def attachSessions(handle):
+    '''
+    Attach to a segment written by exportSessions().
+
+    :return: the segment (for later unlink()), and the columns viewing its memory
+    :rtype: (SharedSegment, SessionColumns)
+    '''
+    segment = SharedSegment.attach(handle)
+    arrays = segment.arrays
+    columns = SessionColumns(arrays['students'],
+                             *[arrays[fieldName] for fieldName in SessionColumns.FIELDS])
+    return (segment, columns)
+
+
+def exportWeeklyEffort(name, weeklyEffortDict):
+    '''
+    Write one course's weekly effort into a new shared segment.
+
+    :param name: segment name
+    :type name: string
+    :param weeklyEffortDict: {student : [[weekNum, effortSecs], ...]}
+    :type weeklyEffortDict: dict
+    :return: handle for the parent to attach to
+    :rtype: SegmentHandle
+    '''
+    with SharedSegment.create(name) as segment:
+        WeeklyEffortColumns.fromWeeklyEffortDict(weeklyEffortDict, arrayFactory=segment.newArray)
+        return segment.handOff()
+
+
+def attachWeeklyEffort(handle):
+    '''
+    Attach to a segment written by exportWeeklyEffort().
+
+    :return: the segment (for later unlink()), and the columns viewing its memory
+    :rtype: (SharedSegment, WeeklyEffortColumns)
+    '''
+    segment = SharedSegment.attach(handle)
+    arrays = segment.arrays
+    columns = WeeklyEffortColumns(arrays['students'],
+                                  *[arrays[fieldName] for fieldName in WeeklyEffortColumns.FIELDS])
+    return (segment, columns)
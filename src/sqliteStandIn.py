@@ -0,0 +1,287 @@
+# Copyright (c) 2014, Stanford University
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification, are permitted provided that the following conditions are met:
+# 1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following disclaimer in the documentation and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote products derived from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+'''
+Created on Oct 19, 2026
+
+Local stand-in for the MySQL databases that EngagementComputer
+reads: Edx, EdxForum, and EdxPrivate, built on the standard
+library's sqlite3. Each database is one SQLite file in a
+directory; every connection attaches all three under their
+MySQL names, so that Edx.EventXtract, Edx.CourseInfo, and
+EdxForum.contents resolve as in MySQL.
+
+Tables (only the columns that engagement computations use):
+
+    Edx.EventXtract:      course_display_name, anon_screen_name, event_type, time
+    Edx.CourseInfo:       course_display_name, start_date, end_date
+    EdxForum.contents:    forum_uid, course_display_name, created_at
+    EdxPrivate.forumUids: forum_uid, anon_screen_name
+
+SQLiteDB has the query()/execute()/close() methods of
+pymysql_utils.MySQLDB. Before a statement is run, the MySQL
+constructs of the engagement queries are rewritten:
+
+    IF(c, a, b)          --> mysqlIf(c, a, b)
+    right(s, n)          --> mysqlRight(s, n)
+    EdxPrivate.f(...)    --> f(...)
+    \\' in literals       --> ''
+
+isUserEvent() and idForum2Anon() are registered as Python functions;
+the former accepts EngagementComputer.trueUserEvents, the latter
+looks forum IDs up in EdxPrivate.forumUids. Values that look like
+'YYYY-MM-DD HH:MM:SS' come back as datetimes, as from MySQL.
+MD5(), CONV() to base 10, and CONCAT() are registered as well,
+for the student sampling predicate of studentSampling.py.
+
+End-to-end use:
+
+    sqliteStandIn.py /tmp/edxLocal --courses 4 --learners 1000 --events 200
+    engagement.py --sqlite /tmp/edxLocal All
+
+or, from Python:
+
+    comp = EngagementComputer(dbFactory=SQLiteDBFactory('/tmp/edxLocal'), ...)
+
+@author: paepcke
+'''
+import argparse
+import hashlib
+import os
+import random
+import re
+import sqlite3
+import sys
+
+from eventSources import parseTime
+
+
+DATABASES = ('Edx', 'EdxForum', 'EdxPrivate')
+
+SCHEMA = ['CREATE TABLE IF NOT EXISTS Edx.EventXtract (course_display_name TEXT, anon_screen_name TEXT, event_type TEXT, time TEXT)',
+          'CREATE INDEX IF NOT EXISTS Edx.EventXtractCourseIdx ON EventXtract (course_display_name, anon_screen_name, time)',
+          'CREATE TABLE IF NOT EXISTS Edx.CourseInfo (course_display_name TEXT PRIMARY KEY, start_date TEXT, end_date TEXT)',
+          'CREATE TABLE IF NOT EXISTS EdxForum.contents (forum_uid INTEGER, course_display_name TEXT, created_at TEXT)',
+          'CREATE INDEX IF NOT EXISTS EdxForum.contentsCourseIdx ON contents (course_display_name)',
+          'CREATE TABLE IF NOT EXISTS EdxPrivate.forumUids (forum_uid INTEGER PRIMARY KEY, anon_screen_name TEXT)']
+
+REWRITES = [(re.compile(r'\bIF\s*\('), 'mysqlIf('),
+            (re.compile(r'\bright\s*\(', re.IGNORECASE), 'mysqlRight('),
+            (re.compile(r'\bEdxPrivate\.(?=\w+\s*\()'), ''),
+            (re.compile(r"\\'"), "''")]
+
+DATETIME_PATTERN = re.compile(r'^\d{4}-\d\d-\d\d \d\d:\d\d:\d\d(\.\d+)?$')
+
+TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+def mysqlIf(condition, thenValue, elseValue):
+    return thenValue if condition else elseValue
+
+
+def mysqlRight(string, length):
+    if string is None:
+        return None
+    return string[-length:] if length > 0 else ''
+
+
+def mysqlMd5(string):
+    if string is None:
+        return None
+    if not isinstance(string, bytes):
+        string = string.encode('utf-8')
+    return hashlib.md5(string).hexdigest()
+
+
+def mysqlConv(string, fromBase, toBase):
+    # Only the conversion to base 10 that
+    # studentSampling.py uses:
+    if string is None or toBase != 10:
+        return None
+    return int(string, fromBase)
+
+
+def mysqlConcat(*strings):
+    if None in strings:
+        return None
+    return ''.join(strings)
+
+
+def toSQLiteSyntax(queryStr):
+    '''
+    Rewrite the MySQL constructs listed in the module
+    comment into SQLite.
+    '''
+    for (pattern, replacement) in REWRITES:
+        queryStr = pattern.sub(replacement, queryStr)
+    return queryStr
+
+
+def _convertValue(value):
+    if isinstance(value, str) and 19 <= len(value) <= 26 and DATETIME_PATTERN.match(value):
+        return parseTime(value)
+    return value
+
+
+def _userEventTypes():
+    # Imported here, so that this module does not
+    # need the MySQL client unless a user event test runs:
+    from engagement import EngagementComputer
+    return frozenset(EngagementComputer.trueUserEvents)
+
+
+class SQLiteDB(object):
+
+    def __init__(self, directory, userEventTypes=None):
+        '''
+        Open (and create if needed) the three databases in directory.
+
+        :param directory: directory holding Edx.sqlite, EdxForum.sqlite, and EdxPrivate.sqlite
+        :type directory: string
+        :param userEventTypes: event types for which isUserEvent() is true.
+            Default: EngagementComputer.trueUserEvents
+        :type userEventTypes: {[string] | None}
+        '''
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        self.directory = directory
+        self.userEventTypes = frozenset(userEventTypes) if userEventTypes is not None else None
+        # Connection pools hand connections from thread to thread,
+        # one thread at a time, as with MySQL:
+        self.connection = sqlite3.connect(':memory:', check_same_thread=False)
+        # Keep returned strings as str under Python 2:
+        self.connection.text_factory = str
+        for dbName in DATABASES:
+            self.connection.execute("ATTACH DATABASE '%s' AS %s" % (os.path.join(directory, dbName + '.sqlite'), dbName))
+        for statement in SCHEMA:
+            self.connection.execute(statement)
+        self.connection.commit()
+        self.forumUids = None
+        self.connection.create_function('mysqlIf', 3, mysqlIf)
+        self.connection.create_function('mysqlRight', 2, mysqlRight)
+        self.connection.create_function('md5', 1, mysqlMd5)
+        self.connection.create_function('conv', 3, mysqlConv)
+        self.connection.create_function('concat', -1, mysqlConcat)
+        self.connection.create_function('isUserEvent', 1, self.isUserEvent)
+        self.connection.create_function('idForum2Anon', 1, self.idForum2Anon)
+
+    def isUserEvent(self, eventType):
+        if self.userEventTypes is None:
+            self.userEventTypes = _userEventTypes()
+        return 1 if eventType in self.userEventTypes else 0
+
+    def idForum2Anon(self, forumUid):
+        if self.forumUids is None:
+            # Read the (small) map once, rather than querying
+            # from inside a running statement:
+            self.forumUids = dict(self.connection.execute('SELECT forum_uid, anon_screen_name FROM EdxPrivate.forumUids').fetchall())
+        return self.forumUids.get(forumUid)
+
+    def query(self, queryStr):
+        '''
+        Run a SELECT, and return an iterator over result tuples.
+        '''
+        cursor = self.connection.execute(toSQLiteSyntax(queryStr))
+        for row in cursor:
+            yield tuple([_convertValue(value) for value in row])
+
+    def execute(self, queryStr):
+        self.connection.execute(toSQLiteSyntax(queryStr))
+        self.connection.commit()
+
+    def close(self):
+        self.connection.close()
+
+    def loadWorkload(self, workload, nonUserFraction=0.1, forumFraction=0.05, seed=42):
+        '''
+        Fill the databases from a synthetic workload (see
+        benchmark/syntheticEvents.py). Video events become one of
+        the video event types, other events become problem or
+        navigation events, or, with probability forumFraction, forum
+        posts. Non-user events, which the engagement query filters
+        out, are added at the rate of nonUserFraction. The engagement
+        results are therefore those of the workload itself.
+
+        :param workload: events to load
+        :type workload: SyntheticWorkload
+        :param nonUserFraction: extra non-user events per event
+        :type nonUserFraction: float
+        :param forumFraction: share of non-video events that become forum posts
+        :type forumFraction: float
+        :param seed: random seed for event types
+        :type seed: int
+        '''
+        rand = random.Random(seed)
+        videoTypes = ['play_video', 'pause_video', 'seek_video', 'load_video', 'speed_change_video']
+        otherTypes = ['problem_check', 'seq_goto', 'seq_next', 'problem_show', 'page_close']
+        forumUids = {}
+        events = []
+        forumPosts = []
+        for (courseName, student, eventTime, isVideo) in workload.events():
+            timeStr = eventTime.strftime(TIME_FORMAT)
+            if isVideo:
+                events.append((courseName, student, rand.choice(videoTypes), timeStr))
+            elif rand.random() < forumFraction:
+                forumUid = forumUids.setdefault(student, len(forumUids) + 1)
+                forumPosts.append((forumUid, courseName, timeStr))
+            else:
+                events.append((courseName, student, rand.choice(otherTypes), timeStr))
+            if rand.random() < nonUserFraction:
+                events.append((courseName, student, '/courseware/%s' % courseName, timeStr))
+        self.connection.executemany('INSERT INTO Edx.EventXtract VALUES (?,?,?,?)', events)
+        self.connection.executemany('INSERT INTO EdxForum.contents VALUES (?,?,?)', forumPosts)
+        self.connection.executemany('INSERT OR REPLACE INTO EdxPrivate.forumUids VALUES (?,?)',
+                                    [(forumUid, student) for (student, forumUid) in forumUids.items()])
+        self.connection.executemany('INSERT OR REPLACE INTO Edx.CourseInfo VALUES (?,?,?)',
+                                    [(courseName, startDate.strftime(TIME_FORMAT), endDate.strftime(TIME_FORMAT))
+                                     for (courseName, (startDate, endDate)) in workload.courseRuntimes().items()])
+        self.connection.commit()
+        self.forumUids = None
+        return len(events) + len(forumPosts)
+
+
+class SQLiteDBFactory(object):
+    '''
+    Stands in for the MySQLDB class as dbFactory of an
+    EngagementComputer. Picklable, so that it can be handed
+    to worker processes.
+    '''
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def __call__(self, host=None, user=None, passwd=None, db=None): #@UnusedVariable
+        return SQLiteDB(self.directory)
+
+
+if __name__ == '__main__':
+
+    # Add the engagement source dir to $PATH
+    # for duration of this execution:
+    source_dir = [os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark")]
+    source_dir.extend(sys.path)
+    sys.path = source_dir
+    from benchEngagement import addWorkloadArguments, workloadParamsFromArgs
+    from syntheticEvents import SyntheticWorkload
+
+    parser = argparse.ArgumentParser(prog=os.path.basename(sys.argv[0]), formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument('directory', help='Directory for the SQLite databases; created if needed.')
+    addWorkloadArguments(parser)
+    parser.add_argument('--nonUserFraction', type=float, default=0.1, help='Non-user events per event (default: 0.1).')
+    parser.add_argument('--forumFraction', type=float, default=0.05, help='Share of non-video events posted to forums (default: 0.05).')
+    args = parser.parse_args();
+
+    db = SQLiteDB(args.directory, userEventTypes=[])
+    numRows = db.loadWorkload(SyntheticWorkload(**workloadParamsFromArgs(args)),
+                              nonUserFraction=args.nonUserFraction,
+                              forumFraction=args.forumFraction)
+    db.close()
+    print('Loaded %d rows into %s.' % (numRows, args.directory))
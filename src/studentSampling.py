@@ -0,0 +1,190 @@
+# Copyright (c) 2014, Stanford University
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification, are permitted provided that the following conditions are met:
+# 1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following disclaimer in the documentation and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote products derived from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+'''
+Created on Oct 19, 2026
+
+Deterministic student sampling, for quick engagement estimates
+of very large courses. A StudentSample keeps a fixed fraction of
+all anon_screen_names: a learner is in the sample if the first
+32 bits of the MD5 of salt + anon_screen_name, modulo SAMPLE_BUCKETS,
+fall below fraction * SAMPLE_BUCKETS. The same learners are
+therefore sampled in every run with the same fraction and salt,
+and a larger fraction's sample contains a smaller one's, so
+estimates stay comparable across runs.
+
+The test runs in the database, as part of the main query
+(see eventSources.buildEventQuery()), so that rows of learners
+outside the sample are never transferred:
+
+    CONV(SUBSTR(MD5(CONCAT('<salt>', anon_screen_name)), 1, 8), 16, 10) % 10000 < <threshold>
+
+and in Python, with identical results, for event sources
+that are not MySQL (SampledEventSource).
+
+Course results of a sampled run carry their sample fraction,
+and report their counts and totals scaled up by its inverse;
+see CourseEngagementResult.statsTuple(). The proportions of
+student-weeks in the three median session length buckets come
+with bootstrap confidence intervals from bucketProportionIntervals(),
+which resamples learners, the unit of sampling.
+
+@author: paepcke
+'''
+import hashlib
+
+import numpy
+
+from eventSources import EventSource
+
+
+# Resolution of sample fractions:
+SAMPLE_BUCKETS = 10000
+
+BUCKET_NAMES = ('oneToTwentyMin', 'twentyoneToSixtyMin', 'greaterSixtyMin')
+
+
+class StudentSample(object):
+
+    def __init__(self, fraction, salt=''):
+        '''
+        :param fraction: share of learners to keep, 0 < fraction <= 1. Rounded
+            to a multiple of 1/SAMPLE_BUCKETS; see self.fraction.
+        :type fraction: float
+        :param salt: prefix to the hashed names; other salts draw
+            other, independent samples
+        :type salt: string
+        :raise ValueError: if fraction is out of range or rounds to 0
+        '''
+        if not 0 < fraction <= 1:
+            raise ValueError('Sample fraction must be in (0, 1], not %s' % fraction)
+        self.threshold = int(round(fraction * SAMPLE_BUCKETS))
+        if self.threshold == 0:
+            raise ValueError('Sample fraction must be at least %s, not %s' % (1.0 / SAMPLE_BUCKETS, fraction))
+        self.salt = salt
+        # Effective fraction:
+        self.fraction = self.threshold / float(SAMPLE_BUCKETS)
+
+    def contains(self, anonScreenName):
+        '''
+        Return True if the learner is in the sample. None,
+        like NULL in SQL, is not.
+        '''
+        if anonScreenName is None:
+            return False
+        name = self.salt + anonScreenName
+        if not isinstance(name, bytes):
+            name = name.encode('utf-8')
+        return int(hashlib.md5(name).hexdigest()[:8], 16) % SAMPLE_BUCKETS < self.threshold
+
+    def sqlPredicate(self, column):
+        '''
+        Return a MySQL condition that is true for rows whose
+        column value is a learner in the sample.
+
+        :param column: column name or expression
+        :type column: string
+        :rtype: string
+        '''
+        if len(self.salt) > 0:
+            column = "CONCAT('%s', %s)" % (self.salt.replace("\\", "\\\\").replace("'", "\\'"), column)
+        return 'CONV(SUBSTR(MD5(%s), 1, 8), 16, 10) %% %d < %d' % (column, SAMPLE_BUCKETS, self.threshold)
+
+    def toDict(self):
+        return {'fraction' : self.fraction, 'salt' : self.salt}
+
+
+class SampledEventSource(EventSource):
+    '''
+    Passes on only the rows of sampled learners from another
+    source, for sources that cannot filter themselves.
+    '''
+
+    def __init__(self, source, sample):
+        '''
+        :param source: where the events come from
+        :type source: EventSource
+        :param sample: learners to keep
+        :type sample: StudentSample
+        '''
+        self.source = source
+        self.sample = sample
+
+    def batches(self, courseToProfile=None, afterCourse=None):
+        return self._filter(self.source.batches(courseToProfile, afterCourse))
+
+    def unsortedBatches(self, courseToProfile=None, afterCourse=None):
+        return self._filter(self.source.unsortedBatches(courseToProfile, afterCourse))
+
+    def _filter(self, batches):
+        # One hash per learner rather than per event:
+        decisions = {}
+        for batch in batches:
+            kept = []
+            for row in batch:
+                try:
+                    keep = decisions[row[1]]
+                except KeyError:
+                    keep = decisions[row[1]] = self.sample.contains(row[1])
+                if keep:
+                    kept.append(row)
+            if len(kept) > 0:
+                yield kept
+
+    def courseRuntime(self, courseName):
+        return self.source.courseRuntime(courseName)
+
+    def watermark(self, courseToProfile=None):
+        return self.source.watermark(courseToProfile)
+
+    def close(self):
+        self.source.close()
+
+
+def bucketProportionIntervals(studentBucketCounts, confidence=0.95, numResamples=1000, seed=0):
+    '''
+    Proportions of student-weeks in each median session length
+    bucket, with percentile bootstrap confidence intervals. Learners
+    are resampled with replacement, together with all their weeks,
+    since learners are what the sample draws.
+
+    :param studentBucketCounts: one row per learner, with the learner's
+        number of student-weeks in each of the BUCKET_NAMES buckets
+    :type studentBucketCounts: {numpy.ndarray | [[int,int,int]]}
+    :param confidence: coverage of the intervals
+    :type confidence: float
+    :param numResamples: bootstrap resamples
+    :type numResamples: int
+    :param seed: random seed, so that reports are reproducible
+    :type seed: int
+    :return: bucket name --> (proportion, lower, upper); empty if there
+        are no student-weeks
+    :rtype: dict
+    '''
+    counts = numpy.asarray(studentBucketCounts, dtype=numpy.float64).reshape(-1, len(BUCKET_NAMES))
+    totals = counts.sum(axis=0)
+    if totals.sum() == 0:
+        return {}
+    proportions = totals / totals.sum()
+    numStudents = len(counts)
+    rng = numpy.random.RandomState(seed)
+    resampled = numpy.empty((numResamples, len(BUCKET_NAMES)))
+    # Resample in slices of about a million weights:
+    sliceSize = max(1, (1 << 20) // numStudents)
+    for start in range(0, numResamples, sliceSize):
+        stop = min(start + sliceSize, numResamples)
+        weights = rng.multinomial(numStudents, [1.0 / numStudents] * numStudents, size=stop - start)
+        resampled[start:stop] = weights.dot(counts)
+    resampled /= resampled.sum(axis=1)[:, numpy.newaxis]
+    alpha = 100 * (1 - confidence) / 2
+    (lower, upper) = numpy.percentile(resampled, [alpha, 100 - alpha], axis=0)
+    return dict([(bucketName, (float(proportions[i]), float(lower[i]), float(upper[i])))
+                 for (i, bucketName) in enumerate(BUCKET_NAMES)])
@@ -0,0 +1,155 @@
+# Copyright (c) 2014, Stanford University
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification, are permitted provided that the following conditions are met:
+# 1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following disclaimer in the documentation and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote products derived from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+'''
+Created on Oct 19, 2026
+
+@author: paepcke
+'''
+import csv
+import datetime
+import os
+import tempfile
+import unittest
+
+from src.aggregators import Aggregator, AGGREGATORS, newAggregators, WEEKDAYS, \
+    SessionLengthQuantilesAggregator
+from src.benchmark.syntheticEvents import SyntheticWorkload, SyntheticEventDb
+from src.engagement import EngagementComputer
+
+
+class SessionCounter(Aggregator):
+
+    name = 'sessionCounter'
+    header = 'Course,NumSessions,NumEvents'
+
+    def __init__(self):
+        self.counts = {}
+
+    def addSession(self, courseName, student, sessionStart, sessionSecs, numEvents): #@UnusedVariable
+        (numSessions, totalEvents) = self.counts.get(courseName, (0, 0))
+        self.counts[courseName] = (numSessions + 1, totalEvents + numEvents)
+
+    def rows(self):
+        for courseName in sorted(self.counts.keys()):
+            yield (courseName,) + self.counts[courseName]
+
+
+class Test(unittest.TestCase):
+
+    def setUp(self):
+        self.workload = SyntheticWorkload(numCourses=2, learnersPerCourse=10, eventsPerLearner=30)
+        self.aggregators = newAggregators(sorted(AGGREGATORS.keys())) + [SessionCounter()]
+        self.comp = EngagementComputer(mySQLUser='test', mySQLPwd='',
+                                       db=SyntheticEventDb(self.workload),
+                                       courseRuntimes=self.workload.courseRuntimes(),
+                                       aggregators=self.aggregators)
+        self.comp.log = lambda msg: None
+        self.comp.run()
+        self.byName = dict([(aggregator.name, aggregator) for aggregator in self.aggregators])
+
+    def testBuiltInsMatchResults(self):
+        self.assertEqual(sorted([('OpenEdX',) + row for row in self.comp.iterSummary()]),
+                         sorted(self.byName['summary'].rows()))
+        self.assertEqual(sorted([('OpenEdX',) + row for row in self.comp.iterWeeklyEffort()]),
+                         sorted(self.byName['weeklyEffort'].rows()))
+        sessions = list(self.comp.iterSessions())
+        byWeekday = list(self.byName['sessionsByWeekday'].rows())
+        self.assertEqual(2 * len(WEEKDAYS), len(byWeekday))
+        self.assertEqual(len(sessions), sum([row[3] for row in byWeekday]))
+        for weekday in range(len(WEEKDAYS)):
+            self.assertEqual(len([session for session in sessions if session[2].weekday() == weekday]),
+                             sum([row[3] for row in byWeekday if row[2] == WEEKDAYS[weekday]]))
+        byHour = list(self.byName['sessionsByHour'].rows())
+        self.assertEqual(2 * 24, len(byHour))
+        self.assertEqual(len(sessions), sum([row[3] for row in byHour]))
+
+    def testWeeklyActiveLearners(self):
+        runtimes = self.workload.courseRuntimes()
+        expected = {}
+        for (course, student, start, _, _) in self.comp.iterSessions():
+            startDate = runtimes[course][0]
+            if start >= startDate:
+                expected.setdefault((course, (start - startDate).days // 7 + 1), set()).add(student)
+        self.assertEqual(sorted([('OpenEdX', course, week, len(students)) for ((course, week), students) in expected.items()]),
+                         list(self.byName['weeklyActiveLearners'].rows()))
+
+    def testSessionLengthQuantiles(self):
+        rows = list(self.byName['sessionLengthQuantiles'].rows())
+        header = self.byName['sessionLengthQuantiles'].header.split(',')
+        for courseName in self.workload.courseNames():
+            sessionSecs = sorted([secs for (_, _, _, secs, _) in self.comp.iterSessions(courseName)])
+            courseRows = [dict(zip(header, row)) for row in rows if row[1] == courseName]
+            self.assertEqual('All', courseRows[0]['Week'])
+            self.assertEqual(len(sessionSecs), courseRows[0]['NumSessions'])
+            # Few sessions, so the sketches are exact:
+            self.assertEqual(int(round(sessionSecs[0])), courseRows[0]['P0'])
+            self.assertEqual(int(round(sessionSecs[-1])), courseRows[0]['P100'])
+            self.assertEqual(int(round(sessionSecs[(len(sessionSecs) - 1) // 2])), courseRows[0]['P50'])
+            self.assertEqual(len(sessionSecs), sum([row['NumSessions'] for row in courseRows[1:]]))
+
+    def testSkippedCourseFreesSketches(self):
+        runtimes = self.workload.courseRuntimes()
+        skippedCourse = self.workload.courseNames()[0]
+        runtimes[skippedCourse] = (None, None)
+        aggregator = SessionLengthQuantilesAggregator()
+        comp = EngagementComputer(mySQLUser='test', mySQLPwd='',
+                                  db=SyntheticEventDb(self.workload),
+                                  courseRuntimes=runtimes,
+                                  aggregators=[aggregator])
+        comp.log = lambda msg: None
+        comp.run()
+        self.assertEqual({}, aggregator.daySketches)
+        self.assertEqual(sorted(self.workload.courseNames()[1:]), sorted(aggregator.courseSketches.keys()))
+
+    def testNoCheckpoints(self):
+        # Courses restored from checkpoints would not be aggregated:
+        self.assertRaises(ValueError, EngagementComputer, mySQLUser='test', mySQLPwd='',
+                          db=SyntheticEventDb(self.workload),
+                          checkpointDir=tempfile.gettempdir(),
+                          aggregators=[SessionLengthQuantilesAggregator()])
+
+    def testDaySketchesNotChanged(self):
+        aggregator = SessionLengthQuantilesAggregator()
+        startDate = datetime.datetime(2013, 9, 2)
+        for (day, sessionSecs) in ((2, 60.0), (3, 120.0), (3, 180.0)):
+            aggregator.sessionClosed('Eng/CS1/F13', 's1', datetime.datetime(2013, 9, day, 10), sessionSecs, 1)
+        daySketches = dict(aggregator.daySketches['Eng/CS1/F13'])
+        aggregator.startCourse('Eng/CS1/F13', startDate, startDate + datetime.timedelta(weeks=10))
+        aggregator.endCourse('Eng/CS1/F13', None)
+        self.assertEqual([1, 2], sorted([sketch.count for sketch in daySketches.values()]))
+        (courseSketch, weekSketches) = aggregator.courseSketches['Eng/CS1/F13']
+        self.assertEqual(3, courseSketch.count)
+        self.assertEqual(3, weekSketches[0].count)
+        self.assertFalse(any([weekSketches[0] is sketch for sketch in daySketches.values()]))
+
+    def testCustomAggregator(self):
+        rows = list(self.byName['sessionCounter'].rows())
+        self.assertEqual(sorted(self.workload.courseNames()), [row[0] for row in rows])
+        self.assertEqual(len(list(self.comp.iterSessions())), sum([row[1] for row in rows]))
+
+    def testWriteToDisk(self):
+        paths = self.comp.writeAggregatorsToDisk()
+        self.assertEqual(set(self.byName.keys()), set(paths.keys()))
+        for (name, path) in paths.items():
+            self.assertTrue(path.endswith('_engagementAllCourses_%s.csv' % name))
+            with open(path) as fd:
+                rows = list(csv.reader(fd))
+            os.remove(path)
+            self.assertEqual(self.byName[name].header.split(','), rows[0])
+            self.assertEqual([[str(value) for value in row] for row in self.byName[name].rows()], rows[1:])
+
+    def testUnknownName(self):
+        self.assertRaises(ValueError, newAggregators, ['summary', 'noSuchMetric'])
+
+if __name__ == "__main__":
+    #import sys;sys.argv = ['', 'Test.test']
+    unittest.main()
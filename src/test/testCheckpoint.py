@@ -0,0 +1,68 @@
+# Copyright (c) 2014, Stanford University
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification, are permitted provided that the following conditions are met:
+# 1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following disclaimer in the documentation and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote products derived from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+'''
+Created on Oct 19, 2026
+
+@author: paepcke
+'''
+import datetime
+import os
+import shutil
+import tempfile
+import unittest
+
+from src.checkpoint import CheckpointStore
+from src.engagementResult import CourseEngagementResult
+
+
+class Test(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.runKey = {'courseToProfile' : None, 'coursesStartYearsArr' : [2013], 'videoOnly' : False}
+        self.sessions = {'s1' : [(datetime.datetime(2013, 9, 2, 10, 0), 600, 3)]}
+        self.result = CourseEngagementResult('Eng/CS1/F13', activeLearners=['s1'],
+                                             totalStudentSessions=1, totalEffortAllStudents=600,
+                                             oneToTwentyMin=1, weeklyEffort={'s1' : [[0, 600]]})
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def testSaveAndResume(self):
+        store = CheckpointStore(self.directory, self.runKey)
+        store.saveCourse('Eng/CS1/F13', self.result, self.sessions)
+        store.saveCourse('Eng/CS2/F13', None, {})
+        resumed = CheckpointStore(self.directory, self.runKey)
+        self.assertEqual(['Eng/CS1/F13', 'Eng/CS2/F13'], resumed.resume())
+        self.assertEqual('Eng/CS2/F13', resumed.lastCompleted)
+        (courseResult, sessions) = resumed.loadCourse('Eng/CS1/F13')
+        self.assertEqual(self.result, courseResult)
+        self.assertEqual(self.sessions, sessions)
+        self.assertEqual((None, {}), resumed.loadCourse('Eng/CS2/F13'))
+        # No temporary files left behind:
+        self.assertEqual(3, len(os.listdir(self.directory)))
+
+    def testOtherRunKey(self):
+        CheckpointStore(self.directory, self.runKey).saveCourse('Eng/CS1/F13', self.result, self.sessions)
+        otherKey = dict(self.runKey)
+        otherKey['videoOnly'] = True
+        self.assertRaises(ValueError, CheckpointStore(self.directory, otherKey).resume)
+
+    def testClear(self):
+        store = CheckpointStore(self.directory, self.runKey)
+        store.saveCourse('Eng/CS1/F13', self.result, self.sessions)
+        store.clear()
+        self.assertEqual([], os.listdir(self.directory))
+        self.assertEqual([], CheckpointStore(self.directory, self.runKey).resume())
+
+if __name__ == "__main__":
+    #import sys;sys.argv = ['', 'Test.test']
+    unittest.main()
@@ -0,0 +1,98 @@
+# Copyright (c) 2014, Stanford University
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification, are permitted provided that the following conditions are met:
+# 1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following disclaimer in the documentation and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote products derived from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+'''
+Created on Oct 19, 2026
+
+@author: paepcke
+'''
+import datetime
+import os
+import tempfile
+import unittest
+
+import numpy
+
+from src.columnarOutput import allDataColumns, weeklyEffortColumns, writeColumns, memmapColumn, \
+    sessionsArray, weeklyEffortArray, summaryArray
+from src.engagementResult import CourseEngagementResult
+from src.sessionColumns import SessionColumns
+
+
+class ComputedResults(object):
+    '''
+    The result attributes of an EngagementComputer
+    after run(), without the database.
+    '''
+    def __init__(self):
+        self.allStudentsDicts = {'Eng/CS1/F13' : {'s1' : [(datetime.datetime(2013,9,2,10,0), 600.0, 4)],
+                                                  's2' : [(datetime.datetime(2013,9,3,11,0), 120.0, 2),
+                                                          (datetime.datetime(2013,9,4,11,0), 60.0, 1)]}}
+        self.courseSessionColumns = {'Eng/CS2/F13' : SessionColumns.fromSessionsDict(
+                                         {'s2' : [(datetime.datetime(2013,10,1,9,0), 3600.0, 30)]})}
+        self.courseResults = {'Eng/CS1/F13' : CourseEngagementResult('Eng/CS1/F13',
+                                                                     weeklyEffort={'s1' : [[0, 600.0]],
+                                                                                   's2' : [[0, 180.0]]})}
+        self.courseWeeklyEffortColumns = {}
+
+
+class Test(unittest.TestCase):
+
+    def setUp(self):
+        (fd, self.path) = tempfile.mkstemp(suffix='.npz')
+        os.close(fd)
+        self.comp = ComputedResults()
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def testAllData(self):
+        writeColumns(self.path, allDataColumns(self.comp))
+        cols = numpy.load(self.path)
+        self.assertEqual(4, len(cols['start']))
+        courseNames = cols['courses'][cols['course']]
+        studentNames = cols['students'][cols['student']]
+        row = list(cols['sessionSecs']).index(3600.0)
+        self.assertEqual(b'Eng/CS2/F13', courseNames[row])
+        self.assertEqual(b's2', studentNames[row])
+        self.assertEqual(numpy.datetime64('2013-10-01T09:00:00'),
+                         cols['start'].astype('datetime64[s]')[row])
+        # Both courses' s2 share one dictionary entry:
+        self.assertEqual(2, len(cols['students']))
+
+    def testWeeklyEffort(self):
+        writeColumns(self.path, weeklyEffortColumns(self.comp))
+        cols = numpy.load(self.path)
+        self.assertEqual([1, 1], list(cols['week']))
+        self.assertEqual(780.0, cols['effortSecs'].sum())
+
+    def testMemmapColumn(self):
+        columns = allDataColumns(self.comp)
+        writeColumns(self.path, columns)
+        mapped = memmapColumn(self.path, 'start')
+        self.assertTrue(isinstance(mapped, numpy.memmap))
+        self.assertEqual(list(columns['start']), list(mapped))
+
+    def testStructuredArrays(self):
+        sessions = sessionsArray(self.comp)
+        self.assertEqual(4, len(sessions))
+        row = list(sessions['sessionSecs']).index(3600.0)
+        self.assertEqual((b'Eng/CS2/F13', b's2', numpy.datetime64('2013-10-01T09:00:00'), 3600.0, 30),
+                         tuple(sessions[row]))
+        efforts = weeklyEffortArray(self.comp)
+        self.assertEqual([1, 1], list(efforts['week']))
+        self.assertEqual(set([b's1', b's2']), set(efforts['student']))
+        summary = summaryArray(self.comp)
+        self.assertEqual([b'Eng/CS1/F13'], list(summary['course']))
+        self.assertEqual(self.comp.courseResults['Eng/CS1/F13'].statsTuple(), tuple(summary[0])[1:])
+
+if __name__ == "__main__":
+    #import sys;sys.argv = ['', 'Test.test']
+    unittest.main()
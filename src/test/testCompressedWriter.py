@@ -0,0 +1,60 @@
+# Copyright (c) 2014, Stanford University
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification, are permitted provided that the following conditions are met:
+# 1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following disclaimer in the documentation and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote products derived from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+'''
+Created on Oct 19, 2026
+
+@author: paepcke
+'''
+import bz2
+import gzip
+import os
+import tempfile
+import unittest
+
+from src.compressedWriter import CompressedWriter
+
+
+class Test(unittest.TestCase):
+
+    def setUp(self):
+        (fd, self.path) = tempfile.mkstemp()
+        os.close(fd)
+        self.lines = ['OpenEdX,Eng/CS1/F13,student%d,2013-09-02,10:00:00,%d,3\n' % (i, i)
+                      for i in range(20000)]
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def testGzip(self):
+        # Small buffer, so that many batches cross the queue:
+        with CompressedWriter(open(self.path, 'wb'), codec='gzip', bufferSize=4096) as writer:
+            for line in self.lines:
+                writer.write(line)
+        with gzip.open(self.path, 'rb') as fd:
+            self.assertEqual(''.join(self.lines).encode('utf-8'), fd.read())
+
+    def testBz2(self):
+        writer = CompressedWriter(open(self.path, 'wb'), codec='bz2', bufferSize=10000)
+        writer.writelines(self.lines)
+        writer.close()
+        self.assertEqual(''.join(self.lines).encode('utf-8'), bz2.BZ2File(self.path).read())
+        self.assertTrue(writer.bytesOut < writer.bytesIn)
+
+    def testNothingWritten(self):
+        CompressedWriter(open(self.path, 'wb')).close()
+        self.assertEqual(0, os.path.getsize(self.path))
+
+    def testUnknownCodec(self):
+        self.assertRaises(ValueError, CompressedWriter, open(self.path, 'wb'), 'zip')
+
+if __name__ == "__main__":
+    #import sys;sys.argv = ['', 'Test.test']
+    unittest.main()
@@ -0,0 +1,148 @@
+# Copyright (c) 2014, Stanford University
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification, are permitted provided that the following conditions are met:
+# 1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following disclaimer in the documentation and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote products derived from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+'''
+Created on Oct 19, 2026
+
+@author: paepcke
+'''
+import threading
+import time
+import unittest
+
+from src.connectionPool import ConnectionPool, PoolExhaustedError
+
+
+class FakeConnection(object):
+
+    def __init__(self, **connectKwargs):
+        self.connectKwargs = connectKwargs
+        self.broken = False
+        self.closed = False
+
+    def query(self, queryStr):
+        if self.broken:
+            raise IOError('Lost connection')
+        return iter([(1,)])
+
+    def close(self):
+        self.closed = True
+
+
+class Test(unittest.TestCase):
+
+    def testReuse(self):
+        pool = ConnectionPool(FakeConnection, size=2, host='localhost', db='Edx')
+        first = pool.acquire()
+        self.assertEqual({'host' : 'localhost', 'db' : 'Edx'}, first.connectKwargs)
+        pool.release(first)
+        for _ in range(10):
+            with pool.connection() as connection:
+                self.assertTrue(connection is first)
+        self.assertEqual(1, pool.numConnects)
+
+    def testSizeLimit(self):
+        pool = ConnectionPool(FakeConnection, size=2)
+        first = pool.acquire()
+        second = pool.acquire()
+        self.assertFalse(first is second)
+        self.assertRaises(PoolExhaustedError, pool.acquire, 0.01)
+        pool.release(second)
+        self.assertTrue(pool.acquire(0.01) is second)
+        self.assertRaises(ValueError, ConnectionPool, FakeConnection, size=0)
+
+    def testReconnect(self):
+        pool = ConnectionPool(FakeConnection, size=1, checkAfterSecs=0)
+        first = pool.acquire()
+        pool.release(first)
+        first.broken = True
+        second = pool.acquire()
+        self.assertFalse(second is first)
+        self.assertTrue(first.closed)
+        self.assertEqual(1, pool.numReconnects)
+
+    def testBrokenInsideWith(self):
+        pool = ConnectionPool(FakeConnection, size=1)
+        try:
+            with pool.connection() as connection:
+                connection.broken = True
+                connection.query('SELECT 1;')
+        except IOError:
+            pass
+        self.assertTrue(connection.closed)
+        self.assertFalse(pool.acquire(0.01) is connection)
+
+        # Healthy connections survive errors of their users:
+        pool = ConnectionPool(FakeConnection, size=1)
+        try:
+            with pool.connection() as connection:
+                raise ValueError('Not found')
+        except ValueError:
+            pass
+        self.assertTrue(pool.acquire(0.01) is connection)
+
+    def testWaiterGetsRoomOfDiscarded(self):
+        pool = ConnectionPool(FakeConnection, size=1)
+        acquired = []
+        waiting = threading.Event()
+        def waiter():
+            waiting.set()
+            acquired.append(pool.acquire())
+        try:
+            with pool.connection() as connection:
+                thread = threading.Thread(target=waiter)
+                thread.daemon = True
+                thread.start()
+                waiting.wait()
+                # Let the waiter block in acquire():
+                time.sleep(0.1)
+                connection.broken = True
+                connection.query('SELECT 1;')
+        except IOError:
+            pass
+        thread.join(5)
+        self.assertFalse(thread.is_alive())
+        self.assertEqual(1, len(acquired))
+        self.assertFalse(acquired[0] is connection)
+        self.assertEqual(1, pool.numOpen)
+
+    def testThreads(self):
+        pool = ConnectionPool(FakeConnection, size=3)
+        inUse = set()
+        errors = []
+        lock = threading.Lock()
+        def worker():
+            for _ in range(200):
+                with pool.connection() as connection:
+                    with lock:
+                        if id(connection) in inUse:
+                            errors.append('Connection handed out twice')
+                        inUse.add(id(connection))
+                    with lock:
+                        inUse.discard(id(connection))
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual([], errors)
+        self.assertTrue(pool.numConnects <= 3)
+
+    def testCloseIdle(self):
+        pool = ConnectionPool(FakeConnection, size=2)
+        connection = pool.acquire()
+        pool.release(connection)
+        pool.closeIdle()
+        self.assertTrue(connection.closed)
+        self.assertEqual(0, pool.numOpen)
+
+if __name__ == "__main__":
+    #import sys;sys.argv = ['', 'Test.test']
+    unittest.main()
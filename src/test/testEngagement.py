@@ -14,11 +14,30 @@ Created on Aug 4, 2014
 @author: paepcke
 '''
 import datetime
+import shutil
+import tempfile
 import unittest
 
+from src.benchmark.syntheticEvents import SyntheticWorkload, SyntheticEventSource
 from src.engagement import EngagementComputer
 
 
+class FailingSource(SyntheticEventSource):
+    '''
+    Fails halfway through the given course, like a lost connection.
+    '''
+    def __init__(self, workload, failInCourse):
+        SyntheticEventSource.__init__(self, workload)
+        self.failInCourse = failInCourse
+
+    def batches(self, courseToProfile=None, afterCourse=None):
+        for batch in SyntheticEventSource.batches(self, courseToProfile, afterCourse):
+            if batch[0][0] == self.failInCourse:
+                yield batch[:len(batch) // 2]
+                raise IOError('Connection lost')
+            yield batch
+
+
 class Test(unittest.TestCase):
 
     def setUp(self):
@@ -71,6 +90,72 @@ class Test(unittest.TestCase):
         dateInFirstWeek = datetime.datetime(2014,1,7)
         self.assertEqual(1, self.engageComputer.courseWeekNumber(courseStartDate, dateInFirstWeek)) 
 
+    def testWindowWeeks(self):
+        courseStartDate = datetime.datetime(2014,1,6)
+        self.assertEqual(list(range(11)), list(self.engageComputer.windowWeeks(courseStartDate, 10)))
+        self.engageComputer.window = (datetime.datetime(2014,1,20,12), datetime.datetime(2014,2,3))
+        self.assertEqual([2, 3], list(self.engageComputer.windowWeeks(courseStartDate, 10)))
+        self.engageComputer.window = (None, datetime.datetime(2014,2,3,0,0,1))
+        self.assertEqual(list(range(5)), list(self.engageComputer.windowWeeks(courseStartDate, 10)))
+        self.engageComputer.window = (None, datetime.datetime(2013,12,1))
+        self.assertEqual([], list(self.engageComputer.windowWeeks(courseStartDate, 10)))
+        self.assertRaises(ValueError, EngagementComputer, mySQLUser='unittest', mySQLPwd='', db=object(),
+                          windowStart=datetime.datetime(2014,1,6), windowEnd=datetime.datetime(2014,1,6))
+
+    def testWindowedRun(self):
+        workload = SyntheticWorkload(numCourses=2, learnersPerCourse=20, eventsPerLearner=100)
+        (courseStart, courseEnd) = list(workload.courseRuntimes().values())[0]
+        windowStart = courseStart + datetime.timedelta(weeks=2)
+        windowEnd = courseStart + datetime.timedelta(weeks=4)
+        comp = EngagementComputer(mySQLUser='unittest', mySQLPwd='',
+                                  eventSource=SyntheticEventSource(workload),
+                                  courseRuntimes=workload.courseRuntimes(),
+                                  windowStart=windowStart,
+                                  windowEnd=windowEnd)
+        comp.log = lambda msg: None
+        comp.run()
+        sessionStarts = [session[2] for session in comp.iterSessions()]
+        self.assertTrue(len(sessionStarts) > 0)
+        self.assertTrue(all([windowStart <= sessionStart < windowEnd for sessionStart in sessionStarts]))
+        # Weeks are numbered from the course start, and 1-based:
+        self.assertEqual(set([3, 4]), set([row[2] for row in comp.iterWeeklyEffort()]))
+
+    def testWrapUpCourseWithCountOnly(self):
+        courseName = 'Medicine/SciWrite/Fall2013'
+        comp = EngagementComputer(mySQLUser='unittest', mySQLPwd='', db=object(),
+                                  courseRuntimes={courseName : (datetime.datetime(2013, 9, 2), datetime.datetime(2013, 11, 11))})
+        comp.log = lambda msg: None
+        # As run() sets it up:
+        comp.studentSessionsDict = {'s1' : [(datetime.datetime(2013, 9, 3, 10), 600, 4)]}
+        comp.wrapUpCourse(courseName, comp.studentSessionsDict, 7)
+        self.assertEqual((7, 1, 600), comp.classStats[courseName][:3])
+
+    def testResumeMatchesUninterruptedRun(self):
+        workload = SyntheticWorkload(numCourses=3, learnersPerCourse=10, eventsPerLearner=30)
+        checkpointDir = tempfile.mkdtemp()
+        def newComputer(source, resume=False):
+            comp = EngagementComputer(mySQLUser='unittest', mySQLPwd='',
+                                      eventSource=source,
+                                      courseRuntimes=workload.courseRuntimes(),
+                                      checkpointDir=checkpointDir,
+                                      resume=resume)
+            comp.log = lambda msg: None
+            comp.logErr = lambda msg: None
+            return comp
+        def results(comp):
+            return (sorted(comp.iterSessions()), sorted(comp.iterWeeklyEffort()), comp.classStats)
+        try:
+            uninterrupted = newComputer(SyntheticEventSource(workload))
+            uninterrupted.run()
+            # Crash in the second course; the first is checkpointed:
+            self.assertRaises(IOError, newComputer(FailingSource(workload, workload.courseNames()[1])).run)
+            resumed = newComputer(SyntheticEventSource(workload), resume=True)
+            resumed.run()
+            self.assertTrue(all([session[1] is not None for session in uninterrupted.iterSessions()]))
+            self.assertEqual(results(uninterrupted), results(resumed))
+        finally:
+            shutil.rmtree(checkpointDir)
+
 if __name__ == "__main__":
     #import sys;sys.argv = ['', 'Test.test']
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,76 @@
+# Copyright (c) 2014, Stanford University
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification, are permitted provided that the following conditions are met:
+# 1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following disclaimer in the documentation and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote products derived from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+'''
+Created on Oct 19, 2026
+
+@author: paepcke
+'''
+import json
+import os
+import tempfile
+import unittest
+
+from src.engagementMetrics import RunMetrics
+
+
+class Test(unittest.TestCase):
+
+    def testRunCounters(self):
+        messages = []
+        metrics = RunMetrics(log=messages.append, reportInterval=0)
+        metrics.startRun()
+        metrics.queryDone()
+        metrics.sessionsCreated += 3
+        metrics.progress(1000, 10, 5)
+        metrics.courseWrappedUp('Eng/CS1/F13', 0.5)
+        metrics.courseWrappedUp('Eng/CS1/F13', 0.25)
+        metrics.endRun()
+        self.assertEqual(1, len(messages))
+        self.assertTrue(messages[0].startswith('Progress: 1000 rows'))
+        metricsDict = metrics.asDict()
+        self.assertEqual(1000, metricsDict['rowsFetched'])
+        self.assertEqual(10, metricsDict['rowsFilteredCourses'])
+        self.assertEqual(5, metricsDict['rowsFilteredStudents'])
+        self.assertEqual(3, metricsDict['sessionsCreated'])
+        self.assertEqual(2, metricsDict['coursesCompleted'])
+        self.assertEqual({'Eng/CS1/F13' : 0.75}, metricsDict['courseWrapUpSecs'])
+        self.assertTrue(metricsDict['runSecs'] >= metricsDict['querySecs'])
+
+    def testNoReportWithoutInterval(self):
+        messages = []
+        metrics = RunMetrics(log=messages.append)
+        metrics.startRun()
+        metrics.progress(1000, 0, 0)
+        self.assertEqual([], messages)
+        self.assertEqual(None, metrics.rowsPerSec)
+
+    def testMergeAndSave(self):
+        metrics = RunMetrics()
+        metrics.rowsFetched = 10
+        metrics.courseWrappedUp('Eng/CS1/F13', 1.0)
+        other = RunMetrics()
+        other.rowsFetched = 5
+        other.courseWrappedUp('Eng/CS2/F13', 2.0)
+        metrics.merge(other.asDict())
+        self.assertEqual(15, metrics.rowsFetched)
+        self.assertEqual(3.0, metrics.wrapUpSecs)
+        (fd, path) = tempfile.mkstemp(suffix='.json')
+        os.close(fd)
+        try:
+            metrics.save(path)
+            with open(path) as fd:
+                self.assertEqual(metrics.asDict(), json.load(fd))
+        finally:
+            os.remove(path)
+
+if __name__ == "__main__":
+    #import sys;sys.argv = ['', 'Test.test']
+    unittest.main()
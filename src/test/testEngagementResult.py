@@ -0,0 +1,109 @@
+# Copyright (c) 2014, Stanford University
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification, are permitted provided that the following conditions are met:
+# 1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following disclaimer in the documentation and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote products derived from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+'''
+Created on Oct 19, 2026
+
+@author: paepcke
+'''
+import os
+import tempfile
+import unittest
+
+from src.engagementResult import CourseEngagementResult, mergeResults
+
+
+class Test(unittest.TestCase):
+
+    def setUp(self):
+        self.part1 = CourseEngagementResult('Engineering/CS101/Fall2013',
+                                            activeLearners=['s1', 's2'],
+                                            totalStudentSessions=3,
+                                            totalEffortAllStudents=600.4,
+                                            oneToTwentyMin=2,
+                                            weeklyEffort={'s1' : [[0, 100], [2, 200]],
+                                                          's2' : [[1, 300.4]]})
+        self.part2 = CourseEngagementResult('Engineering/CS101/Fall2013',
+                                            activeLearners=['s2', 's3'],
+                                            totalStudentSessions=2,
+                                            totalEffortAllStudents=5000,
+                                            greaterSixtyMin=1,
+                                            weeklyEffort={'s1' : [[1, 1000], [2, 4000]]})
+        self.part3 = CourseEngagementResult('Engineering/CS101/Fall2013',
+                                            activeLearners=['s4'],
+                                            totalStudentSessions=1,
+                                            totalEffortAllStudents=1500,
+                                            twentyoneToSixtyMin=1,
+                                            weeklyEffort={'s4' : [[0, 1500]]})
+
+    def testMerge(self):
+        merged = self.part1.merge(self.part2)
+        self.assertEqual((3, 5, 5600, 2, 0, 1), merged.statsTuple())
+        self.assertEqual([[0, 100], [1, 1000], [2, 4200]], merged.weeklyEffort['s1'])
+        self.assertEqual([[1, 300.4]], merged.weeklyEffort['s2'])
+        # Inputs untouched:
+        self.assertEqual([[0, 100], [2, 200]], self.part1.weeklyEffort['s1'])
+
+    def testMergeIsAssociative(self):
+        leftFirst  = self.part1.merge(self.part2).merge(self.part3)
+        rightFirst = self.part1.merge(self.part2.merge(self.part3))
+        self.assertEqual(leftFirst, rightFirst)
+        self.assertEqual(leftFirst, self.part3.merge(self.part1).merge(self.part2))
+
+    def testMergeOtherCourseFails(self):
+        other = CourseEngagementResult('Medicine/SciWrite/Fall2013')
+        self.assertRaises(ValueError, self.part1.merge, other)
+
+    def testMergeResults(self):
+        other = CourseEngagementResult('Medicine/SciWrite/Fall2013', totalStudentSessions=7)
+        merged = mergeResults([self.part1, other, self.part2, self.part3])
+        self.assertEqual(2, len(merged))
+        self.assertEqual(7, merged['Medicine/SciWrite/Fall2013'].totalStudentSessions)
+        self.assertEqual(6, merged['Engineering/CS101/Fall2013'].totalStudentSessions)
+
+    def testSerialization(self):
+        self.assertEqual(self.part1, CourseEngagementResult.fromDict(self.part1.toDict()))
+        (fd, path) = tempfile.mkstemp(suffix='.json')
+        os.close(fd)
+        try:
+            self.part2.save(path)
+            self.assertEqual(self.part2, CourseEngagementResult.load(path))
+        finally:
+            os.remove(path)
+
+    def testSampledResult(self):
+        sampled = CourseEngagementResult('Engineering/CS101/Fall2013',
+                                         activeLearners=['s1', 's2'],
+                                         totalStudentSessions=3,
+                                         totalEffortAllStudents=600.4,
+                                         oneToTwentyMin=2,
+                                         sampleFraction=0.25)
+        self.assertEqual((8, 12, 2402, 8, 0, 0), sampled.statsTuple())
+        self.assertEqual(sampled, CourseEngagementResult.fromDict(sampled.toDict()))
+        self.assertRaises(ValueError, self.part1.merge, sampled)
+        self.assertEqual(0.25, sampled.merge(sampled).sampleFraction)
+
+    def testCountWithoutNames(self):
+        counted = CourseEngagementResult('Engineering/CS101/Fall2013',
+                                         totalStudentSessions=3,
+                                         numActiveLearners=5)
+        self.assertEqual(None, counted.activeLearners)
+        self.assertEqual((5, 3, 0, 0, 0, 0), counted.statsTuple())
+        self.assertEqual(counted, CourseEngagementResult.fromDict(counted.toDict()))
+        self.assertRaises(ValueError, self.part1.merge, counted)
+        self.assertRaises(ValueError, counted.merge, self.part1)
+        # Names win over a count:
+        self.assertEqual(2, CourseEngagementResult('Engineering/CS101/Fall2013',
+                                                   activeLearners=['s1', 's2'],
+                                                   numActiveLearners=5).numActiveLearners)
+
+if __name__ == "__main__":
+    #import sys;sys.argv = ['', 'Test.test']
+    unittest.main()
@@ -0,0 +1,95 @@
+# Copyright (c) 2014, Stanford University
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification, are permitted provided that the following conditions are met:
+# 1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following disclaimer in the documentation and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote products derived from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+'''
+Created on Oct 19, 2026
+
+@author: paepcke
+'''
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+from src.benchmark.syntheticEvents import SyntheticWorkload
+from src.engagementService import EngagementService, request
+from src.sqliteStandIn import SQLiteDB, SQLiteDBFactory
+
+
+class Test(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.dbDir = os.path.join(self.directory, 'db')
+        self.workload = SyntheticWorkload(numCourses=2, learnersPerCourse=10, eventsPerLearner=20)
+        db = SQLiteDB(self.dbDir)
+        db.loadWorkload(self.workload)
+        db.close()
+        self.socketPath = os.path.join(self.directory, 'engagement.sock')
+        self.service = EngagementService(socketPath=self.socketPath,
+                                         mySQLUser='test',
+                                         mySQLPwd='',
+                                         maxConcurrent=2,
+                                         cacheDir=os.path.join(self.directory, 'cache'),
+                                         dbFactory=SQLiteDBFactory(self.dbDir))
+        self.service.log = lambda msg: None
+        self.serverThread = threading.Thread(target=self.service.serve)
+        self.serverThread.start()
+        # Wait for the socket:
+        for _ in range(100):
+            if os.path.exists(self.socketPath):
+                break
+            threading.Event().wait(0.05)
+
+    def tearDown(self):
+        list(request(self.socketPath, op='shutdown'))
+        self.serverThread.join()
+        shutil.rmtree(self.directory)
+
+    def testCompute(self):
+        courseName = self.workload.courseNames()[0]
+        answers = list(request(self.socketPath, op='compute', course=courseName, rows=True))
+        self.assertEqual('running', answers[0]['status'])
+        self.assertEqual('done', answers[-1]['status'])
+        self.assertFalse(answers[-1]['cached'])
+        rows = [row for answer in answers if answer['status'] == 'rows' for row in answer['rows']]
+        with open(answers[-1]['paths'][1], 'r') as fd:
+            self.assertEqual(fd.read().splitlines()[1:], rows)
+        self.assertTrue(all([row.startswith('OpenEdX,%s,' % courseName) for row in rows]))
+        # Second time from the cache:
+        again = list(request(self.socketPath, op='compute', course=courseName))[-1]
+        self.assertTrue(again['cached'])
+        self.assertEqual(answers[-1]['paths'], again['paths'])
+        status = list(request(self.socketPath, op='status'))[-1]
+        self.assertEqual((2, 1, 0, 0), (status['jobs'], status['cacheHits'], status['errors'], status['running']))
+
+    def testConcurrentJobs(self):
+        results = {}
+        def compute(courseName):
+            results[courseName] = list(request(self.socketPath, op='compute', course=courseName))[-1]
+        threads = [threading.Thread(target=compute, args=(courseName,)) for courseName in self.workload.courseNames()]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(set(['done']), set([answer['status'] for answer in results.values()]))
+        # Both jobs' connections went back to the shared pool:
+        self.assertTrue(self.service.dbPool.numOpen <= 3)
+
+    def testErrors(self):
+        self.assertEqual('error', list(request(self.socketPath, op='dance'))[-1]['status'])
+        self.assertEqual('ok', list(request(self.socketPath, op='ping'))[-1]['status'])
+        answer = list(request(self.socketPath, op='compute', course=None, format='npz', rows=True))[-1]
+        self.assertEqual('error', answer['status'])
+
+if __name__ == "__main__":
+    #import sys;sys.argv = ['', 'Test.test']
+    unittest.main()
@@ -0,0 +1,96 @@
+# Copyright (c) 2014, Stanford University
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification, are permitted provided that the following conditions are met:
+# 1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following disclaimer in the documentation and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote products derived from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+'''
+Created on Oct 19, 2026
+
+@author: paepcke
+'''
+import datetime
+import gzip
+import os
+import shutil
+import tempfile
+import unittest
+
+from src.eventSources import CsvEventSource, ColumnarEventSource, WindowedEventSource, writeEventColumns, buildEventQuery, parseTime
+
+
+class Test(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        start = datetime.datetime(2013, 9, 2, 10, 0)
+        self.rows = [(course, student, start + datetime.timedelta(minutes=minute), minute % 2)
+                     for course in ('Eng/CS1/F13', 'Eng/CS2/F13')
+                     for student in ('s1', 's2', 's3')
+                     for minute in range(5)]
+        self.csvPath = os.path.join(self.directory, 'events.csv.gz')
+        with gzip.open(self.csvPath, 'wb') as fd:
+            fd.write(b'course_display_name,anon_screen_name,time,isVideo\n')
+            for row in self.rows:
+                fd.write(('%s,%s,%s,%d\n' % row).encode('utf-8'))
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def readAll(self, source, courseToProfile=None):
+        return [row for batch in source.batches(courseToProfile) for row in batch]
+
+    def testCsv(self):
+        source = CsvEventSource(self.csvPath, batchSize=4)
+        self.assertEqual(self.rows, self.readAll(source))
+        self.assertEqual(self.rows[15:], self.readAll(source, 'Eng/CS2/F13'))
+        self.assertEqual((self.rows[0][2], self.rows[4][2]), source.courseRuntime('Eng/CS1/F13'))
+
+    def testUnsortedTsv(self):
+        tsvPath = os.path.join(self.directory, 'events.tsv')
+        with open(tsvPath, 'w') as fd:
+            fd.write('course_display_name\tanon_screen_name\ttime\tisVideo\n')
+            for row in reversed(self.rows):
+                fd.write('%s\t%s\t%s\t%d\n' % row)
+        self.assertEqual(self.rows, self.readAll(CsvEventSource(tsvPath, presorted=False)))
+
+    def testColumnar(self):
+        npzPath = os.path.join(self.directory, 'events.npz')
+        self.assertEqual(len(self.rows), writeEventColumns(npzPath, CsvEventSource(self.csvPath)))
+        source = ColumnarEventSource(npzPath, batchSize=7)
+        self.assertEqual(self.rows, self.readAll(source))
+        self.assertEqual(self.rows[:15], self.readAll(source, 'Eng/CS1/F13'))
+        self.assertEqual([], self.readAll(source, 'Eng/CS3/F13'))
+
+    def testParseTime(self):
+        self.assertEqual(datetime.datetime(2013, 9, 2, 10, 5, 7), parseTime('2013-09-02 10:05:07'))
+        self.assertEqual(datetime.datetime(2013, 9, 2, 10, 5, 7, 500000), parseTime('2013-09-02 10:05:07.5'))
+        self.assertEqual(None, parseTime(''))
+
+    def testQuery(self):
+        self.assertFalse('>' in buildEventQuery())
+        query = buildEventQuery(afterCourse="Eng/O'Brien/F13")
+        self.assertEqual(2, query.count("course_display_name > 'Eng/O\\'Brien/F13'"))
+        self.assertEqual(2, buildEventQuery('Eng/CS1/F13', 'Eng/CS1/F13').count("course_display_name > "))
+
+    def testWindow(self):
+        window = (datetime.datetime(2013, 9, 2, 10, 1), datetime.datetime(2013, 9, 2, 10, 3))
+        for courseToProfile in (None, 'Eng/CS1/F13'):
+            query = buildEventQuery(courseToProfile, afterCourse='Eng/CS0/F13', window=window)
+            self.assertEqual(1, query.count("AND time >= '2013-09-02 10:01:00'"))
+            self.assertEqual(1, query.count("AND time < '2013-09-02 10:03:00'"))
+            self.assertEqual(1, query.count("created_at >= '2013-09-02 10:01:00'"))
+            self.assertEqual(1, query.count("AND created_at < '2013-09-02 10:03:00'"))
+        self.assertFalse('created_at <' in buildEventQuery(window=(window[0], None)))
+        source = WindowedEventSource(CsvEventSource(self.csvPath), window)
+        self.assertEqual([row for row in self.rows if row[2].minute in (1, 2)], self.readAll(source))
+        # Runtimes are those of the whole course:
+        self.assertEqual((self.rows[0][2], self.rows[4][2]), source.courseRuntime('Eng/CS1/F13'))
+
+if __name__ == "__main__":
+    #import sys;sys.argv = ['', 'Test.test']
+    unittest.main()
@@ -0,0 +1,109 @@
+# Copyright (c) 2014, Stanford University
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification, are permitted provided that the following conditions are met:
+# 1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following disclaimer in the documentation and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote products derived from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+'''
+Created on Oct 19, 2026
+
+@author: paepcke
+'''
+import os
+import random
+import shutil
+import tempfile
+import unittest
+
+from src.benchmark.syntheticEvents import SyntheticWorkload
+from src.engagement import EngagementComputer
+from src.eventSources import EventSource
+from src.externalSort import ExternalSorter, ExternalSortEventSource
+from src.sqliteStandIn import SQLiteDB, SQLiteDBFactory
+
+
+class ShuffledSource(EventSource):
+    '''
+    Delivers a workload's events in random order.
+    '''
+    def __init__(self, workload, batchSize=500):
+        self.rows = list(workload.events())
+        random.Random(3).shuffle(self.rows)
+        self.batchSize = batchSize
+        self.closed = False
+
+    def unsortedBatches(self, courseToProfile=None, afterCourse=None): #@UnusedVariable
+        for start in range(0, len(self.rows), self.batchSize):
+            yield self.rows[start:start + self.batchSize]
+
+    def close(self):
+        self.closed = True
+
+
+class Test(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.workload = SyntheticWorkload(numCourses=3, learnersPerCourse=20, eventsPerLearner=40)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def readAll(self, batches):
+        return [row for batch in batches for row in batch]
+
+    def testSpilledRuns(self):
+        # Chunks of at least MIN_BLOCK_ROWS events; with batches
+        # of 500, 2400 events make runs of 1500 and 900:
+        sorter = ExternalSorter(budgetMB=0, tmpDir=self.directory, batchSize=100)
+        rows = self.readAll(sorter.sortedBatches(ShuffledSource(self.workload).unsortedBatches()))
+        self.assertEqual(sorted(self.workload.events()), rows)
+        self.assertEqual(2, len(sorter.runPaths))
+        self.assertEqual(2400, sorter.numEvents)
+        # Run files are gone:
+        self.assertEqual([], os.listdir(self.directory))
+
+    def testInMemory(self):
+        sorter = ExternalSorter(budgetMB=10, tmpDir=self.directory)
+        rows = self.readAll(sorter.sortedBatches(ShuffledSource(self.workload).unsortedBatches()))
+        self.assertEqual(sorted(self.workload.events()), rows)
+        self.assertEqual([], sorter.runPaths)
+        self.assertEqual([], self.readAll(ExternalSorter().sortedBatches([])))
+
+    def testMissingTimesAndNames(self):
+        sorter = ExternalSorter(budgetMB=0)
+        rows = [('c2', 's1', None, 0), ('c1', None, None, 1), ('c1', 's1', None, 0)]
+        self.assertEqual([('c1', None, None, 1), ('c1', 's1', None, 0), ('c2', 's1', None, 0)],
+                         self.readAll(sorter.sortedBatches([rows])))
+
+    def testEventSource(self):
+        shuffled = ShuffledSource(self.workload)
+        source = ExternalSortEventSource(shuffled, budgetMB=0, tmpDir=self.directory)
+        self.assertEqual(sorted(self.workload.events()), self.readAll(source.batches()))
+        source.close()
+        self.assertTrue(shuffled.closed)
+
+    def testOutOfCoreRun(self):
+        db = SQLiteDB(self.directory)
+        db.loadWorkload(self.workload, forumFraction=0.2)
+        db.close()
+        results = []
+        for outOfCoreBudgetMB in (None, 0):
+            comp = EngagementComputer(mySQLUser='test', mySQLPwd='',
+                                      dbFactory=SQLiteDBFactory(self.directory),
+                                      outOfCoreBudgetMB=outOfCoreBudgetMB,
+                                      sortDir=self.directory)
+            comp.log = lambda msg: None
+            comp.run()
+            results.append((sorted(comp.allDataIterator()),
+                            dict([(courseName, courseResult.statsTuple()) for (courseName, courseResult) in comp.courseResults.items()])))
+        self.assertEqual(3, len(results[0][1]))
+        self.assertEqual(results[0], results[1])
+
+if __name__ == "__main__":
+    #import sys;sys.argv = ['', 'Test.test']
+    unittest.main()
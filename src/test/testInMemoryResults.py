@@ -0,0 +1,76 @@
+# Copyright (c) 2014, Stanford University
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification, are permitted provided that the following conditions are met:
+# 1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following disclaimer in the documentation and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote products derived from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+'''
+Created on Oct 19, 2026
+
+@author: paepcke
+'''
+import csv
+import os
+import unittest
+
+import numpy
+
+from src.benchmark.syntheticEvents import SyntheticWorkload, SyntheticEventDb
+from src.engagement import EngagementComputer
+
+
+class Test(unittest.TestCase):
+
+    def setUp(self):
+        self.workload = SyntheticWorkload(numCourses=2, learnersPerCourse=10, eventsPerLearner=30)
+        self.comp = EngagementComputer(mySQLUser='test', mySQLPwd='',
+                                       db=SyntheticEventDb(self.workload),
+                                       courseRuntimes=self.workload.courseRuntimes())
+        self.comp.log = lambda msg: None
+        self.comp.run()
+
+    def csvRows(self, path):
+        with open(path) as fd:
+            rows = list(csv.reader(fd))[1:]
+        os.remove(path)
+        return rows
+
+    def testIteratorsMatchFiles(self):
+        (summaryPath, allDataPath, weeklyEffortPath) = self.comp.writeResultsToDisk()
+        self.assertEqual(sorted([['OpenEdX', row[0]] + [str(value) for value in row[1:]]
+                                 for row in self.comp.iterSummary()]),
+                         sorted(self.csvRows(summaryPath)))
+        self.assertEqual(sorted(['OpenEdX', course, str(student), str(start.date()), str(start.time()), str(int(secs)), str(numEvents)]
+                                for (course, student, start, secs, numEvents) in self.comp.iterSessions()),
+                         sorted(self.csvRows(allDataPath)))
+        self.assertEqual(sorted(['OpenEdX', course, str(student), str(week), str(int(secs))]
+                                for (course, student, week, secs) in self.comp.iterWeeklyEffort()),
+                         sorted(self.csvRows(weeklyEffortPath)))
+
+    def testCourseFilter(self):
+        courseName = self.workload.courseNames()[0]
+        sessions = list(self.comp.iterSessions(courseName))
+        self.assertTrue(len(sessions) > 0)
+        self.assertEqual(set([courseName]), set([session[0] for session in sessions]))
+        self.assertEqual(len(list(self.comp.iterSessions())),
+                         sum([len(list(self.comp.iterSessions(course))) for course in self.workload.courseNames()]))
+        self.assertEqual([], list(self.comp.iterWeeklyEffort('No/Such/Course')))
+
+    def testArraysMatchIterators(self):
+        sessions = self.comp.sessionsArray()
+        self.assertEqual(len(list(self.comp.iterSessions())), len(sessions))
+        self.assertAlmostEqual(sum([session[3] for session in self.comp.iterSessions()]), sessions['sessionSecs'].sum())
+        efforts = self.comp.weeklyEffortArray()
+        self.assertEqual(sorted([week for (_, _, week, _) in self.comp.iterWeeklyEffort()]), sorted(efforts['week']))
+        summary = self.comp.summaryArray()
+        self.assertEqual(sorted(self.workload.courseNames()), [course.decode('utf-8') for course in summary['course']])
+        self.assertEqual(len(sessions), summary['totalStudentSessions'].sum())
+        self.assertEqual(numpy.dtype('datetime64[s]'), sessions['start'].dtype)
+
+if __name__ == "__main__":
+    #import sys;sys.argv = ['', 'Test.test']
+    unittest.main()
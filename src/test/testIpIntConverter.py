@@ -0,0 +1,104 @@
+# Copyright (c) 2014, Stanford University
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification, are permitted provided that the following conditions are met:
+# 1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following disclaimer in the documentation and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote products derived from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+'''
+Created on Oct 19, 2026
+
+@author: paepcke
+'''
+import os
+import shutil
+import tempfile
+import unittest
+
+from scripts.ipIntConverter import convertChunk, convertIpFrequencyFile, readChunks
+
+
+LINES = ['"",16243',
+         '"1.0.137.96",45',
+         '1.0.138.212,4',
+         '"255.255.255.255",1',
+         '0.0.0.0,7',
+         '"2001:db8::1",7',
+         'header,count',
+         '1.2.3,5',
+         '1.2..3,5',
+         '1.2.3.256,5',
+         '1.2.3.4,abc',
+         '1.2.3.4',
+         '',
+         '"10.0.0.1",12\r']
+
+
+class Test(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.inPath = os.path.join(self.directory, 'ips.csv')
+        with open(self.inPath, 'wb') as fd:
+            # No final newline:
+            fd.write('\n'.join(LINES).encode('ascii'))
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def testConvertFile(self):
+        summary = convertIpFrequencyFile(self.inPath)
+        with open(os.path.join(self.directory, 'ips_ints.csv'), 'rb') as fd:
+            self.assertEqual(b'16812384,45\n16812756,4\n4294967295,1\n0,7\n167772161,12\n', fd.read())
+        with open(os.path.join(self.directory, 'ips_ints6.csv'), 'rb') as fd:
+            self.assertEqual(b'%d,1,7\n' % 0x20010db800000000, fd.read())
+        self.assertEqual((14, 5, 1, 2), (summary.numLines, summary.numIpv4, summary.numIpv6, summary.numEmpty))
+        self.assertEqual({'commas' : 1, 'address' : 4, 'count' : 1}, summary.malformed)
+        self.assertEqual([(7, b'header,count'), (8, b'1.2.3,5')], summary.examples[:2])
+        self.assertTrue('6 malformed' in summary.report())
+
+    def testNoIpv6File(self):
+        with open(self.inPath, 'wb') as fd:
+            fd.write(b'1.2.3.4,5\n')
+        summary = convertIpFrequencyFile(self.inPath)
+        self.assertEqual(1, summary.numIpv4)
+        self.assertFalse(os.path.exists(os.path.join(self.directory, 'ips_ints6.csv')))
+
+    def testChunksAndWorkers(self):
+        with open(self.inPath, 'wb') as fd:
+            for i in range(3000):
+                fd.write(b'"%d.%d.%d.%d",%d\n' % (i % 256, i // 256, 7, 255 - i % 256, i))
+            fd.write(b'bad line\n')
+        whole = convertIpFrequencyFile(self.inPath)
+        with open(os.path.join(self.directory, 'ips_ints.csv'), 'rb') as fd:
+            wholeOut = fd.read()
+        chunked = convertIpFrequencyFile(self.inPath, chunkBytes=1000, workers=3)
+        with open(os.path.join(self.directory, 'ips_ints.csv'), 'rb') as fd:
+            self.assertEqual(wholeOut, fd.read())
+        self.assertEqual(whole.asDict(), chunked.asDict())
+        self.assertEqual([(3001, b'bad line')], chunked.examples)
+        self.assertEqual(b'%d,2999\n' % ((183 << 24) | (11 << 16) | (7 << 8) | 72), wholeOut.splitlines(True)[-1])
+
+    def testBlanksAroundFields(self):
+        result = convertChunk(b'1.2.3.4, 7\n1.2.3.5,8 \n1.2.3.6,\t9\t\r\n1.2.3.7, \n"::1", 3\n1.2.3.8,1 2\n')
+        self.assertEqual(b'16909060,7\n16909061,8\n16909062,9\n', result['ipv4'])
+        self.assertEqual(b'0,1,3\n', result['ipv6'])
+        self.assertEqual({'commas' : 0, 'address' : 0, 'count' : 2}, result['malformed'])
+        result = convertChunk(b' 1.2.3.4,2\n"1.2.3.5 ",3\n1.2.3.6\t,4\n" ::1 ",5\n1.2 .3.7,6\n')
+        self.assertEqual(b'16909060,2\n16909061,3\n16909062,4\n', result['ipv4'])
+        self.assertEqual(b'0,1,5\n', result['ipv6'])
+        self.assertEqual({'commas' : 0, 'address' : 1, 'count' : 0}, result['malformed'])
+
+    def testReadChunks(self):
+        with open(self.inPath, 'rb') as fd:
+            chunks = list(readChunks(fd, 7))
+        self.assertTrue(all([chunk.endswith(b'\n') for chunk in chunks]))
+        self.assertEqual(len(LINES), sum([chunk.count(b'\n') for chunk in chunks]))
+        self.assertEqual(0, convertChunk(b'')['numLines'])
+
+if __name__ == "__main__":
+    #import sys;sys.argv = ['', 'Test.test']
+    unittest.main()
@@ -0,0 +1,80 @@
+# Copyright (c) 2014, Stanford University
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification, are permitted provided that the following conditions are met:
+# 1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following disclaimer in the documentation and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote products derived from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+'''
+Created on Oct 19, 2026
+
+@author: paepcke
+'''
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy
+
+from scripts.ipIntConverter import convertIpFrequencyFile
+from scripts.ipRangeIndex import IpRangeIndex, ipToInt
+
+
+class Test(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.rangesPath = os.path.join(self.directory, 'ranges.csv')
+        with open(self.rangesPath, 'w') as fd:
+            fd.write('start,end,label\n')
+            fd.write('10.0.0.0,10.255.255.255,Private\n')
+            fd.write('16777216,16842751,"Australia, Oceania"\n')
+            fd.write('4294967295,4294967295,Top\n')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def testLookup(self):
+        index = IpRangeIndex.fromCsv(self.rangesPath, hasHeader=True)
+        ips = [ipToInt('1.0.137.96'), ipToInt('1.1.0.0'), ipToInt('10.0.0.0'), ipToInt('10.255.255.255'),
+               ipToInt('11.0.0.0'), 0, 0xFFFFFFFF]
+        self.assertEqual(['Australia, Oceania', None, 'Private', 'Private', None, None, 'Top'], index.labels(ips))
+        self.assertEqual(IpRangeIndex.NO_LABEL, index.lookup([0])[0])
+        self.assertEqual([IpRangeIndex.NO_LABEL] * 2, list(IpRangeIndex.fromRanges([]).lookup([1, 2])))
+
+    def testOverlap(self):
+        self.assertRaises(ValueError, IpRangeIndex.fromRanges, [(10, 20, 'a'), (20, 30, 'b')])
+        self.assertRaises(ValueError, IpRangeIndex.fromRanges, [(30, 20, 'a')])
+        # Adjacent ranges are fine:
+        IpRangeIndex.fromRanges([(21, 30, 'b'), (10, 20, 'a')])
+
+    def testSaveLoad(self):
+        index = IpRangeIndex.fromCsv(self.rangesPath, hasHeader=True)
+        indexPath = os.path.join(self.directory, 'ranges.npz')
+        index.save(indexPath)
+        for mmap in (True, False):
+            loaded = IpRangeIndex.load(indexPath, mmap=mmap)
+            self.assertEqual(index.labelNames, loaded.labelNames)
+            self.assertTrue(numpy.array_equal(index.starts, loaded.starts))
+            ips = numpy.arange(0, 2 ** 32, 2 ** 20, dtype=numpy.uint64).astype(numpy.uint32)
+            self.assertTrue(numpy.array_equal(index.lookup(ips), loaded.lookup(ips)))
+        self.assertTrue(isinstance(IpRangeIndex.load(indexPath).starts, numpy.memmap))
+
+    def testAnnotateConversion(self):
+        index = IpRangeIndex.fromCsv(self.rangesPath, hasHeader=True)
+        inPath = os.path.join(self.directory, 'ips.csv')
+        with open(inPath, 'w') as fd:
+            fd.write('"1.0.137.96",45\n"9.9.9.9",3\n"10.1.2.3",2\n"255.255.255.255",1\n')
+        for workers in (1, 2):
+            convertIpFrequencyFile(inPath, workers=workers, rangeIndex=index)
+            with open(os.path.join(self.directory, 'ips_ints.csv'), 'rb') as fd:
+                self.assertEqual(b'16812384,45,"Australia, Oceania"\n151587081,3,\n167838211,2,Private\n4294967295,1,Top\n',
+                                 fd.read())
+
+if __name__ == "__main__":
+    #import sys;sys.argv = ['', 'Test.test']
+    unittest.main()
@@ -0,0 +1,93 @@
+# Copyright (c) 2014, Stanford University
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification, are permitted provided that the following conditions are met:
+# 1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following disclaimer in the documentation and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote products derived from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+'''
+Created on Oct 19, 2026
+
+@author: paepcke
+'''
+import datetime
+import os
+import tempfile
+import unittest
+
+from src.memoryMonitor import MemoryMonitor, estimateDictBytes, currentRssKb
+
+
+class ComputerStandIn(object):
+    '''
+    The parts of EngagementComputer that MemoryMonitor uses.
+    '''
+    def __init__(self):
+        start = datetime.datetime(2013, 9, 2, 10, 0)
+        self.studentSessionsDict = dict([('student%d' % i, [(start, 600, 4), (start + datetime.timedelta(days=1), 300, 2)])
+                                         for i in range(100)])
+        self.allStudentsDicts = {'Eng/CS1/F13' : self.studentSessionsDict}
+        self.allStudentsWeeklyEffortDict = {'Eng/CS1/F13' : {'student0' : [[0, 900]]}}
+        self.courseSessionColumns = {}
+        self.messages = []
+        self.errors = []
+
+    def addCourseSessions(self, courseName, sessionColumns):
+        self.courseSessionColumns[courseName] = sessionColumns
+
+    def log(self, msg):
+        self.messages.append(msg)
+
+    def logErr(self, msg):
+        self.errors.append(msg)
+
+
+class Test(unittest.TestCase):
+
+    def testEstimate(self):
+        comp = ComputerStandIn()
+        estimate = estimateDictBytes(comp.studentSessionsDict, sampleSize=10)
+        self.assertTrue(estimate > 100 * 2 * 50)
+        self.assertTrue(currentRssKb() > 0)
+
+    def testRecordWithoutBudget(self):
+        comp = ComputerStandIn()
+        monitor = MemoryMonitor()
+        monitor.courseDone(comp, 'Eng/CS1/F13')
+        record = monitor.asDict()['courses']['Eng/CS1/F13']
+        self.assertTrue(record['studentSessionsBytes'] > 0)
+        self.assertTrue(record['allStudentsDictsBytes'] >= record['studentSessionsBytes'])
+        self.assertEqual([], comp.errors)
+
+    def testWarn(self):
+        comp = ComputerStandIn()
+        monitor = MemoryMonitor(budgetMb=0.001)
+        monitor.courseDone(comp, 'Eng/CS1/F13')
+        monitor.check(comp, 'Eng/CS1/F13')
+        self.assertEqual(1, len(comp.errors))
+        self.assertEqual(['Eng/CS1/F13'], monitor.budgetExceededCourses)
+        self.assertTrue('Eng/CS1/F13' in comp.allStudentsDicts)
+
+    def testSpill(self):
+        comp = ComputerStandIn()
+        sessions = comp.allStudentsDicts['Eng/CS1/F13']
+        spillDir = tempfile.mkdtemp()
+        try:
+            monitor = MemoryMonitor(budgetMb=0.001, onBudget='spill', spillDir=spillDir)
+            monitor.courseDone(comp, 'Eng/CS1/F13')
+            self.assertEqual({}, comp.allStudentsDicts)
+            self.assertEqual(sessions, comp.courseSessionColumns['Eng/CS1/F13'].toSessionsDict())
+            # Spill files are unlinked once mapped:
+            self.assertEqual([], os.listdir(spillDir))
+        finally:
+            os.rmdir(spillDir)
+
+    def testBadAction(self):
+        self.assertRaises(ValueError, MemoryMonitor, onBudget='kill')
+
+if __name__ == "__main__":
+    #import sys;sys.argv = ['', 'Test.test']
+    unittest.main()
@@ -0,0 +1,126 @@
+# Copyright (c) 2014, Stanford University
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification, are permitted provided that the following conditions are met:
+# 1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following disclaimer in the documentation and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote products derived from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+'''
+Created on Oct 19, 2026
+
+@author: paepcke
+'''
+import datetime
+import re
+import unittest
+
+from src.benchmark.syntheticEvents import SyntheticWorkload, SyntheticEventDb
+from src.engagement import EngagementComputer
+from src.mysqlResultWriter import MySQLResultWriter, sqlLiteral, infileField
+
+
+class RecordingDb(object):
+    '''
+    Records statements, counts the rows they load, and
+    keeps EngagementLoads, so that swaps can be checked.
+    '''
+    def __init__(self):
+        self.statements = []
+        self.rowsLoaded = {}
+        self.loads = {}
+
+    def execute(self, statement):
+        self.statements.append(statement)
+        match = re.match(r'INSERT INTO Engagement\.(\w+Data) ', statement)
+        if match:
+            self.rowsLoaded[match.group(1)] = self.rowsLoaded.get(match.group(1), 0) + statement.count('),(') + 1
+        match = re.match(r"LOAD DATA LOCAL INFILE '(.*)' INTO TABLE Engagement\.(\w+) ", statement)
+        if match:
+            with open(match.group(1)) as fd:
+                self.rowsLoaded[match.group(2)] = self.rowsLoaded.get(match.group(2), 0) + len(fd.readlines())
+        match = re.match(r"INSERT INTO Engagement\.EngagementLoads .* VALUES \('(.*)', (\d), (\d+), NOW\(\)\)", statement)
+        if match:
+            self.loads[(match.group(1), int(match.group(2)))] = int(match.group(3))
+
+    def query(self, queryStr):
+        match = re.match(r"SELECT load_id FROM Engagement\.EngagementLoads WHERE course_display_name = '(.*)' AND video_only = (\d)", queryStr)
+        key = (match.group(1), int(match.group(2)))
+        return iter([(self.loads[key],)] if key in self.loads else [])
+
+    def close(self):
+        pass
+
+
+class Test(unittest.TestCase):
+
+    def setUp(self):
+        self.workload = SyntheticWorkload(numCourses=2, learnersPerCourse=10, eventsPerLearner=30)
+        self.comp = EngagementComputer(mySQLUser='test', mySQLPwd='',
+                                       db=SyntheticEventDb(self.workload),
+                                       courseRuntimes=self.workload.courseRuntimes())
+        self.comp.log = lambda msg: None
+        self.comp.run()
+        self.numSessions = len(list(self.comp.allDataIterator()))
+        self.numWeeks = sum([len(weeks) for courseResult in self.comp.courseResults.values()
+                                        for weeks in courseResult.weeklyEffort.values()])
+
+    def checkLoaded(self, db):
+        self.assertEqual(2, db.rowsLoaded['EngagementSummaryData'])
+        self.assertEqual(self.numSessions, db.rowsLoaded['EngagementSessionsData'])
+        self.assertEqual(self.numWeeks, db.rowsLoaded['EngagementWeeklyEffortData'])
+
+    def testInsert(self):
+        db = RecordingDb()
+        courses = self.comp.writeResultsToDatabase(method='insert', resultDb=db)
+        self.assertEqual(sorted(self.workload.courseNames()), courses)
+        self.checkLoaded(db)
+        self.assertEqual(set([(courseName, 0) for courseName in courses]), set(db.loads.keys()))
+        # Each course is swapped in after its rows are loaded:
+        swapIndexes = [i for (i, statement) in enumerate(db.statements) if 'EngagementLoads (' in statement and statement.startswith('INSERT')]
+        self.assertEqual(2, len(swapIndexes))
+        self.assertTrue(db.statements[swapIndexes[0] - 1].startswith('INSERT INTO Engagement.EngagementSessionsData'))
+        self.assertFalse([statement for statement in db.statements if statement.startswith('DELETE')])
+
+    def testBatches(self):
+        db = RecordingDb()
+        writer = MySQLResultWriter(db, batchRows=7)
+        writer.writeResults(self.comp)
+        self.checkLoaded(db)
+        self.assertEqual(2 + self.numSessions + self.numWeeks, writer.numRowsLoaded)
+        for statement in db.statements:
+            self.assertTrue(statement.count('),(') < 7)
+
+    def testLoadData(self):
+        db = RecordingDb()
+        self.comp.writeResultsToDatabase(method='loadData', resultDb=db)
+        self.checkLoaded(db)
+
+    def testRerunReplaces(self):
+        db = RecordingDb()
+        writer = MySQLResultWriter(db)
+        writer.writeResults(self.comp)
+        firstLoads = dict(db.loads)
+        writer.writeResults(self.comp)
+        for (key, loadId) in firstLoads.items():
+            self.assertNotEqual(loadId, db.loads[key])
+            deletes = [statement for statement in db.statements if statement.startswith('DELETE') and str(loadId) in statement]
+            self.assertEqual(3, len(deletes))
+            # Old rows go only after the swap:
+            self.assertTrue(db.statements.index(deletes[0]) > db.statements.index(
+                [statement for statement in db.statements if str(db.loads[key]) in statement and 'EngagementLoads (' in statement][0]))
+
+    def testLiterals(self):
+        self.assertEqual("'O\\'Brien\\\\x'", sqlLiteral("O'Brien\\x"))
+        self.assertEqual("'2013-09-02 10:00:05'", sqlLiteral(datetime.datetime(2013, 9, 2, 10, 0, 5)))
+        self.assertEqual('42', sqlLiteral(42.7))
+        self.assertEqual('NULL', sqlLiteral(None))
+        self.assertEqual('a\\tb\\\\c', infileField('a\tb\\c'))
+        self.assertEqual('\\N', infileField(None))
+        self.assertRaises(ValueError, MySQLResultWriter, RecordingDb(), method='replace')
+
+if __name__ == "__main__":
+    #import sys;sys.argv = ['', 'Test.test']
+    unittest.main()
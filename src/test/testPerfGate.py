@@ -0,0 +1,62 @@
+# Copyright (c) 2014, Stanford University
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification, are permitted provided that the following conditions are met:
+# 1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following disclaimer in the documentation and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote products derived from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+'''
+Created on Oct 19, 2026
+
+@author: paepcke
+'''
+import unittest
+
+from src.benchmark.perfGate import compare, BASELINE_FORMAT_VERSION, EXIT_OK, EXIT_REGRESSION, EXIT_INCOMPARABLE
+
+
+class Test(unittest.TestCase):
+
+    def setUp(self):
+        self.params = {'numCourses' : 1, 'learnersPerCourse' : 10, 'eventsPerLearner' : 5}
+        self.baseline = {'formatVersion' : BASELINE_FORMAT_VERSION,
+                         'workloads' : {'small' : {'params' : self.params,
+                                                   'phases' : {'sessionize' : 1.0, 'addTimeToSession' : 2.0}}}}
+
+    def measurement(self, sessionizeSecs, addTimeSecs):
+        return {'small' : {'params' : self.params,
+                           'phases' : {'sessionize' : sessionizeSecs, 'addTimeToSession' : addTimeSecs}}}
+
+    def testWithinTolerance(self):
+        (status, report) = compare(self.baseline, self.measurement(1.1, 1.0), 0.2)
+        self.assertEqual(EXIT_OK, status)
+        self.assertEqual(3, len(report))
+        self.assertTrue(report[1].endswith('faster'))
+
+    def testRegression(self):
+        (status, report) = compare(self.baseline, self.measurement(1.0, 2.5), 0.2)
+        self.assertEqual(EXIT_REGRESSION, status)
+        self.assertTrue('addTimeToSession' in report[1] and report[1].endswith('REGRESSION'))
+        self.assertTrue(report[2].endswith('ok'))
+
+    def testMinDelta(self):
+        # 50% slower, but by only 2ms:
+        self.baseline['workloads']['small']['phases'] = {'sessionize' : 0.004, 'addTimeToSession' : 2.0}
+        (status, report) = compare(self.baseline, self.measurement(0.006, 2.0), 0.2)
+        self.assertEqual(EXIT_OK, status)
+        self.assertTrue(report[2].endswith('ok'))
+        self.assertEqual(EXIT_REGRESSION, compare(self.baseline, self.measurement(0.006, 2.0), 0.2, minDeltaSecs=0.001)[0])
+
+    def testIncomparable(self):
+        self.baseline['formatVersion'] = BASELINE_FORMAT_VERSION + 1
+        self.assertEqual(EXIT_INCOMPARABLE, compare(self.baseline, self.measurement(1.0, 2.0), 0.2)[0])
+        self.baseline['formatVersion'] = BASELINE_FORMAT_VERSION
+        self.baseline['workloads']['small']['params'] = {'numCourses' : 2}
+        self.assertEqual(EXIT_INCOMPARABLE, compare(self.baseline, self.measurement(1.0, 2.0), 0.2)[0])
+
+if __name__ == "__main__":
+    #import sys;sys.argv = ['', 'Test.test']
+    unittest.main()
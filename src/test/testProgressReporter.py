@@ -0,0 +1,123 @@
+# Copyright (c) 2014, Stanford University
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification, are permitted provided that the following conditions are met:
+# 1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following disclaimer in the documentation and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote products derived from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+'''
+Created on Oct 19, 2026
+
+@author: paepcke
+'''
+import json
+import os
+import tempfile
+import unittest
+
+from src.progressReporter import ProgressReporter
+
+
+class CountingDb(object):
+    '''
+    Answers the reporter's estimate queries.
+    '''
+    def __init__(self):
+        self.queries = []
+
+    def query(self, queryStr):
+        self.queries.append(queryStr)
+        if 'information_schema' in queryStr:
+            return iter([(5000,)])
+        if 'EventXtract' in queryStr:
+            return iter([('Eng/CS1/F13', 900), ('Eng/CS2/F13', 1000)])
+        return iter([('Eng/CS1/F13', 100)])
+
+
+class FailingDb(object):
+    '''
+    Refuses the estimate queries, like a user without
+    access to information_schema.
+    '''
+    def query(self, queryStr):
+        raise RuntimeError('SELECT command denied: %s' % queryStr)
+
+
+class Test(unittest.TestCase):
+
+    def setUp(self):
+        self.statusDir = tempfile.mkdtemp()
+        self.statusFile = os.path.join(self.statusDir, 'status.json')
+        self.messages = []
+
+    def tearDown(self):
+        for fileName in os.listdir(self.statusDir):
+            os.remove(os.path.join(self.statusDir, fileName))
+        os.rmdir(self.statusDir)
+
+    def readStatus(self):
+        with open(self.statusFile) as fd:
+            return json.load(fd)
+
+    def testGroupedEstimates(self):
+        reporter = ProgressReporter(interval=0, statusFile=self.statusFile, estimateMethod='grouped', log=self.messages.append)
+        reporter.start(CountingDb())
+        self.assertEqual({'Eng/CS1/F13' : 1000, 'Eng/CS2/F13' : 1000}, reporter.courseEstimates)
+        self.assertEqual('running', self.readStatus()['state'])
+        reporter.queryDone()
+        reporter.startCourse('Eng/CS1/F13', 1)
+        reporter.update(500)
+        status = self.readStatus()
+        self.assertEqual(2000, status['rowsEstimated'])
+        self.assertEqual(499, status['currentCourseRows'])
+        self.assertEqual(1000, status['currentCourseRowsEstimated'])
+        self.assertEqual(1, len(self.messages))
+        reporter.startCourse('Eng/CS2/F13', 1000)
+        reporter.finish(2000)
+        reporter.finish(2000, state='failed')
+        status = self.readStatus()
+        self.assertEqual('done', status['state'])
+        self.assertEqual(2, status['coursesDone'])
+        # Only the status file; no temporary leftovers:
+        self.assertEqual(['status.json'], os.listdir(self.statusDir))
+
+    def testTableStats(self):
+        db = CountingDb()
+        # The default for all courses:
+        reporter = ProgressReporter(statusFile=self.statusFile)
+        reporter.start(db)
+        self.assertEqual(1, len(db.queries))
+        self.assertTrue('information_schema' in db.queries[0])
+        self.assertEqual(5000, reporter.rowsEstimated)
+        self.assertEqual(None, self.readStatus()['courseEtaSecs'])
+        # Single courses are counted:
+        reporter = ProgressReporter(statusFile=self.statusFile)
+        reporter.start(db, 'Eng/CS1/F13')
+        self.assertTrue('GROUP BY' in db.queries[-1])
+        self.assertEqual(1000, reporter.courseEstimates['Eng/CS1/F13'])
+
+    def testGivenEstimates(self):
+        db = CountingDb()
+        reporter = ProgressReporter(interval=3600, estimates={'Eng/CS1/F13' : 10}, log=self.messages.append)
+        reporter.start(db)
+        reporter.update(5)
+        self.assertEqual([], db.queries)
+        self.assertEqual([], self.messages)
+
+    def testFailedEstimate(self):
+        for estimateMethod in ('tableStats', 'grouped'):
+            reporter = ProgressReporter(interval=0, statusFile=self.statusFile, estimateMethod=estimateMethod, log=self.messages.append)
+            reporter.start(FailingDb())
+            self.assertEqual((None, None), (reporter.rowsEstimated, reporter.courseEstimates))
+            self.assertTrue('without ETAs' in self.messages[-1])
+            reporter.startCourse('Eng/CS1/F13', 0)
+            reporter.update(10)
+            status = self.readStatus()
+            self.assertEqual(('running', None), (status['state'], status['runEtaSecs']))
+
+if __name__ == "__main__":
+    #import sys;sys.argv = ['', 'Test.test']
+    unittest.main()
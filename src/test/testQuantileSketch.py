@@ -0,0 +1,91 @@
+# Copyright (c) 2014, Stanford University
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification, are permitted provided that the following conditions are met:
+# 1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following disclaimer in the documentation and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote products derived from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+'''
+Created on Oct 19, 2026
+
+@author: paepcke
+'''
+import bisect
+import json
+import random
+import unittest
+
+from src.quantileSketch import KLLSketch, normalizedRankError
+
+
+class Test(unittest.TestCase):
+
+    FRACTIONS = (0.01, 0.1, 0.25, 0.5, 0.75, 0.9, 0.99)
+
+    def values(self, num, seed=0):
+        rand = random.Random(seed)
+        return [rand.lognormvariate(6, 1) for _ in range(num)]
+
+    def rankErrors(self, sketch, values):
+        sortedValues = sorted(values)
+        return [abs(bisect.bisect_right(sortedValues, value) / float(len(values)) - fraction)
+                for (fraction, value) in zip(self.FRACTIONS, sketch.quantiles(self.FRACTIONS))]
+
+    def testSmallIsExact(self):
+        sketch = KLLSketch()
+        for value in range(100, 0, -1):
+            sketch.update(value)
+        self.assertEqual(1, len(sketch.compactors))
+        self.assertEqual([1, 50, 100], sketch.quantiles([0, 0.5, 1]))
+        self.assertEqual(0.25, sketch.rank(25))
+        self.assertEqual([None], KLLSketch().quantiles([0.5]))
+
+    def testErrorBoundAndMemory(self):
+        values = self.values(50000)
+        sketch = KLLSketch()
+        for value in values:
+            sketch.update(value)
+        self.assertEqual(50000, sketch.count)
+        self.assertEqual(sum([weight for (_, weight) in sketch.weightedValues()]), sketch.count)
+        self.assertTrue(max(self.rankErrors(sketch, values)) <= normalizedRankError(sketch.k))
+        self.assertEqual([min(values), max(values)], sketch.quantiles([0, 1]))
+        # Fixed size: about 3k, plus one per level:
+        self.assertTrue(sketch.numRetained < 3 * sketch.k + len(sketch.compactors))
+        retained = sketch.numRetained
+        for value in self.values(50000, seed=1):
+            sketch.update(value)
+        self.assertTrue(sketch.numRetained < 3 * sketch.k + len(sketch.compactors))
+        self.assertTrue(sketch.numRetained < 2 * retained)
+
+    def testMerge(self):
+        values = self.values(30000)
+        sketches = [KLLSketch(seed=seed) for seed in range(3)]
+        for (i, value) in enumerate(values):
+            sketches[i % 3].update(value)
+        merged = KLLSketch()
+        for sketch in sketches:
+            merged.merge(sketch)
+        self.assertEqual(30000, merged.count)
+        self.assertEqual(10000, sketches[0].count)
+        self.assertTrue(max(self.rankErrors(merged, values)) <= normalizedRankError(merged.k))
+        self.assertTrue(merged.numRetained < merged.maxRetained)
+        self.assertRaises(ValueError, merged.merge, KLLSketch(k=100))
+
+    def testDeterministicAndSerializable(self):
+        (sketch, sameSeed) = (KLLSketch(seed=3), KLLSketch(seed=3))
+        for value in self.values(5000):
+            sketch.update(value)
+            sameSeed.update(value)
+        self.assertEqual(sketch.toDict(), sameSeed.toDict())
+        restored = KLLSketch.fromDict(json.loads(json.dumps(sketch.toDict())))
+        self.assertEqual(sketch.quantiles(self.FRACTIONS), restored.quantiles(self.FRACTIONS))
+        self.assertEqual(sketch.maxRetained, restored.maxRetained)
+        self.assertRaises(ValueError, KLLSketch, k=2)
+
+if __name__ == "__main__":
+    #import sys;sys.argv = ['', 'Test.test']
+    unittest.main()
@@ -0,0 +1,143 @@
+# Copyright (c) 2014, Stanford University
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification, are permitted provided that the following conditions are met:
+# 1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following disclaimer in the documentation and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote products derived from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+'''
+Created on Oct 19, 2026
+
+@author: paepcke
+'''
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from src.benchmark.syntheticEvents import SyntheticWorkload
+from src.engagement import EngagementComputer
+from src.eventSources import CsvEventSource
+from src.resultCache import ResultCache
+from src.sqliteStandIn import SQLiteDB, SQLiteDBFactory
+
+
+class Test(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.cache = ResultCache(os.path.join(self.directory, 'cache'), maxBytes=1000)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def makeFiles(self, name, numBytes):
+        paths = []
+        for part in ('summary', 'allData'):
+            path = os.path.join(self.directory, '%s_%s.csv' % (name, part))
+            with open(path, 'w') as fd:
+                fd.write('x' * numBytes)
+            paths.append(path)
+        return paths
+
+    def testPutGet(self):
+        key = self.cache.key(course='a', years=[2013])
+        self.assertEqual(key, self.cache.key(years=[2013], course='a'))
+        self.assertNotEqual(key, self.cache.key(course='a', years=[2014]))
+        self.assertEqual(None, self.cache.get(key))
+        paths = self.makeFiles('a', 10)
+        cachedPaths = self.cache.put(key, paths)
+        self.assertEqual(cachedPaths, self.cache.get(key))
+        self.assertEqual(['a_summary.csv', 'a_allData.csv'], [os.path.basename(path) for path in cachedPaths])
+        self.assertFalse(os.path.exists(paths[0]))
+        # Second put of the same key keeps the first entry:
+        self.assertEqual(cachedPaths, self.cache.put(key, self.makeFiles('a', 20)))
+        self.assertEqual(20, self.cache.totalBytes())
+
+    def testIncompleteEntryReplaced(self):
+        key = self.cache.key(course='a')
+        # Left behind by a crash, or by a concurrent remove():
+        os.makedirs(self.cache.entryDir(key))
+        with open(os.path.join(self.cache.entryDir(key), 'a_summary.csv'), 'w') as fd:
+            fd.write('partial')
+        self.assertEqual(None, self.cache.get(key))
+        cachedPaths = self.cache.put(key, self.makeFiles('a', 20))
+        self.assertEqual(cachedPaths, self.cache.get(key))
+        self.assertEqual([key], [entryKey for (_, _, entryKey) in self.cache.entries()])
+        self.assertEqual([key], os.listdir(self.cache.directory))
+
+    def testLruEviction(self):
+        keys = [self.cache.key(course=name) for name in ('a', 'b', 'c')]
+        for (age, key, name) in zip((30, 20, 10), keys, ('a', 'b', 'c')):
+            self.cache.put(key, self.makeFiles(name, 150))
+            # Distinct last-use times, 'a' the oldest:
+            lastUsed = time.time() - age
+            os.utime(os.path.join(self.cache.entryDir(key), 'entry.json'), (lastUsed, lastUsed))
+        self.assertEqual(900, self.cache.totalBytes())
+        # Using 'a' makes 'b' the least recently used:
+        self.cache.get(keys[0])
+        self.cache.put(self.cache.key(course='d'), self.makeFiles('d', 150))
+        self.assertEqual(None, self.cache.get(keys[1]))
+        self.assertNotEqual(None, self.cache.get(keys[0]))
+        self.assertEqual(900, self.cache.totalBytes())
+        # An entry bigger than the cache still is kept:
+        bigKey = self.cache.key(course='big')
+        self.cache.put(bigKey, self.makeFiles('big', 2000))
+        self.assertNotEqual(None, self.cache.get(bigKey))
+        self.assertEqual([bigKey], [key for (_, _, key) in self.cache.entries()])
+
+    def testCachedResults(self):
+        csvPath = os.path.join(self.directory, 'events.csv')
+        workload = SyntheticWorkload(numCourses=1, learnersPerCourse=5, eventsPerLearner=20)
+        with open(csvPath, 'w') as fd:
+            fd.write('course_display_name,anon_screen_name,time,isVideo\n')
+            for event in workload.events():
+                fd.write('%s,%s,%s,%d\n' % event)
+        cache = ResultCache(os.path.join(self.directory, 'results'))
+        runs = []
+        def newComputer():
+            comp = EngagementComputer(mySQLUser='test', mySQLPwd='', eventSource=CsvEventSource(csvPath),
+                                      courseRuntimes=workload.courseRuntimes())
+            comp.log = lambda msg: None
+            untimedRun = comp.run
+            comp.run = lambda: runs.append(1) or untimedRun()
+            return comp
+        firstPaths = newComputer().cachedResults(cache)
+        self.assertEqual(1, len(runs))
+        self.assertEqual(firstPaths, newComputer().cachedResults(cache))
+        self.assertEqual(1, len(runs))
+        self.assertTrue(os.path.getsize(firstPaths[1]) > 0)
+        # New events change the watermark:
+        with open(csvPath, 'a') as fd:
+            fd.write('Synthetic/C999/Fall2013,learner,2013-09-03 10:00:00,0\n')
+        self.assertNotEqual(firstPaths, newComputer().cachedResults(cache))
+        self.assertEqual(2, len(runs))
+
+    def testDatabaseWatermark(self):
+        dbDir = os.path.join(self.directory, 'db')
+        os.mkdir(dbDir)
+        db = SQLiteDB(dbDir)
+        db.loadWorkload(SyntheticWorkload(numCourses=2, learnersPerCourse=3, eventsPerLearner=5))
+        db.close()
+        def watermark(courseName):
+            comp = EngagementComputer(mySQLUser='test', mySQLPwd='', courseToProfile=courseName, dbFactory=SQLiteDBFactory(dbDir))
+            try:
+                return comp.dataWatermark()
+            finally:
+                comp.closeDb()
+        before = watermark('Synthetic/C000/Fall2013')
+        beforeAll = watermark(None)
+        self.assertEqual(before, watermark('Synthetic/C000/Fall2013'))
+        db = SQLiteDB(dbDir)
+        db.execute("INSERT INTO Edx.EventXtract VALUES ('Synthetic/C001/Fall2013', 'learner', 'page_close', '2013-12-01 10:00:00')")
+        db.close()
+        self.assertEqual(before, watermark('Synthetic/C000/Fall2013'))
+        self.assertNotEqual(beforeAll, watermark(None))
+
+if __name__ == "__main__":
+    #import sys;sys.argv = ['', 'Test.test']
+    unittest.main()
@@ -0,0 +1,67 @@
+# Copyright (c) 2014, Stanford University
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification, are permitted provided that the following conditions are met:
+# 1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following disclaimer in the documentation and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote products derived from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+'''
+Created on Oct 19, 2026
+
+@author: paepcke
+'''
+import datetime
+import os
+import shutil
+import tempfile
+import unittest
+
+from src.sessionArchive import writeSessionArchive, SessionArchive
+
+
+class ComputedResults(object):
+    '''
+    The session attributes of an EngagementComputer
+    after run(), without the database.
+    '''
+    def __init__(self):
+        self.allStudentsDicts = {'Eng/CS2/F13' : {'s2' : [(datetime.datetime(2013,9,9,10,0), 600.0, 4)],
+                                                  's1' : [(datetime.datetime(2013,9,3,11,0), 120.0, 2)]},
+                                 'Eng/CS1/F13' : {'s2' : [(datetime.datetime(2013,9,4,11,0), 60.0, 1),
+                                                          (datetime.datetime(2013,9,2,8,0), 180.0, 3)]}}
+        self.courseSessionColumns = {}
+
+
+class Test(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpDir = tempfile.mkdtemp()
+        self.basePath = os.path.join(self.tmpDir, 'archive')
+        writeSessionArchive(ComputedResults(), self.basePath)
+        self.archive = SessionArchive(self.basePath)
+
+    def tearDown(self):
+        self.archive.close()
+        shutil.rmtree(self.tmpDir)
+
+    def testLookup(self):
+        # Sorted by session start:
+        self.assertEqual([(datetime.datetime(2013,9,2,8,0), 180.0, 3),
+                          (datetime.datetime(2013,9,4,11,0), 60.0, 1)],
+                         self.archive.lookup('Eng/CS1/F13', 's2'))
+        self.assertEqual([(datetime.datetime(2013,9,9,10,0), 600.0, 4)],
+                         self.archive.lookup('Eng/CS2/F13', 's2'))
+        self.assertEqual([(datetime.datetime(2013,9,3,11,0), 120.0, 2)],
+                         self.archive.lookup('Eng/CS2/F13', 's1'))
+
+    def testMissing(self):
+        self.assertEqual([], self.archive.lookup('Eng/CS1/F13', 's1'))
+        self.assertEqual([], self.archive.lookup('Eng/CS9/F13', 's2'))
+        self.assertEqual([], self.archive.lookup('Eng/CS1/F13', 'nobody'))
+
+if __name__ == "__main__":
+    #import sys;sys.argv = ['', 'Test.test']
+    unittest.main()
@@ -0,0 +1,138 @@
+# Copyright (c) 2014, Stanford University
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification, are permitted provided that the following conditions are met:
+# 1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following disclaimer in the documentation and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote products derived from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+'''
+Created on Oct 19, 2026
+
+@author: paepcke
+'''
+import datetime
+import glob
+import os
+import pickle
+import unittest
+
+from src.benchmark.syntheticEvents import SyntheticWorkload, SyntheticEventSource
+from src.engagement import EngagementComputer
+from src.engagementResult import CourseEngagementResult
+from src.parallelEngagement import ParallelEngagementRunner
+from src.sessionColumns import SessionColumns
+from src.sharedResults import SHM_DIR, SharedSegment, newRunPrefix, unlinkAll, \
+    exportSessions, attachSessions, exportWeeklyEffort, attachWeeklyEffort
+
+
+class Test(unittest.TestCase):
+
+    def setUp(self):
+        self.prefix = newRunPrefix()
+        self.sessions = {'s1' : [(datetime.datetime(2013,9,2,10,5), 600.0, 4),
+                                 (datetime.datetime(2013,9,9,17,0), 60.0, 1)],
+                         's2' : [(0, 60.0, 1),
+                                 (datetime.datetime(2013,9,3,8,30,15), 1860.0, 12)]}
+        self.weeklyEffort = {'s1' : [[0, 600.0], [1, 60.0]],
+                             's2' : [[0, 1860.0]]}
+
+    def tearDown(self):
+        unlinkAll(self.prefix)
+
+    def testSessionColumnsRoundTrip(self):
+        columns = SessionColumns.fromSessionsDict(self.sessions)
+        # The session that never got a start time is dropped:
+        self.assertEqual(3, len(columns))
+        expected = dict(self.sessions)
+        expected['s2'] = expected['s2'][1:]
+        self.assertEqual(expected, columns.toSessionsDict())
+
+    def testSessionColumnsFromLists(self):
+        # Sessions as lists, and fractions of seconds, which are dropped:
+        sessions = {'s1' : [[datetime.datetime(2013,9,2,10,5,0,700000), 600.0, 4]], 's2' : []}
+        columns = SessionColumns.fromSessionsDict(sessions)
+        self.assertEqual({'s1' : [(datetime.datetime(2013,9,2,10,5), 600.0, 4)]}, columns.toSessionsDict())
+
+    def testSessionHandOff(self):
+        handle = exportSessions(self.prefix + '_sessions', self.sessions)
+        # Only the handle crosses the process boundary:
+        handle = pickle.loads(pickle.dumps(handle))
+        (segment, columns) = attachSessions(handle)
+        self.assertEqual(3, len(columns))
+        self.assertEqual(datetime.datetime(2013,9,3,8,30,15),
+                         columns.toSessionsDict()['s2'][0][0])
+        segment.unlink()
+        self.assertEqual([], glob.glob(os.path.join(SHM_DIR, self.prefix + '*')))
+        # Still mapped after unlinking:
+        self.assertEqual(1860.0, columns.sessionSecs.max())
+
+    def testWeeklyEffortHandOff(self):
+        handle = exportWeeklyEffort(self.prefix + '_effort', self.weeklyEffort)
+        (segment, columns) = attachWeeklyEffort(handle)
+        self.assertEqual(self.weeklyEffort, columns.toWeeklyEffortDict())
+        segment.unlink()
+
+    def testAttachedWeeklyEffortIsRead(self):
+        handle = exportWeeklyEffort(self.prefix + '_effort', self.weeklyEffort)
+        (segment, columns) = attachWeeklyEffort(handle)
+        segment.unlink()
+        comp = EngagementComputer(mySQLUser='test', mySQLPwd='', db=object())
+        comp.addCourseResult(CourseEngagementResult('Engineering/CS101/Fall2013', activeLearners=['s1', 's2']))
+        comp.addCourseWeeklyEffort('Engineering/CS101/Fall2013', columns)
+        expected = sorted([('Engineering/CS101/Fall2013', student, weekNum + 1, effortSecs)
+                           for (student, pairs) in self.weeklyEffort.items()
+                           for (weekNum, effortSecs) in pairs])
+        self.assertEqual(expected, sorted(comp.iterWeeklyEffort()))
+        self.assertEqual(sorted([row[2] for row in expected]), sorted(comp.weeklyEffortArray()['week']))
+        (summaryPath, allDataPath, weeklyEffortPath) = comp.writeResultsToDisk()
+        with open(weeklyEffortPath) as fd:
+            lines = fd.readlines()[1:]
+        for path in (summaryPath, allDataPath, weeklyEffortPath):
+            os.remove(path)
+        self.assertEqual(sorted(['OpenEdX,%s,%s,%d,%d\n' % row for row in expected]), sorted(lines))
+
+    def testEmptyCourse(self):
+        handle = exportSessions(self.prefix + '_empty', {})
+        (segment, columns) = attachSessions(handle)
+        self.assertEqual(0, len(columns))
+        segment.unlink()
+
+    def testCleanupOnFailure(self):
+        try:
+            with SharedSegment.create(self.prefix + '_failed') as segment:
+                segment.newArray('sessionSecs', float, 10)
+                raise RuntimeError('worker failed')
+        except RuntimeError:
+            pass
+        self.assertEqual([], glob.glob(os.path.join(SHM_DIR, self.prefix + '*')))
+
+    def testParallelMatchesSerial(self):
+        workload = SyntheticWorkload(numCourses=3, learnersPerCourse=15, eventsPerLearner=40)
+        engineKwargs = {'mySQLUser' : 'test', 'mySQLPwd' : '',
+                        'eventSource' : SyntheticEventSource(workload),
+                        'courseRuntimes' : workload.courseRuntimes()}
+        serial = EngagementComputer(**engineKwargs)
+        serial.log = lambda msg: None
+        serial.run()
+        parallel = EngagementComputer(**engineKwargs)
+        parallel.log = lambda msg: None
+        ParallelEngagementRunner(workload.courseNames(), numWorkers=2, **engineKwargs).run(parallel)
+        self.assertEqual(serial.classStats, parallel.classStats)
+        outputs = []
+        for comp in (serial, parallel):
+            paths = comp.writeResultsToDisk()
+            contents = []
+            for path in paths:
+                with open(path) as fd:
+                    contents.append(sorted(fd.readlines()))
+                os.remove(path)
+            outputs.append(contents)
+        self.assertEqual(outputs[0], outputs[1])
+        self.assertEqual(3, len(outputs[0][0]) - 1)
+
+if __name__ == "__main__":
+    #import sys;sys.argv = ['', 'Test.test']
+    unittest.main()
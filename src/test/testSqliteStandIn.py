@@ -0,0 +1,71 @@
+# Copyright (c) 2014, Stanford University
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification, are permitted provided that the following conditions are met:
+# 1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following disclaimer in the documentation and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote products derived from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+'''
+Created on Oct 19, 2026
+
+@author: paepcke
+'''
+import datetime
+import shutil
+import tempfile
+import unittest
+
+from src.benchmark.syntheticEvents import SyntheticWorkload
+from src.eventSources import buildEventQuery
+from src.sqliteStandIn import SQLiteDB, SQLiteDBFactory, toSQLiteSyntax
+
+
+USER_EVENTS = ['play_video', 'pause_video', 'seek_video', 'load_video', 'speed_change_video',
+               'problem_check', 'seq_goto', 'seq_next', 'problem_show', 'page_close']
+
+
+class Test(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.workload = SyntheticWorkload(numCourses=2, learnersPerCourse=10, eventsPerLearner=20)
+        db = SQLiteDB(self.directory, userEventTypes=USER_EVENTS)
+        db.loadWorkload(self.workload, forumFraction=0.2)
+        db.close()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def testRewrite(self):
+        self.assertEqual("SELECT mysqlIf(a = 1,1,0), mysqlRight(e, 254), idForum2Anon(u) FROM t WHERE c > 'O''Brien'",
+                         toSQLiteSyntax("SELECT IF(a = 1,1,0), right(e, 254), EdxPrivate.idForum2Anon(u) FROM t WHERE c > 'O\\'Brien'"))
+
+    def testEventQuery(self):
+        db = SQLiteDB(self.directory, userEventTypes=USER_EVENTS)
+        try:
+            # Forum posts and non-user events are gone, and
+            # the rows are those of the workload:
+            self.assertEqual(list(self.workload.events()),
+                             [(course, student, eventTime, isVideo) for (course, student, eventTime, isVideo)
+                              in db.query(buildEventQuery())])
+            courseNames = self.workload.courseNames()
+            self.assertTrue(all([row[0] == courseNames[1] for row in db.query(buildEventQuery(afterCourse=courseNames[0]))]))
+        finally:
+            db.close()
+
+    def testCourseInfo(self):
+        db = SQLiteDBFactory(self.directory)(host='localhost', user='nobody', passwd='', db='Edx')
+        try:
+            courseName = self.workload.courseNames()[0]
+            rows = list(db.query("SELECT start_date, end_date FROM Edx.CourseInfo WHERE course_display_name = '%s';" % courseName))
+            self.assertEqual([self.workload.courseRuntimes()[courseName]], rows)
+            self.assertTrue(isinstance(rows[0][0], datetime.datetime))
+        finally:
+            db.close()
+
+if __name__ == "__main__":
+    #import sys;sys.argv = ['', 'Test.test']
+    unittest.main()
@@ -0,0 +1,119 @@
+# Copyright (c) 2014, Stanford University
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification, are permitted provided that the following conditions are met:
+# 1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following disclaimer in the documentation and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote products derived from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+'''
+Created on Oct 19, 2026
+
+@author: paepcke
+'''
+import shutil
+import tempfile
+import unittest
+
+from src.benchmark.syntheticEvents import SyntheticWorkload, SyntheticEventSource
+from src.engagement import EngagementComputer
+from src.eventSources import buildEventQuery
+from src.sqliteStandIn import SQLiteDB, SQLiteDBFactory
+from src.studentSampling import StudentSample, SampledEventSource, bucketProportionIntervals, BUCKET_NAMES
+
+
+class Test(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.workload = SyntheticWorkload(numCourses=2, learnersPerCourse=200, eventsPerLearner=20)
+        self.students = set([row[1] for row in self.workload.events()])
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def testDeterministicAndNested(self):
+        half = set([student for student in self.students if StudentSample(0.5).contains(student)])
+        self.assertEqual(half, set([student for student in self.students if StudentSample(0.5).contains(student)]))
+        self.assertTrue(0.4 < len(half) / float(len(self.students)) < 0.6)
+        tenth = set([student for student in self.students if StudentSample(0.1).contains(student)])
+        self.assertTrue(tenth < half)
+        salted = set([student for student in self.students if StudentSample(0.5, salt='x').contains(student)])
+        self.assertNotEqual(half, salted)
+        self.assertFalse(StudentSample(1.0).contains(None))
+        self.assertTrue(all([StudentSample(1.0).contains(student) for student in self.students]))
+        self.assertRaises(ValueError, StudentSample, 0)
+        self.assertRaises(ValueError, StudentSample, 0.00001)
+        self.assertEqual(0.1234, StudentSample(0.12341).fraction)
+
+    def testSqlMatchesPython(self):
+        db = SQLiteDB(self.directory)
+        db.loadWorkload(self.workload, forumFraction=0.2)
+        try:
+            allRows = list(db.query(buildEventQuery()))
+            for sample in (StudentSample(0.3), StudentSample(0.3, salt="it's")):
+                self.assertEqual([row for row in allRows if sample.contains(row[1])],
+                                 list(db.query(buildEventQuery(sample=sample))))
+            courseName = self.workload.courseNames()[1]
+            self.assertEqual([row for row in allRows if row[0] == courseName and sample.contains(row[1])],
+                             list(db.query(buildEventQuery(courseName, sample=sample))))
+        finally:
+            db.close()
+
+    def testSampledEventSource(self):
+        sample = StudentSample(0.25)
+        rows = [row for batch in SampledEventSource(SyntheticEventSource(self.workload), sample).batches() for row in batch]
+        self.assertEqual([row for row in self.workload.events() if sample.contains(row[1])], rows)
+
+    def testBootstrapIntervals(self):
+        counts = [[3, 1, 0]] * 50 + [[0, 2, 2]] * 50
+        intervals = bucketProportionIntervals(counts, numResamples=500)
+        self.assertEqual(set(BUCKET_NAMES), set(intervals.keys()))
+        (proportion, lower, upper) = intervals['oneToTwentyMin']
+        self.assertAlmostEqual(150 / 400.0, proportion)
+        self.assertTrue(lower < proportion < upper)
+        self.assertTrue(upper - lower < 0.25)
+        self.assertEqual(intervals, bucketProportionIntervals(counts, numResamples=500))
+        self.assertEqual({}, bucketProportionIntervals([]))
+
+    def testSampledRun(self):
+        comps = []
+        for sampleFraction in (None, 0.5):
+            comp = EngagementComputer(mySQLUser='test', mySQLPwd='',
+                                      eventSource=SyntheticEventSource(self.workload),
+                                      courseRuntimes=self.workload.courseRuntimes(),
+                                      sampleFraction=sampleFraction)
+            comp.log = lambda msg: None
+            comp.run()
+            comps.append(comp)
+        (full, sampled) = comps
+        sample = StudentSample(0.5)
+        for courseName in self.workload.courseNames():
+            courseResult = sampled.courseResults[courseName]
+            self.assertEqual(0.5, courseResult.sampleFraction)
+            self.assertTrue(all([sample.contains(student) for student in courseResult.weeklyEffort.keys()]))
+            # Scaled up, estimates are near the full numbers:
+            self.assertEqual(2 * courseResult.numActiveLearners, courseResult.statsTuple()[0])
+            self.assertTrue(abs(courseResult.statsTuple()[1] - full.classStats[courseName][1]) < 0.2 * full.classStats[courseName][1])
+            self.assertEqual(set(BUCKET_NAMES), set(sampled.bucketIntervals[courseName].keys()))
+        self.assertEqual({}, full.bucketIntervals)
+
+    def testSampledDatabaseRun(self):
+        db = SQLiteDB(self.directory)
+        db.loadWorkload(self.workload, forumFraction=0.2)
+        db.close()
+        comp = EngagementComputer(mySQLUser='test', mySQLPwd='',
+                                  dbFactory=SQLiteDBFactory(self.directory),
+                                  sampleFraction=0.2)
+        comp.log = lambda msg: None
+        comp.run()
+        sample = StudentSample(0.2)
+        students = set([row[1] for row in comp.iterSessions() if row[1] is not None])
+        self.assertTrue(len(students) > 0)
+        self.assertTrue(all([sample.contains(student) for student in students]))
+
+if __name__ == "__main__":
+    #import sys;sys.argv = ['', 'Test.test']
+    unittest.main()
@@ -0,0 +1,62 @@
+# Copyright (c) 2014, Stanford University
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification, are permitted provided that the following conditions are met:
+# 1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following disclaimer in the documentation and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote products derived from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+'''
+Created on Oct 19, 2026
+
+@author: paepcke
+'''
+import unittest
+
+from src.benchmark.syntheticEvents import SyntheticWorkload, SyntheticEventSource
+
+
+class Test(unittest.TestCase):
+
+    def testShapeAndOrder(self):
+        workload = SyntheticWorkload(numCourses=3, learnersPerCourse=20, eventsPerLearner=15)
+        events = list(workload.events())
+        self.assertEqual(workload.numEvents, len(events))
+        self.assertEqual(3 * 20 * 15, len(events))
+        # Same order as the main query's ORDER BY:
+        self.assertEqual(sorted(events, key=lambda event: event[:3]), events)
+        self.assertEqual(set(workload.courseNames()), set(workload.courseRuntimes().keys()))
+
+    def testDeterministic(self):
+        self.assertEqual(list(SyntheticWorkload(seed=7).events()),
+                         list(SyntheticWorkload(seed=7).events()))
+        self.assertNotEqual(list(SyntheticWorkload(seed=7).events()),
+                            list(SyntheticWorkload(seed=8).events()))
+
+    def testVideoFraction(self):
+        events = list(SyntheticWorkload(learnersPerCourse=50, videoFraction=0.25).events())
+        fraction = sum([event[3] for event in events]) / float(len(events))
+        self.assertTrue(0.2 < fraction < 0.3)
+
+    def testGapDistributions(self):
+        for gapDistribution in ('exponential', 'lognormal'):
+            events = list(SyntheticWorkload(numCourses=1, learnersPerCourse=2,
+                                            gapDistribution=gapDistribution).events())
+            self.assertEqual(100, len(events))
+        self.assertRaises(ValueError, SyntheticWorkload, gapDistribution='uniform')
+
+    def testEventSource(self):
+        workload = SyntheticWorkload(numCourses=3, learnersPerCourse=5, eventsPerLearner=4)
+        (first, second, third) = workload.courseNames()
+        source = SyntheticEventSource(workload)
+        self.assertEqual(list(workload.events()), [row for batch in source.batches() for row in batch])
+        self.assertEqual([second, third], [batch[0][0] for batch in source.batches(afterCourse=first)])
+        self.assertEqual([second], [batch[0][0] for batch in source.batches(courseToProfile=second)])
+        self.assertEqual(workload.courseRuntimes()[third], source.courseRuntime(third))
+        self.assertEqual(None, source.courseRuntime('Other/Course/Fall2013'))
+
+if __name__ == "__main__":
+    #import sys;sys.argv = ['', 'Test.test']
+    unittest.main()